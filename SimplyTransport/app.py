@@ -9,25 +9,40 @@ from SimplyTransport.lib.db import services as db_services
 from .cli import CLIPlugin
 from .controllers import create_api_router, create_views_router
 from .lib import settings
-from .lib.cache import provide_redis_service, redis_service_cache_config_factory, redis_store_factory
+from .lib.cache import (
+    provide_redis_service,
+    redis_service_cache_config_factory,
+    redis_store_factory,
+    release_response_cache_lease,
+    start_response_cache_tier,
+    stop_response_cache_tier,
+)
 from .lib.compression import compression_config
 from .lib.db.database import sqlalchemy_plugin
 from .lib.logging.logging import logging_setup, logging_shutdown
 from .lib.openapi.openapiconfig import custom_open_api_config
 from .lib.opentelemetry import open_telemetry_plugin
 from .lib.parameters.limitoffset import provide_limit_offset_pagination
+from .lib.response_cache_refresh import request_scope_middleware
 from .lib.static_files import create_static_router
 from .lib.template_engine import custom_template_config
+from .lib.timetable_snapshot import load_timetable_snapshots
 
 
 def create_app() -> Litestar:
     return Litestar(
         debug=settings.app.DEBUG,
         route_handlers=[create_views_router(), create_api_router(), create_static_router()],
-        on_startup=[db_services.create_database_tables, logging_setup],
-        on_shutdown=[logging_shutdown],
+        on_startup=[
+            db_services.create_database_tables,
+            logging_setup,
+            load_timetable_snapshots,
+            start_response_cache_tier,
+        ],
+        on_shutdown=[stop_response_cache_tier, logging_shutdown],
         plugins=[sqlalchemy_plugin, CLIPlugin(), open_telemetry_plugin],
         stores=StoreRegistry(default_factory=redis_store_factory),
+        middleware=[request_scope_middleware],
         openapi_config=custom_open_api_config(),
         template_config=custom_template_config(),
         compression_config=compression_config,
@@ -37,6 +52,7 @@ def create_app() -> Litestar:
             "redis_service": Provide(provide_redis_service),
         },
         response_cache_config=redis_service_cache_config_factory(),
+        after_response=release_response_cache_lease,
         exception_handlers={404: exception_handlers.handle_404, 500: exception_handlers.exception_handler},
     )
 
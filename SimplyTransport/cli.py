@@ -2,11 +2,15 @@ import asyncio
 import functools
 import json
 import os
+import signal
 import time
+import tracemalloc
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import click
 import geojson
+import httpx
 import rich.progress as rp
 from litestar import Litestar
 from litestar.plugins import CLIPluginProtocol
@@ -16,24 +20,39 @@ from rich.table import Table
 import SimplyTransport.lib.gtfs_importers as imp
 from SimplyTransport.lib.db import services as db_services
 
+from .domain.calendar_dates.repo import CalendarDateRepository
+from .domain.enums import DayOfWeek
 from .domain.events.event_types import EventType
 from .domain.events.repo import create_event_with_session, provide_event_repo
+from .domain.maps.payload_store import precompute_static_map_payloads, precompute_stop_layer_payloads
+from .domain.realtime.realtime_schedule.overlay_store import RealtimeOverlayStore
+from .domain.route_stop.repo import refresh_route_stops
+from .domain.schedule.repo import ScheduleRepository
+from .domain.services.schedule_service import ScheduleService
 from .domain.services.statistics_service import provide_statistics_service
+from .domain.stop_route.repo import refresh_stop_routes
+from .lib import gtfs_diff, gtfs_realtime_feed, timetable_snapshot
+from .lib import realtime_daemon as realtime_daemon_mod
 from .lib import settings as lib_settings
 from .lib.cache import provide_redis_service
-from .lib.cache_keys import CacheKeys
+from .lib.cache_keys import CacheKeys, cache_tag
 from .lib.concurrency import concurrency, release_lock, skip_if_lock_held, try_acquire_lock
+from .lib.db import shadow_tables
 from .lib.db.database import async_session_factory
 from .lib.db.timescale_database import async_timescale_session_factory
 from .lib.gtfs_realtime_importers import (
+    FeedFetchOutcome,
+    FeedStateStore,
     RealTimeImporter,
     RealTimeVehiclesImporter,
     asyncio_gather_imports,
     progress_columns,
+    realtime_lock_name,
 )
 from .lib.logging.logging import provide_logger
 from .lib.realtime_seed_time_shift import shift_db_stop_times_and_patch_payload_for_now
 from .lib.stop_features_importer import StopFeaturesImporter
+from .lib.timetable_engine import provide_timetable_engine
 from .lib.tracing import cli_command_span, cli_span_name, get_app_tracer
 from .timescale.services.delays_service import provide_delays_service
 
@@ -42,6 +61,17 @@ DEFAULT_GTFS_DIRECTORY = "./gtfs_data/TFI/"
 # Redis CLI mutex: static GTFS import vs realtime / delays jobs
 _CLI_LOCK_GTFS_STATIC_IMPORT = "gtfs_static_import"
 _CLI_LOCK_GTFS_STATIC_IMPORT_TTL_S = 4 * 60 * 60
+_CLI_LOCK_GTFS_STATIC_SWAP_TTL_S = 10 * 60
+# Redis CLI mutex: one importgtfs run at a time, whatever the mode
+_CLI_LOCK_GTFS_STATIC_RUN = "gtfs_static_run"
+
+GTFS_IMPORT_MODES = ("replace", "staged", "diff")
+
+spinner_columns = (
+    rp.SpinnerColumn(finished_text="✅"),
+    "[progress.description]{task.description}",
+    rp.TimeElapsedColumn(),
+)
 
 logger = provide_logger(__name__)
 
@@ -60,9 +90,21 @@ def gtfs_directory_validator(directory: str | None, console: Console):
     return directory
 
 
+def gtfs_source_validator(source: str | None, console: Console):
+    """Like :func:`gtfs_directory_validator`, but also accepts the path of a zipped GTFS feed."""
+
+    if source and imp.is_gtfs_archive(source):
+        print("Using archive: " + source)
+        return source
+    return gtfs_directory_validator(source, console)
+
+
 def gtfs_dataset_label_from_import_dir(import_dir: str) -> str:
     """Dataset tag stored on GTFS rows: the folder name that holds the .txt files (e.g. .../TFI -> TFI)."""
 
+    if imp.is_gtfs_archive(import_dir):
+        # The folder holding the archive, e.g. .../TFI/GTFS_Realtime.zip -> TFI
+        return Path(import_dir).resolve().parent.name
     return Path(import_dir).resolve().name
 
 
@@ -80,6 +122,22 @@ def make_sync(func):
     return wrapper
 
 
+def percentile_ms(samples: list[float], fraction: float) -> float:
+    """The ``fraction`` percentile of ``samples`` in seconds, as milliseconds"""
+
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+
+def realtime_import_lock(feed_name: str):
+    """``concurrency`` name for a realtime command, locking per dataset so other datasets can import"""
+
+    def lock_name(*args, dataset: str | None = None, **kwargs) -> str:
+        return realtime_lock_name(feed_name, dataset or lib_settings.app.GTFS_TFI_DATASET)
+
+    return lock_name
+
+
 class CLIPlugin(CLIPluginProtocol):
     def on_cli_init(self, cli: click.Group) -> None:
         @cli.command(name="settings", help="Prints the current settings of the app")
@@ -137,17 +195,76 @@ class CLIPlugin(CLIPluginProtocol):
                 console.print(table)
 
         @cli.command(name="importgtfs", help="Imports GTFS data into the database")
-        @click.option("-dir", help="Override the directory containing the GTFS data to import")
+        @click.option(
+            "-dir",
+            help="Override the directory containing the GTFS data to import, or the path of the GTFS zip",
+        )
+        @click.option(
+            "-dataset",
+            help="Override the dataset label, by default the folder holding the GTFS files or the zip",
+        )
+        @click.option(
+            "-loader",
+            type=click.Choice(imp.LOADERS),
+            default=imp.DEFAULT_LOADER,
+            show_default=True,
+            help="'copy' streams rows with PostgreSQL binary COPY, 'insert' uses the SQLAlchemy INSERT path",
+        )
+        @click.option(
+            "-mode",
+            type=click.Choice(GTFS_IMPORT_MODES),
+            default="replace",
+            show_default=True,
+            help=(
+                "'replace' clears and reloads each table in place, 'staged' loads unindexed shadow tables "
+                "and swaps them in with one transaction so readers never see a partial import, 'diff' only "
+                "rewrites the agencies, calendars, routes, stops, trips and shapes changed since the last "
+                "import"
+            ),
+        )
+        @click.option(
+            "-workers",
+            type=click.IntRange(min=1),
+            default=imp.DEFAULT_PARSE_WORKERS,
+            show_default=True,
+            help="Worker processes parsing large files for the 'copy' loader, 1 parses on the main process",
+        )
+        @click.option(
+            "-chunk-size",
+            type=click.IntRange(min=1),
+            default=imp.DEFAULT_PARSE_CHUNK_SIZE_MB,
+            show_default=True,
+            help="Size in MB of the byte ranges handed to each parsing worker",
+        )
+        @click.option(
+            "-connections",
+            type=click.IntRange(min=1),
+            default=imp.DEFAULT_CONNECTION_BUDGET,
+            show_default=True,
+            help="Database connections shared by the files being imported concurrently",
+        )
         @make_sync
-        async def importgtfs(dir: str):
+        async def importgtfs(
+            dir: str,
+            dataset: str | None,
+            loader: imp.Loader,
+            mode: str,
+            workers: int,
+            chunk_size: int,
+            connections: int,
+        ):
             """Imports GTFS data into the database"""
 
             console = Console()
             console.print("Importing GTFS data...")
 
-            dir = gtfs_directory_validator(dir, console)
+            dir = gtfs_source_validator(dir, console)
 
-            dataset = gtfs_dataset_label_from_import_dir(dir)
+            if mode == "staged" and loader != "copy":
+                console.print("[red]Error: staged imports require the 'copy' loader.")
+                return
+
+            dataset = dataset or gtfs_dataset_label_from_import_dir(dir)
             response = click.prompt(
                 f"\nYou are about to import this dataset and assign it to '{dataset}'. "
                 "Press 'y' to continue, anything else to abort: ",
@@ -159,15 +276,31 @@ class CLIPlugin(CLIPluginProtocol):
                 console.print("[red]Aborting import...")
                 return
 
-            lock = await try_acquire_lock(_CLI_LOCK_GTFS_STATIC_IMPORT, _CLI_LOCK_GTFS_STATIC_IMPORT_TTL_S)
-            if lock is None:
+            run_lock = await try_acquire_lock(_CLI_LOCK_GTFS_STATIC_RUN, _CLI_LOCK_GTFS_STATIC_IMPORT_TTL_S)
+            if run_lock is None:
                 console.print(
                     "[yellow]Another GTFS static import is already in progress (Redis lock held). Aborting."
                 )
                 return
-            lock_client, lock_token = lock
-
+            run_lock_client, run_lock_token = run_lock
+
+            # Realtime / delays jobs skip while this is held: the whole run when writing in place,
+            # only the final swap when staging
+            import_lock = None
+            staged_tables: list[str] = []
+            index_time_taken = swap_time_taken = 0.0
+            diffs: dict[str, gtfs_diff.EntityDiff] | None = None
+            entity_hashes: dict[gtfs_diff.EntityKey, int] = {}
+            affected = gtfs_diff.AffectedEntities()
             try:
+                if mode in ("replace", "diff"):
+                    import_lock = await try_acquire_lock(
+                        _CLI_LOCK_GTFS_STATIC_IMPORT, _CLI_LOCK_GTFS_STATIC_IMPORT_TTL_S
+                    )
+                    if import_lock is None:
+                        console.print("[yellow]GTFS static import lock is held. Aborting.")
+                        return
+
                 files_to_import = [
                     "agency.txt",
                     "calendar.txt",
@@ -183,106 +316,279 @@ class CLIPlugin(CLIPluginProtocol):
                 total_time_taken = 0.0
                 start = time.perf_counter()
 
-                for file in files_to_import:
-                    file_start = time.perf_counter()
-                    if not (os.path.exists(dir) and os.path.isfile(dir + file)):
-                        console.print(f"[red]Error: File '{file}' does not exist. Skipping...")
-                        attributes_of_total_rows[file.replace(".txt", "")] = {
-                            "time_taken(s)": 0,
-                            "row_count": 0,
-                            "error": f"File '{file}' does not exist.",
-                        }
-                        continue
-
-                    generic_importer = imp.GTFSImporter(file, dir)
-                    reader = generic_importer.get_reader()
-                    try:
-                        importer = imp.get_importer_for_file(file, reader, None, dataset)
-                    except ValueError:
+                if mode == "diff":
+                    present_files = [file for file in files_to_import if imp.GTFSImporter(file, dir).exists()]
+                    with rp.Progress(*spinner_columns) as progress:
+                        task = progress.add_task("[yellow]Hashing GTFS entities...", total=1)
+                        entity_hashes = gtfs_diff.hash_entities(
+                            (file, imp.GTFSImporter(file, dir).get_reader()) for file in present_files
+                        )
+                        progress.update(task, advance=1)
+                    async with async_session_factory() as db_session:
+                        previous_hashes = await gtfs_diff.load_entity_hashes(db_session, dataset)
+                    if previous_hashes:
+                        diffs = gtfs_diff.diff_entities(
+                            previous_hashes,
+                            entity_hashes,
+                            {gtfs_diff.ENTITY_SOURCES[file][0] for file in present_files},
+                        )
+                    else:
                         console.print(
-                            f"\n[red]Error: File '{file}' does not have a supported importer. Skipping..."
+                            "[yellow]No entity hashes recorded for this dataset, importing in full..."
                         )
-                        attributes_of_total_rows[file.replace(".txt", "")] = {
-                            "time_taken(s)": 0,
-                            "row_count": 0,
-                            "error": f"File '{file}' does not have a supported importer.",
-                        }
-                        continue
-
-                    with rp.Progress(
-                        rp.SpinnerColumn(finished_text="✅"),
-                        "[progress.description]{task.description}",
-                        rp.TimeElapsedColumn(),
-                    ) as progress:
-                        task = progress.add_task("[red]Clearing database table...", total=1)
-                        importer.clear_table()
+                else:
+                    # The tables are about to diverge from the recorded hashes, the next diff starts over
+                    async with async_session_factory() as db_session:
+                        await gtfs_diff.delete_entity_hashes(db_session, dataset)
+                        await db_session.commit()
+
+                if mode == "staged":
+                    staged_tables = [
+                        imp.table_for_file(file)
+                        for file in files_to_import
+                        if imp.GTFSImporter(file, dir).exists()
+                    ]
+                    with rp.Progress(*spinner_columns) as progress:
+                        task = progress.add_task("[yellow]Creating shadow tables...", total=1)
+                        await shadow_tables.create_shadow_tables(staged_tables, dataset)
                         progress.update(task, advance=1)
 
-                    await importer.import_data()
+                if diffs is not None:
+                    apply_start = time.perf_counter()
+                    with rp.Progress(*spinner_columns) as progress:
+                        task = progress.add_task("[yellow]Applying changed entities...", total=1)
+                        async with async_session_factory() as db_session:
+                            affected = await gtfs_diff.find_affected_entities(db_session, dataset, diffs)
+                            rows_written = await gtfs_diff.apply_entity_diff(db_session, dir, dataset, diffs)
+                            affected.update(
+                                await gtfs_diff.find_affected_entities(db_session, dataset, diffs)
+                            )
+                            await gtfs_diff.save_entity_hashes(db_session, dataset, entity_hashes, diffs)
+                            await db_session.commit()
+                        progress.update(task, advance=1)
+                    total_time_taken += round(time.perf_counter() - apply_start, 2)
+                    for entity_type, diff in diffs.items():
+                        console.print(
+                            f"[green]{entity_type}: {len(diff.inserted)} inserted, "
+                            f"{len(diff.updated)} updated, {len(diff.deleted)} deleted"
+                        )
+                    for file, row_count in rows_written.items():
+                        attributes_of_total_rows[file.replace(".txt", "")] = {"row_count": row_count}
+                else:
+                    importers: dict[str, imp.AsyncImporter] = {}
+                    for file in files_to_import:
+                        generic_importer = imp.GTFSImporter(file, dir)
+                        if not generic_importer.exists():
+                            console.print(f"[red]Error: File '{file}' does not exist. Skipping...")
+                            attributes_of_total_rows[file.replace(".txt", "")] = {
+                                "time_taken(s)": 0,
+                                "row_count": 0,
+                                "error": f"File '{file}' does not exist.",
+                            }
+                            continue
+
+                        reader = generic_importer.get_reader()
+                        try:
+                            importer = imp.get_importer_for_file(file, reader, None, dataset, loader)
+                        except ValueError:
+                            console.print(
+                                f"\n[red]Error: File '{file}' does not have a supported importer. Skipping..."
+                            )
+                            attributes_of_total_rows[file.replace(".txt", "")] = {
+                                "time_taken(s)": 0,
+                                "row_count": 0,
+                                "error": f"File '{file}' does not have a supported importer.",
+                            }
+                            continue
+
+                        importer.source = generic_importer
+                        # Byte ranges can only be read independently from an uncompressed file
+                        if workers > 1 and not generic_importer.is_archive:
+                            importer.parallel = imp.ParallelParse(
+                                dir + file, workers, chunk_size * 1024 * 1024
+                            )
+                        if mode == "staged":
+                            importer.table_name = shadow_tables.shadow_name(importer.table_name)
+                        importers[file] = importer
+
+                    if mode != "staged":
+                        # Cleared up front in FK order: imports of independent files overlap below
+                        with rp.Progress(*spinner_columns) as progress:
+                            task = progress.add_task("[red]Clearing database tables...", total=len(importers))
+                            for importer in importers.values():
+                                importer.clear_table()
+                                progress.update(task, advance=1)
+
+                    connection_budget = asyncio.Semaphore(connections)
+                    graph_start = time.perf_counter()
+                    with rp.Progress(*imp.progress_columns) as progress:
+
+                        async def import_file(file: str) -> None:
+                            importer = importers[file]
+                            importer.shared_progress = progress
+                            importer.connection_budget = connection_budget
+                            file_start = time.perf_counter()
+                            await importer.import_data()
+
+                            file_finish = time.perf_counter()
+                            time_taken = round(file_finish - file_start, 2)
+                            row_count = importer.rows_imported
+                            rows_per_second = imp.rows_per_second(row_count, file_finish - file_start)
+                            progress.console.print(
+                                f"[green]Imported {row_count} rows from {file} "
+                                f"({rows_per_second} rows/s via {loader})"
+                            )
+
+                            attributes_of_total_rows[file.replace(".txt", "")] = {
+                                "time_taken(s)": time_taken,
+                                "row_count": row_count,
+                                "rows_per_second": rows_per_second,
+                            }
+
+                        await imp.run_import_graph(
+                            {file: functools.partial(import_file, file) for file in importers}
+                        )
+                    total_time_taken += round(time.perf_counter() - graph_start, 2)
+
+                    if mode == "diff":
+                        async with async_session_factory() as db_session:
+                            await gtfs_diff.save_entity_hashes(db_session, dataset, entity_hashes)
+                            await db_session.commit()
+
+                if mode == "staged":
+                    index_start = time.perf_counter()
+                    with rp.Progress(*spinner_columns) as progress:
+                        task = progress.add_task("[yellow]Building indexes on shadow tables...", total=1)
+                        await shadow_tables.build_shadow_indexes(staged_tables)
+                        progress.update(task, advance=1)
+                    index_time_taken = round(time.perf_counter() - index_start, 2)
+                    total_time_taken += index_time_taken
 
-                    file_finish = time.perf_counter()
-                    time_taken = round(file_finish - file_start, 2)
-                    total_time_taken += time_taken
-                    row_count = importer.rows_imported
-                    console.print(f"[green]Imported {row_count} rows from {file}")
+                    import_lock = await try_acquire_lock(
+                        _CLI_LOCK_GTFS_STATIC_IMPORT, _CLI_LOCK_GTFS_STATIC_SWAP_TTL_S
+                    )
+                    if import_lock is None:
+                        console.print("[yellow]GTFS static import lock is held, shadow tables not swapped.")
+                        await shadow_tables.drop_shadow_tables(staged_tables)
+                        return
+                    swap_start = time.perf_counter()
+                    with rp.Progress(*spinner_columns) as progress:
+                        task = progress.add_task("[yellow]Swapping shadow tables in...", total=1)
+                        await shadow_tables.swap_shadow_tables(staged_tables)
+                        progress.update(task, advance=1)
+                    import_lock_client, import_lock_token = import_lock
+                    await release_lock(import_lock_client, _CLI_LOCK_GTFS_STATIC_IMPORT, import_lock_token)
+                    import_lock = None
+                    swap_time_taken = round(time.perf_counter() - swap_start, 2)
+                    total_time_taken += swap_time_taken
+                    console.print(
+                        f"[green]Indexed shadow tables in {index_time_taken}s, swapped in {swap_time_taken}s"
+                    )
 
-                    attributes_of_total_rows[file.replace(".txt", "")] = {
-                        "time_taken(s)": time_taken,
-                        "row_count": row_count,
-                    }
+                lookup_start = time.perf_counter()
+                with rp.Progress(*spinner_columns) as progress:
+                    task = progress.add_task("[yellow]Refreshing stop and route lookups...", total=1)
+                    async with async_session_factory() as db_session:
+                        await refresh_stop_routes(db_session, dataset)
+                        await refresh_route_stops(db_session, dataset)
+                        await db_session.commit()
+                    progress.update(task, advance=1)
+                lookup_time_taken = round(time.perf_counter() - lookup_start, 2)
+                total_time_taken += lookup_time_taken
+                console.print(f"[green]Refreshed stop and route lookups in {lookup_time_taken}s")
 
                 attributes = {
                     "dataset": dataset,
+                    "loader": loader,
+                    "mode": mode,
+                    "workers": workers,
+                    "connections": connections,
                     "totals": attributes_of_total_rows,
                     "total_time_taken(s)": round(total_time_taken, 2),
                 }
-
-                await create_event_with_session(
+                if mode == "staged":
+                    attributes["index_time_taken(s)"] = index_time_taken
+                    attributes["swap_time_taken(s)"] = swap_time_taken
+                if diffs is not None:
+                    attributes["diff"] = {entity_type: diff.summary() for entity_type, diff in diffs.items()}
+                    attributes["diff_size"] = sum(len(diff) for diff in diffs.values())
+
+                event = await create_event_with_session(
                     EventType.GTFS_DATABASE_UPDATED,
                     "GTFS static data updated with latest schedules",
                     attributes,
                 )
 
-                redis_service = await provide_redis_service()
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.StopMaps.STOP_MAP_DELETE_ALL_KEY_TEMPLATE
-                )
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.StopMaps.STOP_MAP_NEARBY_DELETE_ALL_KEY_TEMPLATE
-                )
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.RouteMaps.ROUTE_MAP_DELETE_ALL_KEY_TEMPLATE
-                )
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.Schedules.SCHEDULE_DELETE_ALL_KEY_TEMPLATE
-                )
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.StaticMaps.STATIC_MAP_AGENCY_ROUTE_DELETE_ALL_KEY_TEMPLATE
-                )
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.StaticMaps.STATIC_MAP_STOP_DELETE_ALL_KEY_TEMPLATE
+                snapshot_start = time.perf_counter()
+                with rp.Progress(*spinner_columns) as progress:
+                    task = progress.add_task("[yellow]Writing timetable snapshot...", total=1)
+                    async with async_session_factory() as db_session:
+                        snapshot_dir = await timetable_snapshot.export_snapshot(
+                            db_session, dataset, str(event.id)
+                        )
+                    progress.update(task, advance=1)
+                console.print(
+                    f"[green]Wrote timetable snapshot {snapshot_dir} in "
+                    f"{round(time.perf_counter() - snapshot_start, 2)}s"
                 )
-                await redis_service.delete_keys_by_pattern(CacheKeys.StopApi.DETAILED_DELETE_ALL_KEY_TEMPLATE)
-                await redis_service.delete_keys_by_pattern(
-                    CacheKeys.RealTime.REALTIME_ROUTE_DELETE_ALL_KEY_TEMPLATE
+
+                redis_service = await provide_redis_service()
+                if diffs is not None:
+                    keys_deleted = await gtfs_diff.invalidate_affected_keys(redis_service, affected)
+                    console.print(f"[green]Invalidated {keys_deleted} cached responses")
+                else:
+                    await redis_service.delete_keys_by_tag(
+                        cache_tag(CacheKeys.StopMaps.STOP_MAP_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.StopMaps.STOP_MAP_NEARBY_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.RouteMaps.ROUTE_MAP_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.Schedules.SCHEDULE_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.StaticMaps.STATIC_MAP_AGENCY_ROUTE_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.StaticMaps.STATIC_MAP_STOP_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.StopApi.DETAILED_DELETE_ALL_KEY_TEMPLATE),
+                        cache_tag(CacheKeys.RealTime.REALTIME_ROUTE_DELETE_ALL_KEY_TEMPLATE),
+                    )
+
+                payloads_start = time.perf_counter()
+                with rp.Progress(*spinner_columns) as progress:
+                    task = progress.add_task("[yellow]Precomputing static map payloads...", total=1)
+                    async with async_session_factory() as db_session:
+                        payload_count = await precompute_static_map_payloads(db_session, redis_service)
+                    progress.update(task, advance=1)
+                console.print(
+                    f"[green]Precomputed {payload_count} static map payloads in "
+                    f"{round(time.perf_counter() - payloads_start, 2)}s"
                 )
 
                 finish = time.perf_counter()
                 console.print(f"\n[blue]Finished import in {round(finish - start, 2)} second(s)")
+            except Exception:
+                if staged_tables:
+                    console.print("[red]Import failed, dropping shadow tables...")
+                    await shadow_tables.drop_shadow_tables(staged_tables)
+                raise
             finally:
-                await release_lock(lock_client, _CLI_LOCK_GTFS_STATIC_IMPORT, lock_token)
+                if import_lock is not None:
+                    import_lock_client, import_lock_token = import_lock
+                    await release_lock(import_lock_client, _CLI_LOCK_GTFS_STATIC_IMPORT, import_lock_token)
+                await release_lock(run_lock_client, _CLI_LOCK_GTFS_STATIC_RUN, run_lock_token)
 
         @cli.command(name="importrealtime", help="Imports GTFS realtime data into the database")
         @click.option("-url", help="Override the default URL for the GTFS realtime data")
         @click.option("-apikey", help="Override the default API key for the GTFS realtime data")
         @click.option("-dataset", help="Override the default dataset that the data will be saved against")
+        @click.option(
+            "-protobuf/-json",
+            "protobuf",
+            default=None,
+            help="Fetch the feed as protobuf instead of JSON, defaults to GTFS_TFI_REALTIME_PROTOBUF",
+        )
         @make_sync
         @skip_if_lock_held(
             _CLI_LOCK_GTFS_STATIC_IMPORT,
             skip_message="Skipped: GTFS static import is in progress",
         )
-        @concurrency(1)
-        async def importrealtime(url: str, apikey: str, dataset: str):
+        @concurrency(1, name=realtime_import_lock(RealTimeImporter.feed_name))
+        async def importrealtime(url: str, apikey: str, dataset: str, protobuf: bool | None):
             """Imports GTFS realtime data into the database"""
 
             start: float = time.perf_counter()
@@ -309,30 +615,55 @@ class CLIPlugin(CLIPluginProtocol):
             else:
                 realtime_dataset = settings.app.GTFS_TFI_DATASET
 
-            importer = RealTimeImporter(url=realtime_url, api_key=realtime_apikey, dataset=realtime_dataset)
+            if protobuf is None:
+                protobuf = settings.app.GTFS_TFI_REALTIME_PROTOBUF
+
+            redis_service = await provide_redis_service()
+            importer = RealTimeImporter(
+                url=realtime_url,
+                api_key=realtime_apikey,
+                dataset=realtime_dataset,
+                protobuf=protobuf,
+                state_store=FeedStateStore(redis_service),
+                overlay_store=RealtimeOverlayStore(redis_service),
+            )
 
             console.print(f"\nImporting using dataset: {realtime_dataset} from {realtime_url}")
 
-            data = await importer.get_data()
+            fetch = await importer.get_data()
+            if fetch.outcome in (FeedFetchOutcome.NOT_MODIFIED, FeedFetchOutcome.UNCHANGED):
+                console.print(f"\n[yellow]Feed unchanged since the last import ({fetch.outcome}), skipping.")
+                return
 
+            data = fetch.feed
             if data is None:
                 console.print(
-                    "[red]Error: No data returned from API, either response was not 200 or JSON was invalid."
+                    "[red]Error: No data returned from API, either response was not 200 or feed was invalid."
                 )
                 return
 
-            console.print(f"\n{len(data['entity'])} entities returned from API")
+            console.print(f"\n{data.entity_count} entities returned from API")
 
             await importer.clear_table_stop_trip()
 
             with rp.Progress(*progress_columns) as progress:
                 total_stop_times, total_trips = await asyncio_gather_imports(importer, data, progress)
+            if total_stop_times.failed or total_trips.failed:
+                console.print("\n[red]Some rows could not be written, the snapshot will be imported again.")
+            else:
+                await importer.commit_feed_state(fetch)
+            console.print(
+                f"\nWrote {total_stop_times.written} stop time(s) and {total_trips.written} trip(s), "
+                f"{total_stop_times.unchanged} and {total_trips.unchanged} unchanged"
+            )
 
             finish: float = time.perf_counter()
             attributes = {
                 "dataset": realtime_dataset,
-                "total_trips": total_trips,
-                "total_stop_times": total_stop_times,
+                "total_trips": total_trips.total,
+                "trips_written": total_trips.written,
+                "total_stop_times": total_stop_times.total,
+                "stop_times_written": total_stop_times.written,
                 "time_taken(s)": round(finish - start, 2),
             }
             await create_event_with_session(
@@ -341,15 +672,8 @@ class CLIPlugin(CLIPluginProtocol):
                 attributes,
             )
 
-            redis_service = await provide_redis_service()
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_STOP_DELETE_ALL_KEY_TEMPLATE
-            )
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_STOP_TABLE_DELETE_ALL_KEY_TEMPLATE
-            )
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_TRIP_DELETE_ALL_KEY_TEMPLATE
+            await realtime_daemon_mod.refresh_realtime_responses(
+                redis_service, settings.app.RESPONSE_CACHE_HOT_REFRESH_COUNT
             )
 
             console.print(f"\n[blue]Finished import in {round(finish - start, 2)} second(s)")
@@ -378,7 +702,7 @@ class CLIPlugin(CLIPluginProtocol):
             ),
         )
         @make_sync
-        @concurrency(1)
+        @concurrency(1, name=realtime_import_lock(RealTimeImporter.feed_name))
         async def seedrealtimefromfile(json_path: str, dataset: str, set_time_to_now: bool):
             """Populate realtime trip/stop-time tables from a file (for tests and local dev)."""
 
@@ -396,22 +720,22 @@ class CLIPlugin(CLIPluginProtocol):
                     msg += f" E2E trips use calendar service_id={svc} for today's weekday."
                 console.print(msg)
 
-            importer = RealTimeImporter(url="", api_key="", dataset=realtime_dataset)
+            redis_service = await provide_redis_service()
+            importer = RealTimeImporter(
+                url="",
+                api_key="",
+                dataset=realtime_dataset,
+                overlay_store=RealtimeOverlayStore(redis_service),
+            )
             total_stop_times, total_trips = await importer.import_from_payload(payload)
             console.print(
                 f"[green]Seeded realtime for dataset {realtime_dataset}: "
-                f"{total_trips} rt_trip row(s) upserted, {total_stop_times} rt_stop_time row(s) upserted."
+                f"{total_trips.written} rt_trip row(s) upserted, "
+                f"{total_stop_times.written} rt_stop_time row(s) upserted."
             )
 
-            redis_service = await provide_redis_service()
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_STOP_DELETE_ALL_KEY_TEMPLATE
-            )
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_STOP_TABLE_DELETE_ALL_KEY_TEMPLATE
-            )
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.RealTime.REALTIME_TRIP_DELETE_ALL_KEY_TEMPLATE
+            await realtime_daemon_mod.refresh_realtime_responses(
+                redis_service, lib_settings.app.RESPONSE_CACHE_HOT_REFRESH_COUNT
             )
 
         @cli.command(
@@ -420,13 +744,19 @@ class CLIPlugin(CLIPluginProtocol):
         @click.option("-url", help="Override the default URL for the GTFS realtime vehicle data")
         @click.option("-apikey", help="Override the default API key for the GTFS realtime vehicle data")
         @click.option("-dataset", help="Override the default dataset that the data will be saved against")
+        @click.option(
+            "-protobuf/-json",
+            "protobuf",
+            default=None,
+            help="Fetch the feed as protobuf instead of JSON, defaults to GTFS_TFI_REALTIME_PROTOBUF",
+        )
         @make_sync
         @skip_if_lock_held(
             _CLI_LOCK_GTFS_STATIC_IMPORT,
             skip_message="Skipped: GTFS static import is in progress",
         )
-        @concurrency(1)
-        async def importrealtimevehicles(url: str, apikey: str, dataset: str):
+        @concurrency(1, name=realtime_import_lock(RealTimeVehiclesImporter.feed_name))
+        async def importrealtimevehicles(url: str, apikey: str, dataset: str, protobuf: bool | None):
             """Imports GTFS realtime vehicle data into the database"""
 
             start: float = time.perf_counter()
@@ -453,25 +783,41 @@ class CLIPlugin(CLIPluginProtocol):
             else:
                 realtime_dataset = settings.app.GTFS_TFI_DATASET
 
+            if protobuf is None:
+                protobuf = settings.app.GTFS_TFI_REALTIME_PROTOBUF
+
+            redis_service = await provide_redis_service()
             importer = RealTimeVehiclesImporter(
-                url=realtime_url, api_key=realtime_apikey, dataset=realtime_dataset
+                url=realtime_url,
+                api_key=realtime_apikey,
+                dataset=realtime_dataset,
+                protobuf=protobuf,
+                state_store=FeedStateStore(redis_service),
             )
 
             console.print(f"\nImporting using dataset: {realtime_dataset} from {realtime_url}")
 
-            data = await importer.get_data()
+            fetch = await importer.get_data()
+            if fetch.outcome in (FeedFetchOutcome.NOT_MODIFIED, FeedFetchOutcome.UNCHANGED):
+                console.print(f"\n[yellow]Feed unchanged since the last import ({fetch.outcome}), skipping.")
+                return
 
+            data = fetch.feed
             if data is None:
                 console.print(
-                    "[red]Error: No data returned from API, either response was not 200 or JSON was invalid."
+                    "[red]Error: No data returned from API, either response was not 200 or feed was invalid."
                 )
                 return
 
-            console.print(f"\n{len(data['entity'])} entities returned from API")
+            console.print(f"\n{data.entity_count} entities returned from API")
 
             await importer.clear_table_vehicles()
             console.print("\nImporting Vehicles")
             total_vehicles = await importer.import_vehicles(data)
+            if total_vehicles is None:
+                console.print("\n[red]Error: Vehicles could not be written, see the logs.")
+                return
+            await importer.commit_feed_state(fetch)
 
             finish: float = time.perf_counter()
             attributes = {
@@ -485,12 +831,90 @@ class CLIPlugin(CLIPluginProtocol):
                 attributes,
             )
 
-            redis_service = await provide_redis_service()
-            await redis_service.delete_keys_by_pattern(CacheKeys.StopMaps.STOP_MAP_DELETE_ALL_KEY_TEMPLATE)
-            await redis_service.delete_keys_by_pattern(CacheKeys.RouteMaps.ROUTE_MAP_DELETE_ALL_KEY_TEMPLATE)
+            await redis_service.delete_keys_by_tag(
+                cache_tag(CacheKeys.StopMaps.STOP_MAP_DELETE_ALL_KEY_TEMPLATE),
+                cache_tag(CacheKeys.RouteMaps.ROUTE_MAP_DELETE_ALL_KEY_TEMPLATE),
+            )
 
             console.print(f"\n[blue]Finished import in {round(finish - start, 2)} second(s)")
 
+        @cli.command(
+            name="realtime-daemon",
+            help="Continuously imports GTFS realtime trip updates and vehicles from one long-running process",
+        )
+        @click.option("-url", help="Override the default URL for the GTFS realtime data")
+        @click.option("-vehiclesurl", help="Override the default URL for the GTFS realtime vehicle data")
+        @click.option(
+            "-dataset", help="Only poll this dataset's feed (defaults to every feed in REALTIME_FEEDS)"
+        )
+        @click.option("-interval", type=float, help="Seconds between the start of consecutive polls")
+        @click.option(
+            "-protobuf/-json",
+            "protobuf",
+            default=None,
+            help="Fetch the feed as protobuf instead of JSON, defaults to each feed's setting",
+        )
+        @make_sync
+        async def realtime_daemon(
+            url: str, vehiclesurl: str, dataset: str, interval: float | None, protobuf: bool | None
+        ):
+            """Polls the realtime feeds of every configured dataset on an interval until interrupted"""
+
+            console = Console()
+            feeds = lib_settings.app.realtime_feeds()
+            if dataset and not lib_settings.app.REALTIME_FEEDS:
+                # Only the TFI feed, relabelled like the -dataset of the single feed commands
+                feeds = [feeds[0].model_copy(update={"dataset": dataset})]
+            elif dataset:
+                feeds = [feed for feed in feeds if feed.dataset == dataset]
+                if not feeds:
+                    configured = ", ".join(feed.dataset for feed in lib_settings.app.REALTIME_FEEDS)
+                    raise click.UsageError(
+                        f"No realtime feed is configured for dataset {dataset}, "
+                        f"configured datasets: {configured}"
+                    )
+            elif (url or vehiclesurl) and len(feeds) > 1:
+                raise click.UsageError(
+                    "-url and -vehiclesurl need -dataset when several feeds are configured"
+                )
+
+            overrides: dict = {}
+            if url:
+                overrides["url"] = url
+            if vehiclesurl:
+                overrides["vehicles_url"] = vehiclesurl
+            if protobuf is not None:
+                overrides["protobuf"] = protobuf
+            if interval:
+                overrides["interval_s"] = interval
+            feeds = [feed.model_copy(update=overrides) for feed in feeds]
+
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(signum, stop.set)
+
+            redis_service = await provide_redis_service()
+            async with httpx.AsyncClient(timeout=realtime_daemon_mod.HTTP_TIMEOUT_S) as client:
+                daemons = [
+                    realtime_daemon_mod.RealtimeDaemon.for_feed(
+                        feed,
+                        client=client,
+                        redis_service=redis_service,
+                        interval=lib_settings.app.REALTIME_DAEMON_INTERVAL_S,
+                        pause_lock=_CLI_LOCK_GTFS_STATIC_IMPORT,
+                    )
+                    for feed in feeds
+                ]
+                for daemon in daemons:
+                    dataset_label = daemon.trip_importer.dataset
+                    console.print(f"[blue]Realtime daemon polling {dataset_label} every {daemon.interval}s")
+                console.print("[blue]Ctrl+C to stop")
+                await realtime_daemon_mod.run_daemons(daemons, stop)
+
+            await redis_service.redis.aclose()
+            console.print("[blue]Realtime daemon stopped")
+
         @cli.command(name="create_tables", help="Creates the database tables")
         @make_sync
         async def create_tables():
@@ -561,6 +985,10 @@ class CLIPlugin(CLIPluginProtocol):
 
             stop_feature_attributes = await importer.import_stop_features()
 
+            console.print("\nPrecomputing static stop map payloads...")
+            async with async_session_factory() as db_session:
+                await precompute_stop_layer_payloads(db_session, await provide_redis_service())
+
             finish: float = time.perf_counter()
 
             attributes = {
@@ -690,8 +1118,8 @@ class CLIPlugin(CLIPluginProtocol):
                     await statistics_service.update_all_statistics()
 
             redis_service = await provide_redis_service()
-            await redis_service.delete_keys_by_pattern(
-                CacheKeys.Statistics.STATISTICS_DELETE_ALL_KEY_TEMPLATE
+            await redis_service.delete_keys_by_tag(
+                cache_tag(CacheKeys.Statistics.STATISTICS_DELETE_ALL_KEY_TEMPLATE)
             )
 
             finish = time.perf_counter()
@@ -773,3 +1201,135 @@ class CLIPlugin(CLIPluginProtocol):
             )
             logger.info(f"Finished cleaning up delays in {round(finish - start, 2)} second(s)")
             console.print(f"\n[blue]Finished cleaning up delays in {round(finish - start, 2)} second(s)")
+
+        @cli.command(
+            name="benchmarktimetable",
+            help="Compares stop departure lookups from the timetable snapshot against the SQL join",
+        )
+        @click.option(
+            "-stop", "stop_ids", multiple=True, required=True, help="Stop id to look up, repeatable"
+        )
+        @click.option("-iterations", default=50, show_default=True, help="Lookups per stop and path")
+        @make_sync
+        async def benchmarktimetable(stop_ids: tuple[str, ...], iterations: int):
+            """Times the realtime stop table lookup (-10 / +60 minutes) through both paths"""
+
+            console = Console()
+            engine = provide_timetable_engine()
+            if not engine.available:
+                console.print("[red]No timetable snapshot found, run importgtfs first.")
+                return
+
+            now = datetime.now()
+            day = DayOfWeek(now.weekday())
+            start_time = (now - timedelta(minutes=10)).time()
+            end_time = (now + timedelta(minutes=60)).time()
+
+            sql_timings: list[float] = []
+            engine_timings: list[float] = []
+            mismatches: list[str] = []
+            async with async_session_factory() as db_session:
+                sql_service = ScheduleService(
+                    ScheduleRepository(session=db_session), CalendarDateRepository(session=db_session)
+                )
+                for stop_id in stop_ids:
+                    for _ in range(iterations):
+                        sql_start = time.perf_counter()
+                        sql_schedules = await sql_service.get_schedule_on_stop_for_day_between_times(
+                            stop_id=stop_id, day=day, start_time=start_time, end_time=end_time
+                        )
+                        sql_schedules = await sql_service.remove_exceptions_and_inactive_calendars(
+                            sql_schedules
+                        )
+                        sql_timings.append(time.perf_counter() - sql_start)
+
+                        engine_start = time.perf_counter()
+                        engine_schedules = engine.departures(stop_id, now.date(), start_time, end_time) or []
+                        engine_timings.append(time.perf_counter() - engine_start)
+
+                    sql_trips = sorted(schedule.trip.id for schedule in sql_schedules)
+                    engine_trips = sorted(schedule.trip.id for schedule in engine_schedules)
+                    if sql_trips != engine_trips:
+                        mismatches.append(
+                            f"{stop_id}: {len(sql_trips)} via SQL, {len(engine_trips)} via snapshot"
+                        )
+
+            table = Table(title=f"{len(stop_ids)} stop(s) x {iterations} lookups")
+            table.add_column("Path")
+            table.add_column("p50 (ms)", justify="right")
+            table.add_column("p95 (ms)", justify="right")
+            table.add_column("p99 (ms)", justify="right")
+            for path, samples in (("SQL join", sql_timings), ("Timetable snapshot", engine_timings)):
+                table.add_row(
+                    path,
+                    *(f"{percentile_ms(samples, fraction):.3f}" for fraction in (0.5, 0.95, 0.99)),
+                )
+            console.print(table)
+            for mismatch in mismatches:
+                console.print(f"[yellow]Different departures for {mismatch}")
+
+        @cli.command(
+            name="benchmarkrealtimedecode",
+            help="Compares decoding recorded GTFS-RT feeds from JSON against the protobuf path",
+        )
+        @click.option(
+            "--file",
+            "json_paths",
+            multiple=True,
+            required=True,
+            type=click.Path(exists=True, dir_okay=False, readable=True, path_type=str),
+            help="Recorded GTFS-RT JSON feed, repeatable (e.g. tests/gtfs_test_data/TFI/*.json)",
+        )
+        @click.option("-iterations", default=20, show_default=True, help="Decodes per feed and path")
+        def benchmarkrealtimedecode(json_paths: tuple[str, ...], iterations: int):
+            """Times decoding and measures peak allocations of both paths on the same feed contents"""
+
+            console = Console()
+            table = Table(title=f"{len(json_paths)} feed(s) x {iterations} decodes")
+            table.add_column("Feed")
+            table.add_column("Path")
+            table.add_column("Size (KiB)", justify="right")
+            table.add_column("p50 (ms)", justify="right")
+            table.add_column("p95 (ms)", justify="right")
+            table.add_column("Peak memory (KiB)", justify="right")
+
+            for json_path in json_paths:
+                raw_json = Path(json_path).read_bytes()
+                raw_protobuf = gtfs_realtime_feed.json_to_protobuf(json.loads(raw_json))
+                paths = (
+                    (
+                        "JSON",
+                        raw_json,
+                        lambda payload: gtfs_realtime_feed.feed_from_json(json.loads(payload)),
+                    ),
+                    ("Protobuf", raw_protobuf, gtfs_realtime_feed.feed_from_protobuf),
+                )
+                decoded = []
+                for path, payload, decode in paths:
+                    timings: list[float] = []
+                    for _ in range(iterations):
+                        decode_start = time.perf_counter()
+                        decode(payload)
+                        timings.append(time.perf_counter() - decode_start)
+
+                    tracemalloc.start()
+                    decoded.append(decode(payload))
+                    _, peak = tracemalloc.get_traced_memory()
+                    tracemalloc.stop()
+
+                    table.add_row(
+                        Path(json_path).name,
+                        path,
+                        f"{len(payload) / 1024:.1f}",
+                        f"{percentile_ms(timings, 0.5):.3f}",
+                        f"{percentile_ms(timings, 0.95):.3f}",
+                        f"{peak / 1024:.1f}",
+                    )
+
+                json_feed, protobuf_feed = decoded
+                if json_feed.trip_updates != protobuf_feed.trip_updates or len(json_feed.vehicles) != len(
+                    protobuf_feed.vehicles
+                ):
+                    console.print(f"[yellow]{json_path} decodes differently through protobuf")
+
+            console.print(table)
@@ -11,6 +11,7 @@ from SimplyTransport.api_contract.delays import (
 
 from ...lib.cache_keys import CacheKeys, key_builder_from_path
 from ...lib.parameters.time_query import EndDateTimeQuery, ScheduledTimePath, StartDateTimeQuery
+from ...lib.response_cache_refresh import STALE_GRACE_OPT
 from ...lib.time_date_conversions import validate_time_range
 from ...timescale.ts_stop_times.repo import (
     MAXIMUM_LIMIT,
@@ -28,6 +29,7 @@ class DelaysController(Controller):
     @get(
         "/{stop_id:str}/{route_code:str}/{scheduled_time:str}/aggregated",
         cache=86400,
+        opt={STALE_GRACE_OPT: 3600},
         cache_key_builder=key_builder_from_path(
             CacheKeys.Delays.DELAYS_AGGREGATED_SPECIFIC_KEY_TEMPLATE,
             "stop_id",
@@ -59,6 +61,7 @@ class DelaysController(Controller):
     @get(
         "/{stop_id:str}/{route_code:str}/{scheduled_time:str}",
         cache=86400,
+        opt={STALE_GRACE_OPT: 3600},
         cache_key_builder=key_builder_from_path(
             CacheKeys.Delays.DELAYS_SPECIFIC_KEY_TEMPLATE,
             "stop_id",
@@ -93,6 +96,7 @@ class DelaysController(Controller):
     @get(
         "/{stop_id:str}/{route_code:str}/{scheduled_time:str}/truncated",
         cache=86400,
+        opt={STALE_GRACE_OPT: 3600},
         cache_key_builder=key_builder_from_path(
             CacheKeys.Delays.DELAYS_SPECIFIC_SLIM_KEY_TEMPLATE,
             "stop_id",
@@ -123,6 +127,7 @@ class DelaysController(Controller):
     @get(
         "/{route_code:str}/aggregated",
         cache=86400,
+        opt={STALE_GRACE_OPT: 3600},
         cache_key_builder=key_builder_from_path(
             CacheKeys.Delays.DELAYS_AGGREGATED_ROUTE_KEY_TEMPLATE,
             "route_code",
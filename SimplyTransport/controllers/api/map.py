@@ -1,9 +1,10 @@
 from typing import Annotated
 
 from advanced_alchemy.exceptions import NotFoundError
-from litestar import Controller, MediaType, Request, get
+from litestar import Controller, MediaType, Request, Response, get
 from litestar.di import Provide
 from litestar.exceptions import NotFoundException, ValidationException
+from litestar.openapi.datastructures import ResponseSpec
 from litestar.params import FromPath, QueryParameter
 
 from SimplyTransport.api_contract.map_payloads import (
@@ -14,13 +15,25 @@ from SimplyTransport.api_contract.map_payloads import (
     StopMapPayload,
 )
 from SimplyTransport.domain.maps.enums import StaticStopMapTypes
+from SimplyTransport.domain.maps.payload_store import (
+    StaticMapPayloadStore,
+    agency_routes_key,
+    precomputed_response,
+    provide_static_map_payload_store,
+    stop_layer_key,
+)
 from SimplyTransport.domain.services.map_service import MapService, provide_map_service
 from SimplyTransport.lib.cache_keys import CacheKeys, key_builder_from_path
+from SimplyTransport.lib.compression import SKIP_COMPRESSION_OPT
+from SimplyTransport.lib.response_cache_refresh import STALE_GRACE_OPT
 
 __all__ = ["MapController"]
 
 _MAP_JSON_STATIC_TTL_S = 86400
 _MAP_JSON_VEHICLE_TTL_S = 120
+# Served stale for this long past their TTL while the payload is rebuilt in the background
+_MAP_JSON_STATIC_STALE_S = 3600
+_MAP_JSON_VEHICLE_STALE_S = 60
 
 
 def _nearby_map_cache_key_builder(request: Request) -> str:
@@ -38,6 +51,7 @@ def _nearby_map_cache_key_builder(request: Request) -> str:
 class MapController(Controller):
     dependencies = {
         "map_service": Provide(provide_map_service),
+        "payload_store": Provide(provide_static_map_payload_store),
     }
 
     @get(
@@ -49,6 +63,7 @@ class MapController(Controller):
             "Optional radius_meters defaults to 1200 and must be between 1 and 1500."
         ),
         cache=_MAP_JSON_STATIC_TTL_S,
+        opt={STALE_GRACE_OPT: _MAP_JSON_STATIC_STALE_S},
         cache_key_builder=_nearby_map_cache_key_builder,
     )
     async def nearby_map_data(
@@ -72,17 +87,24 @@ class MapController(Controller):
         "/stop/aggregated/{map_type:str}",
         media_type=MediaType.JSON,
         summary="Get map data for a static stop map type",
-        description="Static stop map category (see enum).",
+        description="Static stop map category (see enum). Served precomputed and compressed.",
         raises=[ValidationException],
-        cache=_MAP_JSON_STATIC_TTL_S,
-        cache_key_builder=key_builder_from_path(
-            CacheKeys.StaticMaps.STATIC_MAP_STOP_KEY_TEMPLATE, "map_type"
-        ),
+        responses={200: ResponseSpec(data_container=StaticStopsMapPayload)},
+        opt={SKIP_COMPRESSION_OPT: True},
     )
     async def static_stops_map_data(
-        self, map_type: FromPath[StaticStopMapTypes], map_service: MapService
-    ) -> StaticStopsMapPayload:
-        return await map_service.build_static_stop_map_payload(map_type)
+        self,
+        request: Request,
+        map_type: FromPath[StaticStopMapTypes],
+        map_service: MapService,
+        payload_store: StaticMapPayloadStore,
+    ) -> Response[bytes]:
+        return await precomputed_response(
+            request,
+            payload_store,
+            stop_layer_key(map_type),
+            lambda: map_service.build_static_stop_map_payload(map_type),
+        )
 
     @get(
         "/stop/{stop_id:str}",
@@ -91,6 +113,7 @@ class MapController(Controller):
         description=("Returns GeoJSON-friendly route lines, stops, and vehicle positions for the stop map."),
         raises=[NotFoundException],
         cache=_MAP_JSON_VEHICLE_TTL_S,
+        opt={STALE_GRACE_OPT: _MAP_JSON_VEHICLE_STALE_S},
         cache_key_builder=key_builder_from_path(CacheKeys.StopMaps.STOP_MAP_KEY_TEMPLATE, "stop_id"),
     )
     async def stop_map_data(self, stop_id: FromPath[str], map_service: MapService) -> StopMapPayload:
@@ -111,6 +134,7 @@ class MapController(Controller):
         description="Returns GeoJSON-friendly route line, stops, and vehicle positions for the route map.",
         raises=[NotFoundException],
         cache=_MAP_JSON_VEHICLE_TTL_S,
+        opt={STALE_GRACE_OPT: _MAP_JSON_VEHICLE_STALE_S},
         cache_key_builder=key_builder_from_path(
             CacheKeys.RouteMaps.ROUTE_MAP_KEY_TEMPLATE, "route_id", "direction"
         ),
@@ -129,17 +153,22 @@ class MapController(Controller):
         "/route/agency/{agency_id:str}",
         media_type=MediaType.JSON,
         summary="Get map data for all routes of an agency",
-        description=('Use agency_id "All" for every agency.'),
+        description=('Use agency_id "All" for every agency. Served precomputed and compressed.'),
         raises=[NotFoundException],
-        cache=_MAP_JSON_STATIC_TTL_S,
-        cache_key_builder=key_builder_from_path(
-            CacheKeys.StaticMaps.STATIC_MAP_AGENCY_ROUTE_KEY_TEMPLATE, "agency_id"
-        ),
+        responses={200: ResponseSpec(data_container=AgencyRoutesMapPayload)},
+        opt={SKIP_COMPRESSION_OPT: True},
     )
     async def agency_routes_map_data(
-        self, agency_id: FromPath[str], map_service: MapService
-    ) -> AgencyRoutesMapPayload:
-        try:
-            return await map_service.build_agency_routes_map_payload(agency_id)
-        except ValueError as e:
-            raise NotFoundException(detail=str(e)) from e
+        self,
+        request: Request,
+        agency_id: FromPath[str],
+        map_service: MapService,
+        payload_store: StaticMapPayloadStore,
+    ) -> Response[bytes]:
+        async def build() -> AgencyRoutesMapPayload:
+            try:
+                return await map_service.build_agency_routes_map_payload(agency_id)
+            except ValueError as e:
+                raise NotFoundException(detail=str(e)) from e
+
+        return await precomputed_response(request, payload_store, agency_routes_key(agency_id), build)
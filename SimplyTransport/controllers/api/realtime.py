@@ -67,7 +67,6 @@ class RealtimeController(Controller):
             end_time=end_time,
         )
         schedules = await schedule_service.remove_exceptions_and_inactive_calendars(schedules)
-        schedules = await schedule_service.add_in_added_exceptions(schedules)  # TODO
         schedules = await schedule_service.apply_custom_23_00_sorting(schedules)
 
         realtime_schedules = await realtime_service.get_realtime_schedules_for_static_schedules(schedules)
@@ -13,7 +13,7 @@ from ...domain.services.schedule_service import (
     provide_schedule_service,
 )
 from ...lib.parameters.time_query import DayQuery, EndTimeQuery, StartTimeQuery
-from ...lib.time_date_conversions import return_time_difference
+from ...lib.time_date_conversions import next_date_on_weekday, return_time_difference
 
 __all__ = ["ScheduleController"]
 
@@ -61,8 +61,9 @@ class ScheduleController(Controller):
             end_time=end_time,
         )
 
-        schedules = await schedule_service.remove_exceptions_and_inactive_calendars(schedules)
-        schedules = await schedule_service.add_in_added_exceptions(schedules)  # TODO
+        schedules = await schedule_service.remove_exceptions_and_inactive_calendars(
+            schedules, on_date=next_date_on_weekday(day)
+        )
         schedules = await schedule_service.apply_custom_23_00_sorting(schedules)
 
         return [StaticSchedule.model_validate(schedule) for schedule in schedules]
@@ -4,6 +4,7 @@ from litestar.params import FromPath
 from litestar.response import Template
 
 from SimplyTransport.lib.cache_keys import CacheKeys, key_builder_from_path
+from SimplyTransport.lib.response_cache_refresh import STALE_GRACE_OPT
 from SimplyTransport.timescale.ts_stop_times.repo import TSStopTimeRepository, provide_ts_stop_time_repo
 
 __all__ = [
@@ -17,6 +18,7 @@ class DelaysController(Controller):
     @get(
         "/route/{route_code:str}",
         cache=86400,
+        opt={STALE_GRACE_OPT: 3600},
         cache_key_builder=key_builder_from_path(
             CacheKeys.Delays.DELAYS_HTML_ROUTE_KEY_TEMPLATE, "route_code"
         ),
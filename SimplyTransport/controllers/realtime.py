@@ -23,6 +23,8 @@ from ..domain.services.schedule_service import (
     provide_schedule_service,
 )
 from ..domain.stop.repo import StopRepository, provide_stop_repo
+from ..lib.response_cache_refresh import HOT_REFRESH_OPT, STALE_GRACE_OPT
+from ..lib.time_date_conversions import next_date_on_weekday
 
 __all__ = [
     "RealtimeController",
@@ -74,6 +76,7 @@ class RealtimeController(Controller):
     @get(
         "/stop/{stop_id:str}/realtime-table",
         cache=120,
+        opt={STALE_GRACE_OPT: 60, HOT_REFRESH_OPT: True},
         cache_key_builder=key_builder_from_path(
             CacheKeys.RealTime.REALTIME_STOP_TABLE_KEY_TEMPLATE, "stop_id"
         ),
@@ -103,7 +106,6 @@ class RealtimeController(Controller):
             end_time=end_time,
         )
         schedules = await schedule_service.remove_exceptions_and_inactive_calendars(schedules)
-        schedules = await schedule_service.add_in_added_exceptions(schedules)  # TODO
         schedules = await schedule_service.apply_custom_23_00_sorting(schedules)
 
         realtime_schedules = await realtime_service.get_realtime_schedules_for_static_schedules(schedules)
@@ -136,8 +138,9 @@ class RealtimeController(Controller):
         if day is None:
             day = DayOfWeek(datetime.now().weekday())
         schedules = await schedule_service.get_schedule_on_stop_for_day(stop_id=stop_id, day=day)
-        schedules = await schedule_service.remove_exceptions_and_inactive_calendars(schedules)
-        schedules = await schedule_service.add_in_added_exceptions(schedules)  # TODO
+        schedules = await schedule_service.remove_exceptions_and_inactive_calendars(
+            schedules, on_date=next_date_on_weekday(day)
+        )
 
         return Template(
             template_name="realtime/stop_schedule.html",
@@ -4,11 +4,14 @@ from . import (
     calendar_dates,
     database_statistics,
     events,
+    gtfs_entity_hash,
     realtime,
     route,
+    route_stop,
     shape,
     stop,
     stop_features,
+    stop_route,
     stop_times,
     trip,
 )
@@ -26,4 +29,7 @@ __all__ = [
     "events",
     "stop_features",
     "database_statistics",
+    "gtfs_entity_hash",
+    "stop_route",
+    "route_stop",
 ]
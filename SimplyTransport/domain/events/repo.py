@@ -101,6 +101,17 @@ class EventRepository(SQLAlchemyAsyncRepository[EventModel]):  # type: ignore
         else:
             return events[0][0]
 
+    async def get_most_recent_event_id_by_type(self, event_type: EventType) -> int | None:
+        """Id of the latest event of ``event_type``; a single index lookup, cheap enough to poll."""
+
+        result = await self.session.execute(
+            select(EventModel.id)
+            .where(EventModel.event_type == event_type)
+            .order_by(EventModel.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar()
+
     async def get_paginated_events_with_total(
         self, limit_offset: LimitOffset, order: Literal["asc", "desc"] = "desc"
     ) -> tuple[list[EventModel], int]:
@@ -151,7 +162,7 @@ async def provide_event_repo(db_session: AsyncSession) -> EventRepository:
 
 async def create_event_with_session(
     event_type: EventType, description: str, attributes: dict, expiry_time: datetime | None = None
-):
+) -> EventModel:
     async with async_session_factory() as db_session:
         event_repo = await provide_event_repo(db_session=db_session)
-        await event_repo.create_event(event_type, description, attributes, expiry_time)
+        return await event_repo.create_event(event_type, description, attributes, expiry_time)
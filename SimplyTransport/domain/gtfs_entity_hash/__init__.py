@@ -0,0 +1,3 @@
+from .model import GTFSEntityHashModel
+
+__all__ = ["GTFSEntityHashModel"]
@@ -0,0 +1,20 @@
+from advanced_alchemy.base import BigIntAuditBase
+from sqlalchemy import BigInteger, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+__all__ = ["GTFSEntityHashModel"]
+
+
+class GTFSEntityHashModel(BigIntAuditBase):
+    """Content hash of a GTFS entity as of the last static import, used by diff imports"""
+
+    __tablename__: str = "gtfs_entity_hash"  # type: ignore[assignment]
+    __table_args__ = (
+        UniqueConstraint("dataset", "entity_type", "entity_id", name="uq_gtfs_entity_hash_dataset_entity"),
+    )
+
+    entity_type: Mapped[str] = mapped_column(String(length=20))
+    entity_id: Mapped[str] = mapped_column(String(length=1000))
+    # 64 bit digest stored as a signed BIGINT
+    content_hash: Mapped[int] = mapped_column(BigInteger)
+    dataset: Mapped[str] = mapped_column(String(length=80))
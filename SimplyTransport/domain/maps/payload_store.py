@@ -0,0 +1,262 @@
+"""
+Static map payloads precomputed by ``importgtfs``.
+
+The all-agency and per-agency route maps and the ``StaticStopMapTypes`` stop layers only change with
+the static data, yet building one loads every route's first trip and all of its shape points. They are
+built once per import, serialized, compressed with gzip (and brotli when it is installed) and stored
+in Redis next to an ETag, so a request picks the encoding its client accepts and copies the bytes.
+Each worker keeps the bodies it served and only reads one again once its ETag changed.
+"""
+
+import gzip
+import hashlib
+from collections.abc import Awaitable, Callable, Iterable, Mapping, MutableMapping
+from typing import NamedTuple, cast
+
+from litestar import MediaType, Request, Response
+from litestar.serialization import encode_json
+from redis.asyncio.client import Pipeline
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ...api_contract.base import ApiBaseModel
+from ...lib.cache import RedisService
+from ...lib.cache_keys import CacheKeys
+from ...lib.logging.logging import provide_logger
+from ..agency.repo import AgencyRepository
+from ..services.map_service import MapService, provide_map_service
+from .enums import StaticStopMapTypes
+
+try:
+    import brotli
+except ImportError:  # Only gzip is precomputed without it
+    brotli = None
+
+logger = provide_logger(__name__)
+
+IDENTITY = "identity"
+GZIP = "gzip"
+BROTLI = "br"
+# Served in this order of preference among the encodings a client accepts equally
+ENCODINGS = (BROTLI, GZIP, IDENTITY)
+
+_ETAG_FIELD = "etag"
+
+# (key, encoding) -> (etag, body) of the payloads this worker served
+_served_bodies: dict[tuple[str, str], tuple[str, bytes]] = {}
+
+
+class PrecomputedPayload(NamedTuple):
+    """A serialized payload and its ETag, with one body per encoding"""
+
+    etag: str
+    bodies: dict[str, bytes]
+
+
+def precompute_payload(payload: ApiBaseModel) -> PrecomputedPayload:
+    """Serializes ``payload`` as the route handler would and compresses it once per encoding"""
+
+    body = encode_json(payload.model_dump(mode="json"))
+    bodies = {IDENTITY: body, GZIP: gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        bodies[BROTLI] = brotli.compress(body, quality=11)
+    return PrecomputedPayload(hashlib.blake2b(body, digest_size=16).hexdigest(), bodies)
+
+
+def agency_routes_key(agency_id: str) -> str:
+    return CacheKeys.StaticMaps.STATIC_MAP_AGENCY_ROUTE_KEY_TEMPLATE.format(agency_id=agency_id)
+
+
+def stop_layer_key(map_type: StaticStopMapTypes) -> str:
+    return CacheKeys.StaticMaps.STATIC_MAP_STOP_KEY_TEMPLATE.format(map_type=map_type.value)
+
+
+def _payload_key(key: str) -> str:
+    return CacheKeys.StaticMaps.STATIC_MAP_PAYLOAD_KEY_TEMPLATE.format(key=key)
+
+
+def acceptable_encodings(accept_encoding: str) -> list[str]:
+    """
+    The encodings an ``Accept-Encoding`` header allows, best first. Identity always comes last, it is
+    sent even to a client refusing it rather than failing the request.
+    """
+    qualities: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        name, _, value = params.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    def quality_of(coding: str) -> float:
+        if coding in qualities:
+            return qualities[coding]
+        return qualities.get("*", 1.0 if coding == IDENTITY else 0.0)
+
+    accepted = [coding for coding in ENCODINGS if coding != IDENTITY and quality_of(coding) > 0]
+    return [*sorted(accepted, key=quality_of, reverse=True), IDENTITY]
+
+
+def representation_etag(etag: str, encoding: str) -> str:
+    """Strong ETag of one encoding of a payload: each encoding is a different representation"""
+    return f'"{etag}"' if encoding == IDENTITY else f'"{etag}-{encoding}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+class StaticMapPayloadStore:
+    """Precomputed payloads in Redis, one hash of ETag and bodies per map, shared by every web worker"""
+
+    def __init__(
+        self,
+        redis_service: RedisService,
+        served: MutableMapping[tuple[str, str], tuple[str, bytes]] | None = None,
+    ):
+        self.redis_service = redis_service
+        self._served = _served_bodies if served is None else served
+
+    async def get(self, key: str, encoding: str) -> tuple[str, bytes] | None:
+        """ETag and body of ``key`` in ``encoding``, None when it was not precomputed in that encoding"""
+
+        # execute_command: the hash and set commands of redis.asyncio are stubbed as synchronous (pyright)
+        redis = self.redis_service.redis
+        etag = await redis.execute_command("HGET", _payload_key(key), _ETAG_FIELD)
+        if etag is None:
+            return None
+        etag = etag.decode() if isinstance(etag, bytes) else etag
+        served = self._served.get((key, encoding))
+        if served is not None and served[0] == etag:
+            return served
+
+        etag, body = cast(
+            list[bytes | None], await redis.execute_command("HMGET", _payload_key(key), _ETAG_FIELD, encoding)
+        )
+        if etag is None or body is None:
+            return None
+        served = etag.decode() if isinstance(etag, bytes) else etag, body
+        self._served[(key, encoding)] = served
+        return served
+
+    async def put(self, key: str, payload: PrecomputedPayload) -> None:
+        await self.put_many({key: payload})
+
+    async def put_many(self, payloads: Mapping[str, PrecomputedPayload]) -> None:
+        """Stores ``payloads``, each replacing every encoding of its key at once"""
+
+        pipe = self.redis_service.redis.pipeline(transaction=True)
+        _write_payloads(pipe, payloads)
+        await pipe.execute()
+
+    async def replace_all(self, payloads: Mapping[str, PrecomputedPayload]) -> None:
+        """Stores ``payloads`` and drops the ones of maps that are gone, an agency no longer in the feed"""
+
+        redis = self.redis_service.redis
+        index_key = CacheKeys.StaticMaps.STATIC_MAP_PAYLOAD_INDEX_KEY_TEMPLATE
+        members = cast(set[bytes | str], await redis.execute_command("SMEMBERS", index_key))
+        stored = {key.decode() if isinstance(key, bytes) else key for key in members}
+        pipe = redis.pipeline(transaction=True)
+        for key in stored - payloads.keys():
+            pipe.delete(_payload_key(key))
+        pipe.delete(index_key)
+        _write_payloads(pipe, payloads)
+        await pipe.execute()
+
+
+def _write_payloads(pipe: Pipeline, payloads: Mapping[str, PrecomputedPayload]) -> None:
+    for key, payload in payloads.items():
+        pipe.delete(_payload_key(key))
+        pipe.hset(_payload_key(key), mapping={_ETAG_FIELD: payload.etag, **payload.bodies})
+    if payloads:
+        pipe.sadd(CacheKeys.StaticMaps.STATIC_MAP_PAYLOAD_INDEX_KEY_TEMPLATE, *payloads)
+
+
+async def precomputed_response(
+    request: Request,
+    store: StaticMapPayloadStore,
+    key: str,
+    build: Callable[[], Awaitable[ApiBaseModel]],
+) -> Response[bytes]:
+    """
+    Responds with the precomputed payload of ``key`` in the best encoding the client accepts, or 304
+    when the client already holds it. A payload missing from the store, after a flush or before the
+    first import, is built with ``build`` and stored for the next requests.
+    """
+    encodings = acceptable_encodings(request.headers.get("accept-encoding", ""))
+    for encoding in encodings:
+        found = await store.get(key, encoding)
+        if found is not None:
+            etag, body = found
+            break
+    else:
+        payload = precompute_payload(await build())
+        await store.put(key, payload)
+        encoding = next(encoding for encoding in encodings if encoding in payload.bodies)
+        etag, body = payload.etag, payload.bodies[encoding]
+
+    headers = {"ETag": representation_etag(etag, encoding), "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(content=b"", status_code=304, headers=headers)
+    if encoding != IDENTITY:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=MediaType.JSON, headers=headers)
+
+
+async def build_agency_route_payloads(
+    map_service: MapService, agency_ids: Iterable[str]
+) -> dict[str, PrecomputedPayload]:
+    """The route maps of every agency combined and of each of ``agency_ids``"""
+
+    payloads = {}
+    for agency_id in ["All", *agency_ids]:
+        try:
+            payload = await map_service.build_agency_routes_map_payload(agency_id)
+        except ValueError as e:
+            logger.warning(f"Skipped precomputing the route map of agency {agency_id}: {e}")
+            continue
+        payloads[agency_routes_key(agency_id)] = precompute_payload(payload)
+    return payloads
+
+
+async def build_stop_layer_payloads(map_service: MapService) -> dict[str, PrecomputedPayload]:
+    return {
+        stop_layer_key(map_type): precompute_payload(
+            await map_service.build_static_stop_map_payload(map_type)
+        )
+        for map_type in StaticStopMapTypes
+    }
+
+
+async def precompute_static_map_payloads(db_session: AsyncSession, redis_service: RedisService) -> int:
+    """Rebuilds every static map payload after a GTFS import, returns how many were stored"""
+
+    map_service = await provide_map_service(db_session, redis_service)
+    agencies = await AgencyRepository(session=db_session).list()
+    payloads = await build_agency_route_payloads(map_service, [agency.id for agency in agencies])
+    payloads |= await build_stop_layer_payloads(map_service)
+    await StaticMapPayloadStore(redis_service).replace_all(payloads)
+    return len(payloads)
+
+
+async def precompute_stop_layer_payloads(db_session: AsyncSession, redis_service: RedisService) -> int:
+    """Rebuilds the stop layers after a stop features import, returns how many were stored"""
+
+    payloads = await build_stop_layer_payloads(await provide_map_service(db_session, redis_service))
+    await StaticMapPayloadStore(redis_service).put_many(payloads)
+    return len(payloads)
+
+
+async def provide_static_map_payload_store(redis_service: RedisService) -> StaticMapPayloadStore:
+    """This provides the static map payload store."""
+
+    return StaticMapPayloadStore(redis_service)
@@ -1,5 +1,5 @@
 from .stop_time.model import RTStopTimeModel
 from .trip.model import RTTripModel
-from .vehicle.model import RTVehicleModel
+from .vehicle.model import RTVehicleLatestModel, RTVehicleModel
 
-__all__ = ["RTStopTimeModel", "RTTripModel", "RTVehicleModel"]
+__all__ = ["RTStopTimeModel", "RTTripModel", "RTVehicleLatestModel", "RTVehicleModel"]
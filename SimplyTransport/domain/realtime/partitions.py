@@ -0,0 +1,130 @@
+"""
+Time partitions of the realtime tables.
+
+``rt_stop_time``, ``rt_trip`` and ``rt_vehicle`` are range partitioned on ``created_at`` into
+``PARTITION_INTERVAL`` buckets. Importers stamp the rows of a cycle with the start of the current
+bucket, so an upsert only ever conflicts inside one partition and the first cycle of a new bucket
+rewrites a complete snapshot into it. Retention drops whole partitions instead of deleting rows, and
+readers only look at the current and previous buckets.
+"""
+
+from datetime import UTC, datetime, timedelta
+
+from advanced_alchemy.types import DateTimeUTC
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import MappedColumn, mapped_column
+
+PARTITION_INTERVAL = timedelta(minutes=15)
+PARTITIONED_TABLES = ("rt_stop_time", "rt_trip", "rt_vehicle")
+PARTITION_BY = "RANGE (created_at)"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_NAME_FORMAT = "%Y%m%d%H%M"
+# Transaction-scoped advisory lock held while a table's partitions are rotated
+_LOCK_PREFIX = "rt_partitions:"
+
+
+def partition_key_column() -> MappedColumn[datetime]:
+    """``created_at`` as part of the primary key, which PostgreSQL requires of the partition key"""
+
+    return mapped_column(
+        DateTimeUTC(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(UTC),
+        sort_order=3002,
+    )
+
+
+def partition_start(at: datetime | None = None) -> datetime:
+    """Start of the bucket ``at`` (default now) falls in"""
+
+    at = at or datetime.now(UTC)
+    return at - (at - _EPOCH) % PARTITION_INTERVAL
+
+
+def read_window(at: datetime | None = None) -> tuple[datetime, datetime]:
+    """``[start, end)`` covering the previous and current buckets, the only ones readers need"""
+
+    current = partition_start(at)
+    return current - PARTITION_INTERVAL, current + PARTITION_INTERVAL
+
+
+def partition_name(table: str, start: datetime) -> str:
+    return f"{table}_p{start.astimezone(UTC):{_NAME_FORMAT}}"
+
+
+def _partition_start_from_name(table: str, name: str) -> datetime | None:
+    prefix = f"{table}_p"
+    if not name.startswith(prefix):
+        return None
+    try:
+        return datetime.strptime(name.removeprefix(prefix), _NAME_FORMAT).replace(tzinfo=UTC)
+    except ValueError:
+        return None
+
+
+async def ensure_partitions(session: AsyncSession, table: str, at: datetime | None = None) -> None:
+    """Creates the current and next partitions of ``table`` so writes never miss a partition"""
+
+    current = partition_start(at)
+    for start in (current, current + PARTITION_INTERVAL):
+        end = start + PARTITION_INTERVAL
+        await session.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS "{partition_name(table, start)}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+
+async def drop_expired_partitions(session: AsyncSession, table: str, at: datetime | None = None) -> list[str]:
+    """
+    Drops the partitions of ``table`` that ended before the read window. Dropping a partition detaches
+    it, and a child another session already detached or dropped is skipped.
+    """
+
+    window_start, _ = read_window(at)
+    result = await session.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table
+            ORDER BY child.relname
+            """
+        ),
+        {"table": table},
+    )
+    dropped: list[str] = []
+    for name in list(result.scalars()):
+        start = _partition_start_from_name(table, name)
+        if start is None or start + PARTITION_INTERVAL > window_start:
+            continue
+        await session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        dropped.append(name)
+    return dropped
+
+
+async def rotate_partitions(
+    session: AsyncSession, tables: tuple[str, ...], at: datetime | None = None
+) -> None:
+    """
+    Creates upcoming partitions and drops expired ones for each of ``tables``, then commits.
+
+    The importers of every dataset rotate the same tables, so each table is locked for the rest of the
+    transaction first: neither ``CREATE TABLE IF NOT EXISTS ... PARTITION OF`` nor dropping a child
+    listed by another session is safe to run concurrently.
+    """
+
+    # Always locked in the same order so two rotations cannot deadlock
+    for table in sorted(tables):
+        await session.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:lock))"), {"lock": f"{_LOCK_PREFIX}{table}"}
+        )
+    for table in tables:
+        await ensure_partitions(session, table, at)
+        await drop_expired_partitions(session, table, at)
+    await session.commit()
@@ -0,0 +1,171 @@
+"""
+Latest realtime overlay per trip, published to Redis by the realtime importer.
+
+Each trip is one compact JSON value holding its rt_trip fields and packed stop time updates, so a
+realtime table resolves the overlays of all its trips with a single ``MGET`` and no SQL. A ready
+marker per dataset tells readers the store is populated; without it they fall back to the database.
+"""
+
+import itertools
+import json
+from collections.abc import Iterable, Sequence
+from datetime import UTC, date, datetime, time
+from typing import Any, NamedTuple
+
+from redis.exceptions import RedisError
+
+from ....lib.cache import RedisService
+from ....lib.cache_keys import CacheKeys
+from ....lib.logging.logging import provide_logger
+from ...schedule.model import StaticScheduleModel
+from ..partitions import PARTITION_INTERVAL
+from ..stop_time.model import RTStopTimeModel
+from ..trip.model import RTTripModel
+from .repo import RTStopTimeOverlay, resolve_stop_time_overlays, trip_ids_by_schedule_dataset
+
+logger = provide_logger(__name__)
+
+# Same horizon as the SQL read window, trips that drop out of the feed expire with it
+OVERLAY_TTL_S = int(2 * PARTITION_INTERVAL.total_seconds())
+
+
+class TripOverlay(NamedTuple):
+    """The rt_trip and rt_stop_time rows one trip update produced, as written by the importer"""
+
+    trip_id: str
+    trip: dict[str, Any] | None
+    stop_times: list[dict[str, Any]]
+
+
+def _trip_key(dataset: str, trip_id: str) -> str:
+    return CacheKeys.RealTimeOverlay.OVERLAY_TRIP_KEY_TEMPLATE.format(dataset=dataset, trip_id=trip_id)
+
+
+def _ready_key(dataset: str) -> str:
+    return CacheKeys.RealTimeOverlay.OVERLAY_READY_KEY_TEMPLATE.format(dataset=dataset)
+
+
+def pack_trip_overlay(overlay: TripOverlay) -> str:
+    """``[created_at, trip | null, [[stop_id, stop_sequence, relationship, arrival, departure], ...]]``"""
+
+    trip = overlay.trip
+    created_at: datetime = (trip or overlay.stop_times[0])["created_at"]
+    packed_trip = None
+    if trip is not None:
+        packed_trip = [
+            trip["route_id"],
+            trip["start_time"].isoformat(),
+            trip["start_date"].isoformat(),
+            trip["schedule_relationship"],
+            trip["direction"],
+            trip["entity_id"],
+        ]
+    packed_stop_times = [
+        [
+            stop_time["stop_id"],
+            stop_time["stop_sequence"],
+            stop_time["schedule_relationship"],
+            stop_time["arrival_delay"],
+            stop_time["departure_delay"],
+        ]
+        for stop_time in overlay.stop_times
+    ]
+    return json.dumps([created_at.timestamp(), packed_trip, packed_stop_times], separators=(",", ":"))
+
+
+def unpack_trip_overlay(
+    dataset: str, trip_id: str, value: str | bytes
+) -> tuple[RTTripModel | None, list[RTStopTimeModel]]:
+    """Rebuilds detached rt_trip / rt_stop_time models from a packed overlay"""
+
+    timestamp, packed_trip, packed_stop_times = json.loads(value)
+    created_at = datetime.fromtimestamp(timestamp, UTC)
+    trip = None
+    if packed_trip is not None:
+        route_id, start_time, start_date, relationship, direction, entity_id = packed_trip
+        trip = RTTripModel(
+            trip_id=trip_id,
+            route_id=route_id,
+            start_time=time.fromisoformat(start_time),
+            start_date=date.fromisoformat(start_date),
+            schedule_relationship=relationship,
+            direction=direction,
+            entity_id=entity_id,
+            dataset=dataset,
+            created_at=created_at,
+        )
+    stop_times = [
+        RTStopTimeModel(
+            stop_id=stop_id,
+            trip_id=trip_id,
+            stop_sequence=stop_sequence,
+            schedule_relationship=relationship,
+            arrival_delay=arrival_delay,
+            departure_delay=departure_delay,
+            dataset=dataset,
+            created_at=created_at,
+        )
+        for stop_id, stop_sequence, relationship, arrival_delay, departure_delay in packed_stop_times
+    ]
+    return trip, stop_times
+
+
+class RealtimeOverlayStore:
+    """Per-trip realtime overlays in Redis, shared by every web worker"""
+
+    def __init__(self, redis_service: RedisService, expiration: int = OVERLAY_TTL_S):
+        self.redis_service = redis_service
+        self.expiration = expiration
+
+    async def publish(self, dataset: str, overlays: Iterable[TripOverlay], batch_size: int = 1000) -> int:
+        """Writes ``overlays`` in pipelined batches, then marks the dataset's store as populated"""
+
+        published = 0
+        for batch in itertools.batched(overlays, batch_size, strict=False):
+            pipe = self.redis_service.redis.pipeline(transaction=False)
+            for overlay in batch:
+                pipe.set(_trip_key(dataset, overlay.trip_id), pack_trip_overlay(overlay), ex=self.expiration)
+            await pipe.execute()
+            published += len(batch)
+        await self.redis_service.redis.set(_ready_key(dataset), "1", ex=self.expiration)
+        return published
+
+    async def load_recent_rt_overlay_for_schedules(
+        self, schedules: Sequence[StaticScheduleModel]
+    ) -> tuple[dict[str, RTTripModel], dict[tuple[str, str, int], RTStopTimeOverlay]] | None:
+        """
+        Same result as ``RealtimeScheduleRepository.load_recent_rt_overlay_for_schedules`` from one
+        ``MGET``. Returns None when the store of any of the schedules' datasets is not populated or
+        Redis is unavailable.
+        """
+        if not schedules:
+            return {}, {}
+
+        trip_ids_by_dataset = trip_ids_by_schedule_dataset(schedules)
+        datasets = list(trip_ids_by_dataset)
+        trip_keys = [
+            (dataset, trip_id) for dataset, trip_ids in trip_ids_by_dataset.items() for trip_id in trip_ids
+        ]
+        try:
+            values = await self.redis_service.redis.mget(
+                [
+                    *(_ready_key(dataset) for dataset in datasets),
+                    *(_trip_key(dataset, trip_id) for dataset, trip_id in trip_keys),
+                ]
+            )
+        except RedisError as e:
+            logger.warning(f"Realtime overlay store unavailable, falling back to the database: {e}")
+            return None
+        if any(ready is None for ready in values[: len(datasets)]):
+            return None
+
+        trips_by_id: dict[str, RTTripModel] = {}
+        stop_times: list[RTStopTimeModel] = []
+        for (dataset, trip_id), value in zip(trip_keys, values[len(datasets) :], strict=True):
+            if value is None:
+                continue
+            trip, trip_stop_times = unpack_trip_overlay(dataset, trip_id, value)
+            if trip is not None:
+                trips_by_id[trip_id] = trip
+            stop_times.extend(trip_stop_times)
+        return trips_by_id, resolve_stop_time_overlays(schedules, stop_times)
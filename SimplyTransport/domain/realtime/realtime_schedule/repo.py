@@ -1,13 +1,14 @@
-import datetime
+import bisect
 from collections import defaultdict
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from dataclasses import dataclass
 
-from sqlalchemy import select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ...schedule.model import StaticScheduleModel
 from ..enums import ScheduleRealtionship
+from ..partitions import read_window
 from ..stop_time.model import RTStopTimeModel
 from ..trip.model import RTTripModel
 
@@ -20,29 +21,60 @@ class RTStopTimeOverlay:
     exact_match: bool
 
 
-def _pick_predecessor_carry_forward(
-    trip_rows: list[RTStopTimeModel], static_sequence: int
-) -> RTStopTimeModel | None:
-    predecessors = [r for r in trip_rows if r.stop_sequence <= static_sequence]
-    if not predecessors:
-        return None
-    non_skipped = [r for r in predecessors if r.schedule_relationship != ScheduleRealtionship.SKIPPED]
-    if non_skipped:
-        return max(non_skipped, key=lambda r: (r.stop_sequence, r.created_at))
-    return max(predecessors, key=lambda r: (r.stop_sequence, r.created_at))
+class TripOverlayIndex:
+    """
+    One trip's RT stop rows sorted by stop_sequence, for resolving every static row of the trip.
+
+    Rows are grouped per stop_sequence keeping the newest row (and newest non-SKIPPED row) of each
+    group. Prefix/suffix tables point at the nearest group with a non-SKIPPED row, so a carry-forward
+    lookup is one bisect instead of a rescan of the trip's rows.
+    """
 
+    __slots__ = ("_sequences", "_newest", "_last_non_skipped", "_next_non_skipped")
 
-def _pick_successor_carry_forward(
-    trip_rows: list[RTStopTimeModel], static_sequence: int
-) -> RTStopTimeModel | None:
-    successors = [r for r in trip_rows if r.stop_sequence >= static_sequence]
-    if not successors:
-        return None
-    non_skipped = [r for r in successors if r.schedule_relationship != ScheduleRealtionship.SKIPPED]
-    pool = non_skipped if non_skipped else successors
-    min_sq = min(r.stop_sequence for r in pool)
-    at_min = [r for r in pool if r.stop_sequence == min_sq]
-    return max(at_min, key=lambda r: r.created_at)
+    def __init__(self, trip_rows: Iterable[RTStopTimeModel]):
+        sequences: list[int] = []
+        newest: list[RTStopTimeModel] = []
+        newest_non_skipped: list[RTStopTimeModel | None] = []
+        # Newest first within a sequence, ties keep feed order like max() did
+        ordered = sorted(
+            enumerate(trip_rows), key=lambda ir: (ir[1].stop_sequence, -ir[1].created_at.timestamp(), ir[0])
+        )
+        for _, row in ordered:
+            if not sequences or sequences[-1] != row.stop_sequence:
+                sequences.append(row.stop_sequence)
+                newest.append(row)
+                newest_non_skipped.append(None)
+            if newest_non_skipped[-1] is None and row.schedule_relationship != ScheduleRealtionship.SKIPPED:
+                newest_non_skipped[-1] = row
+
+        last_non_skipped: list[RTStopTimeModel | None] = []
+        latest = None
+        for row in newest_non_skipped:
+            latest = row or latest
+            last_non_skipped.append(latest)
+        next_non_skipped: list[RTStopTimeModel | None] = [None] * (len(sequences) + 1)
+        for i in range(len(sequences) - 1, -1, -1):
+            next_non_skipped[i] = newest_non_skipped[i] or next_non_skipped[i + 1]
+
+        self._sequences = sequences
+        self._newest = newest
+        self._last_non_skipped = last_non_skipped
+        self._next_non_skipped = next_non_skipped
+
+    def predecessor(self, static_sequence: int) -> RTStopTimeModel | None:
+        """Latest row with stop_sequence <= static_sequence, preferring rows that are not SKIPPED"""
+        i = bisect.bisect_right(self._sequences, static_sequence) - 1
+        if i < 0:
+            return None
+        return self._last_non_skipped[i] or self._newest[i]
+
+    def successor(self, static_sequence: int) -> RTStopTimeModel | None:
+        """Earliest row with stop_sequence >= static_sequence, preferring rows that are not SKIPPED"""
+        i = bisect.bisect_left(self._sequences, static_sequence)
+        if i == len(self._sequences):
+            return None
+        return self._next_non_skipped[i] or self._newest[i]
 
 
 def overlay_for_static_schedule_row(
@@ -50,26 +82,79 @@ def overlay_for_static_schedule_row(
     stop_id: str,
     stop_sequence: int,
     by_triple: dict[tuple[str, str, int], RTStopTimeModel],
-    trip_rows: list[RTStopTimeModel],
+    trip_rows: list[RTStopTimeModel] | TripOverlayIndex,
 ) -> RTStopTimeOverlay | None:
     """
     Resolve which RT stop-time row applies to one static stop_time row.
 
     Exact (trip_id, stop_id, stop_sequence) matches are exact_match=True. Otherwise we carry
     delay forward from the latest predecessor (preferring non-SKIPPED rows), then earliest successor.
+    Pass a prebuilt ``TripOverlayIndex`` when resolving many rows of the same trip.
     """
     key = (trip_id, stop_id, stop_sequence)
     exact = by_triple.get(key)
     if exact is not None:
         return RTStopTimeOverlay(row=exact, exact_match=True)
-    row = _pick_predecessor_carry_forward(trip_rows, stop_sequence)
-    if row is None:
-        row = _pick_successor_carry_forward(trip_rows, stop_sequence)
+    index = trip_rows if isinstance(trip_rows, TripOverlayIndex) else TripOverlayIndex(trip_rows)
+    row = index.predecessor(stop_sequence) or index.successor(stop_sequence)
     if row is None:
         return None
     return RTStopTimeOverlay(row=row, exact_match=False)
 
 
+def latest_trips_by_id(rows: Iterable[RTTripModel]) -> dict[str, RTTripModel]:
+    """Newest rt_trip row per trip_id."""
+    trips_by_id: dict[str, RTTripModel] = {}
+    for row in rows:
+        existing = trips_by_id.get(row.trip_id)
+        if existing is None or row.created_at > existing.created_at:
+            trips_by_id[row.trip_id] = row
+    return trips_by_id
+
+
+def resolve_stop_time_overlays(
+    schedules: Sequence[StaticScheduleModel], rows: Iterable[RTStopTimeModel]
+) -> dict[tuple[str, str, int], RTStopTimeOverlay]:
+    """
+    Overlay keyed by (trip_id, stop_id, stop_sequence) for each static schedule row.
+
+    See ``RealtimeScheduleRepository.load_recent_rt_overlay_for_schedules`` for the matching rules.
+    """
+    by_triple: dict[tuple[str, str, int], RTStopTimeModel] = {}
+    by_trip: dict[str, list[RTStopTimeModel]] = defaultdict(list)
+    for st in rows:
+        t, s, sq = st.trip_id, st.stop_id, st.stop_sequence
+        by_trip[t].append(st)
+        k3 = (t, s, sq)
+        prev = by_triple.get(k3)
+        if prev is None or st.created_at > prev.created_at:
+            by_triple[k3] = st
+
+    indexes = {trip_id: TripOverlayIndex(trip_rows) for trip_id, trip_rows in by_trip.items()}
+    no_rows = TripOverlayIndex(())
+    stop_map: dict[tuple[str, str, int], RTStopTimeOverlay] = {}
+    for static in schedules:
+        trip_id = static.trip.id
+        stop_id = static.stop.id
+        seq = static.stop_time.stop_sequence
+        key = (trip_id, stop_id, seq)
+        resolved = overlay_for_static_schedule_row(
+            trip_id, stop_id, seq, by_triple, indexes.get(trip_id, no_rows)
+        )
+        if resolved is not None:
+            stop_map[key] = resolved
+    return stop_map
+
+
+def trip_ids_by_schedule_dataset(schedules: Iterable[StaticScheduleModel]) -> dict[str, list[str]]:
+    """Distinct trip ids of ``schedules`` per dataset, a stop can be served by several feeds"""
+
+    trip_ids: dict[str, dict[str, None]] = defaultdict(dict)
+    for static in schedules:
+        trip_ids[static.trip.dataset][static.trip.id] = None
+    return {dataset: list(ids) for dataset, ids in trip_ids.items()}
+
+
 class RealtimeScheduleRepository:
     """RealtimeScheduleRepository repository."""
 
@@ -89,54 +174,40 @@ class RealtimeScheduleRepository:
         stop_sequence >= static (again preferring non-SKIPPED at the minimum sequence).
 
         schedule_relationship SKIPPED is only meaningful for exact matches;
+
+        Only the current and previous partitions are read. A row can be in both, the newer one wins.
         """
         if not schedules:
             return {}, {}
 
-        dataset = schedules[0].trip.dataset
-        trip_ids = list[str](set[str]({s.trip.id for s in schedules}))
-        thirty_mins_ago = datetime.datetime.now(datetime.UTC) - datetime.timedelta(minutes=30)
+        trip_ids_by_dataset = trip_ids_by_schedule_dataset(schedules)
+        window_start, window_end = read_window()
 
         trips_stmt = select(RTTripModel).where(
-            RTTripModel.trip_id.in_(trip_ids),
-            RTTripModel.dataset == dataset,
-            RTTripModel.created_at >= thirty_mins_ago,
+            or_(
+                *(
+                    and_(RTTripModel.dataset == dataset, RTTripModel.trip_id.in_(trip_ids))
+                    for dataset, trip_ids in trip_ids_by_dataset.items()
+                )
+            ),
+            RTTripModel.created_at >= window_start,
+            RTTripModel.created_at < window_end,
         )
         trips_result = await self.session.execute(trips_stmt)
-        trips_by_id: dict[str, RTTripModel] = {}
-        for row in trips_result.scalars():
-            existing = trips_by_id.get(row.trip_id)
-            if existing is None or row.created_at > existing.created_at:
-                trips_by_id[row.trip_id] = row
-
-        stop_map: dict[tuple[str, str, int], RTStopTimeOverlay] = {}
-        if trip_ids:
-            st_stmt = select(RTStopTimeModel).where(
-                RTStopTimeModel.dataset == dataset,
-                RTStopTimeModel.created_at >= thirty_mins_ago,
-                RTStopTimeModel.trip_id.in_(trip_ids),
-            )
-            st_result = await self.session.execute(st_stmt)
-            by_triple: dict[tuple[str, str, int], RTStopTimeModel] = {}
-            by_trip: dict[str, list[RTStopTimeModel]] = defaultdict(list)
-            for st in st_result.scalars():
-                t, s, sq = st.trip_id, st.stop_id, st.stop_sequence
-                by_trip[t].append(st)
-                k3 = (t, s, sq)
-                prev = by_triple.get(k3)
-                if prev is None or st.created_at > prev.created_at:
-                    by_triple[k3] = st
-
-            for static in schedules:
-                trip_id = static.trip.id
-                stop_id = static.stop.id
-                seq = static.stop_time.stop_sequence
-                key = (trip_id, stop_id, seq)
-                resolved = overlay_for_static_schedule_row(
-                    trip_id, stop_id, seq, by_triple, by_trip.get(trip_id, [])
+        trips_by_id = latest_trips_by_id(trips_result.scalars())
+
+        st_stmt = select(RTStopTimeModel).where(
+            or_(
+                *(
+                    and_(RTStopTimeModel.dataset == dataset, RTStopTimeModel.trip_id.in_(trip_ids))
+                    for dataset, trip_ids in trip_ids_by_dataset.items()
                 )
-                if resolved is not None:
-                    stop_map[key] = resolved
+            ),
+            RTStopTimeModel.created_at >= window_start,
+            RTStopTimeModel.created_at < window_end,
+        )
+        st_result = await self.session.execute(st_stmt)
+        stop_map = resolve_stop_time_overlays(schedules, st_result.scalars())
 
         return trips_by_id, stop_map
 
@@ -144,7 +215,12 @@ class RealtimeScheduleRepository:
         """
         Returns all distinct trips.
         """
-        trips_statement = select(RTTripModel.trip_id).distinct()
+        window_start, window_end = read_window()
+        trips_statement = (
+            select(RTTripModel.trip_id)
+            .where(RTTripModel.created_at >= window_start, RTTripModel.created_at < window_end)
+            .distinct()
+        )
         result = await self.session.execute(trips_statement)
         return [trip[0] for trip in result]
 
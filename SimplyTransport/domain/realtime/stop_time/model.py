@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 
 from advanced_alchemy.base import BigIntAuditBase
@@ -6,6 +7,7 @@ from sqlalchemy import ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..enums import ScheduleRealtionship
+from ..partitions import PARTITION_BY, partition_key_column
 
 if TYPE_CHECKING:
     from SimplyTransport.domain.stop.model import StopModel
@@ -23,10 +25,13 @@ class RTStopTimeModel(BigIntAuditBase):
     __table_args__ = (
         Index("ix_rt_stop_time_dataset_created_at", "dataset", "created_at"),
         UniqueConstraint(
-            "stop_id", "trip_id", "stop_sequence", "dataset"
-        ),  # Only store the most recent update per stop_sequence for each trip
+            "stop_id", "trip_id", "stop_sequence", "dataset", "created_at"
+        ),  # Only store the most recent update per stop_sequence for each trip in each partition
+        {"postgresql_partition_by": PARTITION_BY},
     )
 
+    created_at: Mapped[datetime] = partition_key_column()
+
     stop: Mapped[StopModel] = relationship(back_populates="rt_stop_times")
     stop_id: Mapped[str] = mapped_column(
         String(length=1000), ForeignKey("stop.id", ondelete="CASCADE"), index=True
@@ -1,4 +1,4 @@
-from datetime import date, time
+from datetime import date, datetime, time
 from typing import TYPE_CHECKING
 
 from advanced_alchemy.base import BigIntAuditBase
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
 
 from ...enums import Direction
 from ..enums import ScheduleRealtionship
+from ..partitions import PARTITION_BY, partition_key_column
 
 
 class BaseModel(_BaseModel):
@@ -26,10 +27,13 @@ class RTTripModel(BigIntAuditBase):
     __table_args__ = (
         Index("ix_rt_trip_dataset_created_at", "dataset", "created_at"),
         UniqueConstraint(
-            "trip_id", "route_id", "dataset"
-        ),  # Only store the most recent update per trip for each route
+            "trip_id", "route_id", "dataset", "created_at"
+        ),  # Only store the most recent update per trip for each route in each partition
+        {"postgresql_partition_by": PARTITION_BY},
     )
 
+    created_at: Mapped[datetime] = partition_key_column()
+
     trip: Mapped[TripModel] = relationship(back_populates="rt_trips")
     trip_id: Mapped[str] = mapped_column(
         String(length=1000), ForeignKey("trip.id", ondelete="CASCADE"), index=True
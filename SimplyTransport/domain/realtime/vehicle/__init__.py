@@ -1,3 +1,3 @@
-from .model import RTVehicleModel
+from .model import RTVehicleLatestModel, RTVehicleModel
 
-__all__ = ["RTVehicleModel"]
+__all__ = ["RTVehicleLatestModel", "RTVehicleModel"]
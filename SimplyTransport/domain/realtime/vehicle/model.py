@@ -3,10 +3,13 @@ from typing import TYPE_CHECKING
 
 from advanced_alchemy.base import BigIntAuditBase
 from pydantic import BaseModel as _BaseModel
-from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from ..partitions import PARTITION_BY, partition_key_column
+
 if TYPE_CHECKING:
+    from SimplyTransport.domain.route.model import RouteModel
     from SimplyTransport.domain.trip.model import TripModel
 
 
@@ -18,7 +21,12 @@ class BaseModel(_BaseModel):
 
 class RTVehicleModel(BigIntAuditBase):
     __tablename__ = "rt_vehicle"  # type: ignore
-    __table_args__ = (Index("ix_rt_vehicle_dataset_created_at", "dataset", "created_at"),)
+    __table_args__ = (
+        Index("ix_rt_vehicle_dataset_created_at", "dataset", "created_at"),
+        {"postgresql_partition_by": PARTITION_BY},
+    )
+
+    created_at: Mapped[datetime] = partition_key_column()
 
     vehicle_id: Mapped[int] = mapped_column(Integer)
     trip: Mapped[TripModel] = relationship(back_populates="rt_vehicles")
@@ -40,6 +48,30 @@ class RTVehicleModel(BigIntAuditBase):
         return f"{mins} mins ago"
 
 
+class RTVehicleLatestModel(BigIntAuditBase):
+    """
+    Most recent position of each vehicle, upserted by the vehicles importer next to the rt_vehicle
+    history. Route and direction are copied from the trip so maps look vehicles up by index.
+    """
+
+    __tablename__ = "rt_vehicle_latest"  # type: ignore
+    __table_args__ = (
+        UniqueConstraint("vehicle_id", "dataset"),  # One row per vehicle in each dataset
+        Index("ix_rt_vehicle_latest_route_id_direction", "route_id", "direction"),
+    )
+
+    vehicle_id: Mapped[int] = mapped_column(Integer)
+    trip: Mapped[TripModel] = relationship(viewonly=True)
+    trip_id: Mapped[str] = mapped_column(String(length=1000), ForeignKey("trip.id", ondelete="CASCADE"))
+    route: Mapped[RouteModel] = relationship(viewonly=True)
+    route_id: Mapped[str] = mapped_column(String(length=1000), ForeignKey("route.id", ondelete="CASCADE"))
+    direction: Mapped[int] = mapped_column(Integer)
+    time_of_update: Mapped[datetime] = mapped_column(DateTime)
+    lat: Mapped[float] = mapped_column(Float)
+    lon: Mapped[float] = mapped_column(Float)
+    dataset: Mapped[str] = mapped_column(String(length=80))
+
+
 class RTVehicle(BaseModel):
     vehicle_id: int
     trip_id: str
@@ -1,16 +1,15 @@
 from collections.abc import Sequence
 
 from advanced_alchemy.repository import SQLAlchemyAsyncRepository
-from sqlalchemy import func, or_, select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from ...agency.model import AgencyModel
 from ...route.model import RouteModel
-from ...trip.model import TripModel
 from ..enums import REMOVED_TRIP_RELATIONSHIPS
+from ..partitions import read_window
 from ..trip.model import RTTripModel
-from .model import RTVehicleModel
+from .model import RTVehicleLatestModel, RTVehicleModel
 
 
 class RTVehicleRepository(SQLAlchemyAsyncRepository[RTVehicleModel]):  # type: ignore
@@ -22,9 +21,12 @@ class RTVehicleRepository(SQLAlchemyAsyncRepository[RTVehicleModel]):  # type: i
         direction: int,
         *,
         exclude_removed_trips: bool = True,
-    ) -> Sequence[RTVehicleModel]:
+    ) -> Sequence[RTVehicleLatestModel]:
         """Get most recent vehicle updates for vehicles on routes.
 
+        Reads ``rt_vehicle_latest`` by its ``(route_id, direction)`` index; positions older than the
+        realtime read window are left out.
+
         Args:
             route_ids (list): List of route IDs.
             direction (int): Trip direction.
@@ -32,48 +34,38 @@ class RTVehicleRepository(SQLAlchemyAsyncRepository[RTVehicleModel]):  # type: i
                 trip as CANCELED or DELETED (positions are still ingested for other uses).
 
         Returns:
-            list: List of RTVehicleModel objects representing the most recent vehicle updates
+            list: List of RTVehicleLatestModel objects representing the most recent vehicle updates
             for vehicles on the specified routes.
         """
 
-        subquery = (
-            select(
-                RTVehicleModel.vehicle_id,
-                func.max(RTVehicleModel.time_of_update).label("max_time_of_update"),
-            )
-            .join(TripModel, TripModel.id == RTVehicleModel.trip_id)
-            .where(TripModel.route_id.in_(route_ids))
-            .where(TripModel.direction == direction)
-            .group_by(RTVehicleModel.vehicle_id)
-            .alias("subquery")
-        )
+        window_start, window_end = read_window()
 
         statement = (
-            select(RTVehicleModel)
-            .options(
-                joinedload(RTVehicleModel.trip).joinedload(TripModel.route).joinedload(RouteModel.agency)
-            )
-            .join(TripModel, TripModel.id == RTVehicleModel.trip_id)
-            .join(RouteModel, RouteModel.id == TripModel.route_id)
-            .join(AgencyModel, RouteModel.agency_id == AgencyModel.id)
-            .join(
-                subquery,
-                (subquery.c.vehicle_id == RTVehicleModel.vehicle_id)
-                & (subquery.c.max_time_of_update == RTVehicleModel.time_of_update),
-            )
-            .where(TripModel.route_id.in_(route_ids))
-            .where(TripModel.direction == direction)
-            .order_by(RTVehicleModel.vehicle_id.desc())
+            select(RTVehicleLatestModel)
+            .options(joinedload(RTVehicleLatestModel.route).joinedload(RouteModel.agency))
+            .where(RTVehicleLatestModel.route_id.in_(route_ids))
+            .where(RTVehicleLatestModel.direction == direction)
+            .where(RTVehicleLatestModel.updated_at >= window_start)
+            .order_by(RTVehicleLatestModel.vehicle_id.desc())
         )
 
         if exclude_removed_trips:
+            # A trip can have a row in both partitions of the window, only the newest one counts
+            latest_rt_trip = (
+                select(RTTripModel.trip_id, RTTripModel.dataset, RTTripModel.schedule_relationship)
+                .where(RTTripModel.created_at >= window_start, RTTripModel.created_at < window_end)
+                .distinct(RTTripModel.trip_id, RTTripModel.dataset)
+                .order_by(RTTripModel.trip_id, RTTripModel.dataset, RTTripModel.created_at.desc())
+                .subquery("latest_rt_trip")
+            )
             statement = statement.outerjoin(
-                RTTripModel,
-                (RTTripModel.trip_id == TripModel.id) & (RTTripModel.dataset == TripModel.dataset),
+                latest_rt_trip,
+                (latest_rt_trip.c.trip_id == RTVehicleLatestModel.trip_id)
+                & (latest_rt_trip.c.dataset == RTVehicleLatestModel.dataset),
             ).where(
                 or_(
-                    RTTripModel.id.is_(None),
-                    RTTripModel.schedule_relationship.not_in(list(REMOVED_TRIP_RELATIONSHIPS)),
+                    latest_rt_trip.c.trip_id.is_(None),
+                    latest_rt_trip.c.schedule_relationship.not_in(list(REMOVED_TRIP_RELATIONSHIPS)),
                 )
             )
 
@@ -9,8 +9,7 @@ from SimplyTransport.api_contract.map_payloads import RouteSummary
 from SimplyTransport.domain.route.model import RouteModel
 from SimplyTransport.lib.cache import RedisService
 
-from ..stop_times.model import StopTimeModel
-from ..trip.model import TripModel
+from ..stop_route.model import StopRouteModel
 
 
 class RouteRepository(SQLAlchemyAsyncRepository[RouteModel]):  # type: ignore
@@ -43,7 +42,7 @@ class RouteRepository(SQLAlchemyAsyncRepository[RouteModel]):  # type: ignore
         """Get routes by stop_id."""
 
         return await self.list(
-            RouteModel.trips.any(TripModel.stop_times.any(StopTimeModel.stop_id == stop_id))
+            RouteModel.id.in_(select(StopRouteModel.route_id).where(StopRouteModel.stop_id == stop_id))
         )
 
     async def get_routes_by_stop_ids(self, stop_ids: set[str]) -> dict[str, list[RouteSummary]]:
@@ -54,16 +53,14 @@ class RouteRepository(SQLAlchemyAsyncRepository[RouteModel]):  # type: ignore
 
         stmt = (
             select(
-                StopTimeModel.stop_id,
+                StopRouteModel.stop_id,
                 RouteModel.id,
                 RouteModel.short_name,
                 RouteModel.long_name,
             )
-            .select_from(StopTimeModel)
-            .join(TripModel, StopTimeModel.trip_id == TripModel.id)
-            .join(RouteModel, TripModel.route_id == RouteModel.id)
-            .where(StopTimeModel.stop_id.in_(stop_ids))
-            .distinct()
+            .select_from(StopRouteModel)
+            .join(RouteModel, StopRouteModel.route_id == RouteModel.id)
+            .where(StopRouteModel.stop_id.in_(stop_ids))
         )
         result = await self.session.execute(stmt)
         rows = result.all()
@@ -79,7 +76,7 @@ class RouteRepository(SQLAlchemyAsyncRepository[RouteModel]):  # type: ignore
         """Get routes by stop_id with agency."""
 
         return await self.list(
-            RouteModel.trips.any(TripModel.stop_times.any(StopTimeModel.stop_id == stop_id)),
+            RouteModel.id.in_(select(StopRouteModel.route_id).where(StopRouteModel.stop_id == stop_id)),
             statement=select(RouteModel).options(joinedload(RouteModel.agency)),
         )
 
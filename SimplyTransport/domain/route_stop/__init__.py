@@ -0,0 +1,3 @@
+from .model import RouteStopModel
+
+__all__ = ["RouteStopModel"]
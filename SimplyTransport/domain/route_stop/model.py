@@ -0,0 +1,25 @@
+from advanced_alchemy.base import BigIntAuditBase
+from sqlalchemy import Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..enums import Direction
+
+__all__ = ["RouteStopModel"]
+
+
+class RouteStopModel(BigIntAuditBase):
+    """Stop sequence of each route and direction, materialized from stop_time and trip by importgtfs"""
+
+    __tablename__: str = "route_stop"  # type: ignore[assignment]
+    __table_args__ = (
+        UniqueConstraint(
+            "route_id", "direction", "stop_sequence", "stop_id", name="uq_route_stop_route_direction_sequence"
+        ),
+        Index("ix_route_stop_stop_id_direction", "stop_id", "direction"),
+    )
+
+    route_id: Mapped[str] = mapped_column(String(length=1000))
+    direction: Mapped[Direction] = mapped_column(Integer)
+    stop_id: Mapped[str] = mapped_column(String(length=1000))
+    stop_sequence: Mapped[int] = mapped_column(Integer)
+    dataset: Mapped[str] = mapped_column(String(length=80), index=True)
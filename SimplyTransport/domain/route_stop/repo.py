@@ -0,0 +1,34 @@
+from sqlalchemy import delete, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+from ...lib.sqlalchemy_bulk import insert_from_select_statement
+from ..stop_times.model import StopTimeModel
+from ..trip.model import TripModel
+from .model import RouteStopModel
+
+
+def route_stops_statement(dataset: str) -> Insert:
+    """Statement filling ``route_stop`` with the distinct stop sequence of each route and direction"""
+
+    return insert_from_select_statement(
+        RouteStopModel,
+        ("route_id", "direction", "stop_id", "stop_sequence", "dataset"),
+        select(
+            TripModel.route_id,
+            TripModel.direction,
+            StopTimeModel.stop_id,
+            StopTimeModel.stop_sequence,
+            literal(dataset).label("dataset"),
+        )
+        .join(TripModel, TripModel.id == StopTimeModel.trip_id)
+        .where(StopTimeModel.dataset == dataset)
+        .distinct(),
+    )
+
+
+async def refresh_route_stops(session: AsyncSession, dataset: str) -> None:
+    """Rebuilds the ``route_stop`` rows of ``dataset``. Nothing is committed."""
+
+    await session.execute(delete(RouteStopModel).where(RouteStopModel.dataset == dataset))
+    await session.execute(route_stops_statement(dataset))
@@ -1,11 +1,13 @@
-from datetime import time
+from datetime import date, time
 from typing import Any
 
-from sqlalchemy import or_, select
+from sqlalchemy import ColumnElement, Select, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...lib.time_date_conversions import next_date_on_weekday
 from ..calendar.model import CalendarModel
-from ..enums import DayOfWeek
+from ..calendar_dates.model import CalendarDateModel
+from ..enums import DayOfWeek, ExceptionType
 from ..route.model import RouteModel
 from ..stop.model import StopModel
 from ..stop_times.model import StopTimeModel
@@ -24,6 +26,78 @@ def _static_schedule_from_row(row: Any) -> StaticScheduleModel:
     )
 
 
+def _runs_on_weekday(day: DayOfWeek) -> ColumnElement[bool]:
+    if day == DayOfWeek.MONDAY:
+        return CalendarModel.monday == 1
+    elif day == DayOfWeek.TUESDAY:
+        return CalendarModel.tuesday == 1
+    elif day == DayOfWeek.WEDNESDAY:
+        return CalendarModel.wednesday == 1
+    elif day == DayOfWeek.THURSDAY:
+        return CalendarModel.thursday == 1
+    elif day == DayOfWeek.FRIDAY:
+        return CalendarModel.friday == 1
+    elif day == DayOfWeek.SATURDAY:
+        return CalendarModel.saturday == 1
+    elif day == DayOfWeek.SUNDAY:
+        return CalendarModel.sunday == 1
+    else:
+        raise ValueError(f"Invalid day of week {day}")
+
+
+def static_schedules_statement(
+    day: DayOfWeek,
+    stop_id: str | None = None,
+    start_time: time | None = None,
+    end_time: time | None = None,
+    trips: list[str] | None = None,
+    on_date: date | None = None,
+) -> Select:
+    """
+    Statement selecting the static schedules of services running on ``day``.
+
+    Services added by a calendar_dates exception on ``on_date`` (the next ``day`` by default) are
+    selected too, even when their calendar does not run on that weekday.
+    """
+
+    on_date = on_date or next_date_on_weekday(day)
+    added_service_ids = select(CalendarDateModel.service_id).where(
+        CalendarDateModel.date == on_date,
+        CalendarDateModel.exception_type == ExceptionType.added,
+    )
+    conditions = [or_(_runs_on_weekday(day), CalendarModel.id.in_(added_service_ids))]
+
+    if stop_id:
+        conditions.append(StopModel.id == stop_id)
+
+    if trips:
+        conditions.append(TripModel.id.in_(trips))
+
+    if start_time and end_time:
+        if start_time > end_time:
+            conditions.append(
+                or_(
+                    StopTimeModel.arrival_time >= start_time,
+                    StopTimeModel.arrival_time <= end_time,
+                )
+            )
+        else:
+            conditions.append(StopTimeModel.arrival_time >= start_time)
+            conditions.append(StopTimeModel.arrival_time <= end_time)
+
+    return (
+        select(StopTimeModel, RouteModel, CalendarModel, StopModel, TripModel)
+        .join(TripModel, TripModel.id == StopTimeModel.trip_id)
+        .join(StopModel, StopModel.id == StopTimeModel.stop_id)
+        .join(RouteModel, RouteModel.id == TripModel.route_id)
+        .join(CalendarModel, CalendarModel.id == TripModel.service_id)
+        .where(
+            *conditions,
+        )
+        .order_by(StopTimeModel.arrival_time)
+    )
+
+
 class ScheduleRepository:
     """ScheduleRepository repository."""
 
@@ -44,6 +118,7 @@ class ScheduleRepository:
         - stop_id (str | None): The ID of the stop.
         If provided, only schedules for this stop will be retrieved.
         - day (DayOfWeek): The day of the week for which schedules should be retrieved.
+        Services added by a calendar_dates exception on the next such day are included.
         - start_time (time | None): The start time of the schedules.
         If provided, only schedules with arrival times greater than or equal to this time will be retrieved.
         - end_time (time | None): The end time of the schedules.
@@ -54,54 +129,7 @@ class ScheduleRepository:
         - ValueError: If an invalid day of the week is provided.
         """
 
-        conditions = []
-        if day == DayOfWeek.MONDAY:
-            conditions.append(CalendarModel.monday == 1)
-        elif day == DayOfWeek.TUESDAY:
-            conditions.append(CalendarModel.tuesday == 1)
-        elif day == DayOfWeek.WEDNESDAY:
-            conditions.append(CalendarModel.wednesday == 1)
-        elif day == DayOfWeek.THURSDAY:
-            conditions.append(CalendarModel.thursday == 1)
-        elif day == DayOfWeek.FRIDAY:
-            conditions.append(CalendarModel.friday == 1)
-        elif day == DayOfWeek.SATURDAY:
-            conditions.append(CalendarModel.saturday == 1)
-        elif day == DayOfWeek.SUNDAY:
-            conditions.append(CalendarModel.sunday == 1)
-        else:
-            raise ValueError(f"Invalid day of week {day}")
-
-        if stop_id:
-            conditions.append(StopModel.id == stop_id)
-
-        if trips:
-            conditions.append(TripModel.id.in_(trips))
-
-        if start_time and end_time:
-            if start_time > end_time:
-                conditions.append(
-                    or_(
-                        StopTimeModel.arrival_time >= start_time,
-                        StopTimeModel.arrival_time <= end_time,
-                    )
-                )
-            else:
-                conditions.append(StopTimeModel.arrival_time >= start_time)
-                conditions.append(StopTimeModel.arrival_time <= end_time)
-
-        statement = (
-            select(StopTimeModel, RouteModel, CalendarModel, StopModel, TripModel)
-            .join(TripModel, TripModel.id == StopTimeModel.trip_id)
-            .join(StopModel, StopModel.id == StopTimeModel.stop_id)
-            .join(RouteModel, RouteModel.id == TripModel.route_id)
-            .join(CalendarModel, CalendarModel.id == TripModel.service_id)
-            .where(
-                *conditions,
-            )
-            .order_by(StopTimeModel.arrival_time)
-        )
-
+        statement = static_schedules_statement(day, stop_id, start_time, end_time, trips)
         result = await self.session.execute(statement)
         return [_static_schedule_from_row(row) for row in result]
 
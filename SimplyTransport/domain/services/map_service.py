@@ -15,7 +15,7 @@ from SimplyTransport.api_contract.map_payloads import (
     VehiclePoint,
 )
 from SimplyTransport.domain.maps.colors import Colors
-from SimplyTransport.domain.realtime.vehicle.model import RTVehicleModel
+from SimplyTransport.domain.realtime.vehicle.model import RTVehicleLatestModel
 from SimplyTransport.domain.shape.model import ShapeGeometryRow
 from SimplyTransport.lib.cache import RedisService
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -34,11 +34,11 @@ logger = provide_logger(__name__)
 
 
 def _vehicle_point_from_rt(
-    v: RTVehicleModel,
+    v: RTVehicleLatestModel,
     route_id: str,
     color_hex: str,
 ) -> VehiclePoint:
-    route = v.trip.route
+    route = v.route
     agency = route.agency
     return VehiclePoint(
         route_id=route_id,
@@ -83,9 +83,9 @@ class MapService:
         trip_by_route_id = {t.route_id: t for t in trips}
 
         vehicles_on_routes = await self.rt_vehicle_repository.get_vehicles_on_routes(route_ids, direction)
-        vehicles_dict: dict[str, list[RTVehicleModel]] = defaultdict(list)
+        vehicles_dict: dict[str, list[RTVehicleLatestModel]] = defaultdict(list)
         for vehicle in vehicles_on_routes:
-            vehicles_dict[vehicle.trip.route_id].append(vehicle)
+            vehicles_dict[vehicle.route_id].append(vehicle)
 
         shape_ids = list(dict.fromkeys(trip.shape_id for trip in trips))
         shapes = await self.shape_repository.get_sequence_sorted_shapes_by_shape_ids(shape_ids)
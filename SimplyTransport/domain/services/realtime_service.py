@@ -2,8 +2,10 @@ from collections.abc import Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...lib.cache import RedisService
 from ..realtime.enums import REMOVED_TRIP_RELATIONSHIPS, OnTimeStatus
 from ..realtime.realtime_schedule.model import RealTimeScheduleModel
+from ..realtime.realtime_schedule.overlay_store import RealtimeOverlayStore
 from ..realtime.realtime_schedule.repo import RealtimeScheduleRepository
 from ..realtime.stop_time.repo import RTStopTimeRepository
 from ..realtime.trip.repo import RTTripRepository
@@ -18,11 +20,13 @@ class RealTimeService:
         rt_trip_repository: RTTripRepository,
         rt_vehicle_repository: RTVehicleRepository,
         realtime_schedule_repository: RealtimeScheduleRepository,
+        overlay_store: RealtimeOverlayStore | None = None,
     ):
         self.rt_stop_repository = rt_stop_repository
         self.rt_trip_repository = rt_trip_repository
         self.rt_vehicle_repository = rt_vehicle_repository
         self.realtime_schedule_repository = realtime_schedule_repository
+        self.overlay_store = overlay_store
 
     async def get_realtime_schedules_for_static_schedules(
         self, schedules: Sequence[StaticScheduleModel]
@@ -32,10 +36,12 @@ class RealTimeService:
         if not schedules:
             return []
 
-        (
-            overlay_trips,
-            overlay_stop_times,
-        ) = await self.realtime_schedule_repository.load_recent_rt_overlay_for_schedules(schedules)
+        overlay = None
+        if self.overlay_store is not None:
+            overlay = await self.overlay_store.load_recent_rt_overlay_for_schedules(schedules)
+        if overlay is None:
+            overlay = await self.realtime_schedule_repository.load_recent_rt_overlay_for_schedules(schedules)
+        overlay_trips, overlay_stop_times = overlay
 
         realtime_schedules: list[RealTimeScheduleModel] = []
         for static in schedules:
@@ -111,12 +117,18 @@ class RealTimeService:
         return await self.realtime_schedule_repository.get_distinct_realtime_trips()
 
 
-async def provide_realtime_service(db_session: AsyncSession) -> RealTimeService:
-    """Constructs repository and service objects for the realtime service."""
+async def provide_realtime_service(
+    db_session: AsyncSession, redis_service: RedisService | None = None
+) -> RealTimeService:
+    """Constructs repository and service objects for the realtime service.
+
+    With a ``redis_service`` overlays are read from the shared overlay store, falling back to SQL.
+    """
 
     return RealTimeService(
         rt_stop_repository=RTStopTimeRepository(session=db_session),
         rt_trip_repository=RTTripRepository(session=db_session),
         rt_vehicle_repository=RTVehicleRepository(session=db_session),
         realtime_schedule_repository=RealtimeScheduleRepository(session=db_session),
+        overlay_store=RealtimeOverlayStore(redis_service) if redis_service is not None else None,
     )
@@ -2,6 +2,8 @@ from datetime import date, time
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ...lib.time_date_conversions import next_date_on_weekday
+from ...lib.timetable_engine import TimetableEngine, provide_timetable_engine
 from ..calendar_dates.repo import CalendarDateRepository
 from ..enums import DayOfWeek
 from ..schedule.model import StaticScheduleModel
@@ -13,26 +15,48 @@ class ScheduleService:
         self,
         schedule_repository: ScheduleRepository,
         calendar_date_repository: CalendarDateRepository,
+        timetable_engine: TimetableEngine | None = None,
     ):
         self.schedule_repository = schedule_repository
         self.calendar_date_respository = calendar_date_repository
+        self.timetable_engine = timetable_engine
 
     async def get_schedule_on_stop_for_day(self, stop_id: str, day: DayOfWeek) -> list[StaticScheduleModel]:
         """Returns a list of schedules for the given stop and day"""
+        if self.timetable_engine is not None:
+            schedules = self.timetable_engine.departures(stop_id, next_date_on_weekday(day))
+            if schedules is not None:
+                return schedules
         return await self.schedule_repository.get_static_schedules(stop_id=stop_id, day=day)
 
     async def get_all_schedule_for_day_between_times(
         self, day: DayOfWeek, start_time: time, end_time: time, trips: list[str]
     ) -> list[StaticScheduleModel]:
         """Returns all schedules that are currently active"""
-        return await self.schedule_repository.get_static_schedules(
-            day=day, start_time=start_time, end_time=end_time, trips=trips
+        if self.timetable_engine is None or not self.timetable_engine.available:
+            return await self.schedule_repository.get_static_schedules(
+                day=day, start_time=start_time, end_time=end_time, trips=trips
+            )
+
+        schedules, missing_trips = self.timetable_engine.trip_schedules(
+            trips, next_date_on_weekday(day), start_time, end_time
         )
+        if missing_trips:
+            schedules += await self.schedule_repository.get_static_schedules(
+                day=day, start_time=start_time, end_time=end_time, trips=missing_trips
+            )
+        return schedules
 
     async def get_schedule_on_stop_for_day_between_times(
         self, stop_id: str, day: DayOfWeek, start_time: time, end_time: time
     ) -> list[StaticScheduleModel]:
         """Returns a list of schedules for the given stop and day"""
+        if self.timetable_engine is not None:
+            schedules = self.timetable_engine.departures(
+                stop_id, next_date_on_weekday(day), start_time, end_time
+            )
+            if schedules is not None:
+                return schedules
         return await self.schedule_repository.get_static_schedules(
             stop_id=stop_id, day=day, start_time=start_time, end_time=end_time
         )
@@ -57,32 +81,43 @@ class ScheduleService:
         return sorted_schedules
 
     async def remove_exceptions_and_inactive_calendars(
-        self, static_schedules: list[StaticScheduleModel]
-    ) -> list[StaticScheduleModel]:
-        """Removes exceptions from the list of schedules"""
-        current_day = date.today()
-        exceptions_from_db = await self.calendar_date_respository.get_removed_exceptions_on_date(
-            date=current_day
-        )
-        removed_exception_service_ids = {exc.service_id for exc in exceptions_from_db}
-
-        static_schedules_filtered = []
-        for schedule in static_schedules:
-            if not schedule.true_if_active(date=current_day):
-                continue
-            if schedule.calendar.id in removed_exception_service_ids:
-                continue
-            static_schedules_filtered.append(schedule)
-
-        return static_schedules_filtered
-
-    async def add_in_added_exceptions(
-        self, static_schedules: list[StaticScheduleModel]
+        self, static_schedules: list[StaticScheduleModel], on_date: date | None = None
     ) -> list[StaticScheduleModel]:
-        """Adds in added exceptions from the list of schedules"""
-        pass  # TODO
-
-        return static_schedules
+        """
+        Removes the schedules whose service does not run on the given date (today by default).
+
+        Services known to a timetable snapshot are checked against its activation bitmap; the others
+        fall back to the calendar range and the added and removed exceptions from the database.
+        """
+        current_day = on_date or date.today()
+
+        activity: list[bool | None] = [
+            self.timetable_engine.is_service_active(schedule.calendar.id, current_day)
+            if self.timetable_engine is not None
+            else None
+            for schedule in static_schedules
+        ]
+        if None in activity:
+            removed_exceptions = await self.calendar_date_respository.get_removed_exceptions_on_date(
+                date=current_day
+            )
+            added_exceptions = await self.calendar_date_respository.get_added_exceptions_on_date(
+                date=current_day
+            )
+            removed_exception_service_ids = {exc.service_id for exc in removed_exceptions}
+            added_exception_service_ids = {exc.service_id for exc in added_exceptions}
+            activity = [
+                active
+                if active is not None
+                else (
+                    schedule.true_if_active(date=current_day)
+                    and schedule.calendar.id not in removed_exception_service_ids
+                )
+                or schedule.calendar.id in added_exception_service_ids
+                for schedule, active in zip(static_schedules, activity, strict=True)
+            ]
+
+        return [schedule for schedule, active in zip(static_schedules, activity, strict=True) if active]
 
     async def get_by_trip_id(self, trip_id: str) -> list[StaticScheduleModel]:
         """Returns a list of schedules for the given trip_id"""
@@ -91,4 +126,8 @@ class ScheduleService:
 
 async def provide_schedule_service(db_session: AsyncSession) -> ScheduleService:
     """Constructs repository and service objects for the schedule service."""
-    return ScheduleService(ScheduleRepository(session=db_session), CalendarDateRepository(session=db_session))
+    return ScheduleService(
+        ScheduleRepository(session=db_session),
+        CalendarDateRepository(session=db_session),
+        provide_timetable_engine(),
+    )
@@ -6,10 +6,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from ...lib.distance_calculator import calculate_min_max_coordinates, distance_between_points
-from ..route.model import RouteModel
+from ..route_stop.model import RouteStopModel
 from ..stop_features.model import StopFeatureModel
-from ..stop_times.model import StopTimeModel
-from ..trip.model import TripModel
 from .model import StopModel
 
 
@@ -43,34 +41,29 @@ class StopRepository(SQLAlchemyAsyncRepository[StopModel]):  # type: ignore[type
         """Get stops by route_id."""
 
         return await self.list(
-            statement=select(StopModel)
-            .join(StopTimeModel, StopTimeModel.stop_id == StopModel.id)
-            .join(TripModel, TripModel.id == StopTimeModel.trip_id)
-            .where(TripModel.direction == direction)
-            .where(TripModel.route_id == route_id)
-            .distinct(StopModel.id)
+            StopModel.id.in_(
+                select(RouteStopModel.stop_id)
+                .where(RouteStopModel.route_id == route_id)
+                .where(RouteStopModel.direction == direction)
+            )
         )
 
     async def get_stops_by_route_ids(self, route_ids: list[str], direction: int) -> list[StopModel]:
         """Get stops by route_ids."""
 
         return await self.list(
-            statement=select(StopModel)
-            .join(StopTimeModel, StopTimeModel.stop_id == StopModel.id)
-            .join(TripModel, TripModel.id == StopTimeModel.trip_id)
-            .where(TripModel.direction == direction)
-            .where(TripModel.route_id.in_(route_ids))
-            .distinct(StopModel.id)
+            StopModel.id.in_(
+                select(RouteStopModel.stop_id)
+                .where(RouteStopModel.route_id.in_(route_ids))
+                .where(RouteStopModel.direction == direction)
+            )
         )
 
     async def get_direction_of_stop(self, stop_id: str) -> int:
         """Get the direction of a stop."""
 
         result = await self._execute(
-            statement=select(TripModel.direction)
-            .join(StopTimeModel, StopTimeModel.trip_id == TripModel.id)
-            .where(StopTimeModel.stop_id == stop_id)
-            .limit(1)
+            statement=select(RouteStopModel.direction).where(RouteStopModel.stop_id == stop_id).limit(1)
         )
         return result.scalar() or 0
 
@@ -80,14 +73,11 @@ class StopRepository(SQLAlchemyAsyncRepository[StopModel]):  # type: ignore[type
         """Get stops by route_id with a stop_sequence."""
 
         result = await self.session.execute(
-            statement=select(StopModel, StopTimeModel.stop_sequence)
-            .join(StopTimeModel, StopTimeModel.stop_id == StopModel.id)
-            .join(TripModel, TripModel.id == StopTimeModel.trip_id)
-            .join(RouteModel, RouteModel.id == TripModel.route_id)
-            .where(TripModel.direction == direction)
-            .where(RouteModel.id == route_id)
-            .group_by(StopModel.id, StopTimeModel.stop_sequence)
-            .order_by(StopTimeModel.stop_sequence)
+            statement=select(StopModel, RouteStopModel.stop_sequence)
+            .join(RouteStopModel, RouteStopModel.stop_id == StopModel.id)
+            .where(RouteStopModel.route_id == route_id)
+            .where(RouteStopModel.direction == direction)
+            .order_by(RouteStopModel.stop_sequence)
         )
 
         return [(row.StopModel, row.stop_sequence) for row in result.all()]
@@ -0,0 +1,3 @@
+from .model import StopRouteModel
+
+__all__ = ["StopRouteModel"]
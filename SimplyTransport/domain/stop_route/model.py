@@ -0,0 +1,16 @@
+from advanced_alchemy.base import BigIntAuditBase
+from sqlalchemy import String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+__all__ = ["StopRouteModel"]
+
+
+class StopRouteModel(BigIntAuditBase):
+    """Routes calling at each stop, materialized from stop_time and trip by importgtfs"""
+
+    __tablename__: str = "stop_route"  # type: ignore[assignment]
+    __table_args__ = (UniqueConstraint("stop_id", "route_id", name="uq_stop_route_stop_id_route_id"),)
+
+    stop_id: Mapped[str] = mapped_column(String(length=1000), index=True)
+    route_id: Mapped[str] = mapped_column(String(length=1000), index=True)
+    dataset: Mapped[str] = mapped_column(String(length=80), index=True)
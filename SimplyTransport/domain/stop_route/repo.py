@@ -0,0 +1,28 @@
+from sqlalchemy import delete, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+from ...lib.sqlalchemy_bulk import insert_from_select_statement
+from ..stop_times.model import StopTimeModel
+from ..trip.model import TripModel
+from .model import StopRouteModel
+
+
+def stop_routes_statement(dataset: str) -> Insert:
+    """Statement filling ``stop_route`` with every distinct (stop, route) pair of ``dataset``"""
+
+    return insert_from_select_statement(
+        StopRouteModel,
+        ("stop_id", "route_id", "dataset"),
+        select(StopTimeModel.stop_id, TripModel.route_id, literal(dataset).label("dataset"))
+        .join(TripModel, TripModel.id == StopTimeModel.trip_id)
+        .where(StopTimeModel.dataset == dataset)
+        .distinct(),
+    )
+
+
+async def refresh_stop_routes(session: AsyncSession, dataset: str) -> None:
+    """Rebuilds the ``stop_route`` rows of ``dataset``. Nothing is committed."""
+
+    await session.execute(delete(StopRouteModel).where(StopRouteModel.dataset == dataset))
+    await session.execute(stop_routes_statement(dataset))
@@ -1,17 +1,59 @@
+import asyncio
+import itertools
 import json
-from collections.abc import Iterable, Sequence
-from datetime import datetime
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator, Coroutine, Iterable, Sequence
+from contextvars import Context
+from datetime import datetime, timedelta
 from enum import StrEnum
 from typing import Any
 
+from litestar import Litestar, Request
 from litestar.config.response_cache import ResponseCacheConfig
 from litestar.stores.redis import RedisStore
+from litestar.types import ASGIApp
 from opentelemetry.instrumentation.redis import RedisInstrumentor
 from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
 from SimplyTransport.lib.extensions.chunking import chunk_list
 
 from . import settings
-from .cache_keys import CacheKeys
+from .cache_keys import CacheKeys, cache_tags
+from .local_cache import LocalLRUCache
+from .logging.logging import provide_logger
+from .response_cache_refresh import (
+    current_request_scope,
+    hot_request_target,
+    is_rerendering,
+    path_scope,
+    replay_scope,
+    rerender,
+    stale_grace_s,
+)
+from .single_flight import SingleFlight
+from .tracing import get_app_meter
+
+logger = provide_logger(__name__)
+
+# Keys per SCAN / SSCAN page and per UNLINK when invalidating
+INVALIDATION_BATCH_SIZE = 1000
+INVALIDATION_RECONNECT_DELAY_S = 5
+
+# Request counts of hot routes are flushed to Redis every few seconds and reset every window
+HOT_HITS_FLUSH_INTERVAL_S = 10
+HOT_PATHS_WINDOW_S = 60 * 60
+HOT_REFRESH_CONCURRENCY = 4
+HOT_REFRESH_CLAIM_TTL_S = 60
+
+response_cache_lookups_counter = get_app_meter().create_counter(
+    "response_cache.lookups",
+    unit="{lookup}",
+    description=(
+        "Response cache lookups by what answered them: local, redis, stale (served while re-rendered), "
+        "coalesced (waited for another request to recompute) or miss"
+    ),
+)
 
 RedisInstrumentor().instrument()
 
@@ -47,15 +89,354 @@ def redis_store_factory(name: str) -> RedisStore:
     with ``VERSION`` busts cached HTML after a deploy version bump (cached bodies embed
     old asset query strings).
 
+    The response cache coalesces concurrent misses of a key and gets an in-process tier in front
+    of Redis unless ``RESPONSE_CACHE_LOCAL_MAX_BYTES`` is 0.
+
     Returns:
         RedisStore: The created RedisStore object.
     """
     namespace = f"{settings.app.NAME}:{name}"
     if name == "response_cache":
-        namespace = f"{settings.app.NAME}:{name}:v{settings.app.VERSION}"
+        redis = redis_factory()
+        namespace = response_cache_namespace()
+        single_flight = SingleFlight(
+            redis,
+            namespace,
+            lease_ttl_s=settings.app.RESPONSE_CACHE_LEASE_S,
+            wait_s=settings.app.RESPONSE_CACHE_COALESCE_WAIT_S,
+        )
+        if settings.app.RESPONSE_CACHE_LOCAL_MAX_BYTES > 0:
+            return TwoTierRedisStore(
+                redis,
+                namespace=namespace,
+                local=LocalLRUCache(
+                    settings.app.RESPONSE_CACHE_LOCAL_MAX_BYTES, settings.app.RESPONSE_CACHE_LOCAL_MAX_TTL_S
+                ),
+                single_flight=single_flight,
+            )
+        return TaggedRedisStore(redis, namespace=namespace, single_flight=single_flight)
     return RedisStore(redis_factory(), namespace=namespace)
 
 
+def response_cache_namespace() -> str:
+    """
+    The namespace Litestar's response cache store prefixes its keys with.
+
+    Returns:
+        str: The namespace, without the trailing ``:`` separator.
+    """
+    return f"{settings.app.NAME}:response_cache:v{settings.app.VERSION}"
+
+
+def tag_set_key(tag: str) -> str:
+    """Redis set holding the response cache keys tagged ``tag``."""
+    return f"{response_cache_namespace()}:{CacheKeys.Tags.TAG_SET_KEY_TEMPLATE.format(tag=tag)}"
+
+
+def invalidation_channel() -> str:
+    """Pub/sub channel response cache invalidations and refreshes are announced on."""
+    return f"{response_cache_namespace()}:{CacheKeys.Tags.INVALIDATION_CHANNEL}"
+
+
+def hot_paths_key() -> str:
+    """Sorted set of the request paths of ``HOT_REFRESH_OPT`` routes, by request count."""
+    return f"{response_cache_namespace()}:{CacheKeys.HotPaths.HOT_PATHS_KEY}"
+
+
+class TaggedRedisStore(RedisStore):
+    """
+    Response cache store that also records each key in the tag sets of its ``CacheKeys`` template.
+
+    Tag sets live as long as the longest lived key added to them, so invalidating a tag never needs
+    to walk the keyspace. With ``single_flight`` only one request per key recomputes a miss, the
+    others wait for its value, and routes with a ``STALE_GRACE_OPT`` are served stale entries while
+    they are re-rendered in the background.
+
+    Once started, the store follows ``invalidation_channel`` and re-renders the paths the realtime
+    daemon asks for, and counts requests of ``HOT_REFRESH_OPT`` routes in ``hot_paths_key``.
+    """
+
+    def __init__(self, redis: Redis, namespace: str, single_flight: SingleFlight | None = None):
+        super().__init__(redis, namespace=namespace)
+        self.single_flight = single_flight
+        self._app: ASGIApp | None = None
+        self._generation = 0
+        self._hot_hits: Counter[str] = Counter()
+        self._tasks: set[asyncio.Task[object]] = set()
+
+    async def get(self, key: str, renew_for: int | timedelta | None = None) -> bytes | None:
+        if is_rerendering():
+            return None  # Replayed to refresh this entry, the handler has to run
+        if (target := hot_request_target()) is not None:
+            self._hot_hits[target] += 1
+
+        grace = stale_grace_s()
+        value, tier, ttl_ms = await self._lookup(key, renew_for, grace)
+        if value is not None and grace and 0 < ttl_ms <= grace * 1000:
+            tier = "stale"
+            if not await self._revalidate(key):
+                value = None
+        if value is None and self.single_flight is not None and not renew_for:
+            if not await self.single_flight.acquire(key):
+                value = await self.single_flight.wait(key, lambda: self._fetch(key))
+                tier = "coalesced"
+            # Otherwise this request recomputes the response and ``set`` releases the lease
+        response_cache_lookups_counter.add(1, {"tier": tier if value is not None else "miss"})
+        return value
+
+    async def _lookup(
+        self, key: str, renew_for: int | timedelta | None = None, grace: int = 0
+    ) -> tuple[bytes | None, str, int]:
+        """The cached value of ``key``, the tier it came from and its remaining Redis TTL (ms, or -1)"""
+
+        if not grace or renew_for:
+            return await super().get(key, renew_for), "redis", -1
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.get(self._make_key(key))
+        pipe.pttl(self._make_key(key))
+        value, ttl_ms = await pipe.execute()
+        return value, "redis", ttl_ms
+
+    async def _fetch(self, key: str) -> bytes | None:
+        value, _, _ = await self._lookup(key)
+        return value
+
+    async def _revalidate(self, key: str) -> bool:
+        """
+        Re-renders the stale entry ``key`` in the background unless another request already is.
+        False when it cannot be re-rendered and has to be treated as a miss.
+        """
+        scope = current_request_scope()
+        if self.single_flight is None or scope is None:
+            return False
+        if await self.single_flight.acquire(key):
+            context = self.single_flight.hand_over()
+            self._spawn(self._rerender(key, scope["app"], replay_scope(scope)), context)
+        return True
+
+    async def _rerender(self, key: str, app: ASGIApp, scope: dict[str, Any]) -> None:
+        try:
+            await rerender(app, scope)
+        except Exception:
+            logger.exception(f"Response cache: re-rendering {scope['path']} failed")
+        finally:
+            if self.single_flight is not None:
+                await self.single_flight.release(key)
+
+    def _spawn(self, coro: Coroutine[Any, Any, object], context: Context | None = None) -> None:
+        task = asyncio.create_task(coro, context=context)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def set(self, key: str, value: str | bytes, expires_in: int | timedelta | None = None) -> None:
+        if isinstance(expires_in, timedelta):
+            expires_in = int(expires_in.total_seconds())
+        await self._set(key, value, expires_in, stale_grace_s())
+        if self.single_flight is not None:
+            await self.single_flight.release(key)
+
+    async def _set(self, key: str, value: str | bytes, expires_in: int | None, grace: int) -> None:
+        """Writes ``value`` to live ``expires_in`` seconds, plus the route's grace window"""
+
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        ttl = expires_in + grace if expires_in else expires_in
+        full_key = self._make_key(key)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.set(full_key, value, ex=ttl)
+        for tag in cache_tags(key):
+            tag_key = self._make_key(CacheKeys.Tags.TAG_SET_KEY_TEMPLATE.format(tag=tag))
+            pipe.sadd(tag_key, full_key)
+            if ttl:
+                pipe.expire(tag_key, ttl, nx=True)
+                pipe.expire(tag_key, ttl, gt=True)
+        await pipe.execute()
+
+    def start(self, app: ASGIApp) -> None:
+        """Starts following ``invalidation_channel`` and flushing request counts"""
+
+        if self._app is not None:
+            return
+        self._app = app
+        self._spawn(self.listen_for_invalidations())
+        self._spawn(self.flush_hot_hits())
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._app = None
+
+    async def listen_for_invalidations(self) -> None:
+        """Applies announced messages, resubscribing after connection errors"""
+
+        while True:
+            try:
+                async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(invalidation_channel())
+                    self._on_subscribed(True)
+                    async for message in pubsub.listen():
+                        self.handle_message(message["data"])
+            except RedisError as e:
+                logger.warning(f"Response cache invalidations unavailable: {e}")
+            except Exception:
+                logger.exception("Response cache invalidation listener failed")
+            finally:
+                self._on_subscribed(False)
+            await asyncio.sleep(INVALIDATION_RECONNECT_DELAY_S)
+
+    def handle_message(self, data: str | bytes) -> None:
+        """
+        Handles one message published by ``RedisService``: ``{"tags": [...]}`` or ``{"all": true}``
+        invalidations, or ``{"refresh": [...], "id": ...}`` paths to re-render.
+        """
+        message = json.loads(data)
+        if "refresh" in message:
+            self._spawn(self.refresh_paths(message["id"], message["refresh"]))
+        elif message.get("all"):
+            self._evict(clear=True)
+        else:
+            self._evict(tags=message.get("tags", []))
+
+    async def refresh_paths(self, refresh_id: str, targets: list[str]) -> int:
+        """Re-renders ``targets`` if this worker is the first to claim ``refresh_id``, returns how many"""
+
+        if self._app is None:
+            return 0
+        claim_key = self._make_key(
+            CacheKeys.HotPaths.HOT_REFRESH_CLAIM_KEY_TEMPLATE.format(refresh_id=refresh_id)
+        )
+        if not await self._redis.set(claim_key, "1", nx=True, ex=HOT_REFRESH_CLAIM_TTL_S):
+            return 0
+
+        rendered = 0
+        for batch in itertools.batched(targets, HOT_REFRESH_CONCURRENCY, strict=False):
+            results = await asyncio.gather(
+                *(rerender(self._app, path_scope(target)) for target in batch), return_exceptions=True
+            )
+            for target, result in zip(batch, results, strict=True):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Response cache: refreshing {target} failed: {result}")
+                else:
+                    rendered += 1
+        return rendered
+
+    async def flush_hot_hits(self) -> None:
+        """Adds the requests counted since the last flush to ``hot_paths_key``, every few seconds"""
+
+        while True:
+            await asyncio.sleep(HOT_HITS_FLUSH_INTERVAL_S)
+            if not self._hot_hits:
+                continue
+            hits, self._hot_hits = self._hot_hits, Counter()
+            key = hot_paths_key()
+            pipe = self._redis.pipeline(transaction=False)
+            for target, count in hits.items():
+                pipe.zincrby(key, count, target)
+            pipe.expire(key, HOT_PATHS_WINDOW_S, nx=True)
+            try:
+                await pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Response cache: could not record hot paths: {e}")
+
+    def _on_subscribed(self, subscribed: bool) -> None:
+        self._evict(clear=True)
+
+    def _evict(self, tags: Iterable[str] = (), clear: bool = False) -> None:
+        self._generation += 1
+
+
+class TwoTierRedisStore(TaggedRedisStore):
+    """
+    Response cache store with a per-worker ``LocalLRUCache`` in front of Redis.
+
+    Local copies live no longer than the fresh part of the Redis entry they came from, stale entries
+    are always read from Redis. Invalidations are announced on ``invalidation_channel``; the local
+    tier only serves while this worker is subscribed to it, and is emptied whenever the subscription
+    drops, so a missed announcement can never serve a stale entry.
+    """
+
+    def __init__(
+        self, redis: Redis, namespace: str, local: LocalLRUCache, single_flight: SingleFlight | None = None
+    ):
+        super().__init__(redis, namespace=namespace, single_flight=single_flight)
+        self.local = local
+        self._subscribed = False
+
+    async def _lookup(
+        self, key: str, renew_for: int | timedelta | None = None, grace: int = 0
+    ) -> tuple[bytes | None, str, int]:
+        if renew_for or not self._subscribed:
+            return await super()._lookup(key, renew_for, grace)
+
+        value = self.local.get(key)
+        if value is not None:
+            return value, "local", -1
+
+        generation = self._generation
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.get(self._make_key(key))
+        pipe.pttl(self._make_key(key))
+        value, ttl_ms = await pipe.execute()
+        # An invalidation that arrived while Redis was being read may have covered this value
+        if value is not None and generation == self._generation:
+            self.local.set(key, value, (ttl_ms / 1000 - grace) if ttl_ms > 0 else None)
+        return value, "redis", ttl_ms
+
+    async def _set(self, key: str, value: str | bytes, expires_in: int | None, grace: int) -> None:
+        await super()._set(key, value, expires_in, grace)
+        if self._subscribed:
+            self.local.set(key, value.encode("utf-8") if isinstance(value, str) else value, expires_in)
+
+    async def delete(self, key: str) -> None:
+        self.local.delete(key)
+        await super().delete(key)
+
+    async def delete_all(self) -> None:
+        self._evict(clear=True)
+        await super().delete_all()
+
+    def _on_subscribed(self, subscribed: bool) -> None:
+        super()._on_subscribed(subscribed)
+        self._subscribed = subscribed
+
+    def _evict(self, tags: Iterable[str] = (), clear: bool = False) -> None:
+        super()._evict(tags, clear)
+        if clear:
+            self.local.clear()
+        else:
+            self.local.evict_tags(tags)
+
+
+async def start_response_cache_tier(app: Litestar) -> None:
+    """Startup hook subscribing this worker's response cache store to invalidations and refreshes"""
+
+    store = app.response_cache_config.get_store_from_app(app)
+    if isinstance(store, TaggedRedisStore):
+        store.start(app)
+
+
+async def release_response_cache_lease(request: Request) -> None:
+    """
+    After response hook releasing the lease of a request that recomputed a cache miss but did not
+    cache its response (an error status), so waiting requests take over without waiting it out.
+    """
+    if not request.route_handler.cache:
+        return
+    config = request.app.response_cache_config
+    store = config.get_store_from_app(request.app)
+    if isinstance(store, TaggedRedisStore) and store.single_flight is not None:
+        key_builder = request.route_handler.cache_key_builder or config.key_builder
+        await store.single_flight.release(key_builder(request))
+
+
+async def stop_response_cache_tier(app: Litestar) -> None:
+    store = app.response_cache_config.get_store_from_app(app)
+    if isinstance(store, TaggedRedisStore):
+        await store.stop()
+
+
 def redis_service_cache_config_factory() -> ResponseCacheConfig:
     """
     Factory function that returns a ResponseCacheConfig object for Redis service cache.
@@ -73,19 +454,60 @@ class RedisService:
         self.redis = redis_factory()
         self.default_expiration = default_expiration
 
+    async def delete_keys_by_tag(self, *tags: str) -> int:
+        """
+        Delete the response cache entries carrying any of ``tags``.
+
+        Each tag set is renamed away before it is read, so entries cached meanwhile start a fresh set
+        instead of being dropped from it. Members are read with ``SSCAN`` and unlinked in batches, then
+        the tags are announced so the workers' in-process tiers evict their copies.
+
+        Args:
+            *tags (str): Tags from ``cache_tag`` / ``entity_tag``.
+
+        Returns:
+            int: The number of keys deleted.
+        """
+        deleted = 0
+        for tag in tags:
+            tag_key = tag_set_key(tag)
+            draining_key = f"{tag_key}:draining:{uuid.uuid4().hex}"
+            try:
+                await self.redis.rename(tag_key, draining_key)
+            except ResponseError:
+                continue  # Nothing cached under this tag
+            deleted += await self._unlink(self.redis.sscan_iter(draining_key, count=INVALIDATION_BATCH_SIZE))
+            await self.redis.unlink(draining_key)
+        if tags:
+            await self.redis.publish(invalidation_channel(), json.dumps({"tags": list(tags)}))
+        return deleted
+
+    async def _unlink(self, keys: AsyncIterator[Any]) -> int:
+        deleted = 0
+        batch: list[Any] = []
+        async for key in keys:
+            batch.append(key)
+            if len(batch) == INVALIDATION_BATCH_SIZE:
+                deleted += await self.redis.unlink(*batch)
+                batch.clear()
+        if batch:
+            deleted += await self.redis.unlink(*batch)
+        return deleted
+
     async def delete_keys_by_pattern(self, pattern: StrEnum) -> None:
         """
         Delete keys from the cache based on the given pattern.
 
+        Walks the keyspace with ``SCAN`` so Redis keeps serving other clients meanwhile. Prefer
+        ``delete_keys_by_tag`` for response cache entries.
+
         Args:
             pattern (StrEnum): The pattern to match the keys.
 
         Returns:
             None
         """
-        keys = await self.redis.keys(pattern.value)
-        if keys:
-            await self.redis.delete(*keys)
+        await self._unlink(self.redis.scan_iter(match=pattern.value, count=INVALIDATION_BATCH_SIZE))
 
     async def delete_key(self, key: str) -> None:
         """
@@ -113,9 +535,28 @@ class RedisService:
 
     async def delete_all_keys(self) -> None:
         """
-        Deletes all keys from the cache.
+        Deletes all keys from the cache, freeing them in the background, and empties the
+        in-process response cache tiers.
+        """
+        await self.redis.flushdb(asynchronous=True)
+        await self.redis.publish(invalidation_channel(), json.dumps({"all": True}))
+
+    async def request_hot_refresh(self, count: int) -> list[str]:
+        """
+        Asks the web workers to re-render the ``count`` most requested paths of ``HOT_REFRESH_OPT``
+        routes; one worker claims the request.
+
+        Returns:
+            list[str]: The paths asked for.
         """
-        await self.delete_keys_by_pattern(CacheKeys.Meta.ALL_KEYS)
+        targets = [
+            target.decode() if isinstance(target, bytes) else target
+            for target in await self.redis.zrevrange(hot_paths_key(), 0, count - 1)
+        ]
+        if targets:
+            message = {"refresh": targets, "id": uuid.uuid4().hex}
+            await self.redis.publish(invalidation_channel(), json.dumps(message))
+        return targets
 
     async def count_all_keys(self) -> int:
         """
@@ -1,3 +1,6 @@
+import functools
+import re
+import string
 from collections.abc import Callable
 from enum import StrEnum
 
@@ -44,6 +47,15 @@ class CacheKeys:
         REALTIME_ROUTE_DELETE_ALL_KEY_TEMPLATE = "*realtime:route:*"
         REALTIME_ROUTE_DELETE_KEY_TEMPLATE = "*realtime:route:{route_id}:*"
 
+    class RealTimeOverlay(StrEnum):
+        OVERLAY_TRIP_KEY_TEMPLATE = "realtime_overlay:{dataset}:{trip_id}"
+        OVERLAY_READY_KEY_TEMPLATE = "realtime_overlay_ready:{dataset}"
+        OVERLAY_DELETE_ALL_KEY_TEMPLATE = "*realtime_overlay*"
+
+    class RealTimeFeeds(StrEnum):
+        FEED_STATE_KEY_TEMPLATE = "realtime_feed_state:{feed}:{dataset}"
+        FEED_STATE_DELETE_ALL_KEY_TEMPLATE = "*realtime_feed_state:*"
+
     class StaticMaps(StrEnum):
         STATIC_MAP_AGENCY_ROUTE_KEY_TEMPLATE = "static_map:agency:route:{agency_id}"
         STATIC_MAP_AGENCY_ROUTE_DELETE_ALL_KEY_TEMPLATE = "*static_map:agency:route:*"
@@ -51,6 +63,8 @@ class CacheKeys:
         STATIC_MAP_STOP_KEY_TEMPLATE = "static_map:stop:{map_type}"
         STATIC_MAP_STOP_DELETE_ALL_KEY_TEMPLATE = "*static_map:stop:*"
         STATIC_MAP_STOP_DELETE_KEY_TEMPLATE = "*static_map:stop:{map_type}"
+        STATIC_MAP_PAYLOAD_KEY_TEMPLATE = "static_map_payload:{key}"
+        STATIC_MAP_PAYLOAD_INDEX_KEY_TEMPLATE = "static_map_payloads"
 
     class Delays(StrEnum):
         DELAYS_AGGREGATED_SPECIFIC_KEY_TEMPLATE = (
@@ -81,6 +95,87 @@ class CacheKeys:
         DELAYS_STATS_KEY_TEMPLATE = "stats:delays:most_recent"
         STATISTICS_DELETE_ALL_KEY_TEMPLATE = "*stats:*"
 
+    class Tags(StrEnum):
+        TAG_SET_KEY_TEMPLATE = "cache_tag:{tag}"
+        INVALIDATION_CHANNEL = "cache_invalidation"
+
+    class SingleFlight(StrEnum):
+        LEASE_KEY_TEMPLATE = "single_flight_lease:{key}"
+
+    class HotPaths(StrEnum):
+        HOT_PATHS_KEY = "hot_paths"
+        HOT_REFRESH_CLAIM_KEY_TEMPLATE = "hot_refresh_claim:{refresh_id}"
+
+
+# Template fields naming a GTFS entity; keys built with one are also tagged ``{entity}:{value}``.
+# ``id`` is only used by ``StopApi.DETAILED_KEY_TEMPLATE``.
+_ENTITY_TAG_FIELDS = {
+    "stop_id": "stop",
+    "id": "stop",
+    "route_id": "route",
+    "trip_id": "trip",
+    "agency_id": "agency",
+    "route_code": "route_code",
+}
+
+
+def cache_tag(template: StrEnum) -> str:
+    """
+    Tag of a key family: the literal prefix of a key template or ``*<prefix>:*`` delete pattern.
+
+    ``REALTIME_STOP_KEY_TEMPLATE`` and ``REALTIME_STOP_DELETE_ALL_KEY_TEMPLATE`` are both
+    ``realtime:stop``. Keys carry every prefix of their template (``realtime``, ``realtime:stop``,
+    ``realtime:stop:table``), so the tag of a delete pattern covers the keys the pattern matched.
+    """
+    return re.split(r"[{*]", template.value.lstrip("*"), maxsplit=1)[0].rstrip(":")
+
+
+def entity_tag(entity: str, entity_id: str) -> str:
+    """Tag of the keys holding data about one stop, route, trip, agency or route code"""
+    return f"{entity}:{entity_id}"
+
+
+@functools.cache
+def _tag_matchers() -> list[tuple[re.Pattern[str], tuple[str, ...]]]:
+    matchers = []
+    for family in vars(CacheKeys).values():
+        if not isinstance(family, type) or not issubclass(family, StrEnum):
+            continue
+        if family in (CacheKeys.Tags, CacheKeys.SingleFlight, CacheKeys.HotPaths):
+            continue
+        for template in family:
+            if not template.name.endswith("_KEY_TEMPLATE") or "DELETE" in template.name:
+                continue
+            regex = "".join(
+                re.escape(literal) + (f"(?P<{field}>.*?)" if field is not None else "")
+                for literal, field, _, _ in string.Formatter().parse(template.value)
+            )
+            segments = cache_tag(template).split(":")
+            prefixes = tuple(":".join(segments[: i + 1]) for i in range(len(segments)))
+            matchers.append((re.compile(regex), prefixes))
+    # Most specific template first, "realtime:stop:table:{stop_id}" before "realtime:stop:{stop_id}"
+    return sorted(matchers, key=lambda matcher: len(matcher[1][-1]), reverse=True)
+
+
+def cache_tags(key: str) -> list[str]:
+    """
+    Tags of a key built from a ``CacheKeys`` template: its family prefixes and the entities it names.
+
+    ``stop_map:8220DB000002`` is tagged ``stop_map`` and ``stop:8220DB000002``. Keys that match no
+    template have no tags.
+    """
+    for pattern, prefixes in _tag_matchers():
+        match = pattern.fullmatch(key)
+        if match is None:
+            continue
+        entities = [
+            entity_tag(_ENTITY_TAG_FIELDS[field], value)
+            for field, value in match.groupdict().items()
+            if field in _ENTITY_TAG_FIELDS
+        ]
+        return [*prefixes, *entities]
+    return []
+
 
 def simple_key_builder(template: StrEnum) -> Callable[[Request], str]:
     """
@@ -1,3 +1,6 @@
 from litestar.config.compression import CompressionConfig
 
-compression_config = CompressionConfig(backend="gzip")
+# Routes with this opt set send responses they encoded themselves, see ``domain.maps.payload_store``
+SKIP_COMPRESSION_OPT = "skip_compression"
+
+compression_config = CompressionConfig(backend="gzip", exclude_opt_key=SKIP_COMPRESSION_OPT)
@@ -4,7 +4,8 @@ Redis-backed concurrency limiting for async callables (e.g. CLI jobs under async
 
 import functools
 import uuid
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from typing import ParamSpec, TypeVar
 
 import click
@@ -27,6 +28,11 @@ def cli_lock_key(lock_name: str) -> str:
     return f"{settings.app.NAME}:cli:{lock_name}"
 
 
+def concurrency_key(lock_name: str) -> str:
+    """Redis key of the ``concurrency`` limiter named ``lock_name``."""
+    return f"{settings.app.NAME}:concurrency:{lock_name}"
+
+
 async def is_lock_held(lock_name: str) -> bool:
     client = redis_factory()
     try:
@@ -143,6 +149,26 @@ async def _release_mutex(redis: Redis, key: str, token: str) -> None:
     await redis.execute_command("EVAL", _MUTEX_RELEASE_LUA, 1, key, token)
 
 
+@asynccontextmanager
+async def hold_mutex(redis: Redis, lock_name: str, ttl_seconds: int) -> AsyncIterator[bool]:
+    """
+    Hold the ``concurrency(1)`` mutex named ``lock_name`` on an existing client for the block.
+
+    Yields False without waiting when another holder has it. Long-running processes use this to share
+    a lock with the one-shot CLI commands without opening a connection per acquire.
+    """
+    key = concurrency_key(lock_name)
+    token = await _acquire_mutex(redis, key, ttl_seconds * 1000)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            try:
+                await _release_mutex(redis, key, token)
+            except redis_exc.RedisError:
+                logger.exception("Failed to release concurrency lock %s", lock_name)
+
+
 async def _acquire_semaphore(redis: Redis, key: str, limit: int, ttl_ms: int) -> str | None:
     token = str(uuid.uuid4())
     result = await redis.execute_command(
@@ -160,7 +186,7 @@ async def _release_semaphore(redis: Redis, key: str, token: str) -> None:
 def concurrency(
     limit: int,
     *,
-    name: str | None = None,
+    name: str | Callable[..., str] | None = None,
     ttl_seconds: int = 3600,
     skip_log: str | None = None,
 ) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R | None]]]:
@@ -172,7 +198,8 @@ def concurrency(
 
     Args:
         limit: Maximum concurrent holders (1 = mutual exclusion).
-        name: Redis key suffix; defaults to the wrapped function's __name__.
+        name: Redis key suffix; defaults to the wrapped function's __name__. A callable is given the
+            call's arguments and returns the suffix, e.g. to lock per dataset instead of per command.
         ttl_seconds: Lock / lease TTL; must exceed worst-case runtime or another process
             may acquire while this job is still running.
         skip_log: Optional extra text appended to the warning when skipping.
@@ -181,11 +208,10 @@ def concurrency(
         raise ValueError("limit must be >= 1")
 
     def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R | None]]:
-        lock_name = name or func.__name__
-        key = f"{settings.app.NAME}:concurrency:{lock_name}"
-
         @functools.wraps(func)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R | None:
+            lock_name = name(*args, **kwargs) if callable(name) else name or func.__name__
+            key = concurrency_key(lock_name)
             client: Redis | None = None
             token: str | None = None
             try:
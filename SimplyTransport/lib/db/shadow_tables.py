@@ -0,0 +1,292 @@
+"""
+Shadow tables for staged bulk loads.
+
+A shadow table is an index-free copy of a live table that is filled off to the side, indexed once
+the load has finished and then swapped in with renames inside a single transaction, so readers only
+ever see the old or the new contents.
+"""
+
+import hashlib
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .database import async_engine
+
+SHADOW_SUFFIX = "__staging"
+RETIRED_SUFFIX = "__retired"
+# PostgreSQL truncates identifiers beyond 63 bytes, which would make renamed names collide
+_MAX_IDENTIFIER_LENGTH = 63
+
+_INDEX_DEFINITION = re.compile(r"^(CREATE (?:UNIQUE )?INDEX) (\S+) ON (?:ONLY )?(\S+) (.*)$", re.DOTALL)
+_REFERENCES = re.compile(r"REFERENCES (\S+?)\(")
+_SINGLE_COLUMN_FOREIGN_KEY = re.compile(r"^FOREIGN KEY \((\w+)\) REFERENCES (\S+?)\((\w+)\)")
+
+
+@dataclass(frozen=True, slots=True)
+class _IndexDefinition:
+    name: str
+    definition: str
+
+
+@dataclass(frozen=True, slots=True)
+class _ConstraintDefinition:
+    table: str
+    name: str
+    kind: str
+    definition: str
+    partitioned: bool = False
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _unqualified(name: str) -> str:
+    return name.rsplit(".", 1)[-1].strip('"')
+
+
+def shadow_name(name: str, suffix: str = SHADOW_SUFFIX) -> str:
+    """Name of the shadow counterpart of a table, index or constraint."""
+
+    candidate = f"{name}{suffix}"
+    if len(candidate) <= _MAX_IDENTIFIER_LENGTH:
+        return candidate
+    digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+    return f"{name[: _MAX_IDENTIFIER_LENGTH - len(suffix) - 9]}_{digest}{suffix}"
+
+
+async def _indexes(conn: AsyncConnection, table: str) -> list[_IndexDefinition]:
+    """Plain indexes of ``table``; indexes that back a constraint are rebuilt with the constraint."""
+
+    result = await conn.execute(
+        text(
+            """
+            SELECT i.relname AS name, pg_get_indexdef(i.oid) AS definition
+            FROM pg_index x
+            JOIN pg_class i ON i.oid = x.indexrelid
+            WHERE x.indrelid = CAST(:table AS regclass)
+              AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint c
+                WHERE c.conrelid = x.indrelid AND c.conindid = i.oid AND c.contype IN ('p', 'u', 'x')
+              )
+            ORDER BY i.relname
+            """
+        ),
+        {"table": table},
+    )
+    return [_IndexDefinition(row.name, row.definition) for row in result]
+
+
+async def _constraints(conn: AsyncConnection, table: str) -> list[_ConstraintDefinition]:
+    result = await conn.execute(
+        text(
+            """
+            SELECT conname AS name, contype AS kind, pg_get_constraintdef(oid) AS definition
+            FROM pg_constraint
+            WHERE conrelid = CAST(:table AS regclass) AND contype IN ('p', 'u', 'c', 'f')
+            ORDER BY conname
+            """
+        ),
+        {"table": table},
+    )
+    return [_ConstraintDefinition(table, row.name, row.kind, row.definition) for row in result]
+
+
+async def _external_foreign_keys(conn: AsyncConnection, tables: Sequence[str]) -> list[_ConstraintDefinition]:
+    """Foreign keys on tables outside ``tables`` that point into ``tables``.
+
+    Keys a partition inherits from its partitioned parent are skipped; re-adding the parent's key
+    recreates them.
+    """
+
+    result = await conn.execute(
+        text(
+            """
+            SELECT c.conrelid::regclass::text AS table_name,
+                   c.conname AS name,
+                   pg_get_constraintdef(c.oid) AS definition,
+                   t.relkind = 'p' AS partitioned
+            FROM pg_constraint c
+            JOIN pg_class t ON t.oid = c.conrelid
+            WHERE c.contype = 'f'
+              AND c.conparentid = 0
+              AND c.confrelid::regclass::text = ANY(:tables)
+              AND NOT (c.conrelid::regclass::text = ANY(:tables))
+            ORDER BY c.conname
+            """
+        ),
+        {"tables": list(tables)},
+    )
+    return [
+        _ConstraintDefinition(row.table_name, row.name, "f", row.definition, row.partitioned)
+        for row in result
+    ]
+
+
+def _shadow_index_definition(index: _IndexDefinition, table: str) -> str:
+    match = _INDEX_DEFINITION.match(index.definition)
+    if match is None:
+        raise ValueError(f"Unrecognised index definition for {index.name}: {index.definition}")
+    create, _, _, rest = match.groups()
+    return f"{create} {_quote(shadow_name(index.name))} ON {_quote(shadow_name(table))} {rest}"
+
+
+def _retarget_references(definition: str, tables: Sequence[str]) -> str:
+    """Point ``REFERENCES x(...)`` at the shadow of ``x`` when ``x`` is being staged too."""
+
+    def replace(match: re.Match[str]) -> str:
+        referenced = _unqualified(match.group(1))
+        if referenced in tables:
+            return f"REFERENCES {_quote(shadow_name(referenced))}("
+        return match.group(0)
+
+    return _REFERENCES.sub(replace, definition)
+
+
+def _delete_orphans_statement(constraint: _ConstraintDefinition) -> str | None:
+    """Deletes the rows ``constraint`` would reject, as its ``ON DELETE CASCADE`` would have done."""
+
+    match = _SINGLE_COLUMN_FOREIGN_KEY.match(constraint.definition)
+    if match is None or "ON DELETE CASCADE" not in constraint.definition:
+        return None
+    column, referenced, referenced_column = match.groups()
+    return (
+        f"DELETE FROM {constraint.table} AS orphan WHERE NOT EXISTS "
+        f"(SELECT 1 FROM {referenced} AS parent WHERE parent.{referenced_column} = orphan.{column})"
+    )
+
+
+async def drop_shadow_tables(tables: Sequence[str]) -> None:
+    """Drops any shadow tables left for ``tables`` (e.g. by an aborted load)."""
+
+    async with async_engine.begin() as conn:
+        for table in tables:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {_quote(shadow_name(table))} CASCADE"))
+
+
+async def create_shadow_tables(tables: Sequence[str], dataset: str) -> None:
+    """
+    Creates an unindexed shadow for each table and carries over the rows of every other dataset.
+
+    Only columns, defaults and ``NOT NULL`` are copied so the bulk load pays no index maintenance;
+    :func:`build_shadow_indexes` adds the rest once the load is done.
+    """
+
+    await drop_shadow_tables(tables)
+    async with async_engine.begin() as conn:
+        for table in tables:
+            shadow = _quote(shadow_name(table))
+            await conn.execute(
+                text(f"CREATE TABLE {shadow} (LIKE {_quote(table)} INCLUDING DEFAULTS INCLUDING IDENTITY)")
+            )
+            await conn.execute(
+                text(f"INSERT INTO {shadow} SELECT * FROM {_quote(table)} WHERE dataset <> :dataset"),
+                {"dataset": dataset},
+            )
+
+
+async def build_shadow_indexes(tables: Sequence[str]) -> None:
+    """
+    Mirrors the indexes and constraints of each live table onto its shadow.
+
+    Keys and indexes are built before foreign keys so that references between shadows resolve.
+    """
+
+    async with async_engine.begin() as conn:
+        foreign_keys: list[_ConstraintDefinition] = []
+        for table in tables:
+            shadow = _quote(shadow_name(table))
+            for constraint in await _constraints(conn, table):
+                if constraint.kind == "f":
+                    foreign_keys.append(constraint)
+                    continue
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE {shadow} ADD CONSTRAINT {_quote(shadow_name(constraint.name))} "
+                        f"{constraint.definition}"
+                    )
+                )
+            for index in await _indexes(conn, table):
+                await conn.execute(text(_shadow_index_definition(index, table)))
+
+        for constraint in foreign_keys:
+            definition = _retarget_references(constraint.definition, tables)
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {_quote(shadow_name(constraint.table))} "
+                    f"ADD CONSTRAINT {_quote(shadow_name(constraint.name))} {definition}"
+                )
+            )
+
+        for table in tables:
+            await conn.execute(text(f"ANALYZE {_quote(shadow_name(table))}"))
+
+
+async def swap_shadow_tables(tables: Sequence[str]) -> None:
+    """
+    Atomically replaces each live table with its shadow.
+
+    Inside one transaction the live tables are renamed aside, the shadows take their names (and the
+    original index / constraint names), owned sequences move across and the old tables are dropped.
+    Foreign keys from other tables are re-pointed at the new tables as ``NOT VALID`` so the swap does
+    not have to scan them; partitioned tables (the realtime ones) are validated instead, after their
+    cascading orphans are deleted.
+    """
+
+    async with async_engine.begin() as conn:
+        external_foreign_keys = await _external_foreign_keys(conn, tables)
+        renames: list[tuple[str, str, str]] = []
+        for table in tables:
+            for constraint in await _constraints(conn, table):
+                renames.append(("CONSTRAINT", table, constraint.name))
+            for index in await _indexes(conn, table):
+                renames.append(("INDEX", table, index.name))
+
+        for table in tables:
+            await conn.execute(text(f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE"))
+
+        for table in tables:
+            sequence = await conn.scalar(
+                text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table}
+            )
+            if sequence:
+                await conn.execute(
+                    text(f"ALTER SEQUENCE {sequence} OWNED BY {_quote(shadow_name(table))}.id")
+                )
+            await conn.execute(
+                text(f"ALTER TABLE {_quote(table)} RENAME TO {_quote(shadow_name(table, RETIRED_SUFFIX))}")
+            )
+            await conn.execute(text(f"ALTER TABLE {_quote(shadow_name(table))} RENAME TO {_quote(table)}"))
+
+        for table in tables:
+            await conn.execute(text(f"DROP TABLE {_quote(shadow_name(table, RETIRED_SUFFIX))} CASCADE"))
+
+        for kind, table, name in renames:
+            if kind == "CONSTRAINT":
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE {_quote(table)} RENAME CONSTRAINT "
+                        f"{_quote(shadow_name(name))} TO {_quote(name)}"
+                    )
+                )
+            else:
+                await conn.execute(text(f"ALTER INDEX {_quote(shadow_name(name))} RENAME TO {_quote(name)}"))
+
+        for constraint in external_foreign_keys:
+            # Partitioned tables cannot take NOT VALID foreign keys, they are validated on the spot
+            not_valid = " NOT VALID"
+            if constraint.partitioned:
+                not_valid = ""
+                delete_orphans = _delete_orphans_statement(constraint)
+                if delete_orphans is not None:
+                    await conn.execute(text(delete_orphans))
+            await conn.execute(
+                text(
+                    f"ALTER TABLE {constraint.table} ADD CONSTRAINT {_quote(constraint.name)} "
+                    f"{constraint.definition}{not_valid}"
+                )
+            )
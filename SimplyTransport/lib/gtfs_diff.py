@@ -0,0 +1,393 @@
+"""
+Incremental GTFS static imports keyed on content hashes.
+
+Each entity of a feed is reduced to a 64 bit hash of the rows that describe it: a trip hashes its
+``trips.txt`` row together with its ``stop_times.txt`` rows, a calendar its ``calendar.txt`` row
+with its ``calendar_dates.txt`` rows, a shape all of its points. Comparing those hashes with the
+ones stored by the previous import of the dataset tells which entities were inserted, updated or
+deleted, and only those rows are rewritten.
+"""
+
+import hashlib
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import ARRAY, String, any_, delete, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..domain.gtfs_entity_hash.model import GTFSEntityHashModel
+from ..domain.route.model import RouteModel
+from ..domain.stop_times.model import StopTimeModel
+from ..domain.trip.model import TripModel
+from . import gtfs_importers as imp
+from .cache import RedisService
+from .cache_keys import CacheKeys, cache_tag, entity_tag
+from .sqlalchemy_bulk import bulk_copy, bulk_upsert, reserve_sequence_ids
+
+type EntityKey = tuple[str, str]
+
+ENTITY_TYPES = ("agency", "calendar", "route", "stop", "trip", "shape")
+
+# file -> (entity type the rows belong to, column holding the entity id)
+ENTITY_SOURCES: dict[str, tuple[str, str]] = {
+    "agency.txt": ("agency", "agency_id"),
+    "calendar.txt": ("calendar", "service_id"),
+    "calendar_dates.txt": ("calendar", "service_id"),
+    "routes.txt": ("route", "route_id"),
+    "stops.txt": ("stop", "stop_id"),
+    "trips.txt": ("trip", "trip_id"),
+    "stop_times.txt": ("trip", "trip_id"),
+    "shapes.txt": ("shape", "shape_id"),
+}
+
+# Files whose rows are keyed on the entity id, upserted parents first so foreign keys resolve
+_PARENT_FILES = ("agency.txt", "calendar.txt", "routes.txt", "stops.txt", "trips.txt")
+# Files whose rows are replaced wholesale for every changed entity
+_CHILD_FILES = ("stop_times.txt", "calendar_dates.txt", "shapes.txt")
+# Entities that no longer appear in the feed are deleted children first
+_DELETE_ORDER = ("trip", "stop", "route", "calendar", "agency")
+
+_HASH_MODULUS = 2**64
+_SIGNED_HASH_LIMIT = 2**63
+
+
+@dataclass(slots=True)
+class EntityDiff:
+    """Ids of one entity type that changed between two imports"""
+
+    inserted: set[str] = field(default_factory=set)
+    updated: set[str] = field(default_factory=set)
+    deleted: set[str] = field(default_factory=set)
+
+    @property
+    def changed(self) -> set[str]:
+        return self.inserted | self.updated | self.deleted
+
+    def __len__(self) -> int:
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def summary(self) -> dict[str, int]:
+        return {"inserted": len(self.inserted), "updated": len(self.updated), "deleted": len(self.deleted)}
+
+
+@dataclass(slots=True)
+class AffectedEntities:
+    """Stops, routes and agencies whose cached pages may show changed schedule data"""
+
+    stops: set[str] = field(default_factory=set)
+    routes: set[str] = field(default_factory=set)
+    agencies: set[str] = field(default_factory=set)
+
+    def update(self, other: AffectedEntities) -> None:
+        self.stops |= other.stops
+        self.routes |= other.routes
+        self.agencies |= other.agencies
+
+
+def row_hash(file: str, row: Mapping[str, Any]) -> int:
+    """Order independent 64 bit digest of a CSV row, salted with the file it came from"""
+
+    digest = hashlib.blake2b(file.encode(), digest_size=8)
+    for column in sorted(row, key=str):
+        value = row[column]
+        digest.update(f"\x1f{column}={'' if value is None else value}".encode())
+    return int.from_bytes(digest.digest())
+
+
+def hash_entities(sources: Iterable[tuple[str, Iterable[Mapping[str, Any]]]]) -> dict[EntityKey, int]:
+    """
+    Content hash of every entity found in ``sources``.
+
+    Row hashes are summed modulo 2**64 so the result does not depend on row order within a file.
+
+    Args:
+        sources: ``(file name, rows)`` pairs, e.g. ``("trips.txt", csv.DictReader(...))``.
+
+    Returns:
+        dict[EntityKey, int]: ``(entity type, entity id)`` to unsigned 64 bit hash.
+    """
+
+    hashes: defaultdict[EntityKey, int] = defaultdict(int)
+    for file, rows in sources:
+        entity_type, id_column = ENTITY_SOURCES[file]
+        for row in rows:
+            key = (entity_type, row[id_column])
+            hashes[key] = (hashes[key] + row_hash(file, row)) % _HASH_MODULUS
+    return dict(hashes)
+
+
+def diff_entities(
+    old: Mapping[EntityKey, int],
+    new: Mapping[EntityKey, int],
+    entity_types: Iterable[str] = ENTITY_TYPES,
+) -> dict[str, EntityDiff]:
+    """Inserted, updated and deleted ids per entity type, limited to ``entity_types``"""
+
+    diffs = {entity_type: EntityDiff() for entity_type in entity_types}
+    for (entity_type, entity_id), content_hash in new.items():
+        if entity_type not in diffs:
+            continue
+        previous = old.get((entity_type, entity_id))
+        if previous is None:
+            diffs[entity_type].inserted.add(entity_id)
+        elif previous != content_hash:
+            diffs[entity_type].updated.add(entity_id)
+    for entity_type, entity_id in old:
+        if entity_type in diffs and (entity_type, entity_id) not in new:
+            diffs[entity_type].deleted.add(entity_id)
+    return diffs
+
+
+def to_signed(content_hash: int) -> int:
+    """Maps an unsigned 64 bit hash onto the range of a PostgreSQL ``BIGINT``"""
+
+    return content_hash - _HASH_MODULUS if content_hash >= _SIGNED_HASH_LIMIT else content_hash
+
+
+def _any(ids: Iterable[str]):
+    # One array parameter rather than one bind per id, asyncpg caps a statement at 32767 parameters
+    return any_(literal(sorted(ids), ARRAY(String)))
+
+
+def _read(source: str, file: str) -> Iterator[dict[str, Any]]:
+    importer = imp.GTFSImporter(file, source)
+    if not importer.exists():
+        return iter(())
+    return importer.get_reader()
+
+
+def _file_for(entity_type: str) -> str:
+    return next(file for file in _PARENT_FILES if ENTITY_SOURCES[file][0] == entity_type)
+
+
+async def load_entity_hashes(session: AsyncSession, dataset: str) -> dict[EntityKey, int]:
+    """The entity hashes recorded by the last import of ``dataset``"""
+
+    result = await session.execute(
+        select(
+            GTFSEntityHashModel.entity_type,
+            GTFSEntityHashModel.entity_id,
+            GTFSEntityHashModel.content_hash,
+        ).where(GTFSEntityHashModel.dataset == dataset)
+    )
+    return {
+        (entity_type, entity_id): content_hash % _HASH_MODULUS
+        for entity_type, entity_id, content_hash in result
+    }
+
+
+async def delete_entity_hashes(session: AsyncSession, dataset: str) -> None:
+    """Forgets the hashes of ``dataset`` so the next diff import starts from a full import"""
+
+    await session.execute(delete(GTFSEntityHashModel).where(GTFSEntityHashModel.dataset == dataset))
+
+
+async def save_entity_hashes(
+    session: AsyncSession,
+    dataset: str,
+    hashes: Mapping[EntityKey, int],
+    diffs: Mapping[str, EntityDiff] | None = None,
+) -> None:
+    """
+    Records ``hashes`` as the baseline for the next diff import of ``dataset``.
+
+    Without ``diffs`` the baseline is rewritten in full, otherwise only the changed entries are.
+    Nothing is committed.
+    """
+
+    if diffs is None:
+        await delete_entity_hashes(session, dataset)
+        audit = (datetime.now(UTC),) * 2
+        records = [
+            (entity_type, entity_id, to_signed(content_hash), dataset, *audit)
+            for (entity_type, entity_id), content_hash in hashes.items()
+        ]
+        for i in range(0, len(records), imp.COPY_BATCH_SIZE):
+            batch = records[i : i + imp.COPY_BATCH_SIZE]
+            ids = await reserve_sequence_ids(session, GTFSEntityHashModel, len(batch))
+            await bulk_copy(
+                session,
+                GTFSEntityHashModel,
+                ("id", "entity_type", "entity_id", "content_hash", "dataset", "created_at", "updated_at"),
+                [(id_, *record) for id_, record in zip(ids, batch, strict=True)],
+                auto_commit=False,
+            )
+        return
+
+    for entity_type, diff in diffs.items():
+        if diff.deleted:
+            await session.execute(
+                delete(GTFSEntityHashModel).where(
+                    GTFSEntityHashModel.dataset == dataset,
+                    GTFSEntityHashModel.entity_type == entity_type,
+                    GTFSEntityHashModel.entity_id == _any(diff.deleted),
+                )
+            )
+        await bulk_upsert(
+            session,
+            GTFSEntityHashModel,
+            [
+                {
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "content_hash": to_signed(hashes[(entity_type, entity_id)]),
+                    "dataset": dataset,
+                }
+                for entity_id in diff.inserted | diff.updated
+            ],
+            ["dataset", "entity_type", "entity_id"],
+            {"content_hash": "content_hash", "updated_at": "updated_at"},
+            auto_commit=False,
+        )
+
+
+async def find_affected_entities(
+    session: AsyncSession, dataset: str, diffs: Mapping[str, EntityDiff]
+) -> AffectedEntities:
+    """
+    Stops, routes and agencies touched by ``diffs`` according to the current contents of the database.
+
+    Called both before and after :func:`apply_entity_diff` to catch what a trip served before and
+    after it changed. Calendar and shape changes touch every trip that runs on them.
+    """
+
+    def ids(entity_type: str) -> set[str]:
+        return diffs[entity_type].changed if entity_type in diffs else set()
+
+    affected = AffectedEntities(stops=ids("stop"), routes=ids("route"), agencies=ids("agency"))
+    trip_ids, service_ids, shape_ids = ids("trip"), ids("calendar"), ids("shape")
+    if trip_ids or service_ids or shape_ids:
+        touched = (
+            TripModel.dataset == dataset,
+            or_(
+                TripModel.id == _any(trip_ids),
+                TripModel.service_id == _any(service_ids),
+                TripModel.shape_id == _any(shape_ids),
+            ),
+        )
+        routes = await session.scalars(select(TripModel.route_id).where(*touched).distinct())
+        affected.routes.update(routes)
+        stops = await session.scalars(
+            select(StopTimeModel.stop_id)
+            .where(StopTimeModel.trip_id.in_(select(TripModel.id).where(*touched)))
+            .distinct()
+        )
+        affected.stops.update(stops)
+    if affected.routes:
+        agencies = await session.scalars(
+            select(RouteModel.agency_id).where(RouteModel.id == _any(affected.routes)).distinct()
+        )
+        affected.agencies.update(agencies)
+    return affected
+
+
+async def _copy_rows(
+    session: AsyncSession, importer: imp.AsyncImporter, rows: Iterable[dict[str, Any]]
+) -> int:
+    columns: tuple[str, ...] = (*importer.copy_columns, "created_at", "updated_at")
+    if importer.reserve_ids:
+        columns = ("id", *columns)
+    copied = 0
+    records: list[tuple[Any, ...]] = []
+
+    async def flush() -> None:
+        batch = records
+        if importer.reserve_ids:
+            ids = await reserve_sequence_ids(session, importer.model, len(batch))
+            batch = [(id_, *record) for id_, record in zip(ids, batch, strict=True)]
+        await bulk_copy(session, importer.model, columns, batch, auto_commit=False)
+
+    audit = (datetime.now(UTC),) * 2
+    for row in rows:
+        records.append(importer.copy_record(row) + audit)
+        if len(records) >= imp.COPY_BATCH_SIZE:
+            await flush()
+            copied += len(records)
+            records = []
+    if records:
+        await flush()
+        copied += len(records)
+    return copied
+
+
+async def apply_entity_diff(
+    session: AsyncSession, source: str, dataset: str, diffs: Mapping[str, EntityDiff]
+) -> dict[str, int]:
+    """
+    Writes the rows of every changed entity of ``dataset`` from the feed at ``source``.
+
+    Parents are upserted on their GTFS id, so rows referencing them (realtime updates, stop
+    features) survive an update. The child rows of a changed trip, calendar or shape are deleted and
+    copied in again, then entities missing from the feed are deleted. Nothing is committed.
+
+    Returns:
+        dict[str, int]: Number of rows written per file.
+    """
+
+    rows_written: dict[str, int] = {}
+    seen: defaultdict[str, set[str]] = defaultdict(set)
+
+    for file in _PARENT_FILES:
+        entity_type, id_column = ENTITY_SOURCES[file]
+        if not diffs.get(entity_type):
+            continue
+        changed = diffs[entity_type].changed
+        importer = imp.get_importer_for_file(file, iter(()), None, dataset)
+        rows = []
+        for row in _read(source, file):
+            if row[id_column] in changed:
+                rows.append(dict(zip(importer.copy_columns, importer.copy_record(row), strict=True)))
+                seen[entity_type].add(row[id_column])
+        if entity_type == "stop":
+            # Parent stations first, stop.parent_station references stop.id
+            rows.sort(key=lambda row: row["parent_station"] is not None)
+        update = {column: column for column in importer.copy_columns if column != "id"}
+        update["updated_at"] = "updated_at"
+        await bulk_upsert(session, importer.model, rows, ["id"], update, auto_commit=False)
+        rows_written[file] = len(rows)
+
+    for file in _CHILD_FILES:
+        entity_type, id_column = ENTITY_SOURCES[file]
+        if not diffs.get(entity_type):
+            continue
+        changed = diffs[entity_type].changed
+        importer = imp.get_importer_for_file(file, iter(()), None, dataset)
+        model: Any = importer.model
+        await session.execute(
+            delete(model).where(model.dataset == dataset, getattr(model, id_column) == _any(changed))
+        )
+        rows = (row for row in _read(source, file) if row[id_column] in changed)
+        rows_written[file] = await _copy_rows(session, importer, rows)
+
+    for entity_type in _DELETE_ORDER:
+        if not diffs.get(entity_type):
+            continue
+        removed = diffs[entity_type].changed - seen[entity_type]
+        if removed:
+            model = imp.IMPORTER_CLASSES_BY_FILE[_file_for(entity_type)].model
+            await session.execute(delete(model).where(model.dataset == dataset, model.id == _any(removed)))
+
+    return rows_written
+
+
+def cache_invalidation_tags(affected: AffectedEntities) -> list[str]:
+    """The response cache tags of the entries that may hold data about ``affected``"""
+
+    tags = [entity_tag("stop", s) for s in sorted(affected.stops)]
+    tags += [entity_tag("route", r) for r in sorted(affected.routes)]
+    if affected.agencies or affected.routes:
+        tags += [entity_tag("agency", a) for a in sorted(affected.agencies | {"All"})]
+    if affected.stops:
+        # Keyed on coordinates / map type rather than stop id, so any stop change invalidates them all
+        tags.append(cache_tag(CacheKeys.StopMaps.STOP_MAP_NEARBY_DELETE_ALL_KEY_TEMPLATE))
+        tags.append(cache_tag(CacheKeys.StaticMaps.STATIC_MAP_STOP_DELETE_ALL_KEY_TEMPLATE))
+    return tags
+
+
+async def invalidate_affected_keys(redis_service: RedisService, affected: AffectedEntities) -> int:
+    """Deletes the cached responses that may show data about ``affected``, returns how many were deleted"""
+
+    return await redis_service.delete_keys_by_tag(*cache_invalidation_tags(affected))
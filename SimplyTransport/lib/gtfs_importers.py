@@ -1,9 +1,16 @@
 import asyncio
+import contextlib
 import csv
+import io
+import os
+import zipfile
 from abc import ABC, abstractmethod
-from collections.abc import Iterator
+from collections.abc import Callable, Coroutine, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import UTC, datetime
+from graphlib import TopologicalSorter
+from pathlib import PurePosixPath
 from typing import Any, Literal
 
 import rich.progress as rp
@@ -20,10 +27,34 @@ from ..domain.stop_times.model import StopTimeModel
 from ..domain.trip.model import TripModel
 from . import time_date_conversions as tdc
 from .db.database import async_session_factory, session
+from .sqlalchemy_bulk import bulk_copy, reserve_sequence_ids
 
 NUMBER_OF_CONSUMERS = 2
 QUEUE_MAXSIZE = 2
 
+# "copy" streams typed tuples through binary COPY; "insert" is the original ORM / Core INSERT path
+type Loader = Literal["copy", "insert"]
+LOADERS: tuple[Loader, ...] = ("copy", "insert")
+DEFAULT_LOADER: Loader = "copy"
+COPY_BATCH_SIZE = 50000
+# Parallel parsing: worker processes each turn a byte range of the file into COPY tuples
+DEFAULT_PARSE_WORKERS = 1
+DEFAULT_PARSE_CHUNK_SIZE_MB = 16
+# Database connections shared by all importers running at once, each consumer holds one per batch
+DEFAULT_CONNECTION_BUDGET = 4
+
+# file -> files whose rows it references through foreign keys, imported first
+IMPORT_DEPENDENCIES: dict[str, tuple[str, ...]] = {
+    "agency.txt": (),
+    "calendar.txt": (),
+    "calendar_dates.txt": ("calendar.txt",),
+    "routes.txt": ("agency.txt",),
+    "stops.txt": (),
+    "trips.txt": ("routes.txt", "calendar.txt"),
+    "stop_times.txt": ("trips.txt", "stops.txt"),
+    "shapes.txt": (),
+}
+
 progress_columns = (
     rp.SpinnerColumn(finished_text="✅"),
     "[progress.description]{task.description}",
@@ -45,12 +76,117 @@ class GTFSCoreBatch:
     rows: list[dict[str, Any]]
 
 
+@dataclass(frozen=True, slots=True)
+class GTFSCopyBatch:
+    """Payload for binary ``COPY``: tuples ordered like ``columns`` (ids are added by the consumer)."""
+
+    model: type
+    table_name: str
+    columns: tuple[str, ...]
+    records: list[tuple[Any, ...]]
+    reserve_ids: bool
+
+
+@dataclass(frozen=True, slots=True)
+class ParallelParse:
+    """Where and how to split a file for :meth:`AsyncImporter.parallel_copy_producer`"""
+
+    path: str
+    workers: int
+    chunk_size: int
+
+    def worthwhile(self) -> bool:
+        """Spinning up a pool only pays off for files spanning several chunks"""
+
+        return self.workers > 1 and os.path.getsize(self.path) > self.chunk_size
+
+
+def split_byte_ranges(path: str, chunk_size: int) -> list[tuple[int, int]]:
+    """
+    Splits the rows of a CSV file (everything after the header) into ``[start, end)`` byte ranges.
+
+    Each range ends on a line boundary, so quoted fields containing newlines are not supported,
+    which GTFS feeds do not use in practice.
+    """
+
+    size = os.path.getsize(path)
+    ranges: list[tuple[int, int]] = []
+    with open(path, "rb") as f:
+        f.readline()  # Skip the header row
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_size, size))
+            f.readline()  # Run on to the end of the line the chunk boundary fell in
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def parse_chunk(
+    importer_class: type[AsyncImporter],
+    path: str,
+    start: int,
+    end: int,
+    dataset: str,
+    audit: tuple[datetime, datetime],
+) -> list[tuple[Any, ...]]:
+    """Worker process entry point: converts one byte range of ``path`` into COPY tuples"""
+
+    with open(path, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8-sig")]))
+        f.seek(start)
+        data = f.read(end - start).decode("utf8")
+
+    importer = importer_class(iter(()), None, dataset)
+    return [
+        importer.copy_record(dict(zip(header, row, strict=False))) + audit
+        for row in csv.reader(io.StringIO(data))
+        if row
+    ]
+
+
+def _optional_int(value: str) -> int | None:
+    return int(value) if value != "" else None
+
+
+def _optional_float(value: str) -> float | None:
+    return float(value) if value != "" else None
+
+
+def _optional_str(value: str) -> str | None:
+    return value if value != "" else None
+
+
 class AsyncImporter(ABC):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
+    # Set by each importer for the COPY loader
+    model: type
+    copy_columns: tuple[str, ...]
+    progress_label: str
+    # True when ``id`` is a sequence-backed surrogate key rather than a GTFS id present in the file
+    reserve_ids: bool = False
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
         self.reader = reader
         self.row_count = row_count
         self.dataset = dataset
+        self.loader = loader
         self.rows_imported = 0
+        # COPY target; pointed at a shadow table by staged imports
+        self.table_name: str = self.model.__tablename__  # type: ignore[attr-defined]
+        # Set to parse the file in worker processes instead of reading ``reader`` on the event loop
+        self.parallel: ParallelParse | None = None
+        # Set to size progress on bytes read from the file rather than on ``row_count``
+        self.source: GTFSImporter | None = None
+        # Set when importing alongside other files: one live display and a shared connection limit
+        self.shared_progress: rp.Progress | None = None
+        self.connection_budget: asyncio.Semaphore | None = None
 
     @abstractmethod
     def __str__(self) -> str:
@@ -68,8 +204,132 @@ class AsyncImporter(ABC):
     def clear_table(self):
         pass
 
+    @abstractmethod
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        """Converts a CSV row into a tuple ordered like ``copy_columns``"""
+        pass
+
+    def progress_display(self) -> contextlib.AbstractContextManager[rp.Progress]:
+        """The shared display when importing concurrently, otherwise a display of its own"""
+
+        if self.shared_progress is not None:
+            return contextlib.nullcontext(self.shared_progress)
+        return rp.Progress(*progress_columns)
+
+    def progress_total(self) -> int | None:
+        """Progress bar total: bytes of the source file when known, otherwise the row count"""
 
-async def consumer(q: asyncio.Queue) -> None:
+        if self.source is not None:
+            return self.source.size()
+        return self.row_count
+
+    def advance_progress(self, progress: rp.Progress, task: rp.TaskID, rows: int) -> None:
+        if self.source is not None:
+            progress.update(task, completed=self.source.bytes_read())
+        else:
+            progress.update(task, advance=rows)
+
+    def active_producer(self):
+        """The producer matching the selected loader"""
+
+        if self.loader != "copy":
+            return self.producer
+        if self.parallel is not None and self.parallel.worthwhile():
+            return self.parallel_copy_producer
+        return self.copy_producer
+
+    async def copy_producer(self, q: asyncio.Queue, number_of_consumers: int):
+        """Batches CSV rows as typed tuples for binary COPY, skipping ORM objects and dicts entirely"""
+
+        columns = (*self.copy_columns, "created_at", "updated_at")
+        records: list[tuple[Any, ...]] = []
+        now = datetime.now(UTC)
+        audit = (now, now)
+
+        with self.progress_display() as progress:
+            task = progress.add_task(f"[green]Copying {self.progress_label}...", total=self.progress_total())
+
+            for row in self.reader:
+                if not records:
+                    now = datetime.now(UTC)
+                    audit = (now, now)
+                records.append(self.copy_record(row) + audit)
+                self.rows_imported += 1
+
+                if len(records) >= COPY_BATCH_SIZE:
+                    await q.put(
+                        GTFSCopyBatch(self.model, self.table_name, columns, records, self.reserve_ids)
+                    )
+                    self.advance_progress(progress, task, len(records))
+                    records = []
+
+            if records:
+                await q.put(GTFSCopyBatch(self.model, self.table_name, columns, records, self.reserve_ids))
+                self.advance_progress(progress, task, len(records))
+
+            # Signal the consumer that the producer is done
+            for _ in range(number_of_consumers):
+                await q.put(None)
+
+    async def parallel_copy_producer(self, q: asyncio.Queue, number_of_consumers: int):
+        """
+        Parses byte ranges of the file in a process pool and queues the resulting batches for COPY.
+
+        CSV parsing and type conversion run off the event loop, so the consumers are never starved.
+        At most two chunks per worker are in flight to bound the memory held by parsed rows.
+        """
+
+        if self.parallel is None:
+            raise ValueError("parallel_copy_producer requires 'parallel' to be set")
+        parallel = self.parallel
+        columns = (*self.copy_columns, "created_at", "updated_at")
+        ranges = iter(split_byte_ranges(parallel.path, parallel.chunk_size))
+        loop = asyncio.get_running_loop()
+
+        with (
+            self.progress_display() as progress,
+            ProcessPoolExecutor(max_workers=parallel.workers) as pool,
+        ):
+            task = progress.add_task(
+                f"[green]Copying {self.progress_label} ({parallel.workers} workers)...",
+                total=os.path.getsize(parallel.path),
+            )
+            pending: dict[asyncio.Future, int] = {}
+
+            while True:
+                while len(pending) < parallel.workers * 2 and (chunk := next(ranges, None)) is not None:
+                    start, end = chunk
+                    now = datetime.now(UTC)
+                    audit = (now, now)
+                    future = loop.run_in_executor(
+                        pool, parse_chunk, type(self), parallel.path, start, end, self.dataset, audit
+                    )
+                    pending[future] = end - start
+                if not pending:
+                    break
+
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    records = future.result()
+                    self.rows_imported += len(records)
+                    for i in range(0, len(records), COPY_BATCH_SIZE):
+                        await q.put(
+                            GTFSCopyBatch(
+                                self.model,
+                                self.table_name,
+                                columns,
+                                records[i : i + COPY_BATCH_SIZE],
+                                self.reserve_ids,
+                            )
+                        )
+                    progress.update(task, advance=pending.pop(future))
+
+            # Signal the consumer that the producer is done
+            for _ in range(number_of_consumers):
+                await q.put(None)
+
+
+async def consumer(q: asyncio.Queue, connection_budget: asyncio.Semaphore | None = None) -> None:
     async with async_session_factory() as session:
         while True:
             batch = await q.get()
@@ -77,100 +337,232 @@ async def consumer(q: asyncio.Queue) -> None:
             if batch is None:
                 break
 
-            if isinstance(batch, GTFSCoreBatch):
-                if batch.table == "stop_time":
-                    await session.execute(insert(StopTimeModel), batch.rows)
-                elif batch.table == "shape":
-                    await session.execute(insert(ShapeModel), batch.rows)
-                else:
-                    msg = f"Unknown GTFS core batch table: {batch.table}"
-                    raise ValueError(msg)
-                await session.commit()
-            else:
-                session.add_all(batch)
-                await session.commit()
+            # Each batch ends in a commit, which hands the connection back to the pool
+            async with connection_budget or contextlib.nullcontext():
+                await write_batch(session, batch)
 
             q.task_done()
 
 
-def create_queue_and_tasks(producer) -> list[asyncio.Task]:
+async def write_batch(session, batch) -> None:
+    """Writes one queued batch and commits it"""
+
+    if isinstance(batch, GTFSCopyBatch):
+        columns = batch.columns
+        records = batch.records
+        if batch.reserve_ids:
+            ids = await reserve_sequence_ids(session, batch.model, len(records))
+            columns = ("id", *columns)
+            records = [(id_, *record) for id_, record in zip(ids, records, strict=True)]
+        await bulk_copy(session, batch.model, columns, records, table_name=batch.table_name)
+    elif isinstance(batch, GTFSCoreBatch):
+        if batch.table == "stop_time":
+            await session.execute(insert(StopTimeModel), batch.rows)
+        elif batch.table == "shape":
+            await session.execute(insert(ShapeModel), batch.rows)
+        else:
+            msg = f"Unknown GTFS core batch table: {batch.table}"
+            raise ValueError(msg)
+        await session.commit()
+    else:
+        session.add_all(batch)
+        await session.commit()
+
+
+def create_queue_and_tasks(
+    producer, connection_budget: asyncio.Semaphore | None = None
+) -> list[asyncio.Task]:
     """Creates a queue and tasks for producers and consumers"""
 
     q = asyncio.Queue(maxsize=QUEUE_MAXSIZE)
     producer_task = asyncio.create_task(producer(q, NUMBER_OF_CONSUMERS))
-    consumer_tasks = [asyncio.create_task(consumer(q)) for _ in range(NUMBER_OF_CONSUMERS)]
+    consumer_tasks = [asyncio.create_task(consumer(q, connection_budget)) for _ in range(NUMBER_OF_CONSUMERS)]
 
     return consumer_tasks + [producer_task]
 
 
+async def run_import_graph(
+    jobs: Mapping[str, Callable[[], Coroutine[Any, Any, None]]],
+    dependencies: Mapping[str, tuple[str, ...]] = IMPORT_DEPENDENCIES,
+) -> None:
+    """
+    Runs each file's import job as soon as the jobs of the files it depends on have finished.
+
+    Dependencies on files without a job (e.g. missing from the feed) are ignored. If a job fails
+    the jobs still running are cancelled and the error is raised.
+
+    Raises:
+        graphlib.CycleError: If ``dependencies`` contain a cycle.
+    """
+
+    sorter = TopologicalSorter(
+        {
+            file: [dependency for dependency in dependencies.get(file, ()) if dependency in jobs]
+            for file in jobs
+        }
+    )
+    sorter.prepare()
+    running: dict[asyncio.Task, str] = {}
+    try:
+        while sorter.is_active():
+            for file in sorter.get_ready():
+                running[asyncio.create_task(jobs[file]())] = file
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                file = running.pop(task)
+                task.result()
+                sorter.done(file)
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+
+
+def rows_per_second(row_count: int, seconds: float) -> int:
+    """Import throughput rounded to whole rows, used for per-file reporting"""
+
+    if seconds <= 0:
+        return row_count
+    return round(row_count / seconds)
+
+
 def get_importer_for_file(
-    file: str, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str
+    file: str,
+    reader: Iterator[dict[str, Any]],
+    row_count: int | None,
+    dataset: str,
+    loader: Loader = DEFAULT_LOADER,
 ) -> AsyncImporter:
     """Maps a file name to the appropriate importer class"""
 
-    map_file_to_importer = {
-        "agency.txt": AgencyImporter,
-        "calendar.txt": CalendarImporter,
-        "calendar_dates.txt": CalendarDateImporter,
-        "routes.txt": RouteImporter,
-        "stops.txt": StopImporter,
-        "trips.txt": TripImporter,
-        "shapes.txt": ShapeImporter,
-        "stop_times.txt": StopTimeImporter,
-    }
     try:
-        importer_class = map_file_to_importer[file]
+        importer_class = IMPORTER_CLASSES_BY_FILE[file]
     except KeyError as err:
         raise ValueError(f"File '{file}' does not have a supported importer.") from err
-    importer = importer_class(reader, row_count, dataset)
+    importer = importer_class(reader, row_count, dataset, loader)
     return importer
 
 
+def is_gtfs_archive(path: str) -> bool:
+    """True when ``path`` is a zipped feed rather than a directory of .txt files"""
+
+    return path.lower().endswith(".zip") and os.path.isfile(path)
+
+
+def _archive_member(archive: zipfile.ZipFile, filename: str) -> zipfile.ZipInfo | None:
+    """The member named ``filename``, at the root of the archive or inside a single folder"""
+
+    for info in archive.infolist():
+        if not info.is_dir() and PurePosixPath(info.filename).name == filename:
+            return info
+    return None
+
+
 class GTFSImporter:
+    """Reads one GTFS file, either from a feed directory or streamed straight out of the feed zip"""
+
     def __init__(self, filename: str, path: str):
         self.path = path
         self.filename = filename
+        self._bytes_read: Callable[[], int] | None = None
 
-    def get_reader(self) -> Iterator[dict[str, Any]]:
-        """Returns a DictReader object for the file"""
+    @property
+    def is_archive(self) -> bool:
+        return is_gtfs_archive(self.path)
+
+    def exists(self) -> bool:
+        """Whether the feed contains the file"""
+
+        if self.is_archive:
+            with zipfile.ZipFile(self.path) as archive:
+                return _archive_member(archive, self.filename) is not None
+        return os.path.isfile(self.path + self.filename)
+
+    def size(self) -> int:
+        """Bytes the reader will go through: the compressed size for archive members"""
 
-        with open(self.path + self.filename, encoding="utf8") as f:
-            reader = csv.DictReader(f)
-            yield from reader
+        if self.is_archive:
+            with zipfile.ZipFile(self.path) as archive:
+                info = _archive_member(archive, self.filename)
+                if info is None:
+                    raise FileNotFoundError(f"'{self.filename}' is not in {self.path}")
+                return info.compress_size
+        return os.path.getsize(self.path + self.filename)
 
-    def get_row_count(self):
-        """Returns the number of rows in the file"""
+    def bytes_read(self) -> int:
+        """How far the reader has got, in the same units as :meth:`size`"""
+
+        return self._bytes_read() if self._bytes_read is not None else 0
+
+    def get_reader(self) -> Iterator[dict[str, Any]]:
+        """Returns a DictReader object for the file"""
 
-        with rp.open(
-            self.path + self.filename,
-            "r",
-            encoding="utf8",
-            description=f"Reading {self.filename}",
-            transient=True,
-        ) as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip the header row
-            return sum(1 for _ in reader)
+        if not self.is_archive:
+            with open(self.path + self.filename, "rb") as raw:
+                self._bytes_read = raw.tell
+                # Held in a name: collecting the wrapper would close ``raw`` before the final tell()
+                text = io.TextIOWrapper(raw, encoding="utf8", newline="")
+                try:
+                    yield from csv.DictReader(text)
+                finally:
+                    self._freeze_bytes_read()
+            return
+
+        # The archive is read through our own handle so its position tracks the compressed bytes consumed
+        with open(self.path, "rb") as raw, zipfile.ZipFile(raw) as archive:
+            info = _archive_member(archive, self.filename)
+            if info is None:
+                raise FileNotFoundError(f"'{self.filename}' is not in {self.path}")
+            self._bytes_read = lambda: min(max(raw.tell() - info.header_offset, 0), info.compress_size)
+            with archive.open(info) as member:
+                try:
+                    yield from csv.DictReader(io.TextIOWrapper(member, encoding="utf8", newline=""))
+                finally:
+                    self._freeze_bytes_read()
+
+    def _freeze_bytes_read(self) -> None:
+        # Keep reporting the final position once the file is closed
+        final = self.bytes_read()
+        self._bytes_read = lambda: final
 
 
 class AgencyImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = AgencyModel
+    copy_columns = ("id", "name", "url", "timezone", "dataset")
+    progress_label = "Agencies"
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 10000
 
     def __str__(self) -> str:
         return "AgencyImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["agency_id"],
+            row["agency_name"],
+            row["agency_url"],
+            row["agency_timezone"],
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Agencies...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Agencies...", total=self.progress_total())
 
             for row in self.reader:
                 new_agency = AgencyModel(
@@ -184,7 +576,7 @@ class AgencyImporter(AsyncImporter):
                 objects_to_commit.append(new_agency)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -207,28 +599,60 @@ class AgencyImporter(AsyncImporter):
 
 
 class CalendarImporter(AsyncImporter):
+    model = CalendarModel
+    copy_columns = (
+        "id",
+        "monday",
+        "tuesday",
+        "wednesday",
+        "thursday",
+        "friday",
+        "saturday",
+        "sunday",
+        "start_date",
+        "end_date",
+        "dataset",
+    )
+    progress_label = "Calendars"
+
     def __init__(
         self,
         reader: Iterator[dict[str, Any]],
         row_count: int | None,
         dataset: str,
+        loader: Loader = DEFAULT_LOADER,
     ):
-        super().__init__(reader, row_count, dataset)
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 10000
 
     def __str__(self) -> str:
         return "CalendarImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["service_id"],
+            int(row["monday"]),
+            int(row["tuesday"]),
+            int(row["wednesday"]),
+            int(row["thursday"]),
+            int(row["friday"]),
+            int(row["saturday"]),
+            int(row["sunday"]),
+            tdc.convert_joined_date_to_date(row["start_date"]),
+            tdc.convert_joined_date_to_date(row["end_date"]),
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Calendars...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Calendars...", total=self.progress_total())
 
             for row in self.reader:
                 new_calendar = CalendarModel(
@@ -248,7 +672,7 @@ class CalendarImporter(AsyncImporter):
                 objects_to_commit.append(new_calendar)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -271,23 +695,49 @@ class CalendarImporter(AsyncImporter):
 
 
 class CalendarDateImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = CalendarDateModel
+    copy_columns = ("service_id", "date", "exception_type", "dataset")
+    progress_label = "Calendar Dates"
+    reserve_ids = True
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 10000
 
     def __str__(self) -> str:
         return "CalendarDateImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        if row["exception_type"] == "1":
+            exception_type = "added"
+        elif row["exception_type"] == "2":
+            exception_type = "removed"
+        else:
+            raise ValueError(f"Invalid exception_type '{row['exception_type']}'")
+
+        return (
+            row["service_id"],
+            tdc.convert_joined_date_to_date(row["date"]),
+            exception_type,
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Calendar Dates...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Calendar Dates...", total=self.progress_total())
 
             for row in self.reader:
                 if row["exception_type"] == "1":
@@ -307,7 +757,7 @@ class CalendarDateImporter(AsyncImporter):
                 objects_to_commit.append(new_calendar_date)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -330,23 +780,58 @@ class CalendarDateImporter(AsyncImporter):
 
 
 class RouteImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = RouteModel
+    copy_columns = (
+        "id",
+        "agency_id",
+        "short_name",
+        "long_name",
+        "description",
+        "route_type",
+        "url",
+        "color",
+        "text_color",
+        "dataset",
+    )
+    progress_label = "Routes"
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 10000
 
     def __str__(self) -> str:
         return "RouteImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["route_id"],
+            row["agency_id"],
+            row["route_short_name"],
+            row["route_long_name"],
+            row["route_desc"],
+            RouteType(int(row["route_type"])).value,
+            row["route_url"],
+            row["route_color"],
+            row["route_text_color"],
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Routes...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Routes...", total=self.progress_total())
 
             for row in self.reader:
                 route_type = RouteType(int(row["route_type"]))
@@ -367,7 +852,7 @@ class RouteImporter(AsyncImporter):
                 objects_to_commit.append(new_route)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -390,23 +875,56 @@ class RouteImporter(AsyncImporter):
 
 
 class TripImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = TripModel
+    copy_columns = (
+        "id",
+        "route_id",
+        "service_id",
+        "shape_id",
+        "headsign",
+        "short_name",
+        "direction",
+        "block_id",
+        "dataset",
+    )
+    progress_label = "Trips"
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 20000
 
     def __str__(self) -> str:
         return "TripImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["trip_id"],
+            row["route_id"],
+            row["service_id"],
+            row["shape_id"],
+            row["trip_headsign"],
+            row["trip_short_name"],
+            int(row["direction_id"]),
+            row["block_id"],
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Trips...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Trips...", total=self.progress_total())
 
             for row in self.reader:
                 new_trip = TripModel(
@@ -424,7 +942,7 @@ class TripImporter(AsyncImporter):
                 objects_to_commit.append(new_trip)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -447,23 +965,60 @@ class TripImporter(AsyncImporter):
 
 
 class StopImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = StopModel
+    copy_columns = (
+        "id",
+        "code",
+        "name",
+        "description",
+        "lat",
+        "lon",
+        "zone_id",
+        "url",
+        "location_type",
+        "parent_station",
+        "dataset",
+    )
+    progress_label = "Stops"
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 10000
 
     def __str__(self) -> str:
         return "StopImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["stop_id"],
+            row["stop_code"],
+            row["stop_name"],
+            row["stop_desc"],
+            float(row["stop_lat"]),
+            float(row["stop_lon"]),
+            row["zone_id"],
+            row["stop_url"],
+            _optional_int(row["location_type"]),
+            _optional_str(row["parent_station"]),
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_count = 0
         objects_to_commit = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Stops...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Stops...", total=self.progress_total())
 
             for row in self.reader:
                 if row["location_type"] == "":
@@ -493,7 +1048,7 @@ class StopImporter(AsyncImporter):
                 objects_to_commit.append(new_stop)
                 batch_count += 1
                 self.rows_imported += 1
-                progress.update(task, advance=1)
+                self.advance_progress(progress, task, 1)
 
                 if batch_count >= self.batchsize:
                     await q.put(objects_to_commit)
@@ -516,22 +1071,43 @@ class StopImporter(AsyncImporter):
 
 
 class ShapeImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = ShapeModel
+    copy_columns = ("shape_id", "lat", "lon", "sequence", "distance", "dataset")
+    progress_label = "Shapes"
+    reserve_ids = True
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 20000
 
     def __str__(self) -> str:
         return "ShapeImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["shape_id"],
+            float(row["shape_pt_lat"]),
+            float(row["shape_pt_lon"]),
+            int(row["shape_pt_sequence"]),
+            _optional_float(row["shape_dist_traveled"]),
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_dicts: list[dict[str, Any]] = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Shapes...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Shapes...", total=self.progress_total())
 
             for row in self.reader:
                 if not batch_dicts:
@@ -554,12 +1130,12 @@ class ShapeImporter(AsyncImporter):
 
                 if len(batch_dicts) >= self.batchsize:
                     await q.put(GTFSCoreBatch("shape", batch_dicts))
-                    progress.update(task, advance=len(batch_dicts))
+                    self.advance_progress(progress, task, len(batch_dicts))
                     batch_dicts = []
 
             if batch_dicts:
                 await q.put(GTFSCoreBatch("shape", batch_dicts))
-                progress.update(task, advance=len(batch_dicts))
+                self.advance_progress(progress, task, len(batch_dicts))
 
             # Signal the consumer that the producer is done
             for _ in range(number_of_consumers):
@@ -574,22 +1150,58 @@ class ShapeImporter(AsyncImporter):
 
 
 class StopTimeImporter(AsyncImporter):
-    def __init__(self, reader: Iterator[dict[str, Any]], row_count: int | None, dataset: str):
-        super().__init__(reader, row_count, dataset)
+    model = StopTimeModel
+    copy_columns = (
+        "trip_id",
+        "arrival_time",
+        "departure_time",
+        "stop_id",
+        "stop_sequence",
+        "stop_headsign",
+        "pickup_type",
+        "dropoff_type",
+        "timepoint",
+        "dataset",
+    )
+    progress_label = "Stop Times"
+    reserve_ids = True
+
+    def __init__(
+        self,
+        reader: Iterator[dict[str, Any]],
+        row_count: int | None,
+        dataset: str,
+        loader: Loader = DEFAULT_LOADER,
+    ):
+        super().__init__(reader, row_count, dataset, loader)
         self.batchsize = 20000
 
     def __str__(self) -> str:
         return "StopTimeImporter"
 
+    def copy_record(self, row: dict[str, str]) -> tuple[Any, ...]:
+        return (
+            row["trip_id"],
+            tdc.convert_29_hours_to_24_hours(row["arrival_time"]),
+            tdc.convert_29_hours_to_24_hours(row["departure_time"]),
+            row["stop_id"],
+            int(row["stop_sequence"]),
+            row["stop_headsign"],
+            _optional_int(row["pickup_type"]),
+            _optional_int(row["drop_off_type"]),
+            _optional_int(row["timepoint"]),
+            self.dataset,
+        )
+
     async def import_data(self):
-        tasks = create_queue_and_tasks(self.producer)
+        tasks = create_queue_and_tasks(self.active_producer(), self.connection_budget)
         await asyncio.gather(*tasks)
 
     async def producer(self, q: asyncio.Queue, number_of_consumers: int):
         batch_dicts: list[dict[str, Any]] = []
 
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing Stop Times...", total=self.row_count)
+        with self.progress_display() as progress:
+            task = progress.add_task("[green]Importing Stop Times...", total=self.progress_total())
 
             for row in self.reader:
                 arrival_time = tdc.convert_29_hours_to_24_hours(row["arrival_time"])
@@ -632,12 +1244,12 @@ class StopTimeImporter(AsyncImporter):
 
                 if len(batch_dicts) >= self.batchsize:
                     await q.put(GTFSCoreBatch("stop_time", batch_dicts))
-                    progress.update(task, advance=len(batch_dicts))
+                    self.advance_progress(progress, task, len(batch_dicts))
                     batch_dicts = []
 
             if batch_dicts:
                 await q.put(GTFSCoreBatch("stop_time", batch_dicts))
-                progress.update(task, advance=len(batch_dicts))
+                self.advance_progress(progress, task, len(batch_dicts))
 
             # Signal the consumer that the producer is done
             for _ in range(number_of_consumers):
@@ -649,3 +1261,21 @@ class StopTimeImporter(AsyncImporter):
         with session:
             session.query(StopTimeModel).filter(StopTimeModel.dataset == self.dataset).delete()
             session.commit()
+
+
+IMPORTER_CLASSES_BY_FILE: dict[str, type[AsyncImporter]] = {
+    "agency.txt": AgencyImporter,
+    "calendar.txt": CalendarImporter,
+    "calendar_dates.txt": CalendarDateImporter,
+    "routes.txt": RouteImporter,
+    "stops.txt": StopImporter,
+    "trips.txt": TripImporter,
+    "shapes.txt": ShapeImporter,
+    "stop_times.txt": StopTimeImporter,
+}
+
+
+def table_for_file(file: str) -> str:
+    """Name of the table the importer for ``file`` writes to"""
+
+    return IMPORTER_CLASSES_BY_FILE[file].model.__tablename__  # type: ignore[attr-defined]
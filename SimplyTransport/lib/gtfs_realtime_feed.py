@@ -0,0 +1,212 @@
+"""
+Format-neutral GTFS-Realtime feed contents.
+
+A feed fetched as JSON or as protobuf (``application/x-protobuf``) decodes into the same flat tuples,
+which are all the realtime importers read. The protobuf path walks the ``FeedMessage`` entities
+directly so no intermediate dict tree is built for the multi-megabyte national feeds.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from google.protobuf import json_format
+from google.transit import gtfs_realtime_pb2
+
+from ..domain.realtime.enums import ScheduleRealtionship
+
+PROTOBUF_CONTENT_TYPE = "application/x-protobuf"
+
+_SCHEDULED = ScheduleRealtionship.SCHEDULED.value
+_TRIP_RELATIONSHIPS = {
+    value: name for name, value in gtfs_realtime_pb2.TripDescriptor.ScheduleRelationship.items()
+}
+_STOP_TIME_RELATIONSHIPS = {
+    value: name for name, value in gtfs_realtime_pb2.TripUpdate.StopTimeUpdate.ScheduleRelationship.items()
+}
+
+
+class StopTimeUpdate(NamedTuple):
+    stop_id: str | None
+    stop_sequence: int | None
+    schedule_relationship: str
+    arrival_delay: int | None
+    departure_delay: int | None
+
+
+class TripUpdate(NamedTuple):
+    entity_id: str | None
+    trip_id: str | None
+    """DB trip id: ``trip_properties.trip_id`` for DUPLICATED trips when set, else the descriptor's"""
+    route_id: str | None
+    direction_id: int | None
+    start_time: str | None
+    start_date: str | None
+    schedule_relationship: str
+    stop_time_updates: list[StopTimeUpdate]
+
+
+class VehiclePosition(NamedTuple):
+    vehicle_id: str | None
+    trip_id: str | None
+    timestamp: int | None
+    lat: float | None
+    lon: float | None
+
+
+@dataclass
+class RealtimeFeed:
+    """The trip updates and vehicle positions of one feed message"""
+
+    entity_count: int = 0
+    header_timestamp: int | None = None
+    """Producer's ``header.timestamp``, when the snapshot was generated"""
+    trip_updates: list[TripUpdate] = field(default_factory=list)
+    vehicles: list[VehiclePosition] = field(default_factory=list)
+
+
+def _effective_trip_id(relationship: str, trip_id: str | None, properties_trip_id: str | None) -> str | None:
+    if relationship == ScheduleRealtionship.DUPLICATED.value and properties_trip_id:
+        return properties_trip_id
+    return trip_id or None
+
+
+def _optional_int(value: Any) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except TypeError, ValueError:
+        return None
+
+
+def feed_from_json(data: dict) -> RealtimeFeed:
+    """Flattens a GTFS-RT feed already decoded from JSON"""
+
+    entities = data.get("entity", [])
+    feed = RealtimeFeed(
+        entity_count=len(entities),
+        header_timestamp=_optional_int((data.get("header") or {}).get("timestamp")),
+    )
+    for item in entities:
+        trip_update = item.get("trip_update")
+        if trip_update:
+            trip = trip_update.get("trip") or {}
+            props = trip_update.get("trip_properties") or {}
+            relationship = trip.get("schedule_relationship") or _SCHEDULED
+            trip_id = trip.get("trip_id")
+            feed.trip_updates.append(
+                TripUpdate(
+                    entity_id=item.get("id"),
+                    trip_id=_effective_trip_id(
+                        relationship,
+                        str(trip_id) if trip_id else None,
+                        str(props["trip_id"]) if props.get("trip_id") else None,
+                    ),
+                    route_id=trip.get("route_id"),
+                    direction_id=_optional_int(trip.get("direction_id")),
+                    start_time=trip.get("start_time"),
+                    start_date=trip.get("start_date") or props.get("start_date"),
+                    schedule_relationship=relationship,
+                    stop_time_updates=[
+                        StopTimeUpdate(
+                            stop_id=stop_time.get("stop_id"),
+                            stop_sequence=_optional_int(stop_time.get("stop_sequence")),
+                            schedule_relationship=stop_time.get("schedule_relationship") or _SCHEDULED,
+                            arrival_delay=(stop_time.get("arrival") or {}).get("delay"),
+                            departure_delay=(stop_time.get("departure") or {}).get("delay"),
+                        )
+                        for stop_time in trip_update.get("stop_time_update", [])
+                    ],
+                )
+            )
+
+        vehicle = item.get("vehicle")
+        if vehicle:
+            position = vehicle.get("position") or {}
+            timestamp = vehicle.get("timestamp")
+            feed.vehicles.append(
+                VehiclePosition(
+                    vehicle_id=(vehicle.get("vehicle") or {}).get("id"),
+                    trip_id=(vehicle.get("trip") or {}).get("trip_id"),
+                    timestamp=int(timestamp) if timestamp is not None else None,
+                    lat=position.get("latitude"),
+                    lon=position.get("longitude"),
+                )
+            )
+    return feed
+
+
+def _delay(event: Any) -> int | None:
+    return event.delay if event.HasField("delay") else None
+
+
+def feed_from_protobuf(content: bytes) -> RealtimeFeed:
+    """Decodes a serialized ``FeedMessage`` without going through a dict representation"""
+
+    message = gtfs_realtime_pb2.FeedMessage()
+    message.ParseFromString(content)
+
+    header = message.header
+    feed = RealtimeFeed(
+        entity_count=len(message.entity),
+        header_timestamp=header.timestamp if header.HasField("timestamp") else None,
+    )
+    for entity in message.entity:
+        if entity.HasField("trip_update"):
+            trip_update = entity.trip_update
+            trip = trip_update.trip
+            props = trip_update.trip_properties if trip_update.HasField("trip_properties") else None
+            relationship = _TRIP_RELATIONSHIPS.get(trip.schedule_relationship, _SCHEDULED)
+            feed.trip_updates.append(
+                TripUpdate(
+                    entity_id=entity.id or None,
+                    trip_id=_effective_trip_id(
+                        relationship, trip.trip_id, props.trip_id if props is not None else None
+                    ),
+                    route_id=trip.route_id or None,
+                    direction_id=trip.direction_id if trip.HasField("direction_id") else None,
+                    start_time=trip.start_time or None,
+                    start_date=trip.start_date or (props.start_date if props is not None else None) or None,
+                    schedule_relationship=relationship,
+                    stop_time_updates=[
+                        StopTimeUpdate(
+                            stop_id=stop_time.stop_id or None,
+                            stop_sequence=(
+                                stop_time.stop_sequence if stop_time.HasField("stop_sequence") else None
+                            ),
+                            schedule_relationship=_STOP_TIME_RELATIONSHIPS.get(
+                                stop_time.schedule_relationship, _SCHEDULED
+                            ),
+                            arrival_delay=_delay(stop_time.arrival)
+                            if stop_time.HasField("arrival")
+                            else None,
+                            departure_delay=(
+                                _delay(stop_time.departure) if stop_time.HasField("departure") else None
+                            ),
+                        )
+                        for stop_time in trip_update.stop_time_update
+                    ],
+                )
+            )
+
+        if entity.HasField("vehicle"):
+            vehicle = entity.vehicle
+            has_position = vehicle.HasField("position")
+            feed.vehicles.append(
+                VehiclePosition(
+                    vehicle_id=vehicle.vehicle.id if vehicle.vehicle.HasField("id") else None,
+                    trip_id=vehicle.trip.trip_id or None,
+                    timestamp=vehicle.timestamp if vehicle.HasField("timestamp") else None,
+                    lat=vehicle.position.latitude if has_position else None,
+                    lon=vehicle.position.longitude if has_position else None,
+                )
+            )
+    return feed
+
+
+def json_to_protobuf(data: dict) -> bytes:
+    """Serializes a JSON feed as protobuf, for benchmarks and tests against the recorded JSON fixtures"""
+
+    message = gtfs_realtime_pb2.FeedMessage()
+    json_format.ParseDict(data, message, ignore_unknown_fields=True)
+    return message.SerializeToString()
@@ -1,26 +1,42 @@
 import asyncio
-from dataclasses import dataclass
-from datetime import UTC, date, datetime, time, timedelta
-from json import JSONDecodeError
-from typing import Any
+import hashlib
+import json
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, date, datetime, time
+from enum import StrEnum
+from typing import Any, NamedTuple
 
 import httpx
 import rich.progress as rp
-from SimplyTransport.lib.tracing import CreateSpan
+from google.protobuf.message import DecodeError
+from redis.exceptions import RedisError
+from SimplyTransport.lib.tracing import CreateSpan, get_app_meter
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..domain.realtime.enums import ScheduleRealtionship
+from ..domain.realtime.partitions import partition_start, read_window, rotate_partitions
+from ..domain.realtime.realtime_schedule.overlay_store import RealtimeOverlayStore, TripOverlay
 from ..domain.realtime.stop_time.model import RTStopTimeModel
 from ..domain.realtime.trip.model import RTTripModel
-from ..domain.realtime.vehicle.model import RTVehicleModel
+from ..domain.realtime.vehicle.model import RTVehicleLatestModel, RTVehicleModel
 from ..domain.route.model import RouteModel
 from ..domain.stop.model import StopModel
 from ..domain.trip.model import TripModel
 from . import time_date_conversions as tdc
+from .cache import RedisService
+from .cache_keys import CacheKeys
 from .db.database import async_session_factory
+from .gtfs_realtime_feed import (
+    PROTOBUF_CONTENT_TYPE,
+    RealtimeFeed,
+    TripUpdate,
+    feed_from_json,
+    feed_from_protobuf,
+)
 from .logging.logging import provide_logger
-from .sqlalchemy_bulk import bulk_insert, bulk_upsert
+from .sqlalchemy_bulk import bulk_insert, bulk_upsert, bulk_upsert_stream
 
 logger = provide_logger(__name__)
 
@@ -36,23 +52,42 @@ progress_columns = (
     rp.TimeRemainingColumn(),
 )
 
-RETENTION_PERIOD = datetime.now(UTC) - timedelta(minutes=30)
+FEED_STATE_TTL_S = 60 * 60
+
+feed_polls_counter = get_app_meter().create_counter(
+    "realtime.feed.polls",
+    unit="{poll}",
+    description="Realtime feed polls by outcome; unchanged and not_modified polls skip the import",
+)
 
 
 @dataclass(frozen=True)
 class RealtimeImportSharedContext:
-    """Trip ids present in static GTFS for a dataset; shared by parallel RT importers."""
+    """Static GTFS ids for a dataset; shared by parallel RT importers."""
 
     trips_in_db: frozenset[str]
+    stops_in_db: frozenset[str]
+    routes_in_db: frozenset[str]
+    trip_routes: dict[str, tuple[str, int]]
 
 
 async def _shared_context_from_session(session: AsyncSession, dataset: str) -> RealtimeImportSharedContext:
-    result = await session.execute(select(TripModel.id).where(TripModel.dataset == dataset))
-    return RealtimeImportSharedContext(frozenset[str](result.scalars()))
+    trip_rows = await session.execute(
+        select(TripModel.id, TripModel.route_id, TripModel.direction).where(TripModel.dataset == dataset)
+    )
+    trip_routes = {row.id: (row.route_id, row.direction) for row in trip_rows.all()}
+    result_stops = await session.execute(select(StopModel.id).where(StopModel.dataset == dataset))
+    result_routes = await session.execute(select(RouteModel.id).where(RouteModel.dataset == dataset))
+    return RealtimeImportSharedContext(
+        trips_in_db=frozenset[str](trip_routes),
+        stops_in_db=frozenset[str](result_stops.scalars()),
+        routes_in_db=frozenset[str](result_routes.scalars()),
+        trip_routes=trip_routes,
+    )
 
 
 async def load_realtime_import_shared_context(dataset: str) -> RealtimeImportSharedContext:
-    """Load static trip ids for ``dataset`` (opens one session)."""
+    """Load static trip, stop and route ids for ``dataset`` (opens one session)."""
     async with async_session_factory() as session:
         return await _shared_context_from_session(session, dataset)
 
@@ -89,343 +124,566 @@ def _parse_rt_start_date(date_str: str | None, fallback: date) -> date:
     return tdc.convert_joined_date_to_date(date_str)
 
 
-class RealTimeImporter:
-    def __init__(self, url: str, api_key: str, dataset: str) -> None:
+class FeedFetchOutcome(StrEnum):
+    CHANGED = "changed"
+    NOT_MODIFIED = "not_modified"
+    UNCHANGED = "unchanged"
+    FAILED = "failed"
+
+
+@dataclass
+class FeedState:
+    """What the last imported snapshot of a feed looked like, used to skip unchanged polls"""
+
+    etag: str | None = None
+    last_modified: str | None = None
+    content_hash: str | None = None
+    header_timestamp: int | None = None
+
+
+class FeedFetch(NamedTuple):
+    outcome: FeedFetchOutcome
+    feed: RealtimeFeed | None = None
+    state: FeedState | None = None
+    """State to record once ``feed`` has been imported"""
+
+
+class FeedStateStore:
+    """Per feed and dataset :class:`FeedState` kept in Redis, so separate CLI runs share it"""
+
+    def __init__(self, redis_service: RedisService, expiration: int = FEED_STATE_TTL_S):
+        self.redis_service = redis_service
+        self.expiration = expiration
+
+    @staticmethod
+    def _key(feed: str, dataset: str) -> str:
+        return CacheKeys.RealTimeFeeds.FEED_STATE_KEY_TEMPLATE.format(feed=feed, dataset=dataset)
+
+    async def get(self, feed: str, dataset: str) -> FeedState:
+        value = await self.redis_service.get(self._key(feed, dataset))
+        return FeedState(**json.loads(value)) if value else FeedState()
+
+    async def set(self, feed: str, dataset: str, state: FeedState) -> None:
+        await self.redis_service.set(self._key(feed, dataset), json.dumps(asdict(state)), self.expiration)
+
+
+class UpsertCounts(NamedTuple):
+    written: int
+    unchanged: int
+    failed: bool = False
+    """The rows could not be written, the snapshot has to be imported again"""
+
+    @property
+    def total(self) -> int:
+        return self.written + self.unchanged
+
+
+class _CountedRows:
+    """Passes rows through while counting them, so a stream can be sized after it was consumed"""
+
+    def __init__(self, rows: Iterable[dict[str, Any]]):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for row in self.rows:
+            self.count += 1
+            yield row
+
+
+class RowDelta:
+    """
+    What was last written per row key, so rows identical to the previous cycle are not upserted again.
+
+    Keys and values are both kept as hashes, two ints per row. It must be cleared whenever the rows
+    it describes are no longer in the partition being written, otherwise they would never be rewritten.
+    """
+
+    def __init__(self, key_columns: Sequence[str], value_columns: Sequence[str]):
+        self.key_columns = tuple(key_columns)
+        self.value_columns = tuple(value_columns)
+        self._written: dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._written)
+
+    def _key(self, row: dict[str, Any]) -> int:
+        return hash(tuple(row[column] for column in self.key_columns))
+
+    def _value(self, row: dict[str, Any]) -> int:
+        return hash(tuple(row[column] for column in self.value_columns))
+
+    def changed(self, rows: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        """Lazily yields the rows whose values differ from what was last written for their key"""
+
+        written = self._written
+        return (row for row in rows if written.get(self._key(row)) != self._value(row))
+
+    def remember(self, rows: Iterable[dict[str, Any]]) -> None:
+        for row in rows:
+            self._written[self._key(row)] = self._value(row)
+
+    def clear(self) -> None:
+        self._written.clear()
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+async def _fetch_feed(
+    client: httpx.AsyncClient | None,
+    url: str,
+    api_key: str,
+    protobuf: bool,
+    label: str,
+    state: FeedState | None = None,
+) -> FeedFetch:
+    if client is None:
+        async with httpx.AsyncClient() as client:
+            return await _fetch_feed(client, url, api_key, protobuf, label, state)
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "x-api-key": api_key,
+    }
+    if protobuf:
+        headers["Accept"] = PROTOBUF_CONTENT_TYPE
+    if state is not None and state.etag:
+        headers["If-None-Match"] = state.etag
+    if state is not None and state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    response = await client.get(url, headers=headers)
+    if response.status_code == 304:
+        return FeedFetch(FeedFetchOutcome.NOT_MODIFIED)
+    if response.status_code != 200:
+        logger.warning(f"{label}: {url} returned {response.status_code}")
+        return FeedFetch(FeedFetchOutcome.FAILED)
+
+    digest = content_hash(response.content)
+    if state is not None and digest == state.content_hash:
+        return FeedFetch(FeedFetchOutcome.UNCHANGED)
+
+    if protobuf:
+        try:
+            feed = feed_from_protobuf(response.content)
+        except DecodeError as e:
+            logger.error(f"{label}: {url} returned invalid protobuf: {e}")
+            return FeedFetch(FeedFetchOutcome.FAILED)
+    else:
+        try:
+            feed = feed_from_json(json.loads(response.content))
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"{label}: {url} returned invalid JSON: {e}")
+            return FeedFetch(FeedFetchOutcome.FAILED)
+
+    # Same producer snapshot re-serialized, e.g. with a different key order
+    if (
+        state is not None
+        and feed.header_timestamp is not None
+        and feed.header_timestamp == state.header_timestamp
+    ):
+        return FeedFetch(FeedFetchOutcome.UNCHANGED)
+
+    return FeedFetch(
+        FeedFetchOutcome.CHANGED,
+        feed,
+        FeedState(
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            content_hash=digest,
+            header_timestamp=feed.header_timestamp,
+        ),
+    )
+
+
+def realtime_lock_name(feed_name: str, dataset: str) -> str:
+    """Concurrency lock shared by every process importing ``feed_name`` for ``dataset``"""
+
+    return f"realtime_{feed_name}:{dataset}"
+
+
+class _FeedImporter:
+    feed_name: str
+    log_label: str
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str,
+        dataset: str,
+        protobuf: bool = False,
+        state_store: FeedStateStore | None = None,
+    ) -> None:
         self.url = url
         self.api_key = api_key
         self.dataset = dataset
+        self.protobuf = protobuf
+        self.state_store = state_store
 
-    async def get_data(self) -> dict | None:
-        headers = {
-            "Cache-Control": "no-cache",
-            "x-api-key": self.api_key,
-        }
+    @property
+    def lock_name(self) -> str:
+        return realtime_lock_name(self.feed_name, self.dataset)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.url, headers=headers)
-            if response.status_code != 200:
-                logger.warning(f"RealTime: {self.url} returned {response.status_code}")
-                return None
+    async def get_data(self, client: httpx.AsyncClient | None = None) -> FeedFetch:
+        """
+        Fetches and decodes the feed, over ``client``'s pooled connections when one is given.
 
-            try:
-                return response.json()
-            except JSONDecodeError as e:
-                logger.error(f"RealTime: {self.url} returned invalid JSON: {e}")
-                return None
+        With a ``state_store`` the request is conditional and a snapshot identical to the last imported
+        one is reported as unchanged without being decoded. Every outcome is counted in metrics.
+        """
 
-    async def clear_table_stop_trip(self):
-        """Clears the table in the database that corresponds to the dataset for rows older than 60 mins"""
+        state = await self.state_store.get(self.feed_name, self.dataset) if self.state_store else None
+        fetch = await _fetch_feed(client, self.url, self.api_key, self.protobuf, self.log_label, state)
+        feed_polls_counter.add(
+            1, {"feed": self.feed_name, "dataset": self.dataset, "outcome": fetch.outcome.value}
+        )
+        return fetch
 
-        async with async_session_factory() as session:
-            delete_stoptime = delete(RTStopTimeModel).where(
-                RTStopTimeModel.created_at < RETENTION_PERIOD,
-                RTStopTimeModel.dataset == self.dataset,
-            )
-            await session.execute(delete_stoptime)
+    async def commit_feed_state(self, fetch: FeedFetch) -> None:
+        """Records ``fetch`` as the last imported snapshot, call after the import succeeded"""
 
-            delete_trip = delete(RTTripModel).where(
-                RTTripModel.created_at < RETENTION_PERIOD,
-                RTTripModel.dataset == self.dataset,
-            )
-            await session.execute(delete_trip)
+        if self.state_store is not None and fetch.state is not None:
+            await self.state_store.set(self.feed_name, self.dataset, fetch.state)
+
+
+class RealTimeImporter(_FeedImporter):
+    feed_name = "trip_updates"
+    log_label = "RealTime"
+
+    def __init__(self, *args: Any, overlay_store: RealtimeOverlayStore | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.overlay_store = overlay_store
+        self.stop_time_delta = RowDelta(
+            ("stop_id", "trip_id", "stop_sequence"),
+            ("schedule_relationship", "arrival_delay", "departure_delay", "entity_id"),
+        )
+        self.trip_delta = RowDelta(
+            ("trip_id", "route_id"),
+            ("start_time", "start_date", "schedule_relationship", "direction", "entity_id"),
+        )
+        self._static_context: RealtimeImportSharedContext | None = None
+        self.partition: datetime | None = None
+        """Start of the partition this cycle writes to, the ``created_at`` of every row"""
 
-            await session.commit()
+    def use_partition(self, start: datetime) -> None:
+        """Forgets the written rows when the partition rolls over, a new one starts from a full snapshot"""
 
-    async def import_from_payload(self, data: dict) -> tuple[int, int]:
+        if start != self.partition:
+            self.stop_time_delta.clear()
+            self.trip_delta.clear()
+            self.partition = start
+
+    def use_static_context(self, shared: RealtimeImportSharedContext) -> None:
+        """Forgets the written rows when the static ids were reloaded, the import cascades rt rows away"""
+
+        if shared is not self._static_context:
+            self.stop_time_delta.clear()
+            self.trip_delta.clear()
+            self._static_context = shared
+
+    async def clear_table_stop_trip(self):
+        """Creates the upcoming rt_stop_time / rt_trip partitions and drops the expired ones"""
+
+        now = datetime.now(UTC)
+        async with async_session_factory() as session:
+            await rotate_partitions(session, ("rt_stop_time", "rt_trip"), now)
+        self.use_partition(partition_start(now))
+
+    async def import_from_payload(self, data: dict) -> tuple[UpsertCounts, UpsertCounts]:
         """Import trip updates and stop times from an in-memory GTFS-RT payload (used by CLI seed)."""
         await self.clear_table_stop_trip()
         with rp.Progress(*progress_columns) as progress:
-            total_stop_times, total_trips = await asyncio_gather_imports(self, data, progress)
+            total_stop_times, total_trips = await asyncio_gather_imports(self, feed_from_json(data), progress)
         return total_stop_times, total_trips
 
+    def _trip_update_stop_time_rows(
+        self, trip_update: TripUpdate, shared: RealtimeImportSharedContext, created_at: datetime
+    ) -> Iterator[dict[str, Any]]:
+        if _skip_stop_time_import_for_trip_relationship(trip_update.schedule_relationship):
+            return
+        eff_trip_id = trip_update.trip_id
+        if not eff_trip_id or eff_trip_id not in shared.trips_in_db:
+            return
+
+        for stop_time in trip_update.stop_time_updates:
+            sid = stop_time.stop_id
+            if not sid or sid not in shared.stops_in_db or stop_time.stop_sequence is None:
+                continue
+
+            yield {
+                "stop_id": sid,
+                "trip_id": eff_trip_id,
+                "stop_sequence": stop_time.stop_sequence,
+                "schedule_relationship": stop_time.schedule_relationship,
+                "arrival_delay": stop_time.arrival_delay,
+                "departure_delay": stop_time.departure_delay,
+                "entity_id": trip_update.entity_id,
+                "dataset": self.dataset,
+                "created_at": created_at,
+            }
+
+    def _trip_update_trip_row(
+        self, trip_update: TripUpdate, shared: RealtimeImportSharedContext, today: date, created_at: datetime
+    ) -> dict[str, Any] | None:
+        trip_dir = shared.trip_routes
+        eff_trip_id = trip_update.trip_id
+        if not eff_trip_id or eff_trip_id not in shared.trips_in_db:
+            return None
+
+        route_id = trip_update.route_id or trip_dir.get(eff_trip_id, (None,))[0]
+        if not route_id or route_id not in shared.routes_in_db:
+            return None
+
+        if trip_update.direction_id is not None:
+            direction = trip_update.direction_id
+        else:
+            static_dir = trip_dir.get(eff_trip_id, (None, None))[1]
+            direction = int(static_dir) if static_dir is not None else 0
+
+        return {
+            "trip_id": eff_trip_id,
+            "route_id": route_id,
+            "start_time": _parse_rt_start_time(trip_update.start_time),
+            "start_date": _parse_rt_start_date(trip_update.start_date, today),
+            "schedule_relationship": trip_update.schedule_relationship,
+            "direction": direction,
+            "entity_id": str(trip_update.entity_id or ""),
+            "dataset": self.dataset,
+            "created_at": created_at,
+        }
+
+    def _stop_time_rows(
+        self,
+        feed: RealtimeFeed,
+        shared: RealtimeImportSharedContext,
+        progress: rp.Progress,
+        task: rp.TaskID,
+    ) -> Iterator[dict[str, Any]]:
+        created_at = self.partition or partition_start()
+        for trip_update in feed.trip_updates:
+            progress.update(task, advance=1)
+            yield from self._trip_update_stop_time_rows(trip_update, shared, created_at)
+
+    def _trip_rows(
+        self,
+        feed: RealtimeFeed,
+        shared: RealtimeImportSharedContext,
+        progress: rp.Progress,
+        task: rp.TaskID,
+    ) -> Iterator[dict[str, Any]]:
+        today = date.today()
+        created_at = self.partition or partition_start()
+        for trip_update in feed.trip_updates:
+            progress.update(task, advance=1)
+            row = self._trip_update_trip_row(trip_update, shared, today, created_at)
+            if row is not None:
+                yield row
+
+    def _trip_overlays(
+        self, feed: RealtimeFeed, shared: RealtimeImportSharedContext
+    ) -> Iterator[TripOverlay]:
+        today = date.today()
+        created_at = self.partition or partition_start()
+        for trip_update in feed.trip_updates:
+            trip = self._trip_update_trip_row(trip_update, shared, today, created_at)
+            stop_times = list(self._trip_update_stop_time_rows(trip_update, shared, created_at))
+            if trip_update.trip_id and (trip is not None or stop_times):
+                yield TripOverlay(trip_update.trip_id, trip, stop_times)
+
+    async def publish_overlays(self, feed: RealtimeFeed, shared: RealtimeImportSharedContext) -> int:
+        """Publishes the latest overlay of every trip in the feed for the web workers to read"""
+
+        if self.overlay_store is None:
+            return 0
+        try:
+            return await self.overlay_store.publish(self.dataset, self._trip_overlays(feed, shared))
+        except RedisError as e:
+            logger.error(f"RealTime: {self.url} failed to publish overlays: {e}")
+            return 0
+
     @CreateSpan()
     async def import_stop_times(
         self,
-        data: dict,
+        feed: RealtimeFeed,
         progress: rp.Progress,
         shared: RealtimeImportSharedContext,
-    ) -> int:
-        """Imports the stop times from the dataset into the database"""
-
-        entities = data.get("entity", [])
-        stop_time_update_count = sum(
-            len((item.get("trip_update") or {}).get("stop_time_update", []))
-            for item in entities
-            if item.get("trip_update")
-            and not _skip_stop_time_import_for_trip_relationship(
-                _trip_descriptor_relationship((item.get("trip_update") or {}).get("trip") or {})
-            )
-        )
-        task = progress.add_task("[green]Importing RT Stop Times...", total=max(stop_time_update_count, 1))
-
-        async with async_session_factory() as session:
-            objects_to_commit: list[dict] = []
+    ) -> UpsertCounts:
+        """Streams the stop times of the feed that changed since the previous cycle into the database"""
 
-            result_stops = await session.execute(
-                select(StopModel.id).where(StopModel.dataset == self.dataset)
-            )
-            stops_in_db = frozenset[str](result_stops.scalars())
+        task = progress.add_task("[green]Importing RT Stop Times...", total=max(len(feed.trip_updates), 1))
+        rows = _CountedRows(self._stop_time_rows(feed, shared, progress, task))
 
+        async with async_session_factory() as session:
             try:
-                for item in entities:
-                    trip_update = item.get("trip_update") or {}
-                    if not trip_update:
-                        continue
-                    trip = trip_update.get("trip") or {}
-                    rel = _trip_descriptor_relationship(trip)
-                    if _skip_stop_time_import_for_trip_relationship(rel):
-                        continue
-
-                    eff_trip_id = _effective_trip_id_for_trip_update(trip_update)
-                    if not eff_trip_id or eff_trip_id not in shared.trips_in_db:
-                        continue
-
-                    for stop_time in trip_update.get("stop_time_update", []):
-                        sid = stop_time.get("stop_id")
-                        if not sid or sid not in stops_in_db:
-                            continue
-
-                        raw_seq = stop_time.get("stop_sequence")
-                        if raw_seq is None:
-                            continue
-                        try:
-                            stop_seq = int(raw_seq)
-                        except TypeError, ValueError:
-                            continue
-
-                        st_rel = stop_time.get("schedule_relationship") or (
-                            ScheduleRealtionship.SCHEDULED.value
-                        )
-                        arrival = stop_time.get("arrival") or {}
-                        departure = stop_time.get("departure") or {}
-
-                        new_rt_stop_time = {
-                            "stop_id": sid,
-                            "trip_id": eff_trip_id,
-                            "stop_sequence": stop_seq,
-                            "schedule_relationship": st_rel,
-                            "arrival_delay": arrival.get("delay"),
-                            "departure_delay": departure.get("delay"),
-                            "entity_id": item.get("id"),
-                            "dataset": self.dataset,
-                        }
-
-                        objects_to_commit.append(new_rt_stop_time)
-                        progress.update(task, advance=1)
-
-                if objects_to_commit:
-                    try:
-                        await bulk_upsert(
-                            session,
-                            RTStopTimeModel,
-                            objects_to_commit,
-                            ["stop_id", "trip_id", "stop_sequence", "dataset"],
-                            {
-                                "arrival_delay": "arrival_delay",
-                                "departure_delay": "departure_delay",
-                                "schedule_relationship": "schedule_relationship",
-                                "entity_id": "entity_id",
-                                "dataset": "dataset",
-                            },
-                        )
-                    except Exception as e:
-                        logger.error(f"RealTime: {self.url} failed to commit stop times: {e}")
-                        return 0
-                return len(objects_to_commit)
+                written = await bulk_upsert_stream(
+                    session,
+                    RTStopTimeModel,
+                    self.stop_time_delta.changed(rows),
+                    ["stop_id", "trip_id", "stop_sequence", "dataset", "created_at"],
+                    {
+                        "arrival_delay": "arrival_delay",
+                        "departure_delay": "departure_delay",
+                        "schedule_relationship": "schedule_relationship",
+                        "entity_id": "entity_id",
+                        "dataset": "dataset",
+                    },
+                    on_batch=self.stop_time_delta.remember,
+                )
             except Exception as e:
-                logger.warning(f"RealTime: {self.url} returned invalid JSON in entities: {e}")
-                return 0
+                logger.error(f"RealTime: {self.url} failed to commit stop times: {e}")
+                self.stop_time_delta.clear()
+                return UpsertCounts(0, 0, failed=True)
+            return UpsertCounts(written, rows.count - written)
 
     @CreateSpan()
     async def import_trips(
         self,
-        data: dict,
+        feed: RealtimeFeed,
         progress: rp.Progress,
         shared: RealtimeImportSharedContext,
-    ) -> int:
-        """Imports the trips from the dataset into the database"""
+    ) -> UpsertCounts:
+        """Streams the trips of the feed that changed since the previous cycle into the database"""
 
-        entities = [e for e in data.get("entity", []) if e.get("trip_update")]
-        trip_update_count = len(entities)
-        task = progress.add_task("[green]Importing RT Trips...", total=max(trip_update_count, 1))
+        task = progress.add_task("[green]Importing RT Trips...", total=max(len(feed.trip_updates), 1))
+        rows = _CountedRows(self._trip_rows(feed, shared, progress, task))
 
         async with async_session_factory() as session:
-            objects_to_commit: list[dict] = []
-            result_routes = await session.execute(
-                select(RouteModel.id).where(RouteModel.dataset == self.dataset)
-            )
-            routes_in_db = frozenset[str](result_routes.scalars())
-
-            trip_meta_rows = await session.execute(
-                select(TripModel.id, TripModel.route_id, TripModel.direction).where(
-                    TripModel.dataset == self.dataset
+            try:
+                written = await bulk_upsert_stream(
+                    session,
+                    RTTripModel,
+                    self.trip_delta.changed(rows),
+                    ["trip_id", "route_id", "dataset", "created_at"],
+                    {
+                        "start_time": "start_time",
+                        "start_date": "start_date",
+                        "schedule_relationship": "schedule_relationship",
+                        "direction": "direction",
+                        "entity_id": "entity_id",
+                        "dataset": "dataset",
+                    },
+                    on_batch=self.trip_delta.remember,
                 )
-            )
-            trip_dir = {r.id: (r.route_id, r.direction) for r in trip_meta_rows.all()}
-            today = date.today()
-
-            for item in entities:
-                trip_update = item.get("trip_update") or {}
-                trip = trip_update.get("trip") or {}
-                props = trip_update.get("trip_properties") or {}
-                rel = _trip_descriptor_relationship(trip)
-                eff_trip_id = _effective_trip_id_for_trip_update(trip_update)
-                if not eff_trip_id or eff_trip_id not in shared.trips_in_db:
-                    progress.update(task, advance=1)
-                    continue
-
-                route_id = trip.get("route_id") or trip_dir.get(eff_trip_id, (None,))[0]
-                if not route_id or route_id not in routes_in_db:
-                    progress.update(task, advance=1)
-                    continue
-
-                start_time = _parse_rt_start_time(trip.get("start_time"))
-                start_date_src = trip.get("start_date") or props.get("start_date")
-                start_date = _parse_rt_start_date(start_date_src, today)
-
-                di = trip.get("direction_id")
-                if di is not None:
-                    direction = int(di)
-                else:
-                    static_dir = trip_dir.get(eff_trip_id, (None, None))[1]
-                    direction = int(static_dir) if static_dir is not None else 0
-
-                new_rt_trip = {
-                    "trip_id": eff_trip_id,
-                    "route_id": route_id,
-                    "start_time": start_time,
-                    "start_date": start_date,
-                    "schedule_relationship": rel,
-                    "direction": direction,
-                    "entity_id": str(item.get("id") or ""),
-                    "dataset": self.dataset,
-                }
-
-                objects_to_commit.append(new_rt_trip)
-                progress.update(task, advance=1)
-
-            if objects_to_commit:
-                try:
-                    await bulk_upsert(
-                        session,
-                        RTTripModel,
-                        objects_to_commit,
-                        ["trip_id", "route_id", "dataset"],
-                        {
-                            "start_time": "start_time",
-                            "start_date": "start_date",
-                            "schedule_relationship": "schedule_relationship",
-                            "direction": "direction",
-                            "entity_id": "entity_id",
-                            "dataset": "dataset",
-                        },
-                    )
-                except Exception as e:
-                    logger.error(f"RealTime: {self.url} failed to commit trips: {e}")
-                    return 0
-            return len(objects_to_commit)
+            except Exception as e:
+                logger.error(f"RealTime: {self.url} failed to commit trips: {e}")
+                self.trip_delta.clear()
+                return UpsertCounts(0, 0, failed=True)
+            return UpsertCounts(written, rows.count - written)
 
 
 async def asyncio_gather_imports(
-    importer: RealTimeImporter, data: dict, progress: rp.Progress
-) -> tuple[int, int]:
-    shared = await load_realtime_import_shared_context(importer.dataset)
+    importer: RealTimeImporter,
+    feed: RealtimeFeed,
+    progress: rp.Progress,
+    shared: RealtimeImportSharedContext | None = None,
+) -> tuple[UpsertCounts, UpsertCounts]:
+    if shared is None:
+        shared = await load_realtime_import_shared_context(importer.dataset)
+    importer.use_static_context(shared)
     total_stop_times, total_trips = await asyncio.gather(
-        importer.import_stop_times(data, progress, shared),
-        importer.import_trips(data, progress, shared),
+        importer.import_stop_times(feed, progress, shared),
+        importer.import_trips(feed, progress, shared),
     )
+    await importer.publish_overlays(feed, shared)
     return total_stop_times, total_trips
 
 
-class RealTimeVehiclesImporter:
-    def __init__(self, url: str, api_key: str, dataset: str) -> None:
-        self.url = url
-        self.api_key = api_key
-        self.dataset = dataset
-
-    async def get_data(self) -> dict | None:
-        headers = {
-            "Cache-Control": "no-cache",
-            "x-api-key": self.api_key,
-        }
-
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.url, headers=headers)
-            if response.status_code != 200:
-                logger.warning(f"RealTime Vehicles: {self.url} returned {response.status_code}")
-                return None
-
-            try:
-                return response.json()
-            except JSONDecodeError as e:
-                logger.error(f"RealTime Vehicles: {self.url} returned invalid JSON: {e}")
-                return None
+class RealTimeVehiclesImporter(_FeedImporter):
+    feed_name = "vehicles"
+    log_label = "RealTime Vehicles"
 
     async def clear_table_vehicles(self):
-        """Clears the table in the database that corresponds to the dataset for rows older than 60 mins"""
+        """
+        Creates the upcoming rt_vehicle partitions and drops the expired ones, and removes latest
+        positions of vehicles that have not reported within the read window
+        """
 
+        window_start, _ = read_window()
         async with async_session_factory() as session:
-            delete_vehicles = delete(RTVehicleModel).where(
-                RTVehicleModel.created_at < RETENTION_PERIOD,
-                RTVehicleModel.dataset == self.dataset,
+            await session.execute(
+                delete(RTVehicleLatestModel).where(
+                    RTVehicleLatestModel.dataset == self.dataset,
+                    RTVehicleLatestModel.updated_at < window_start,
+                )
             )
-            await session.execute(delete_vehicles)
-            await session.commit()
+            await rotate_partitions(session, ("rt_vehicle",))
 
     @CreateSpan()
-    async def import_vehicles(self, data: dict) -> int:
-        """Imports the vehicles from the dataset into the database"""
+    async def import_vehicles(
+        self,
+        feed: RealtimeFeed,
+        shared: RealtimeImportSharedContext | None = None,
+        show_progress: bool = True,
+    ) -> int | None:
+        """
+        Appends the vehicles to the rt_vehicle history and upserts each one's latest position.
+
+        Returns the number of vehicles written, None when they could not be written.
+        """
 
-        entities = data.get("entity", [])
         objects_to_commit: list[dict] = []
-        with rp.Progress(*progress_columns) as progress:
-            task = progress.add_task("[green]Importing RT Vehicles...", total=max(len(entities), 1))
+        latest_by_vehicle: dict[int, dict] = {}
+        with rp.Progress(*progress_columns, disable=not show_progress) as progress:
+            task = progress.add_task("[green]Importing RT Vehicles...", total=max(len(feed.vehicles), 1))
 
             async with async_session_factory() as session:
-                shared = await _shared_context_from_session(session, self.dataset)
+                if shared is None:
+                    shared = await _shared_context_from_session(session, self.dataset)
 
+                updated_at = datetime.now(UTC)
                 try:
-                    for item in entities:
-                        vehicle_update = item.get("vehicle") or {}
-                        trip = vehicle_update.get("trip") or {}
-                        trip_id = trip.get("trip_id")
-                        if not trip_id or trip_id not in shared.trips_in_db:
-                            progress.update(task, advance=1)
+                    for vehicle in feed.vehicles:
+                        progress.update(task, advance=1)
+                        if not vehicle.trip_id or vehicle.trip_id not in shared.trips_in_db:
                             continue
-
-                        vid = vehicle_update.get("vehicle", {}).get("id")
-                        ts = vehicle_update.get("timestamp")
-                        if vid is None or ts is None:
-                            progress.update(task, advance=1)
+                        if vehicle.vehicle_id is None or vehicle.timestamp is None:
                             continue
-
-                        pos = vehicle_update.get("position") or {}
-                        lat = pos.get("latitude")
-                        lon = pos.get("longitude")
-                        if lat is None or lon is None:
-                            progress.update(task, advance=1)
+                        if vehicle.lat is None or vehicle.lon is None:
                             continue
 
-                        objects_to_commit.append(
-                            {
-                                "vehicle_id": int(vid),
-                                "trip_id": trip_id,
-                                "time_of_update": datetime.fromtimestamp(int(ts)),
-                                "lat": lat,
-                                "lon": lon,
-                                "dataset": self.dataset,
+                        row = {
+                            "vehicle_id": int(vehicle.vehicle_id),
+                            "trip_id": vehicle.trip_id,
+                            "time_of_update": datetime.fromtimestamp(vehicle.timestamp),
+                            "lat": vehicle.lat,
+                            "lon": vehicle.lon,
+                            "dataset": self.dataset,
+                        }
+                        objects_to_commit.append(row)
+                        latest = latest_by_vehicle.get(row["vehicle_id"])
+                        if latest is None or row["time_of_update"] >= latest["time_of_update"]:
+                            route_id, direction = shared.trip_routes[vehicle.trip_id]
+                            latest_by_vehicle[row["vehicle_id"]] = {
+                                **row,
+                                "route_id": route_id,
+                                "direction": direction,
+                                "updated_at": updated_at,
                             }
-                        )
-                        progress.update(task, advance=1)
 
                     if objects_to_commit:
                         try:
-                            await bulk_insert(session, RTVehicleModel, objects_to_commit)
+                            await bulk_insert(session, RTVehicleModel, objects_to_commit, auto_commit=False)
+                            await bulk_upsert(
+                                session,
+                                RTVehicleLatestModel,
+                                list(latest_by_vehicle.values()),
+                                ["vehicle_id", "dataset"],
+                                {
+                                    "trip_id": "trip_id",
+                                    "route_id": "route_id",
+                                    "direction": "direction",
+                                    "time_of_update": "time_of_update",
+                                    "lat": "lat",
+                                    "lon": "lon",
+                                    "updated_at": "updated_at",
+                                },
+                            )
                         except Exception as e:
                             logger.error(f"RealTime: {self.url} failed to commit vehicles: {e}")
-                            return 0
+                            return None
                 except Exception as e:
-                    logger.warning(f"RealTime: {self.url} returned invalid JSON in entities: {e}")
-                    return 0
+                    logger.warning(f"RealTime: {self.url} returned invalid vehicle entities: {e}")
+                    return None
 
         return len(objects_to_commit)
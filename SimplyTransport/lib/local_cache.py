@@ -0,0 +1,95 @@
+"""
+Per-worker in-process tier of the response cache.
+
+Holds the encoded responses a worker served most recently, bounded by a byte budget and never kept
+longer than they live in Redis. Entries remember the tags of their key so a tag invalidation
+published by another process evicts the local copies too.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from typing import NamedTuple
+
+from .cache_keys import cache_tags
+
+
+class _Entry(NamedTuple):
+    value: bytes
+    expires_at: float
+    tags: tuple[str, ...]
+
+
+class LocalLRUCache:
+    """Least recently used eviction once ``max_bytes`` of keys and values are held"""
+
+    def __init__(self, max_bytes: int, max_ttl_s: float, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.max_ttl_s = max_ttl_s
+        self.clock = clock
+        self.size_bytes = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._keys_by_tag: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self.clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def set(self, key: str, value: bytes, ttl_s: float | None) -> None:
+        """Stores ``value`` for at most ``ttl_s`` seconds (the remaining Redis TTL) and ``max_ttl_s``"""
+
+        self._remove(key)
+        ttl_s = self.max_ttl_s if ttl_s is None else min(ttl_s, self.max_ttl_s)
+        size = _size(key, value)
+        if ttl_s <= 0 or size > self.max_bytes:
+            return
+
+        entry = _Entry(value, self.clock() + ttl_s, tuple(cache_tags(key)))
+        self._entries[key] = entry
+        self.size_bytes += size
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str) -> None:
+        self._remove(key)
+
+    def evict_tags(self, tags: Iterable[str]) -> int:
+        """Removes the entries carrying any of ``tags``, returns how many were removed"""
+
+        keys = set()
+        for tag in tags:
+            keys |= self._keys_by_tag.get(tag, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+        self.size_bytes = 0
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size_bytes -= _size(key, entry.value)
+        for tag in entry.tags:
+            keys = self._keys_by_tag[tag]
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_tag[tag]
+
+
+def _size(key: str, value: bytes) -> int:
+    return len(key) + len(value)
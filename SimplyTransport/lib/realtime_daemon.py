@@ -0,0 +1,279 @@
+"""
+Long-running GTFS realtime ingestion.
+
+Polls the trip updates and vehicles feeds from a single event loop instead of a fresh CLI process per
+cycle. One pooled HTTP client and one Redis connection live for the lifetime of the daemon, and the
+dataset's static trip/stop/route ids stay in memory until a newer ``GTFS_DATABASE_UPDATED`` event is
+recorded.
+
+Several operators' feeds run side by side, one ``RealtimeDaemon`` per dataset with its own interval.
+Each cycle holds a per-dataset lock shared with the one-shot import commands, so a slow or failing feed
+never holds up the others.
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+import rich.progress as rp
+
+from ..domain.events.event_types import EventType
+from ..domain.events.repo import EventRepository, create_event_with_session
+from ..domain.realtime.realtime_schedule.overlay_store import RealtimeOverlayStore
+from . import settings
+from .cache import RedisService
+from .cache_keys import CacheKeys, cache_tag
+from .concurrency import cli_lock_key, hold_mutex
+from .db.database import async_session_factory
+from .gtfs_realtime_importers import (
+    FeedFetchOutcome,
+    FeedStateStore,
+    RealTimeImporter,
+    RealtimeImportSharedContext,
+    RealTimeVehiclesImporter,
+    UpsertCounts,
+    _shared_context_from_session,
+    asyncio_gather_imports,
+)
+from .logging.logging import provide_logger
+from .settings import RealtimeFeedConfig
+
+logger = provide_logger(__name__)
+
+HTTP_TIMEOUT_S = 30
+CYCLE_LOCK_TTL_S = 15 * 60
+
+
+class StaticIdCache:
+    """Static ids of a dataset, reloaded only when a new ``GTFS_DATABASE_UPDATED`` event appears"""
+
+    def __init__(self, dataset: str):
+        self.dataset = dataset
+        self._context: RealtimeImportSharedContext | None = None
+        self._event_id: int | None = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> RealtimeImportSharedContext:
+        async with self._lock, async_session_factory() as session:
+            event_id = await EventRepository(session=session).get_most_recent_event_id_by_type(
+                EventType.GTFS_DATABASE_UPDATED
+            )
+            if self._context is None or event_id != self._event_id:
+                self._context = await _shared_context_from_session(session, self.dataset)
+                self._event_id = event_id
+                logger.info(
+                    f"RealTime daemon: loaded {len(self._context.trips_in_db)} static trips "
+                    f"for {self.dataset}"
+                )
+            return self._context
+
+
+async def refresh_realtime_responses(redis_service: RedisService, hot_refresh_count: int) -> None:
+    """
+    Invalidates the cached realtime stop and trip responses after a trip updates import, then asks
+    the web workers to re-render the ``hot_refresh_count`` most requested of them.
+    """
+    await redis_service.delete_keys_by_tag(
+        cache_tag(CacheKeys.RealTime.REALTIME_STOP_DELETE_ALL_KEY_TEMPLATE),
+        cache_tag(CacheKeys.RealTime.REALTIME_TRIP_DELETE_ALL_KEY_TEMPLATE),
+    )
+    if hot_refresh_count:
+        await redis_service.request_hot_refresh(hot_refresh_count)
+
+
+class RealtimeDaemon:
+    """
+    Runs both realtime imports of one dataset every ``interval`` seconds until stopped.
+
+    A cycle is skipped while ``pause_lock`` (the static import lock) is held, or while another process
+    holds the dataset's import lock. Failures are logged and the next cycle runs as normal. After a trip
+    updates cycle the web workers re-render the realtime tables of the ``hot_refresh_count`` most
+    requested stops.
+    """
+
+    def __init__(
+        self,
+        trip_importer: RealTimeImporter,
+        vehicles_importer: RealTimeVehiclesImporter | None,
+        client: httpx.AsyncClient,
+        redis_service: RedisService,
+        interval: float,
+        pause_lock: str | None = None,
+        hot_refresh_count: int = 0,
+    ):
+        self.trip_importer = trip_importer
+        self.vehicles_importer = vehicles_importer
+        self.client = client
+        self.redis_service = redis_service
+        self.interval = interval
+        self.pause_lock = pause_lock
+        self.hot_refresh_count = hot_refresh_count
+        self.static_ids = StaticIdCache(trip_importer.dataset)
+
+    @classmethod
+    def for_feed(
+        cls,
+        feed: RealtimeFeedConfig,
+        client: httpx.AsyncClient,
+        redis_service: RedisService,
+        interval: float,
+        pause_lock: str | None = None,
+    ) -> RealtimeDaemon:
+        """Daemon for one configured feed; vehicles are only polled when the feed has a vehicles URL"""
+
+        feed_states = FeedStateStore(redis_service)
+        vehicles_importer = None
+        if feed.vehicles_url:
+            vehicles_importer = RealTimeVehiclesImporter(
+                url=feed.vehicles_url,
+                api_key=feed.vehicles_api_key or feed.api_key,
+                dataset=feed.dataset,
+                protobuf=feed.protobuf,
+                state_store=feed_states,
+            )
+        return cls(
+            trip_importer=RealTimeImporter(
+                url=feed.url,
+                api_key=feed.api_key,
+                dataset=feed.dataset,
+                protobuf=feed.protobuf,
+                state_store=feed_states,
+                overlay_store=RealtimeOverlayStore(redis_service),
+            ),
+            vehicles_importer=vehicles_importer,
+            client=client,
+            redis_service=redis_service,
+            interval=feed.interval_s or interval,
+            pause_lock=pause_lock,
+            hot_refresh_count=settings.app.RESPONSE_CACHE_HOT_REFRESH_COUNT,
+        )
+
+    async def _paused(self) -> bool:
+        if self.pause_lock is None:
+            return False
+        return bool(await self.redis_service.redis.exists(cli_lock_key(self.pause_lock)))
+
+    async def import_trip_updates(self) -> tuple[UpsertCounts, UpsertCounts] | FeedFetchOutcome:
+        """One trip updates cycle; returns the stop time and trip counts, or why nothing was imported"""
+
+        start = time.perf_counter()
+        fetch = await self.trip_importer.get_data(self.client)
+        if fetch.feed is None:
+            return fetch.outcome
+
+        shared = await self.static_ids.get()
+        await self.trip_importer.clear_table_stop_trip()
+        with rp.Progress(disable=True) as progress:
+            total_stop_times, total_trips = await asyncio_gather_imports(
+                self.trip_importer, fetch.feed, progress, shared
+            )
+        # A snapshot that was not fully written is imported again on the next poll
+        if not (total_stop_times.failed or total_trips.failed):
+            await self.trip_importer.commit_feed_state(fetch)
+
+        await create_event_with_session(
+            EventType.REALTIME_DATABASE_UPDATED,
+            "Realtime database updated with new realtime information",
+            {
+                "dataset": self.trip_importer.dataset,
+                "total_trips": total_trips.total,
+                "trips_written": total_trips.written,
+                "total_stop_times": total_stop_times.total,
+                "stop_times_written": total_stop_times.written,
+                "time_taken(s)": round(time.perf_counter() - start, 2),
+            },
+        )
+        await refresh_realtime_responses(self.redis_service, self.hot_refresh_count)
+        return total_stop_times, total_trips
+
+    async def import_vehicles(self) -> int | FeedFetchOutcome:
+        """One vehicles cycle; returns the vehicle total, or why nothing was imported"""
+
+        importer = self.vehicles_importer
+        if importer is None:
+            raise RuntimeError(f"No vehicles feed is configured for {self.trip_importer.dataset}")
+        start = time.perf_counter()
+        fetch = await importer.get_data(self.client)
+        if fetch.feed is None:
+            return fetch.outcome
+
+        shared = await self.static_ids.get()
+        await importer.clear_table_vehicles()
+        total_vehicles = await importer.import_vehicles(fetch.feed, shared, show_progress=False)
+        if total_vehicles is None:
+            return FeedFetchOutcome.FAILED
+        await importer.commit_feed_state(fetch)
+
+        await create_event_with_session(
+            EventType.REALTIME_VEHICLES_DATABASE_UPDATED,
+            "Realtime vehicles database updated with new realtime information",
+            {
+                "dataset": importer.dataset,
+                "total_vehicles": total_vehicles,
+                "time_taken(s)": round(time.perf_counter() - start, 2),
+            },
+        )
+        await self.redis_service.delete_keys_by_tag(
+            cache_tag(CacheKeys.StopMaps.STOP_MAP_DELETE_ALL_KEY_TEMPLATE),
+            cache_tag(CacheKeys.RouteMaps.ROUTE_MAP_DELETE_ALL_KEY_TEMPLATE),
+        )
+        return total_vehicles
+
+    async def poll(
+        self,
+        name: str,
+        cycle: Callable[[], Awaitable[object]],
+        stop: asyncio.Event,
+        lock_name: str | None = None,
+    ) -> None:
+        """
+        Runs ``cycle`` every ``interval`` seconds, measured start to start, until ``stop`` is set.
+
+        With ``lock_name`` each cycle holds that concurrency lock and is skipped when it is taken.
+        """
+
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                if await self._paused():
+                    logger.warning(f"RealTime daemon: {name} skipped, GTFS static import is in progress")
+                elif lock_name is None:
+                    await self._run_cycle(name, cycle, start)
+                else:
+                    async with hold_mutex(self.redis_service.redis, lock_name, CYCLE_LOCK_TTL_S) as acquired:
+                        if acquired:
+                            await self._run_cycle(name, cycle, start)
+                        else:
+                            logger.warning(
+                                f"RealTime daemon: {name} skipped, another import holds {lock_name}"
+                            )
+            except Exception:
+                logger.exception(f"RealTime daemon: {name} cycle failed")
+
+            remaining = self.interval - (time.perf_counter() - start)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=max(remaining, 0))
+            except TimeoutError:
+                pass
+
+    async def _run_cycle(self, name: str, cycle: Callable[[], Awaitable[object]], start: float) -> None:
+        result = await cycle()
+        logger.info(f"RealTime daemon: {name} cycle {result} in {round(time.perf_counter() - start, 2)}s")
+
+    async def run(self, stop: asyncio.Event) -> None:
+        dataset = self.trip_importer.dataset
+        polls = [
+            self.poll(f"{dataset} trip updates", self.import_trip_updates, stop, self.trip_importer.lock_name)
+        ]
+        if self.vehicles_importer is not None:
+            polls.append(
+                self.poll(f"{dataset} vehicles", self.import_vehicles, stop, self.vehicles_importer.lock_name)
+            )
+        await asyncio.gather(*polls)
+
+
+async def run_daemons(daemons: list[RealtimeDaemon], stop: asyncio.Event) -> None:
+    """Polls every dataset concurrently until ``stop`` is set; each daemon handles its own failures"""
+
+    await asyncio.gather(*(daemon.run(stop) for daemon in daemons))
@@ -0,0 +1,124 @@
+"""
+Stale-while-revalidate and proactive refresh for the response cache.
+
+Routes opt in through their ``opt``:
+
+- ``STALE_GRACE_OPT``: seconds an entry is kept past its ``cache`` TTL. A request inside that grace
+  window is served the stale entry while one request per key re-renders it in the background.
+- ``HOT_REFRESH_OPT``: requests are counted per path so the realtime daemon can have the most
+  requested ones re-rendered right after each import cycle.
+
+Re-rendering replays a GET request through the app in-process with the response cache bypassed; the
+response cache middleware then stores the fresh response as for any other request.
+"""
+
+from collections.abc import Mapping
+from contextvars import ContextVar
+from typing import Any
+
+from litestar.types import ASGIApp, HTTPRequestEvent, Message, Receive, Scope, Send
+
+STALE_GRACE_OPT = "stale_grace_s"
+HOT_REFRESH_OPT = "hot_refresh"
+
+# Headers a replayed request keeps, so it renders and compresses the same way as the original
+_REPLAYED_HEADERS = frozenset({b"accept", b"accept-encoding", b"host"})
+
+_request_scope: ContextVar[Scope | None] = ContextVar("response_cache_request_scope", default=None)
+_rerendering: ContextVar[bool] = ContextVar("response_cache_rerendering", default=False)
+
+
+def request_scope_middleware(app: ASGIApp) -> ASGIApp:
+    """Exposes the scope of the current request to the response cache store"""
+
+    async def middleware(scope: Scope, receive: Receive, send: Send) -> None:
+        token = _request_scope.set(scope)
+        try:
+            await app(scope, receive, send)
+        finally:
+            _request_scope.reset(token)
+
+    return middleware
+
+
+def _route_opt(name: str) -> Any:
+    scope = _request_scope.get()
+    if scope is None or "route_handler" not in scope:
+        return None
+    return scope["route_handler"].opt.get(name)
+
+
+def stale_grace_s() -> int:
+    """Grace window of the current request's route, 0 when it does not serve stale entries"""
+    return int(_route_opt(STALE_GRACE_OPT) or 0)
+
+
+def hot_request_target() -> str | None:
+    """Path and query of the current request when its route is refreshed proactively"""
+
+    if not _route_opt(HOT_REFRESH_OPT):
+        return None
+    scope = _request_scope.get()
+    if scope is None:
+        return None
+    query = scope.get("query_string", b"").decode("latin-1")
+    return f"{scope['path']}?{query}" if query else scope["path"]
+
+
+def current_request_scope() -> Scope | None:
+    return _request_scope.get()
+
+
+def is_rerendering() -> bool:
+    """True inside a replayed request, whose cache lookups must miss so the handler runs"""
+    return _rerendering.get()
+
+
+def replay_scope(scope: Mapping[str, Any]) -> dict[str, Any]:
+    """A fresh GET scope for the request ``scope`` was created for"""
+
+    return {
+        "type": "http",
+        "asgi": scope.get("asgi", {"version": "3.0"}),
+        "http_version": scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": scope.get("scheme", "http"),
+        "server": scope.get("server"),
+        "client": scope.get("client"),
+        "root_path": scope.get("root_path", ""),
+        "path": scope["path"],
+        "raw_path": scope.get("raw_path", scope["path"].encode()),
+        "query_string": scope.get("query_string", b""),
+        "headers": [(name, value) for name, value in scope.get("headers", []) if name in _REPLAYED_HEADERS],
+        "state": {},
+    }
+
+
+def path_scope(target: str) -> dict[str, Any]:
+    """A GET scope for ``target`` (path and query); asks for gzip like the browsers the cache serves"""
+
+    path, _, query = target.partition("?")
+    return replay_scope(
+        {"path": path, "query_string": query.encode("latin-1"), "headers": [(b"accept-encoding", b"gzip")]}
+    )
+
+
+async def rerender(app: ASGIApp, scope: dict[str, Any]) -> int:
+    """Replays ``scope`` through ``app`` with the response cache bypassed, returns the response status"""
+
+    status = 0
+
+    async def receive() -> HTTPRequestEvent:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    token = _rerendering.set(True)
+    try:
+        await app(scope, receive, send)  # type: ignore[arg-type]
+    finally:
+        _rerendering.reset(token)
+    return status
@@ -1,7 +1,19 @@
-from pydantic import ValidationInfo, field_validator
+from pydantic import BaseModel, ValidationInfo, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class RealtimeFeedConfig(BaseModel):
+    """One operator's GTFS realtime feeds, polled by the realtime daemon."""
+
+    dataset: str
+    url: str
+    api_key: str
+    vehicles_url: str | None = None
+    vehicles_api_key: str | None = None
+    protobuf: bool = False
+    interval_s: float | None = None  # Seconds between polls, defaults to REALTIME_DAEMON_INTERVAL_S
+
+
 class AppSettings(BaseSettings):
     """Settings class for environment variables."""
 
@@ -32,16 +44,33 @@ class AppSettings(BaseSettings):
     REDIS_HOST: str = "127.0.0.1"
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str | None = None
+    # Per-worker in-process tier of the response cache, 0 bytes disables it
+    RESPONSE_CACHE_LOCAL_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_LOCAL_MAX_TTL_S: int = 300
+    # Concurrent misses of one response cache key wait for a single request to recompute it
+    RESPONSE_CACHE_LEASE_S: float = 10
+    RESPONSE_CACHE_COALESCE_WAIT_S: float = 5
+    # Realtime tables of this many of the most requested stops are re-rendered after each realtime import
+    RESPONSE_CACHE_HOT_REFRESH_COUNT: int = 0
 
     # OpenTelemetry (OTLP/HTTP base URL; paths /v1/traces, /v1/metrics, /v1/logs appended in code)
     OTEL_EXPORTER_OTLP_ENDPOINT: str = "http://127.0.0.1:4318"
 
+    # Directory the static timetable snapshots are written to by importgtfs and mapped from by workers
+    TIMETABLE_SNAPSHOT_DIR: str = "timetable_snapshots"
+
     # GTFS TFI Realtime
     GTFS_TFI_REALTIME_URL: str = "example"
     GTFS_TFI_REALTIME_VEHICLES_URL: str = "example"
     GTFS_TFI_API_KEY_1: str = "example"
     GTFS_TFI_API_KEY_2: str = "example"
     GTFS_TFI_DATASET: str = "example"
+    GTFS_TFI_REALTIME_PROTOBUF: bool = False
+    REALTIME_DAEMON_INTERVAL_S: int = 60
+
+    # Realtime feeds of every operator as a JSON list, e.g. [{"dataset": "TFI", "url": ..., "api_key": ...}]
+    # When empty the daemon ingests the single TFI feed configured above
+    REALTIME_FEEDS: list[RealtimeFeedConfig] = []
 
     @field_validator("NAME")
     def set_name(cls, v: str, values: ValidationInfo) -> str:  # noqa: N805
@@ -57,6 +86,21 @@ class AppSettings(BaseSettings):
         # Sets the log level to DEBUG if in DEV else INFO
         return "DEBUG" if values.data.get("ENVIRONMENT") == "DEV" else "INFO"
 
+    def realtime_feeds(self) -> list[RealtimeFeedConfig]:
+        """``REALTIME_FEEDS``, or the TFI feed when none are configured."""
+        if self.REALTIME_FEEDS:
+            return list(self.REALTIME_FEEDS)
+        return [
+            RealtimeFeedConfig(
+                dataset=self.GTFS_TFI_DATASET,
+                url=self.GTFS_TFI_REALTIME_URL,
+                api_key=self.GTFS_TFI_API_KEY_1,
+                vehicles_url=self.GTFS_TFI_REALTIME_VEHICLES_URL,
+                vehicles_api_key=self.GTFS_TFI_API_KEY_2,
+                protobuf=self.GTFS_TFI_REALTIME_PROTOBUF,
+            )
+        ]
+
     model_config = SettingsConfigDict(env_file=(".env"), extra="ignore")
 
 
@@ -0,0 +1,91 @@
+"""
+Request coalescing for response cache misses, across every worker.
+
+The first request to miss a key takes a short Redis lease on it and recomputes the response. Concurrent
+requests for the same key, in any process, wait for that value to appear instead of recomputing it
+too. A lease is released once its value is cached; if its holder fails it is released after the
+response (see ``release_response_cache_lease``) or expires, and a waiter takes over.
+"""
+
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable
+from contextvars import Context, ContextVar, copy_context
+
+from redis.asyncio import Redis
+
+from .cache_keys import CacheKeys
+
+# Delay between a waiter's polls doubles from the first to the last
+POLL_INTERVAL_S = 0.025
+MAX_POLL_INTERVAL_S = 0.2
+
+_LEASE_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+else
+  return 0
+end
+"""
+
+# (key, token) of the lease the current request holds; each request runs in its own task context
+_held_lease: ContextVar[tuple[str, str] | None] = ContextVar("single_flight_lease", default=None)
+
+
+class SingleFlight:
+    """Redis leases under ``namespace``, one per cache key being recomputed"""
+
+    def __init__(self, redis: Redis, namespace: str, lease_ttl_s: float, wait_s: float):
+        self._redis = redis
+        self.namespace = namespace
+        self.lease_ttl_s = lease_ttl_s
+        self.wait_s = wait_s
+
+    def _lease_key(self, key: str) -> str:
+        return f"{self.namespace}:{CacheKeys.SingleFlight.LEASE_KEY_TEMPLATE.format(key=key)}"
+
+    async def acquire(self, key: str) -> bool:
+        """Takes the lease on ``key`` for the current request, False when another request holds it"""
+
+        token = uuid.uuid4().hex
+        if not await self._redis.set(self._lease_key(key), token, nx=True, px=int(self.lease_ttl_s * 1000)):
+            return False
+        _held_lease.set((key, token))
+        return True
+
+    async def release(self, key: str) -> None:
+        """Releases the lease on ``key`` if the current request holds it, otherwise a no-op"""
+
+        held = _held_lease.get()
+        if held is None or held[0] != key:
+            return
+        _held_lease.set(None)
+        await self._redis.execute_command("EVAL", _LEASE_RELEASE_LUA, 1, self._lease_key(key), held[1])
+
+    def hand_over(self) -> Context:
+        """
+        Moves the lease the current request holds into a copy of its context, for a background task
+        to finish the work in. The request itself no longer releases it.
+        """
+        context = copy_context()
+        _held_lease.set(None)
+        return context
+
+    async def wait[T](self, key: str, fetch: Callable[[], Awaitable[T | None]]) -> T | None:
+        """
+        Polls ``fetch`` until the lease holder of ``key`` has cached its value and returns it.
+
+        Returns None when the caller should compute the value itself: it took over the lease of a
+        holder that gave up, or ``wait_s`` passed.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_s
+        delay = POLL_INTERVAL_S
+        while True:
+            await asyncio.sleep(delay)
+            value = await fetch()
+            if value is not None:
+                return value
+            if loop.time() >= deadline or await self.acquire(key):
+                return None
+            delay = min(delay * 2, MAX_POLL_INTERVAL_S)
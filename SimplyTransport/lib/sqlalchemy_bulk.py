@@ -1,7 +1,13 @@
-"""Batched PostgreSQL Core ``INSERT`` and ``INSERT ... ON CONFLICT DO UPDATE`` helpers."""
+"""Batched PostgreSQL Core ``INSERT``, ``INSERT ... ON CONFLICT DO UPDATE`` and binary ``COPY`` helpers."""
 
+import asyncio
+import contextlib
+import itertools
+from collections.abc import AsyncIterable, Callable, Iterable, Sequence
 from typing import Any
 
+from sqlalchemy import Select, func, select
+from sqlalchemy import Sequence as DBSequence
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_scoped_session
 from sqlalchemy.sql.dml import Insert
@@ -59,3 +65,126 @@ async def bulk_upsert(
         await session.execute(stmt)
     if auto_commit:
         await session.commit()
+
+
+async def bulk_upsert_stream(
+    session: _AsyncSessionish,
+    model: type,
+    rows: Iterable[dict[str, Any]],
+    index_elements: list[str],
+    update_dict: dict[str, str],
+    *,
+    batch_size: int = DEFAULT_BULK_INSERT_BATCH_SIZE,
+    on_batch: Callable[[list[dict[str, Any]]], None] | None = None,
+    auto_commit: bool = True,
+) -> int:
+    """Upsert ``rows`` as they are produced, building each batch while the previous one executes.
+
+    Only the batch in flight and the one being built are held, so memory is bounded by ``batch_size``
+    instead of by the number of rows. ``on_batch`` is called with each batch once it has executed.
+
+    Returns:
+        int: Number of rows upserted.
+    """
+    written = 0
+    in_flight: asyncio.Future[Any] | None = None
+    in_flight_rows: list[dict[str, Any]] = []
+
+    async def finish() -> None:
+        nonlocal written, in_flight
+        assert in_flight is not None
+        await in_flight
+        in_flight = None
+        written += len(in_flight_rows)
+        if on_batch is not None:
+            on_batch(in_flight_rows)
+
+    try:
+        for batch in itertools.batched(rows, batch_size, strict=False):
+            if in_flight is not None:
+                await finish()
+            in_flight_rows = list(batch)
+            in_flight = asyncio.ensure_future(
+                session.execute(_bulk_upsert_statement(model, in_flight_rows, index_elements, update_dict))
+            )
+            # Let the statement go out before the generator builds the next batch
+            await asyncio.sleep(0)
+        if in_flight is not None:
+            await finish()
+    except BaseException:
+        if in_flight is not None:
+            # Never leave a statement running on the connection the caller is about to roll back
+            with contextlib.suppress(Exception):
+                await in_flight
+        raise
+
+    if auto_commit:
+        await session.commit()
+    return written
+
+
+async def reserve_sequence_ids(session: _AsyncSessionish, model: type, count: int) -> list[int]:
+    """Draw ``count`` ids from the ``id`` sequence of ``model`` in one round trip.
+
+    ``COPY`` bypasses column defaults that SQLAlchemy fires client-side, so tables keyed on a
+    ``BigIntAuditBase`` sequence need their ids allocated up front.
+    """
+    if count <= 0:
+        return []
+    sequence = model.__table__.c.id.default  # type: ignore[attr-defined]
+    if not isinstance(sequence, DBSequence):
+        raise ValueError(f"{model.__name__}.id is not backed by a sequence")
+    stmt = select(sequence.next_value()).select_from(func.generate_series(1, count))
+    result = await session.execute(stmt)
+    return list(result.scalars())
+
+
+def insert_from_select_statement(model: type, columns: Sequence[str], statement: Select) -> Insert:
+    """``INSERT INTO model (id, columns..., created_at, updated_at) SELECT ...`` run entirely server-side.
+
+    ``statement`` selects ``columns`` in order; ids are drawn from the ``BigIntAuditBase`` sequence
+    and the audit timestamps set to ``now()``, since their client-side defaults never fire here.
+    """
+    sequence = model.__table__.c.id.default  # type: ignore[attr-defined]
+    if not isinstance(sequence, DBSequence):
+        raise ValueError(f"{model.__name__}.id is not backed by a sequence")
+    rows = statement.subquery()
+    return insert(model).from_select(  # type: ignore[arg-type]
+        ["id", *columns, "created_at", "updated_at"],
+        select(sequence.next_value(), *(rows.c[column] for column in columns), func.now(), func.now()),
+    )
+
+
+async def bulk_copy(
+    session: _AsyncSessionish,
+    model: type,
+    columns: Sequence[str],
+    records: Iterable[tuple[Any, ...]] | AsyncIterable[tuple[Any, ...]],
+    *,
+    table_name: str | None = None,
+    auto_commit: bool = True,
+) -> int:
+    """Stream ``records`` into ``model``'s table with binary ``COPY ... FROM STDIN``.
+
+    Records are plain tuples in ``columns`` order and must already hold the Python types asyncpg
+    encodes for each column (``str``, ``int``, ``float``, ``date``, ``time``, aware ``datetime``).
+    ``table_name`` overrides the model's table, e.g. to load a shadow copy of it.
+    Requires the asyncpg driver; callers should fall back to :func:`bulk_insert` otherwise.
+
+    Returns:
+        int: Number of rows copied, as reported by the server.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    if not hasattr(driver_connection, "copy_records_to_table"):
+        raise TypeError("bulk_copy requires an asyncpg connection")
+
+    status: str = await driver_connection.copy_records_to_table(  # type: ignore[union-attr]
+        table_name or model.__tablename__,  # type: ignore[attr-defined]
+        records=records,
+        columns=list(columns),
+    )
+    if auto_commit:
+        await session.commit()
+    return int(status.rsplit(" ", 1)[-1])
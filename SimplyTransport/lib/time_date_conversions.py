@@ -1,5 +1,5 @@
 import json
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timedelta
 from typing import Any
 
 from litestar.exceptions import ValidationException
@@ -75,3 +75,19 @@ def validate_time_range(start_time: datetime | None, end_time: datetime | None)
         raise ValidationException(
             detail=f"Start time cannot be greater than end time {start_time} > {end_time}"
         )
+
+
+def next_date_on_weekday(weekday: int, today: date | None = None) -> date:
+    """
+    Returns the first date on or after ``today`` that falls on ``weekday``.
+
+    Args:
+        weekday (int): The day of the week, Monday being 0 as in ``date.weekday()``.
+        today (date | None): The date to count from, defaults to the current date.
+
+    Returns:
+        date: ``today`` itself when it already falls on ``weekday``.
+    """
+
+    today = today or date.today()
+    return today + timedelta(days=(weekday - today.weekday()) % 7)
@@ -0,0 +1,295 @@
+"""
+Stop departures answered from the mapped timetable snapshots instead of SQL.
+
+Within a snapshot the stop times of a stop are a contiguous, arrival-ordered slice, so a time window
+is two binary searches and every row in between is a candidate. Services are filtered with a bit
+test against the snapshot's precomputed activation bitmap, which already folds in the calendar
+weekday bits, the validity range and the ``calendar_dates`` removals and additions. Matching rows
+are hydrated into the same :class:`StaticScheduleModel` objects the SQL path returns, parents being
+built once per snapshot.
+"""
+
+import math
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from datetime import date, time
+
+from ..domain.calendar.model import CalendarModel
+from ..domain.route.model import RouteModel
+from ..domain.schedule.model import StaticScheduleModel
+from ..domain.stop.model import StopModel
+from ..domain.stop_times.model import StopTimeModel
+from ..domain.trip.model import TripModel
+from .timetable_snapshot import (
+    NULL,
+    WEEKDAY_COLUMNS,
+    TimetableSnapshot,
+    TimetableSnapshotStore,
+    seconds_since_midnight,
+    time_from_seconds,
+    timetable_snapshots,
+)
+
+
+def _optional_int(value: int) -> int | None:
+    return None if value == NULL else value
+
+
+def window_ranges(
+    arrivals: memoryview, rows: range, start_time: time | None, end_time: time | None
+) -> list[range]:
+    """
+    Sub-ranges of ``rows`` (sorted by arrival) whose arrival lies between the two times, inclusive.
+
+    A window whose start is after its end wraps past midnight and yields the early and the late part,
+    in arrival order.
+    """
+
+    if start_time is None or end_time is None:
+        return [rows]
+
+    start, end = seconds_since_midnight(start_time), seconds_since_midnight(end_time)
+    lo, hi = rows.start, rows.stop
+    if start <= end:
+        return [range(bisect_left(arrivals, start, lo, hi), bisect_right(arrivals, end, lo, hi))]
+    return [
+        range(lo, bisect_right(arrivals, end, lo, hi)),
+        range(bisect_left(arrivals, start, lo, hi), hi),
+    ]
+
+
+def in_window(arrival: int, start_time: time | None, end_time: time | None) -> bool:
+    if start_time is None or end_time is None:
+        return True
+    start, end = seconds_since_midnight(start_time), seconds_since_midnight(end_time)
+    if start <= end:
+        return start <= arrival <= end
+    return arrival >= start or arrival <= end
+
+
+class SnapshotSchedules:
+    """Model hydration for a single snapshot"""
+
+    def __init__(self, snapshot: TimetableSnapshot):
+        self.snapshot = snapshot
+        self._routes: dict[int, RouteModel] = {}
+        self._stops: dict[int, StopModel] = {}
+        self._calendars: dict[int, CalendarModel] = {}
+        self._trips: dict[int, TripModel] = {}
+
+    def route(self, index: int) -> RouteModel:
+        route = self._routes.get(index)
+        if route is None:
+            snapshot, string = self.snapshot, self.snapshot.string
+            route = RouteModel(
+                id=string(snapshot["route_id"][index]),
+                agency_id=string(snapshot["route_agency_id"][index]),
+                short_name=string(snapshot["route_short_name"][index]),
+                long_name=string(snapshot["route_long_name"][index]),
+                description=string(snapshot["route_description"][index]),
+                route_type=snapshot["route_type"][index],
+                url=string(snapshot["route_url"][index]),
+                color=string(snapshot["route_color"][index]),
+                text_color=string(snapshot["route_text_color"][index]),
+                dataset=snapshot.dataset,
+            )
+            self._routes[index] = route
+        return route
+
+    def stop(self, index: int) -> StopModel:
+        stop = self._stops.get(index)
+        if stop is None:
+            snapshot, string = self.snapshot, self.snapshot.string
+            lat, lon = snapshot["stop_lat"][index], snapshot["stop_lon"][index]
+            stop = StopModel(
+                id=string(snapshot["stop_id"][index]),
+                code=string(snapshot["stop_code"][index]),
+                name=string(snapshot["stop_name"][index]),
+                description=string(snapshot["stop_description"][index]),
+                lat=None if math.isnan(lat) else lat,
+                lon=None if math.isnan(lon) else lon,
+                zone_id=string(snapshot["stop_zone_id"][index]),
+                url=string(snapshot["stop_url"][index]),
+                location_type=_optional_int(snapshot["stop_location_type"][index]),
+                parent_station=string(snapshot["stop_parent_station"][index]),
+                dataset=snapshot.dataset,
+            )
+            self._stops[index] = stop
+        return stop
+
+    def calendar(self, index: int) -> CalendarModel:
+        calendar = self._calendars.get(index)
+        if calendar is None:
+            snapshot = self.snapshot
+            weekdays = snapshot["calendar_weekdays"][index]
+            calendar = CalendarModel(
+                id=snapshot.string(snapshot["calendar_id"][index]),
+                start_date=date.fromordinal(snapshot["calendar_start_date"][index]),
+                end_date=date.fromordinal(snapshot["calendar_end_date"][index]),
+                dataset=snapshot.dataset,
+                **{column: (weekdays >> bit) & 1 for bit, column in enumerate(WEEKDAY_COLUMNS)},
+            )
+            self._calendars[index] = calendar
+        return calendar
+
+    def trip(self, index: int) -> TripModel:
+        trip = self._trips.get(index)
+        if trip is None:
+            snapshot, string = self.snapshot, self.snapshot.string
+            trip = TripModel(
+                id=string(snapshot["trip_id"][index]),
+                route_id=string(snapshot["route_id"][snapshot["trip_route"][index]]),
+                service_id=string(snapshot["calendar_id"][snapshot["trip_service"][index]]),
+                headsign=string(snapshot["trip_headsign"][index]),
+                short_name=string(snapshot["trip_short_name"][index]),
+                direction=snapshot["trip_direction"][index],
+                block_id=string(snapshot["trip_block_id"][index]),
+                shape_id=string(snapshot["trip_shape_id"][index]),
+                dataset=snapshot.dataset,
+            )
+            self._trips[index] = trip
+        return trip
+
+    def schedule(self, row: int, stop_index: int) -> StaticScheduleModel:
+        snapshot = self.snapshot
+        trip_index = snapshot["stop_time_trip"][row]
+        trip, stop = self.trip(trip_index), self.stop(stop_index)
+        stop_time = StopTimeModel(
+            trip_id=trip.id,
+            stop_id=stop.id,
+            arrival_time=time_from_seconds(snapshot["stop_time_arrival"][row]),
+            departure_time=time_from_seconds(snapshot["stop_time_departure"][row]),
+            stop_sequence=snapshot["stop_time_sequence"][row],
+            stop_headsign=snapshot.string(snapshot["stop_time_headsign"][row]),
+            pickup_type=_optional_int(snapshot["stop_time_pickup_type"][row]),
+            dropoff_type=_optional_int(snapshot["stop_time_dropoff_type"][row]),
+            timepoint=_optional_int(snapshot["stop_time_timepoint"][row]),
+            dataset=snapshot.dataset,
+        )
+        return StaticScheduleModel(
+            route=self.route(snapshot["trip_route"][trip_index]),
+            stop_time=stop_time,
+            calendar=self.calendar(snapshot["trip_service"][trip_index]),
+            stop=stop,
+            trip=trip,
+        )
+
+    def stop_of_row(self, row: int) -> int:
+        """Index of the stop a stop time row belongs to, found from the per-stop offsets"""
+
+        return bisect_right(self.snapshot["stop_offsets"], row) - 1
+
+
+class TimetableEngine:
+    """
+    Answers schedule queries from every dataset snapshot in ``store``.
+
+    Queries return ``None`` (or report the trips they could not find) when no snapshot knows the
+    stop, so callers can fall back to SQL for datasets that have not been snapshotted yet.
+    """
+
+    def __init__(self, store: TimetableSnapshotStore):
+        self.store = store
+        self._schedules: dict[tuple[str, str], SnapshotSchedules] = {}
+
+    def _snapshot_schedules(self) -> list[SnapshotSchedules]:
+        current = {(snapshot.dataset, snapshot.version): snapshot for snapshot in self.store.all()}
+        if current.keys() != self._schedules.keys():
+            self._schedules = {
+                key: self._schedules.get(key) or SnapshotSchedules(snapshot)
+                for key, snapshot in current.items()
+            }
+        return list(self._schedules.values())
+
+    @property
+    def available(self) -> bool:
+        return bool(self._snapshot_schedules())
+
+    def departures(
+        self,
+        stop_id: str,
+        service_date: date,
+        start_time: time | None = None,
+        end_time: time | None = None,
+    ) -> list[StaticScheduleModel] | None:
+        """Schedules calling at ``stop_id`` on ``service_date``, ordered by arrival time"""
+
+        found = False
+        results: list[StaticScheduleModel] = []
+        for schedules in self._snapshot_schedules():
+            snapshot = schedules.snapshot
+            stop_index = snapshot.stop_indexes.get(stop_id)
+            if stop_index is None:
+                continue
+            found = True
+            ordinal, service_active = service_date.toordinal(), snapshot.service_active
+            trips, services = snapshot["stop_time_trip"], snapshot["trip_service"]
+            rows = snapshot.stop_time_range(stop_id)
+            for window in window_ranges(snapshot["stop_time_arrival"], rows, start_time, end_time):
+                for row in window:
+                    if service_active(services[trips[row]], ordinal):
+                        results.append(schedules.schedule(row, stop_index))
+
+        if not found:
+            return None
+        results.sort(key=lambda schedule: schedule.stop_time.arrival_time)
+        return results
+
+    def trip_schedules(
+        self,
+        trip_ids: Iterable[str],
+        service_date: date,
+        start_time: time | None = None,
+        end_time: time | None = None,
+    ) -> tuple[list[StaticScheduleModel], list[str]]:
+        """
+        Schedules of ``trip_ids`` arriving between the two times on ``service_date``.
+
+        Returns the schedules, ordered by arrival time, and the trip ids no snapshot knows about.
+        """
+
+        missing = dict.fromkeys(trip_ids)
+        results: list[StaticScheduleModel] = []
+        for schedules in self._snapshot_schedules():
+            snapshot = schedules.snapshot
+            arrivals, services = snapshot["stop_time_arrival"], snapshot["trip_service"]
+            for trip_id in list(missing):
+                trip_index = snapshot.trip_indexes.get(trip_id)
+                if trip_index is None:
+                    continue
+                del missing[trip_id]
+                if not snapshot.service_active(services[trip_index], service_date.toordinal()):
+                    continue
+                for row in _rows_in_window(
+                    snapshot.trip_stop_time_rows(trip_index), arrivals, start_time, end_time
+                ):
+                    results.append(schedules.schedule(row, schedules.stop_of_row(row)))
+
+        results.sort(key=lambda schedule: schedule.stop_time.arrival_time)
+        return results, list(missing)
+
+    def is_service_active(self, service_id: str, on_date: date) -> bool | None:
+        """Whether ``service_id`` runs on ``on_date``, ``None`` when no snapshot has the service"""
+
+        for schedules in self._snapshot_schedules():
+            service_index = schedules.snapshot.service_indexes.get(service_id)
+            if service_index is not None:
+                return schedules.snapshot.service_active(service_index, on_date.toordinal())
+        return None
+
+
+def _rows_in_window(
+    rows: memoryview, arrivals: memoryview, start_time: time | None, end_time: time | None
+) -> Iterator[int]:
+    for row in rows:
+        if in_window(arrivals[row], start_time, end_time):
+            yield row
+
+
+timetable_engine = TimetableEngine(timetable_snapshots)
+
+
+def provide_timetable_engine() -> TimetableEngine:
+    """This provides the timetable engine over the snapshots mapped by this worker."""
+
+    return timetable_engine
@@ -0,0 +1,681 @@
+"""
+Columnar, memory-mappable snapshot of the static timetable.
+
+``importgtfs`` writes one snapshot per dataset and import event. Every id and text value is
+interned into a single UTF-8 string pool and referenced by index, times are stored as seconds since
+midnight and dates as ordinals, and stop times are sorted by stop and arrival so ``stop_offsets``
+gives the slice of departures of any stop, while ``trip_stop_times`` / ``trip_offsets`` list the
+stop times of each trip in sequence order.
+
+Which services run on which day is precomputed into ``service_activation``: one bit per service and
+day of the feed's validity range, folding in the weekday flags, start and end dates and the
+``calendar_dates`` additions and removals, so checking a service is a single bit test.
+
+Each column is a flat native-endian array in its own
+file, so a web worker maps the files and reads them in place instead of copying them into Python
+objects.
+
+Layout::
+
+    <TIMETABLE_SNAPSHOT_DIR>/<dataset>/<version>/manifest.json
+    <TIMETABLE_SNAPSHOT_DIR>/<dataset>/<version>/<column>.bin
+    <TIMETABLE_SNAPSHOT_DIR>/<dataset>/CURRENT
+
+``CURRENT`` names the live version and is replaced atomically, so workers can poll it and hot-swap
+to a new snapshot while requests still holding the old one keep reading it.
+"""
+
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+import time as timer
+from array import array
+from collections.abc import AsyncIterator, Mapping
+from datetime import time
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..domain.calendar.model import CalendarModel
+from ..domain.calendar_dates.model import CalendarDateModel
+from ..domain.enums import ExceptionType
+from ..domain.route.model import RouteModel
+from ..domain.stop.model import StopModel
+from ..domain.stop_times.model import StopTimeModel
+from ..domain.trip.model import TripModel
+from . import settings
+from .logging.logging import provide_logger
+
+logger = provide_logger(__name__)
+
+SNAPSHOT_FORMAT = 3
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+VERSIONS_TO_KEEP = 3
+REFRESH_INTERVAL_S = 30.0
+FETCH_SIZE = 50000
+
+# Reference used in string columns for a NULL value, and the value of NULL small integers
+NULL = -1
+
+# column -> array typecode, grouped by the entity each row describes
+COLUMNS: dict[str, str] = {
+    "strings": "B",
+    "string_offsets": "q",
+    "stop_id": "i",
+    "stop_code": "i",
+    "stop_name": "i",
+    "stop_description": "i",
+    "stop_zone_id": "i",
+    "stop_url": "i",
+    "stop_parent_station": "i",
+    "stop_lat": "d",
+    "stop_lon": "d",
+    "stop_location_type": "b",
+    "route_id": "i",
+    "route_agency_id": "i",
+    "route_short_name": "i",
+    "route_long_name": "i",
+    "route_description": "i",
+    "route_url": "i",
+    "route_color": "i",
+    "route_text_color": "i",
+    "route_type": "h",
+    "calendar_id": "i",
+    "calendar_weekdays": "B",
+    "calendar_start_date": "i",
+    "calendar_end_date": "i",
+    "service_activation": "B",
+    "service_activation_range": "i",
+    "trip_id": "i",
+    "trip_route": "I",
+    "trip_service": "I",
+    "trip_headsign": "i",
+    "trip_short_name": "i",
+    "trip_direction": "b",
+    "trip_block_id": "i",
+    "trip_shape_id": "i",
+    "stop_time_trip": "I",
+    "stop_time_arrival": "i",
+    "stop_time_departure": "i",
+    "stop_time_sequence": "I",
+    "stop_time_headsign": "i",
+    "stop_time_pickup_type": "b",
+    "stop_time_dropoff_type": "b",
+    "stop_time_timepoint": "b",
+    "stop_offsets": "I",
+    "trip_stop_times": "I",
+    "trip_offsets": "I",
+}
+
+WEEKDAY_COLUMNS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def seconds_since_midnight(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def time_from_seconds(seconds: int) -> time:
+    seconds %= 86400
+    return time(seconds // 3600, seconds // 60 % 60, seconds % 60)
+
+
+def _small_int(value: int | None) -> int:
+    return NULL if value is None else int(value)
+
+
+class StringPool:
+    """Interns strings into one UTF-8 blob, handing out a stable index per distinct value"""
+
+    def __init__(self):
+        self.indexes: dict[str, int] = {}
+        self.blob = bytearray()
+        self.offsets = array("q", [0])
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return NULL
+        index = self.indexes.get(value)
+        if index is None:
+            index = len(self.indexes)
+            self.indexes[value] = index
+            self.blob += value.encode()
+            self.offsets.append(len(self.blob))
+        return index
+
+
+class SnapshotBuilder:
+    """
+    Accumulates timetable rows into columns.
+
+    Stops, routes, calendars and trips are added first so that calendar dates and stop times can be
+    resolved to their row indexes, :meth:`columns` then sorts stop times by stop and arrival.
+    """
+
+    def __init__(self):
+        self.strings = StringPool()
+        self.data = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        self.stops: dict[str, int] = {}
+        self.routes: dict[str, int] = {}
+        self.calendars: dict[str, int] = {}
+        self.trips: dict[str, int] = {}
+        self.stop_time_stops = array("I")
+        # (service, date ordinal, runs) for every calendar_dates row, folded into the activation bitmap
+        self.exceptions: list[tuple[int, int, bool]] = []
+
+    def _append(self, **values: Any) -> None:
+        for name, value in values.items():
+            self.data[name].append(value)
+
+    def add_stop(self, stop: Any) -> None:
+        self.stops[stop.id] = len(self.stops)
+        self._append(
+            stop_id=self.strings.add(stop.id),
+            stop_code=self.strings.add(stop.code),
+            stop_name=self.strings.add(stop.name),
+            stop_description=self.strings.add(stop.description),
+            stop_zone_id=self.strings.add(stop.zone_id),
+            stop_url=self.strings.add(stop.url),
+            stop_parent_station=self.strings.add(stop.parent_station),
+            stop_lat=math.nan if stop.lat is None else stop.lat,
+            stop_lon=math.nan if stop.lon is None else stop.lon,
+            stop_location_type=_small_int(stop.location_type),
+        )
+
+    def add_route(self, route: Any) -> None:
+        self.routes[route.id] = len(self.routes)
+        self._append(
+            route_id=self.strings.add(route.id),
+            route_agency_id=self.strings.add(route.agency_id),
+            route_short_name=self.strings.add(route.short_name),
+            route_long_name=self.strings.add(route.long_name),
+            route_description=self.strings.add(route.description),
+            route_url=self.strings.add(route.url),
+            route_color=self.strings.add(route.color),
+            route_text_color=self.strings.add(route.text_color),
+            route_type=int(route.route_type),
+        )
+
+    def add_calendar(self, calendar: Any) -> None:
+        self.calendars[calendar.id] = len(self.calendars)
+        weekdays = 0
+        for bit, column in enumerate(WEEKDAY_COLUMNS):
+            if getattr(calendar, column):
+                weekdays |= 1 << bit
+        self._append(
+            calendar_id=self.strings.add(calendar.id),
+            calendar_weekdays=weekdays,
+            calendar_start_date=calendar.start_date.toordinal(),
+            calendar_end_date=calendar.end_date.toordinal(),
+        )
+
+    def add_calendar_date(self, calendar_date: Any) -> None:
+        service = self.calendars.get(calendar_date.service_id)
+        if service is None:
+            return
+        self.exceptions.append(
+            (service, calendar_date.date.toordinal(), calendar_date.exception_type == ExceptionType.added)
+        )
+
+    def add_trip(self, trip: Any) -> None:
+        route = self.routes.get(trip.route_id)
+        service = self.calendars.get(trip.service_id)
+        if route is None or service is None:
+            return
+        self.trips[trip.id] = len(self.trips)
+        self._append(
+            trip_id=self.strings.add(trip.id),
+            trip_route=route,
+            trip_service=service,
+            trip_headsign=self.strings.add(trip.headsign),
+            trip_short_name=self.strings.add(trip.short_name),
+            trip_direction=int(trip.direction),
+            trip_block_id=self.strings.add(trip.block_id),
+            trip_shape_id=self.strings.add(trip.shape_id),
+        )
+
+    def add_stop_time(self, stop_time: Any) -> None:
+        stop = self.stops.get(stop_time.stop_id)
+        trip = self.trips.get(stop_time.trip_id)
+        if stop is None or trip is None:
+            return
+        self.stop_time_stops.append(stop)
+        self._append(
+            stop_time_trip=trip,
+            stop_time_arrival=seconds_since_midnight(stop_time.arrival_time),
+            stop_time_departure=seconds_since_midnight(stop_time.departure_time),
+            stop_time_sequence=stop_time.stop_sequence,
+            stop_time_headsign=self.strings.add(stop_time.stop_headsign),
+            stop_time_pickup_type=_small_int(stop_time.pickup_type),
+            stop_time_dropoff_type=_small_int(stop_time.dropoff_type),
+            stop_time_timepoint=_small_int(stop_time.timepoint),
+        )
+
+    def columns(self) -> dict[str, array]:
+        """The finished columns, stop times ordered by (stop, arrival, trip) with per-stop offsets"""
+
+        columns = dict(self.data)
+        columns["strings"] = array("B", self.strings.blob)
+        columns["string_offsets"] = self.strings.offsets
+
+        stops, arrivals, trips = (
+            self.stop_time_stops,
+            self.data["stop_time_arrival"],
+            self.data["stop_time_trip"],
+        )
+        sort_keys = [
+            (stop << 49) | (arrival << 32) | trip
+            for stop, arrival, trip in zip(stops, arrivals, trips, strict=True)
+        ]
+        order = sorted(range(len(sort_keys)), key=sort_keys.__getitem__)
+        for name in COLUMNS:
+            if name.startswith("stop_time_"):
+                column = self.data[name]
+                columns[name] = array(column.typecode, (column[i] for i in order))
+
+        offsets = array("I", [0] * (len(self.stops) + 1))
+        for stop in stops:
+            offsets[stop + 1] += 1
+        for i in range(len(self.stops)):
+            offsets[i + 1] += offsets[i]
+        columns["stop_offsets"] = offsets
+
+        sequences, sorted_trips = columns["stop_time_sequence"], columns["stop_time_trip"]
+        by_trip = sorted(range(len(order)), key=lambda row: (sorted_trips[row] << 32) | sequences[row])
+        columns["trip_stop_times"] = array("I", by_trip)
+        trip_offsets = array("I", [0] * (len(self.trips) + 1))
+        for trip in sorted_trips:
+            trip_offsets[trip + 1] += 1
+        for i in range(len(self.trips)):
+            trip_offsets[i + 1] += trip_offsets[i]
+        columns["trip_offsets"] = trip_offsets
+
+        columns["service_activation_range"], columns["service_activation"] = self.service_activation()
+        return columns
+
+    def service_activation(self) -> tuple[array, array]:
+        """
+        The activation bitmap and its ``[first day ordinal, number of days]`` range.
+
+        Each service owns ``ceil(days / 8)`` consecutive bytes, bit ``d % 8`` of byte ``d // 8``
+        being set when it runs ``d`` days after the first day.
+        """
+
+        starts, ends = self.data["calendar_start_date"], self.data["calendar_end_date"]
+        days_of_interest = [*starts, *ends, *(ordinal for _, ordinal, _ in self.exceptions)]
+        if not days_of_interest:
+            return array("i", [0, 0]), array("B")
+
+        first_day = min(days_of_interest)
+        days = max(days_of_interest) - first_day + 1
+        stride = (days + 7) // 8
+        bitmap = bytearray(len(self.calendars) * stride)
+        for service, weekdays in enumerate(self.data["calendar_weekdays"]):
+            base = service * stride
+            for ordinal in range(starts[service], ends[service] + 1):
+                # Ordinal 1 (1 January of year 1) was a Monday
+                if weekdays >> ((ordinal - 1) % 7) & 1:
+                    day = ordinal - first_day
+                    bitmap[base + (day >> 3)] |= 1 << (day & 7)
+        for service, ordinal, runs in self.exceptions:
+            day = ordinal - first_day
+            if runs:
+                bitmap[service * stride + (day >> 3)] |= 1 << (day & 7)
+            else:
+                bitmap[service * stride + (day >> 3)] &= ~(1 << (day & 7)) & 0xFF
+        return array("i", [first_day, days]), array("B", bitmap)
+
+
+def write_snapshot(root: str | Path, dataset: str, version: str, columns: Mapping[str, array]) -> Path:
+    """
+    Writes ``columns`` as version ``version`` of ``dataset`` and makes it the current snapshot.
+
+    The version directory is filled under a temporary name and renamed into place before ``CURRENT``
+    is replaced, so readers never see a partial snapshot. Older versions beyond
+    :data:`VERSIONS_TO_KEEP` are removed; workers that still map them keep their pages until they
+    swap.
+    """
+
+    dataset_dir = Path(root) / dataset
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    version_dir = dataset_dir / version
+    staging_dir = Path(tempfile.mkdtemp(prefix=f".{version}-", dir=dataset_dir))
+    try:
+        for name, column in columns.items():
+            with open(staging_dir / f"{name}.bin", "wb") as file:
+                column.tofile(file)
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "dataset": dataset,
+            "version": version,
+            "byteorder": sys.byteorder,
+            "created_at": timer.time(),
+            "columns": {
+                name: {"typecode": column.typecode, "length": len(column)} for name, column in columns.items()
+            },
+        }
+        (staging_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+        if version_dir.exists():
+            shutil.rmtree(version_dir)
+        staging_dir.rename(version_dir)
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    pointer = dataset_dir / f".{CURRENT_FILE}.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, dataset_dir / CURRENT_FILE)
+    prune_versions(dataset_dir, keep=version)
+    return version_dir
+
+
+def _version_sort_key(path: Path) -> tuple[int, int | str]:
+    return (0, int(path.name)) if path.name.isdigit() else (1, path.name)
+
+
+def prune_versions(dataset_dir: Path, keep: str, versions_to_keep: int = VERSIONS_TO_KEEP) -> None:
+    versions = sorted(
+        (path for path in dataset_dir.iterdir() if path.is_dir() and not path.name.startswith(".")),
+        key=_version_sort_key,
+    )
+    for path in versions[:-versions_to_keep]:
+        if path.name != keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def current_version(root: str | Path, dataset: str) -> str | None:
+    try:
+        return (Path(root) / dataset / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+async def _stream(session: AsyncSession, statement: Any) -> AsyncIterator[Any]:
+    result = await session.stream(statement.execution_options(yield_per=FETCH_SIZE))
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+
+async def build_snapshot_from_db(session: AsyncSession, dataset: str) -> SnapshotBuilder:
+    """Reads the timetable of ``dataset`` into a :class:`SnapshotBuilder`"""
+
+    trip_ids = select(TripModel.id).where(TripModel.dataset == dataset)
+    route_ids = select(TripModel.route_id).where(TripModel.dataset == dataset)
+    service_ids = select(TripModel.service_id).where(TripModel.dataset == dataset)
+    stop_ids = select(StopTimeModel.stop_id).where(StopTimeModel.dataset == dataset)
+
+    builder = SnapshotBuilder()
+    statements: list[tuple[Any, Any]] = [
+        (
+            builder.add_stop,
+            select(
+                StopModel.id,
+                StopModel.code,
+                StopModel.name,
+                StopModel.description,
+                StopModel.zone_id,
+                StopModel.url,
+                StopModel.parent_station,
+                StopModel.lat,
+                StopModel.lon,
+                StopModel.location_type,
+            )
+            .where(StopModel.id.in_(stop_ids))
+            .order_by(StopModel.id),
+        ),
+        (
+            builder.add_route,
+            select(
+                RouteModel.id,
+                RouteModel.agency_id,
+                RouteModel.short_name,
+                RouteModel.long_name,
+                RouteModel.description,
+                RouteModel.url,
+                RouteModel.color,
+                RouteModel.text_color,
+                RouteModel.route_type,
+            )
+            .where(RouteModel.id.in_(route_ids))
+            .order_by(RouteModel.id),
+        ),
+        (
+            builder.add_calendar,
+            select(
+                CalendarModel.id,
+                *(getattr(CalendarModel, column) for column in WEEKDAY_COLUMNS),
+                CalendarModel.start_date,
+                CalendarModel.end_date,
+            )
+            .where(CalendarModel.id.in_(service_ids))
+            .order_by(CalendarModel.id),
+        ),
+        (
+            builder.add_calendar_date,
+            select(CalendarDateModel.service_id, CalendarDateModel.date, CalendarDateModel.exception_type)
+            .where(CalendarDateModel.service_id.in_(service_ids))
+            .order_by(CalendarDateModel.service_id, CalendarDateModel.date),
+        ),
+        (
+            builder.add_trip,
+            select(
+                TripModel.id,
+                TripModel.route_id,
+                TripModel.service_id,
+                TripModel.headsign,
+                TripModel.short_name,
+                TripModel.direction,
+                TripModel.block_id,
+                TripModel.shape_id,
+            )
+            .where(TripModel.dataset == dataset)
+            .order_by(TripModel.id),
+        ),
+        (
+            builder.add_stop_time,
+            select(
+                StopTimeModel.trip_id,
+                StopTimeModel.stop_id,
+                StopTimeModel.arrival_time,
+                StopTimeModel.departure_time,
+                StopTimeModel.stop_sequence,
+                StopTimeModel.stop_headsign,
+                StopTimeModel.pickup_type,
+                StopTimeModel.dropoff_type,
+                StopTimeModel.timepoint,
+            ).where(StopTimeModel.dataset == dataset, StopTimeModel.trip_id.in_(trip_ids)),
+        ),
+    ]
+    for add, statement in statements:
+        async for row in _stream(session, statement):
+            add(row)
+    return builder
+
+
+async def export_snapshot(
+    session: AsyncSession, dataset: str, version: str, root: str | Path | None = None
+) -> Path:
+    """Builds the snapshot of ``dataset`` from the database and publishes it as ``version``"""
+
+    builder = await build_snapshot_from_db(session, dataset)
+    return write_snapshot(root or settings.app.TIMETABLE_SNAPSHOT_DIR, dataset, version, builder.columns())
+
+
+def _map_column(path: Path, typecode: str, length: int) -> memoryview:
+    if length == 0:
+        return memoryview(array(typecode))
+    with open(path, "rb") as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    # The overloads of cast only take literal formats, typecodes come from COLUMNS
+    return view if typecode == "B" else view.cast(typecode)  # type: ignore[call-overload]
+
+
+class TimetableSnapshot:
+    """
+    A snapshot mapped read-only from disk.
+
+    Columns are ``memoryview`` objects over the mapped files and are indexed like arrays. Only the
+    stop id index is materialised on load, trip and service ids are indexed on first use.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.manifest: dict[str, Any] = json.loads((self.path / MANIFEST_FILE).read_text())
+        if self.manifest["format"] != SNAPSHOT_FORMAT:
+            raise ValueError(
+                f"Unsupported timetable snapshot format {self.manifest['format']} in {self.path}"
+            )
+        if self.manifest["byteorder"] != sys.byteorder:
+            raise ValueError(
+                f"Timetable snapshot {self.path} was written on a {self.manifest['byteorder']} host"
+            )
+
+        self.dataset: str = self.manifest["dataset"]
+        self.version: str = self.manifest["version"]
+        self.columns: dict[str, memoryview] = {
+            name: _map_column(self.path / f"{name}.bin", spec["typecode"], spec["length"])
+            for name, spec in self.manifest["columns"].items()
+        }
+        self._strings = self.columns["strings"]
+        self._string_offsets = self.columns["string_offsets"]
+        self.stop_indexes: dict[str, int] = {
+            self.id_string(ref): index for index, ref in enumerate(self.columns["stop_id"])
+        }
+        self._trip_indexes: dict[str, int] | None = None
+        self._service_indexes: dict[str, int] | None = None
+        self._first_day, self._days = self.columns["service_activation_range"]
+        self._activation_stride = (self._days + 7) // 8
+
+    def __getitem__(self, name: str) -> memoryview:
+        return self.columns[name]
+
+    def string(self, ref: int) -> str | None:
+        if ref == NULL:
+            return None
+        return self.id_string(ref)
+
+    def id_string(self, ref: int) -> str:
+        """String of a reference that is never NULL, such as a stop, trip or service id"""
+        return bytes(self._strings[self._string_offsets[ref] : self._string_offsets[ref + 1]]).decode()
+
+    @property
+    def trip_indexes(self) -> dict[str, int]:
+        if self._trip_indexes is None:
+            self._trip_indexes = {
+                self.id_string(ref): index for index, ref in enumerate(self.columns["trip_id"])
+            }
+        return self._trip_indexes
+
+    @property
+    def service_indexes(self) -> dict[str, int]:
+        if self._service_indexes is None:
+            self._service_indexes = {
+                self.id_string(ref): index for index, ref in enumerate(self.columns["calendar_id"])
+            }
+        return self._service_indexes
+
+    def service_active(self, service_index: int, ordinal: int) -> bool:
+        """Whether the service at ``service_index`` runs on the day with the given date ordinal"""
+
+        day = ordinal - self._first_day
+        if not 0 <= day < self._days:
+            return False
+        byte = self.columns["service_activation"][service_index * self._activation_stride + (day >> 3)]
+        return bool(byte >> (day & 7) & 1)
+
+    def stop_time_range(self, stop_id: str) -> range:
+        """Rows of the stop time columns belonging to ``stop_id``, in arrival order"""
+
+        index = self.stop_indexes.get(stop_id)
+        if index is None:
+            return range(0)
+        offsets = self.columns["stop_offsets"]
+        return range(offsets[index], offsets[index + 1])
+
+    def trip_stop_time_rows(self, trip_index: int) -> memoryview:
+        """Rows of the stop time columns belonging to the trip at ``trip_index``, in sequence order"""
+
+        offsets = self.columns["trip_offsets"]
+        return self.columns["trip_stop_times"][offsets[trip_index] : offsets[trip_index + 1]]
+
+    def __len__(self) -> int:
+        return len(self.columns["stop_time_trip"])
+
+
+def load_snapshot(root: str | Path, dataset: str, version: str | None = None) -> TimetableSnapshot | None:
+    """Maps ``version`` (the current one by default) of ``dataset``, ``None`` if there is none"""
+
+    version = version or current_version(root, dataset)
+    if version is None:
+        return None
+    return TimetableSnapshot(Path(root) / dataset / version)
+
+
+class TimetableSnapshotStore:
+    """
+    The current snapshot of every dataset under ``root``.
+
+    :meth:`refresh` re-reads the ``CURRENT`` pointers and maps any version that changed, swapping
+    the reference in one assignment. Requests that already hold the previous snapshot finish on it
+    and its mappings are released once they let go.
+    """
+
+    def __init__(self, root: str | Path, refresh_interval: float = REFRESH_INTERVAL_S):
+        self.root = Path(root)
+        self.refresh_interval = refresh_interval
+        self.snapshots: dict[str, TimetableSnapshot] = {}
+        self._checked_at: float | None = None
+
+    def refresh(self) -> list[str]:
+        """Loads new versions, returns the datasets that were swapped"""
+
+        self._checked_at = timer.monotonic()
+        if not self.root.is_dir():
+            return []
+
+        swapped = []
+        snapshots = dict(self.snapshots)
+        for dataset_dir in sorted(path for path in self.root.iterdir() if path.is_dir()):
+            dataset = dataset_dir.name
+            version = current_version(self.root, dataset)
+            loaded = snapshots.get(dataset)
+            if version is None or (loaded is not None and loaded.version == version):
+                continue
+            try:
+                snapshots[dataset] = TimetableSnapshot(dataset_dir / version)
+            except OSError, ValueError, KeyError:
+                # Written by another release or damaged, keep serving what was loaded until a re-import
+                logger.exception("Could not load timetable snapshot %s of %s", version, dataset)
+                continue
+            swapped.append(dataset)
+        self.snapshots = snapshots
+        return swapped
+
+    def maybe_refresh(self) -> None:
+        if self._checked_at is None or timer.monotonic() - self._checked_at >= self.refresh_interval:
+            self.refresh()
+
+    def get(self, dataset: str) -> TimetableSnapshot | None:
+        self.maybe_refresh()
+        return self.snapshots.get(dataset)
+
+    def all(self) -> list[TimetableSnapshot]:
+        self.maybe_refresh()
+        return list(self.snapshots.values())
+
+
+timetable_snapshots = TimetableSnapshotStore(settings.app.TIMETABLE_SNAPSHOT_DIR)
+
+
+def load_timetable_snapshots() -> None:
+    """Maps the current snapshots on startup so the first request does not pay for it"""
+
+    timetable_snapshots.refresh()
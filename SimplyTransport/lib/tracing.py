@@ -1,4 +1,4 @@
-"""OpenTelemetry helpers: CLI span naming and method decorators."""
+"""OpenTelemetry helpers: CLI span naming, method decorators and the app meter."""
 
 from __future__ import annotations
 
@@ -8,7 +8,7 @@ from collections.abc import Awaitable, Callable, Generator
 from contextlib import contextmanager
 from typing import Any, ParamSpec, TypeVar, overload
 
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 
 from . import settings
 
@@ -20,6 +20,10 @@ def get_app_tracer() -> trace.Tracer:
     return trace.get_tracer(settings.app.NAME, settings.app.VERSION)
 
 
+def get_app_meter() -> metrics.Meter:
+    return metrics.get_meter(settings.app.NAME, settings.app.VERSION)
+
+
 def cli_span_name(func: Callable[..., object]) -> str:
     return f"cli.{func.__name__}"
 
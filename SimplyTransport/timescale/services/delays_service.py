@@ -72,7 +72,6 @@ class DelaysService:
 
         schedules = await self.schedule_service.remove_exceptions_and_inactive_calendars(schedules)
         logger.info(f"Removed exceptions and inactive calendars. {len(schedules)} schedules remaining.")
-        schedules = await self.schedule_service.add_in_added_exceptions(schedules)  # TODO
 
         async def gather_realtime_schedules(
             schedules: Sequence[StaticScheduleModel],
@@ -172,6 +171,6 @@ async def provide_delays_service(
     return DelaysService(
         ts_stop_time_repository=TSStopTimeRepository(session=timescale_db_session),
         schedule_service=await provide_schedule_service(db_session=db_session),
-        realtime_service=await provide_realtime_service(db_session=db_session),
+        realtime_service=await provide_realtime_service(db_session=db_session, redis_service=redis_cache),
         redis_cache=redis_cache,
     )
@@ -29,7 +29,8 @@ echo "EXISTING_DIR_DATE: $EXISTING_DIR_DATE"
 echo
 
 if  [ "$FORCE_OPERATION" == true ] || [[ "$CREATION_DATE" > "$EXISTING_DIR_DATE" ]]; then
-	unzip -o "$DOWNLOAD_DIR/GTFS_Realtime.zip" -d "$EXISTING_DIR"
-    cd /home/niall/SimplyTransport && echo y | /home/niall/SimplyTransport/venv/bin/litestar importgtfs # This uses the CLI command
+    # Imported straight from the archive, only agency.txt is kept on disk for the date check above
+    cd /home/niall/SimplyTransport && echo y | /home/niall/SimplyTransport/venv/bin/litestar importgtfs -dir "$DOWNLOAD_DIR/GTFS_Realtime.zip" -dataset TFI \
+        && unzip -j -o "$DOWNLOAD_DIR/GTFS_Realtime.zip" agency.txt -d "$EXISTING_DIR" # This uses the CLI command
 
 fi
\ No newline at end of file
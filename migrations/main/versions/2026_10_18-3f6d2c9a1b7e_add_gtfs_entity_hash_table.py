@@ -0,0 +1,38 @@
+"""Add gtfs_entity_hash table
+
+Revision ID: 3f6d2c9a1b7e
+Revises: 9161a426452a
+Create Date: 2026-10-18 09:12:41.508213
+
+"""
+
+from collections.abc import Sequence
+
+import advanced_alchemy.types.datetime
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6d2c9a1b7e"
+down_revision: str | None = "9161a426452a"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "gtfs_entity_hash",
+        sa.Column("entity_type", sa.String(length=20), nullable=False),
+        sa.Column("entity_id", sa.String(length=1000), nullable=False),
+        sa.Column("content_hash", sa.BigInteger(), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_gtfs_entity_hash")),
+        sa.UniqueConstraint("dataset", "entity_type", "entity_id", name="uq_gtfs_entity_hash_dataset_entity"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("gtfs_entity_hash")
@@ -0,0 +1,57 @@
+"""Add rt_vehicle_latest
+
+Revision ID: 5d8e1f3a7b24
+Revises: c41a7e2f9d38
+Create Date: 2026-10-18 18:24:09.551203
+
+Latest position per vehicle, with the trip's route and direction copied in so maps can read it by
+(route_id, direction). It is filled by the next vehicles import cycle.
+"""
+
+from collections.abc import Sequence
+
+import advanced_alchemy.types.datetime
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8e1f3a7b24"
+down_revision: str | None = "c41a7e2f9d38"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rt_vehicle_latest",
+        sa.Column("vehicle_id", sa.Integer(), nullable=False),
+        sa.Column("trip_id", sa.String(length=1000), nullable=False),
+        sa.Column("route_id", sa.String(length=1000), nullable=False),
+        sa.Column("direction", sa.Integer(), nullable=False),
+        sa.Column("time_of_update", sa.DateTime(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("lon", sa.Float(), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["route_id"], ["route.id"], name=op.f("fk_rt_vehicle_latest_route_id_route"), ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["trip_id"], ["trip.id"], name=op.f("fk_rt_vehicle_latest_trip_id_trip"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_rt_vehicle_latest")),
+        sa.UniqueConstraint("vehicle_id", "dataset", name=op.f("uq_rt_vehicle_latest_vehicle_id")),
+    )
+    op.create_index(
+        "ix_rt_vehicle_latest_route_id_direction",
+        "rt_vehicle_latest",
+        ["route_id", "direction"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_rt_vehicle_latest_route_id_direction", table_name="rt_vehicle_latest")
+    op.drop_table("rt_vehicle_latest")
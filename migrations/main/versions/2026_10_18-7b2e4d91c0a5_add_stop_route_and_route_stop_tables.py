@@ -0,0 +1,93 @@
+"""Add stop_route and route_stop tables
+
+Revision ID: 7b2e4d91c0a5
+Revises: 3f6d2c9a1b7e
+Create Date: 2026-10-18 14:37:05.912604
+
+Both tables are backfilled from the imported stop_time and trip rows of every dataset, the same
+pairs importgtfs refreshes after each import, so routes and stops keep showing right after the
+upgrade.
+"""
+
+from collections.abc import Sequence
+
+import advanced_alchemy.types.datetime
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7b2e4d91c0a5"
+down_revision: str | None = "3f6d2c9a1b7e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stop_route",
+        sa.Column("stop_id", sa.String(length=1000), nullable=False),
+        sa.Column("route_id", sa.String(length=1000), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_stop_route")),
+        sa.UniqueConstraint("stop_id", "route_id", name="uq_stop_route_stop_id_route_id"),
+    )
+    op.create_index(op.f("ix_stop_route_stop_id"), "stop_route", ["stop_id"], unique=False)
+    op.create_index(op.f("ix_stop_route_route_id"), "stop_route", ["route_id"], unique=False)
+    op.create_index(op.f("ix_stop_route_dataset"), "stop_route", ["dataset"], unique=False)
+    op.create_table(
+        "route_stop",
+        sa.Column("route_id", sa.String(length=1000), nullable=False),
+        sa.Column("direction", sa.Integer(), nullable=False),
+        sa.Column("stop_id", sa.String(length=1000), nullable=False),
+        sa.Column("stop_sequence", sa.Integer(), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_route_stop")),
+        sa.UniqueConstraint(
+            "route_id", "direction", "stop_sequence", "stop_id", name="uq_route_stop_route_direction_sequence"
+        ),
+    )
+    op.create_index("ix_route_stop_stop_id_direction", "route_stop", ["stop_id", "direction"], unique=False)
+    op.create_index(op.f("ix_route_stop_dataset"), "route_stop", ["dataset"], unique=False)
+
+    op.execute(
+        """
+        INSERT INTO stop_route (stop_id, route_id, dataset, created_at, updated_at)
+        SELECT pairs.stop_id, pairs.route_id, pairs.dataset, now(), now()
+        FROM (
+            SELECT DISTINCT stop_time.stop_id, trip.route_id, stop_time.dataset
+            FROM stop_time
+            JOIN trip ON trip.id = stop_time.trip_id
+        ) AS pairs
+        ON CONFLICT DO NOTHING;
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO route_stop (route_id, direction, stop_id, stop_sequence, dataset, created_at, updated_at)
+        SELECT sequences.route_id, sequences.direction, sequences.stop_id, sequences.stop_sequence,
+            sequences.dataset, now(), now()
+        FROM (
+            SELECT DISTINCT trip.route_id, trip.direction, stop_time.stop_id, stop_time.stop_sequence,
+                stop_time.dataset
+            FROM stop_time
+            JOIN trip ON trip.id = stop_time.trip_id
+        ) AS sequences
+        ON CONFLICT DO NOTHING;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_route_stop_dataset"), table_name="route_stop")
+    op.drop_index("ix_route_stop_stop_id_direction", table_name="route_stop")
+    op.drop_table("route_stop")
+    op.drop_index(op.f("ix_stop_route_dataset"), table_name="stop_route")
+    op.drop_index(op.f("ix_stop_route_route_id"), table_name="stop_route")
+    op.drop_index(op.f("ix_stop_route_stop_id"), table_name="stop_route")
+    op.drop_table("stop_route")
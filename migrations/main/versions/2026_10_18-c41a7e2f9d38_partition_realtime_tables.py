@@ -0,0 +1,124 @@
+"""Partition realtime tables on created_at
+
+Revision ID: c41a7e2f9d38
+Revises: 7b2e4d91c0a5
+Create Date: 2026-10-18 16:02:41.227310
+
+rt_stop_time, rt_trip and rt_vehicle become RANGE (created_at) partitioned tables. PostgreSQL
+cannot convert a table in place, so they are dropped and recreated; realtime rows are rebuilt by
+the next import cycle, which also creates the partitions. The partition key is added to the
+primary key and unique constraints as PostgreSQL requires.
+"""
+
+from collections.abc import Sequence
+
+import advanced_alchemy.types.datetime
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c41a7e2f9d38"
+down_revision: str | None = "7b2e4d91c0a5"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+RT_TABLES = ("rt_stop_time", "rt_trip", "rt_vehicle")
+
+
+def _audit_columns() -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), nullable=False),
+        sa.Column("created_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+        sa.Column("updated_at", advanced_alchemy.types.datetime.DateTimeUTC(timezone=True), nullable=False),
+    ]
+
+
+def _create_rt_tables(partitioned: bool) -> None:
+    key = ["created_at"] if partitioned else []
+    table_kwargs = {"postgresql_partition_by": "RANGE (created_at)"} if partitioned else {}
+
+    op.create_table(
+        "rt_stop_time",
+        sa.Column("stop_id", sa.String(length=1000), nullable=False),
+        sa.Column("trip_id", sa.String(length=1000), nullable=False),
+        sa.Column("stop_sequence", sa.Integer(), nullable=False),
+        sa.Column("schedule_relationship", sa.String(length=1000), nullable=False),
+        sa.Column("arrival_delay", sa.Integer(), nullable=True),
+        sa.Column("departure_delay", sa.Integer(), nullable=True),
+        sa.Column("entity_id", sa.String(length=1000), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        *_audit_columns(),
+        sa.ForeignKeyConstraint(
+            ["stop_id"], ["stop.id"], name=op.f("fk_rt_stop_time_stop_id_stop"), ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["trip_id"], ["trip.id"], name=op.f("fk_rt_stop_time_trip_id_trip"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", *key, name=op.f("pk_rt_stop_time")),
+        sa.UniqueConstraint(
+            "stop_id", "trip_id", "stop_sequence", "dataset", *key, name=op.f("uq_rt_stop_time_stop_id")
+        ),
+        **table_kwargs,
+    )
+    op.create_index(op.f("ix_rt_stop_time_stop_id"), "rt_stop_time", ["stop_id"], unique=False)
+    op.create_index(op.f("ix_rt_stop_time_trip_id"), "rt_stop_time", ["trip_id"], unique=False)
+    op.create_index(op.f("ix_rt_stop_time_entity_id"), "rt_stop_time", ["entity_id"], unique=False)
+    op.create_index(
+        "ix_rt_stop_time_dataset_created_at", "rt_stop_time", ["dataset", "created_at"], unique=False
+    )
+
+    op.create_table(
+        "rt_trip",
+        sa.Column("trip_id", sa.String(length=1000), nullable=False),
+        sa.Column("route_id", sa.String(length=1000), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("schedule_relationship", sa.String(length=1000), nullable=False),
+        sa.Column("direction", sa.Integer(), nullable=False),
+        sa.Column("entity_id", sa.String(length=1000), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        *_audit_columns(),
+        sa.ForeignKeyConstraint(
+            ["route_id"], ["route.id"], name=op.f("fk_rt_trip_route_id_route"), ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["trip_id"], ["trip.id"], name=op.f("fk_rt_trip_trip_id_trip"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", *key, name=op.f("pk_rt_trip")),
+        sa.UniqueConstraint("trip_id", "route_id", "dataset", *key, name=op.f("uq_rt_trip_trip_id")),
+        **table_kwargs,
+    )
+    op.create_index(op.f("ix_rt_trip_trip_id"), "rt_trip", ["trip_id"], unique=False)
+    op.create_index(op.f("ix_rt_trip_route_id"), "rt_trip", ["route_id"], unique=False)
+    op.create_index(op.f("ix_rt_trip_entity_id"), "rt_trip", ["entity_id"], unique=False)
+    op.create_index("ix_rt_trip_dataset_created_at", "rt_trip", ["dataset", "created_at"], unique=False)
+
+    op.create_table(
+        "rt_vehicle",
+        sa.Column("vehicle_id", sa.Integer(), nullable=False),
+        sa.Column("trip_id", sa.String(length=1000), nullable=False),
+        sa.Column("time_of_update", sa.DateTime(), nullable=False),
+        sa.Column("lat", sa.Float(), nullable=False),
+        sa.Column("lon", sa.Float(), nullable=False),
+        sa.Column("dataset", sa.String(length=80), nullable=False),
+        *_audit_columns(),
+        sa.ForeignKeyConstraint(
+            ["trip_id"], ["trip.id"], name=op.f("fk_rt_vehicle_trip_id_trip"), ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id", *key, name=op.f("pk_rt_vehicle")),
+        **table_kwargs,
+    )
+    op.create_index(op.f("ix_rt_vehicle_trip_id"), "rt_vehicle", ["trip_id"], unique=False)
+    op.create_index("ix_rt_vehicle_dataset_created_at", "rt_vehicle", ["dataset", "created_at"], unique=False)
+
+
+def upgrade() -> None:
+    for table in RT_TABLES:
+        op.execute(f"DROP TABLE {table} CASCADE")
+    _create_rt_tables(partitioned=True)
+
+
+def downgrade() -> None:
+    for table in RT_TABLES:
+        op.execute(f"DROP TABLE {table} CASCADE")
+    _create_rt_tables(partitioned=False)
@@ -0,0 +1,26 @@
+from unittest.mock import patch
+
+import click
+from click.testing import CliRunner
+from SimplyTransport.lib import settings
+from SimplyTransport.lib.settings import RealtimeFeedConfig
+
+
+@patch.object(
+    settings.app,
+    "REALTIME_FEEDS",
+    [
+        RealtimeFeedConfig(dataset="TFI", url="https://tfi.example/realtime", api_key="tfi"),
+        RealtimeFeedConfig(dataset="OTHER", url="https://other.example/realtime", api_key="other"),
+    ],
+)
+@patch("SimplyTransport.cli.provide_redis_service")
+def test_realtime_daemon_command_with_unknown_dataset_fails(
+    mock_provide_redis_service, cli_runner: CliRunner, cli_group: click.Group
+):
+    result = cli_runner.invoke(cli_group.commands["realtime-daemon"], ["-dataset", "TYPO"])
+
+    assert result.exit_code == 2
+    assert "No realtime feed is configured for dataset TYPO" in result.output
+    assert "configured datasets: TFI, OTHER" in result.output
+    mock_provide_redis_service.assert_not_called()
@@ -0,0 +1,109 @@
+import gzip
+import json
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+from SimplyTransport.api_contract.map_payloads import StaticStopsMapPayload
+from SimplyTransport.domain.maps import payload_store as ps
+
+
+def _payload() -> StaticStopsMapPayload:
+    return StaticStopsMapPayload(center=(-6.26, 53.35), zoom=7, map_type="All Stops", stops=[])
+
+
+def _request(headers: dict[str, str]) -> Mock:
+    request = Mock()
+    request.headers = headers
+    return request
+
+
+def _store_holding(payloads: dict[str, ps.PrecomputedPayload]) -> tuple[ps.StaticMapPayloadStore, AsyncMock]:
+    """A store over a fake Redis holding ``payloads`` under their keys, and the fake's command mock"""
+
+    hashes = {
+        f"static_map_payload:{key}": {"etag": payload.etag.encode(), **payload.bodies}
+        for key, payload in payloads.items()
+    }
+
+    def execute_command(command: str, name: str, *fields: str) -> bytes | list[bytes | None] | None:
+        values = [hashes.get(name, {}).get(field) for field in fields]
+        return values[0] if command == "HGET" else values
+
+    redis_service = Mock()
+    redis_service.redis.execute_command = AsyncMock(side_effect=execute_command)
+    return ps.StaticMapPayloadStore(redis_service, served={}), redis_service.redis.execute_command
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        ("gzip, deflate, br", [ps.BROTLI, ps.GZIP, ps.IDENTITY]),
+        ("gzip;q=1.0, br;q=0.5", [ps.GZIP, ps.BROTLI, ps.IDENTITY]),
+        ("br;q=0, *", [ps.GZIP, ps.IDENTITY]),
+        ("", [ps.IDENTITY]),
+    ],
+)
+def test_acceptable_encodings_follow_quality_then_preference(accept_encoding: str, expected: list[str]):
+    assert ps.acceptable_encodings(accept_encoding) == expected
+
+
+@pytest.mark.asyncio
+async def test_serves_the_precomputed_encoding_with_its_etag():
+    # Arrange
+    precomputed = ps.precompute_payload(_payload())
+    store, _ = _store_holding({"static_map:stop:All Stops": precomputed})
+    build = AsyncMock()
+
+    # Act
+    response = await ps.precomputed_response(
+        _request({"accept-encoding": "gzip"}), store, "static_map:stop:All Stops", build
+    )
+    revalidated = await ps.precomputed_response(
+        _request({"accept-encoding": "gzip", "if-none-match": f'"{precomputed.etag}-gzip"'}),
+        store,
+        "static_map:stop:All Stops",
+        build,
+    )
+
+    # Assert
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == f'"{precomputed.etag}-gzip"'
+    assert json.loads(gzip.decompress(response.content))["map_type"] == "All Stops"
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    build.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_missing_payload_is_built_and_stored():
+    # Arrange
+    store, _ = _store_holding({})
+    put = AsyncMock()
+    store.put = put
+    build = AsyncMock(return_value=_payload())
+
+    # Act
+    response = await ps.precomputed_response(_request({}), store, "static_map:stop:All Stops", build)
+
+    # Assert
+    build.assert_awaited_once()
+    assert put.await_args is not None
+    key, stored = put.await_args.args
+    assert key == "static_map:stop:All Stops"
+    assert response.content == stored.bodies[ps.IDENTITY]
+    assert "Content-Encoding" not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_worker_reads_a_body_again_only_once_its_etag_changed():
+    # Arrange
+    store, execute_command = _store_holding({"static_map:stop:All Stops": ps.precompute_payload(_payload())})
+
+    # Act
+    first = await store.get("static_map:stop:All Stops", ps.GZIP)
+    second = await store.get("static_map:stop:All Stops", ps.GZIP)
+
+    # Assert
+    assert first == second
+    commands = [call.args[0] for call in execute_command.await_args_list]
+    assert commands == ["HGET", "HMGET", "HGET"]
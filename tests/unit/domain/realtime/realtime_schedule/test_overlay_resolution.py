@@ -1,9 +1,13 @@
-from datetime import UTC, datetime
+import random
+from datetime import UTC, datetime, timedelta
 from types import SimpleNamespace
 from typing import cast
 
 from SimplyTransport.domain.realtime.enums import ScheduleRealtionship
-from SimplyTransport.domain.realtime.realtime_schedule.repo import overlay_for_static_schedule_row
+from SimplyTransport.domain.realtime.realtime_schedule.repo import (
+    TripOverlayIndex,
+    overlay_for_static_schedule_row,
+)
 from SimplyTransport.domain.realtime.stop_time.model import RTStopTimeModel
 
 _utc = datetime(2025, 1, 1, 12, 0, 0, tzinfo=UTC)
@@ -58,3 +62,37 @@ def test_overlay_successor_prefers_non_skipped_at_min_sequence():
     assert out is not None
     assert out.exact_match is False
     assert out.row.stop_sequence == 12
+
+
+def _reference_carry_forward(rows: list, static_sequence: int):
+    """The per-row rescan the index replaces: predecessor first, then successor"""
+
+    def not_skipped(pool: list) -> list:
+        return [r for r in pool if r.schedule_relationship != ScheduleRealtionship.SKIPPED] or pool
+
+    predecessors = [r for r in rows if r.stop_sequence <= static_sequence]
+    if predecessors:
+        return max(not_skipped(predecessors), key=lambda r: (r.stop_sequence, r.created_at))
+    successors = not_skipped([r for r in rows if r.stop_sequence >= static_sequence])
+    if not successors:
+        return None
+    min_sq = min(r.stop_sequence for r in successors)
+    return max((r for r in successors if r.stop_sequence == min_sq), key=lambda r: r.created_at)
+
+
+def test_trip_overlay_index_matches_per_row_carry_forward():
+    rng = random.Random(18)
+    for _ in range(200):
+        rows = [
+            _row(
+                f"S{seq}",
+                seq,
+                rel=rng.choice([ScheduleRealtionship.SCHEDULED, ScheduleRealtionship.SKIPPED]),
+                created_at=_utc + timedelta(minutes=rng.randint(0, 2)),
+            )
+            for seq in (rng.randint(1, 12) for _ in range(rng.randint(0, 10)))
+        ]
+        index = TripOverlayIndex(cast(list[RTStopTimeModel], rows))
+        for static_sequence in range(0, 14):
+            expected = _reference_carry_forward(rows, static_sequence)
+            assert (index.predecessor(static_sequence) or index.successor(static_sequence)) is expected
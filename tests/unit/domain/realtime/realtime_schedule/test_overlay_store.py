@@ -0,0 +1,145 @@
+from datetime import UTC, date, datetime, time
+from types import SimpleNamespace
+from typing import cast
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from SimplyTransport.domain.realtime.realtime_schedule import overlay_store
+from SimplyTransport.domain.schedule.model import StaticScheduleModel
+
+_partition = datetime(2026, 10, 18, 9, 0, tzinfo=UTC)
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+
+    def pipeline(self, transaction: bool = True) -> MagicMock:
+        """Commands are queued synchronously on a redis.asyncio pipeline, only execute is awaited"""
+
+        pipe = MagicMock()
+        pipe.set.side_effect = lambda key, value, ex=None: self.values.__setitem__(key, value)
+        pipe.execute = AsyncMock(return_value=[])
+        return pipe
+
+    async def set(self, key: str, value: str, ex: int | None = None) -> bool:
+        self.values[key] = value
+        return True
+
+    async def mget(self, keys: list[str]) -> list[str | None]:
+        return [self.values.get(key) for key in keys]
+
+
+def _store() -> tuple[overlay_store.RealtimeOverlayStore, _FakeRedis]:
+    redis = _FakeRedis()
+    return overlay_store.RealtimeOverlayStore(MagicMock(redis=redis)), redis
+
+
+def _schedule(trip_id: str, stop_id: str, stop_sequence: int, dataset: str = "TFI") -> StaticScheduleModel:
+    return cast(
+        StaticScheduleModel,
+        SimpleNamespace(
+            trip=SimpleNamespace(id=trip_id, dataset=dataset),
+            stop=SimpleNamespace(id=stop_id),
+            stop_time=SimpleNamespace(stop_sequence=stop_sequence),
+        ),
+    )
+
+
+def _overlay(trip_id: str = "T1") -> overlay_store.TripOverlay:
+    return overlay_store.TripOverlay(
+        trip_id=trip_id,
+        trip={
+            "trip_id": trip_id,
+            "route_id": "R1",
+            "start_time": time(9, 5),
+            "start_date": date(2026, 10, 18),
+            "schedule_relationship": "SCHEDULED",
+            "direction": 1,
+            "entity_id": "E1",
+            "created_at": _partition,
+        },
+        stop_times=[
+            {
+                "stop_id": "S1",
+                "stop_sequence": 1,
+                "schedule_relationship": "SCHEDULED",
+                "arrival_delay": 60,
+                "departure_delay": None,
+                "created_at": _partition,
+            }
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_published_overlay_resolves_schedules_without_sql():
+    # Arrange
+    store, _ = _store()
+    await store.publish("TFI", [_overlay()])
+
+    # Act
+    overlay = await store.load_recent_rt_overlay_for_schedules(
+        [_schedule("T1", "S1", 1), _schedule("T1", "S2", 2), _schedule("T2", "S1", 1)]
+    )
+
+    # Assert
+    assert overlay is not None
+    trips, stop_times = overlay
+    assert list(trips) == ["T1"]
+    assert (trips["T1"].route_id, trips["T1"].start_time, trips["T1"].created_at) == (
+        "R1",
+        time(9, 5),
+        _partition,
+    )
+    assert stop_times[("T1", "S1", 1)].exact_match is True
+    assert stop_times[("T1", "S2", 2)].row.arrival_delay == 60
+    assert stop_times[("T1", "S2", 2)].exact_match is False
+    assert ("T2", "S1", 1) not in stop_times
+
+
+@pytest.mark.asyncio
+async def test_unpopulated_store_falls_back():
+    # Arrange
+    store, redis = _store()
+    redis.values["realtime_overlay:TFI:T1"] = overlay_store.pack_trip_overlay(_overlay())
+
+    # Act
+    overlay = await store.load_recent_rt_overlay_for_schedules([_schedule("T1", "S1", 1)])
+
+    # Assert
+    assert overlay is None
+
+
+@pytest.mark.asyncio
+async def test_schedules_of_several_datasets_read_their_own_overlays():
+    # Arrange
+    store, _ = _store()
+    await store.publish("TFI", [_overlay("T1")])
+    await store.publish("NIR", [_overlay("N1")])
+
+    # Act
+    overlay = await store.load_recent_rt_overlay_for_schedules(
+        [_schedule("T1", "S1", 1), _schedule("N1", "S1", 1, dataset="NIR")]
+    )
+
+    # Assert
+    assert overlay is not None
+    trips, stop_times = overlay
+    assert {trip_id: trip.dataset for trip_id, trip in trips.items()} == {"T1": "TFI", "N1": "NIR"}
+    assert stop_times[("N1", "S1", 1)].row.dataset == "NIR"
+
+
+@pytest.mark.asyncio
+async def test_any_unpopulated_dataset_falls_back():
+    # Arrange
+    store, _ = _store()
+    await store.publish("TFI", [_overlay("T1")])
+
+    # Act
+    overlay = await store.load_recent_rt_overlay_for_schedules(
+        [_schedule("T1", "S1", 1), _schedule("N1", "S1", 1, dataset="NIR")]
+    )
+
+    # Assert
+    assert overlay is None
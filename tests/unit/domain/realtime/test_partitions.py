@@ -0,0 +1,68 @@
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from SimplyTransport.domain.realtime import partitions
+
+NOW = datetime(2026, 10, 18, 9, 37, 12, tzinfo=UTC)
+
+
+def test_partition_start_and_read_window_cover_current_and_previous_bucket():
+    # Act
+    start = partitions.partition_start(NOW)
+    window = partitions.read_window(NOW)
+
+    # Assert
+    assert start == datetime(2026, 10, 18, 9, 30, tzinfo=UTC)
+    assert window == (datetime(2026, 10, 18, 9, 15, tzinfo=UTC), datetime(2026, 10, 18, 9, 45, tzinfo=UTC))
+    assert partitions.partition_name("rt_trip", start) == "rt_trip_p202610180930"
+
+
+@pytest.mark.asyncio
+async def test_rotate_partitions_creates_upcoming_and_drops_expired():
+    # Arrange
+    executed: list[str] = []
+    existing = MagicMock()
+    existing.scalars.return_value = [
+        "rt_trip_p202610180845",
+        "rt_trip_p202610180900",
+        "rt_trip_p202610180915",
+        "rt_trip_p202610180930",
+    ]
+
+    async def execute(statement, params=None):
+        executed.append(str(statement))
+        return existing
+
+    session = AsyncMock()
+    session.execute = AsyncMock(side_effect=execute)
+
+    # Act
+    await partitions.rotate_partitions(session, ("rt_trip",), NOW)
+
+    # Assert
+    assert executed[0] == "SELECT pg_advisory_xact_lock(hashtext(:lock))"
+    assert executed[1] == (
+        'CREATE TABLE IF NOT EXISTS "rt_trip_p202610180930" PARTITION OF "rt_trip" '
+        "FOR VALUES FROM ('2026-10-18T09:30:00+00:00') TO ('2026-10-18T09:45:00+00:00')"
+    )
+    assert '"rt_trip_p202610180945"' in executed[2]
+    assert executed[4:] == [
+        'DROP TABLE IF EXISTS "rt_trip_p202610180845"',
+        'DROP TABLE IF EXISTS "rt_trip_p202610180900"',
+    ]
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_rotate_partitions_locks_every_table_before_touching_any():
+    # Arrange
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=MagicMock(scalars=MagicMock(return_value=[])))
+
+    # Act
+    await partitions.rotate_partitions(session, ("rt_trip", "rt_stop_time"), NOW)
+
+    # Assert
+    locks = [call.args[1]["lock"] for call in session.execute.await_args_list[:2]]
+    assert locks == ["rt_partitions:rt_stop_time", "rt_partitions:rt_trip"]
@@ -1,5 +1,5 @@
 from datetime import date, time
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 from SimplyTransport.domain.enums import DayOfWeek
@@ -255,3 +255,138 @@ async def test_get_by_trip_id_calls_repository():
 
     # Assert
     schedule_repository.get_by_trip_id.assert_called_once_with(trip_id=trip_id)
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_on_stop_for_day_between_times_uses_timetable_engine():
+    # Arrange
+    schedule_repository = AsyncMock()
+    timetable_engine = MagicMock()
+    timetable_engine.departures.return_value = ["schedule"]
+    schedule_service = ScheduleService(
+        schedule_repository=schedule_repository,
+        calendar_date_repository=AsyncMock(),
+        timetable_engine=timetable_engine,
+    )
+    start_time = time(hour=10)
+    end_time = time(hour=11)
+
+    # Act
+    result = await schedule_service.get_schedule_on_stop_for_day_between_times(
+        stop_id="stop_id", day=DayOfWeek.MONDAY, start_time=start_time, end_time=end_time
+    )
+
+    # Assert
+    assert result == ["schedule"]
+    stop_id, service_date, *window = timetable_engine.departures.call_args.args
+    assert (stop_id, window) == ("stop_id", [start_time, end_time])
+    assert service_date.weekday() == DayOfWeek.MONDAY
+    schedule_repository.get_static_schedules.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_on_stop_for_day_falls_back_when_engine_lacks_stop():
+    # Arrange
+    schedule_repository = AsyncMock()
+    timetable_engine = MagicMock()
+    timetable_engine.departures.return_value = None
+    schedule_service = ScheduleService(
+        schedule_repository=schedule_repository,
+        calendar_date_repository=AsyncMock(),
+        timetable_engine=timetable_engine,
+    )
+
+    # Act
+    await schedule_service.get_schedule_on_stop_for_day(stop_id="stop_id", day=DayOfWeek.FRIDAY)
+
+    # Assert
+    schedule_repository.get_static_schedules.assert_called_once_with(stop_id="stop_id", day=DayOfWeek.FRIDAY)
+
+
+@pytest.mark.asyncio
+async def test_get_all_schedule_for_day_between_times_queries_trips_missing_from_engine():
+    # Arrange
+    schedule_repository = AsyncMock()
+    schedule_repository.get_static_schedules.return_value = ["from_sql"]
+    timetable_engine = MagicMock()
+    timetable_engine.available = True
+    timetable_engine.trip_schedules.return_value = (["from_engine"], ["added_trip"])
+    schedule_service = ScheduleService(
+        schedule_repository=schedule_repository,
+        calendar_date_repository=AsyncMock(),
+        timetable_engine=timetable_engine,
+    )
+    start_time = time(hour=10)
+    end_time = time(hour=11)
+
+    # Act
+    result = await schedule_service.get_all_schedule_for_day_between_times(
+        day=DayOfWeek.MONDAY, start_time=start_time, end_time=end_time, trips=["trip", "added_trip"]
+    )
+
+    # Assert
+    assert result == ["from_engine", "from_sql"]
+    schedule_repository.get_static_schedules.assert_called_once_with(
+        day=DayOfWeek.MONDAY, start_time=start_time, end_time=end_time, trips=["added_trip"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_remove_exceptions_and_inactive_calendars_uses_activation_bitmap():
+    # Arrange
+    calendar_date_repository = AsyncMock()
+    timetable_engine = MagicMock()
+    timetable_engine.is_service_active.side_effect = lambda service_id, on_date: service_id == "running"
+    schedule_service = ScheduleService(
+        schedule_repository=AsyncMock(),
+        calendar_date_repository=calendar_date_repository,
+        timetable_engine=timetable_engine,
+    )
+    running = MagicMock(spec=StaticScheduleModel)
+    running.calendar.id = "running"
+    stopped = MagicMock(spec=StaticScheduleModel)
+    stopped.calendar.id = "stopped"
+    on_date = date(2026, 10, 10)
+
+    # Act
+    result = await schedule_service.remove_exceptions_and_inactive_calendars([running, stopped], on_date)
+
+    # Assert
+    assert result == [running]
+    timetable_engine.is_service_active.assert_any_call("running", on_date)
+    calendar_date_repository.get_removed_exceptions_on_date.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_remove_exceptions_and_inactive_calendars_checks_unknown_services_in_database():
+    # Arrange
+    calendar_date_repository = AsyncMock()
+    removed = MagicMock()
+    removed.service_id = "removed"
+    calendar_date_repository.get_removed_exceptions_on_date.return_value = [removed]
+    added = MagicMock()
+    added.service_id = "added"
+    calendar_date_repository.get_added_exceptions_on_date.return_value = [added]
+    timetable_engine = MagicMock()
+    timetable_engine.is_service_active.side_effect = lambda service_id, on_date: (
+        True if service_id == "snapshotted" else None
+    )
+    schedule_service = ScheduleService(
+        schedule_repository=AsyncMock(),
+        calendar_date_repository=calendar_date_repository,
+        timetable_engine=timetable_engine,
+    )
+    schedules = []
+    for service_id in ("unknown", "snapshotted", "removed", "added"):
+        schedule = MagicMock(spec=StaticScheduleModel)
+        schedule.calendar.id = service_id
+        schedule.true_if_active.return_value = service_id != "added"
+        schedules.append(schedule)
+
+    # Act
+    result = await schedule_service.remove_exceptions_and_inactive_calendars(schedules)
+
+    # Assert
+    assert result == [schedules[0], schedules[1], schedules[3]]
+    calendar_date_repository.get_removed_exceptions_on_date.assert_called_once_with(date=date.today())
+    calendar_date_repository.get_added_exceptions_on_date.assert_called_once_with(date=date.today())
@@ -0,0 +1,24 @@
+from SimplyTransport.domain.route_stop.repo import route_stops_statement
+from SimplyTransport.domain.stop_route.repo import stop_routes_statement
+from sqlalchemy.dialects import postgresql
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_stop_routes_statement_inserts_distinct_pairs_of_dataset():
+    sql = _compile(stop_routes_statement("TFI"))
+
+    assert sql.startswith("INSERT INTO stop_route (id, stop_id, route_id, dataset, created_at, updated_at)")
+    assert "nextval('stop_route_id_seq')" in sql
+    assert "SELECT DISTINCT stop_time.stop_id AS stop_id, trip.route_id AS route_id, 'TFI' AS dataset" in sql
+    assert "WHERE stop_time.dataset = 'TFI'" in sql
+
+
+def test_route_stops_statement_keeps_direction_and_sequence():
+    sql = _compile(route_stops_statement("TFI"))
+
+    assert sql.startswith("INSERT INTO route_stop (id, route_id, direction, stop_id, stop_sequence, dataset")
+    assert "SELECT DISTINCT trip.route_id AS route_id, trip.direction AS direction" in sql
+    assert "stop_time.stop_sequence AS stop_sequence" in sql
@@ -0,0 +1,28 @@
+from datetime import date
+
+from SimplyTransport.domain.enums import DayOfWeek
+from SimplyTransport.domain.schedule.repo import static_schedules_statement
+from sqlalchemy.dialects import postgresql
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_static_schedules_statement_includes_services_added_on_the_date():
+    sql = _compile(static_schedules_statement(DayOfWeek.SUNDAY, stop_id="stop", on_date=date(2026, 10, 18)))
+
+    assert (
+        "WHERE (calendar.sunday = 1 OR calendar.id IN (SELECT calendar_date.service_id \n"
+        "FROM calendar_date \n"
+        "WHERE calendar_date.date = '2026-10-18' AND calendar_date.exception_type = 'added')) "
+        "AND stop.id = 'stop'"
+    ) in sql
+
+
+def test_static_schedules_statement_defaults_to_the_next_date_on_the_day():
+    today = date.today()
+
+    sql = _compile(static_schedules_statement(DayOfWeek(today.weekday())))
+
+    assert f"calendar_date.date = '{today.isoformat()}'" in sql
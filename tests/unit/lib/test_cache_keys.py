@@ -3,6 +3,8 @@ from unittest.mock import AsyncMock, PropertyMock
 from litestar import Request
 from SimplyTransport.lib.cache_keys import (
     CacheKeys,
+    cache_tag,
+    cache_tags,
     key_builder_from_header,
     key_builder_from_path,
     key_builder_from_path_and_query,
@@ -129,3 +131,30 @@ def test_key_builder_from_header_with_missing_args():
     type(request).headers = PropertyMock(return_value={})
 
     assert key_builder(request) == "stop_map:None"
+
+
+def test_cache_tag_is_shared_by_key_and_delete_templates():
+    assert cache_tag(CacheKeys.RealTime.REALTIME_STOP_KEY_TEMPLATE) == "realtime:stop"
+    assert cache_tag(CacheKeys.RealTime.REALTIME_STOP_DELETE_ALL_KEY_TEMPLATE) == "realtime:stop"
+    assert cache_tag(CacheKeys.Statistics.STATISTICS_DELETE_ALL_KEY_TEMPLATE) == "stats"
+
+
+def test_cache_tags_include_family_prefixes_and_entities():
+    assert cache_tags("stop_map:123") == ["stop_map", "stop:123"]
+    assert cache_tags("realtime:stop:table:S1") == [
+        "realtime",
+        "realtime:stop",
+        "realtime:stop:table",
+        "stop:S1",
+    ]
+    assert cache_tags("route_map:R1:0") == ["route_map", "route:R1"]
+    assert cache_tags("static_map:agency:route:A1") == [
+        "static_map",
+        "static_map:agency",
+        "static_map:agency:route",
+        "agency:A1",
+    ]
+
+
+def test_cache_tags_empty_for_unknown_key():
+    assert cache_tags("not_a_cache_key") == []
@@ -52,6 +52,43 @@ async def test_concurrency_mutex_skips_when_locked():
     mock_redis.aclose.assert_awaited_once()
 
 
+@pytest.mark.asyncio
+async def test_concurrency_lock_name_from_call_arguments():
+    mock_redis = AsyncMock()
+    mock_redis.set = AsyncMock(return_value=True)
+    mock_redis.execute_command = AsyncMock(return_value=1)
+
+    async def inner(dataset: str) -> str:
+        return dataset
+
+    with patch.object(concurrency_mod, "redis_factory", return_value=mock_redis):
+        wrapped = concurrency_mod.concurrency(1, name=lambda dataset: f"import:{dataset}")(inner)
+        await wrapped(dataset="TFI")
+        await wrapped(dataset="GAI")
+
+    keys = [c.args[0] for c in mock_redis.set.call_args_list]
+    assert keys == [
+        concurrency_mod.concurrency_key("import:TFI"),
+        concurrency_mod.concurrency_key("import:GAI"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_hold_mutex_releases_only_when_acquired():
+    mock_redis = AsyncMock()
+    mock_redis.set = AsyncMock(side_effect=[True, None])
+    mock_redis.execute_command = AsyncMock(return_value=1)
+
+    async with concurrency_mod.hold_mutex(mock_redis, "import:TFI", 60) as first:
+        pass
+    async with concurrency_mod.hold_mutex(mock_redis, "import:TFI", 60) as second:
+        pass
+
+    assert (first, second) == (True, False)
+    mock_redis.execute_command.assert_awaited_once()
+    mock_redis.aclose.assert_not_awaited()
+
+
 @pytest.mark.asyncio
 async def test_concurrency_semaphore_acquires_when_under_limit():
     mock_redis = AsyncMock()
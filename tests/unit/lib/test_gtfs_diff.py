@@ -0,0 +1,81 @@
+import pytest
+from SimplyTransport.lib import gtfs_diff
+from SimplyTransport.lib.cache_keys import cache_tags
+
+
+def _stop_time(trip_id: str, stop_id: str, sequence: int) -> dict[str, str]:
+    return {
+        "trip_id": trip_id,
+        "stop_id": stop_id,
+        "stop_sequence": str(sequence),
+        "arrival_time": "08:00:00",
+    }
+
+
+def test_row_hash_ignores_column_order_but_not_file():
+    row = {"stop_id": "1", "stop_name": "Main Street"}
+    reordered = {"stop_name": "Main Street", "stop_id": "1"}
+
+    assert gtfs_diff.row_hash("stops.txt", row) == gtfs_diff.row_hash("stops.txt", reordered)
+    assert gtfs_diff.row_hash("stops.txt", row) != gtfs_diff.row_hash("shapes.txt", row)
+
+
+def test_hash_entities_groups_child_rows_under_parent():
+    trips = [{"trip_id": "T1", "route_id": "R1"}, {"trip_id": "T2", "route_id": "R1"}]
+    stop_times = [_stop_time("T1", "S1", 1), _stop_time("T1", "S2", 2), _stop_time("T2", "S1", 1)]
+
+    hashes = gtfs_diff.hash_entities([("trips.txt", trips), ("stop_times.txt", stop_times)])
+    reordered = gtfs_diff.hash_entities([("stop_times.txt", stop_times[::-1]), ("trips.txt", trips)])
+    moved_stop = gtfs_diff.hash_entities(
+        [("trips.txt", trips), ("stop_times.txt", [*stop_times[:2], _stop_time("T2", "S3", 1)])]
+    )
+
+    assert set(hashes) == {("trip", "T1"), ("trip", "T2")}
+    assert hashes == reordered
+    assert moved_stop[("trip", "T1")] == hashes[("trip", "T1")]
+    assert moved_stop[("trip", "T2")] != hashes[("trip", "T2")]
+
+
+def test_diff_entities_classifies_changes_for_requested_types():
+    old = {("trip", "T1"): 1, ("trip", "T2"): 2, ("trip", "T3"): 3, ("shape", "SH1"): 4}
+    new = {("trip", "T1"): 1, ("trip", "T2"): 20, ("trip", "T4"): 4}
+
+    diffs = gtfs_diff.diff_entities(old, new, ["trip"])
+
+    assert set(diffs) == {"trip"}
+    assert diffs["trip"].inserted == {"T4"}
+    assert diffs["trip"].updated == {"T2"}
+    assert diffs["trip"].deleted == {"T3"}
+    assert diffs["trip"].changed == {"T2", "T3", "T4"}
+    assert diffs["trip"].summary() == {"inserted": 1, "updated": 1, "deleted": 1}
+    assert len(diffs["trip"]) == 3
+
+
+@pytest.mark.parametrize("content_hash", [0, 2**63 - 1, 2**63, 2**64 - 1])
+def test_to_signed_round_trips_through_bigint(content_hash: int):
+    signed = gtfs_diff.to_signed(content_hash)
+
+    assert -(2**63) <= signed < 2**63
+    assert signed % 2**64 == content_hash
+
+
+def test_cache_invalidation_tags_target_affected_entities_only():
+    affected = gtfs_diff.AffectedEntities(stops={"S1"}, routes={"R1"}, agencies={"A1"})
+
+    tags = gtfs_diff.cache_invalidation_tags(affected)
+
+    assert tags == [
+        "stop:S1",
+        "route:R1",
+        "agency:A1",
+        "agency:All",
+        "stop_map_nearby",
+        "static_map:stop",
+    ]
+    assert set(cache_tags("schedule:S1:monday")) & set(tags)
+    assert not set(cache_tags("schedule:S10:monday")) & set(tags)
+    assert not set(cache_tags("route_map:R2:0")) & set(tags)
+
+
+def test_cache_invalidation_tags_empty_when_nothing_affected():
+    assert gtfs_diff.cache_invalidation_tags(gtfs_diff.AffectedEntities()) == []
@@ -0,0 +1,272 @@
+import asyncio
+import csv
+import zipfile
+from datetime import UTC, date, datetime, time
+from pathlib import Path
+
+import pytest
+from SimplyTransport.lib import gtfs_importers as imp
+
+
+def test_stop_time_copy_record_matches_copy_columns():
+    importer = imp.StopTimeImporter(iter([]), None, "TFI")
+    row = {
+        "trip_id": "3623_8603",
+        "arrival_time": "25:30:00",
+        "departure_time": "5:30:00",
+        "stop_id": "8240DB000324",
+        "stop_sequence": "1",
+        "stop_headsign": "Monkstown Ave",
+        "pickup_type": "0",
+        "drop_off_type": "",
+        "timepoint": "1",
+    }
+
+    record = importer.copy_record(row)
+
+    assert len(record) == len(importer.copy_columns)
+    assert dict(zip(importer.copy_columns, record, strict=True)) == {
+        "trip_id": "3623_8603",
+        "arrival_time": time(1, 30, 0),
+        "departure_time": time(5, 30, 0),
+        "stop_id": "8240DB000324",
+        "stop_sequence": 1,
+        "stop_headsign": "Monkstown Ave",
+        "pickup_type": 0,
+        "dropoff_type": None,
+        "timepoint": 1,
+        "dataset": "TFI",
+    }
+
+
+def test_stop_copy_record_nulls_empty_parent_station():
+    importer = imp.StopImporter(iter([]), None, "TFI")
+    row = {
+        "stop_id": "8220DB000037",
+        "stop_code": "37",
+        "stop_name": "DCU Ballymun Road",
+        "stop_desc": "",
+        "stop_lat": "53.3853464",
+        "stop_lon": "-6.264886981",
+        "zone_id": "",
+        "stop_url": "",
+        "location_type": "",
+        "parent_station": "",
+    }
+
+    record = dict(zip(importer.copy_columns, importer.copy_record(row), strict=True))
+
+    assert record["location_type"] is None
+    assert record["parent_station"] is None
+    assert record["lat"] == pytest.approx(53.3853464)
+
+
+def test_calendar_date_copy_record_rejects_unknown_exception_type():
+    importer = imp.CalendarDateImporter(iter([]), None, "TFI")
+
+    assert importer.copy_record({"service_id": "1", "date": "20240101", "exception_type": "1"}) == (
+        "1",
+        date(2024, 1, 1),
+        "added",
+        "TFI",
+    )
+    with pytest.raises(ValueError):
+        importer.copy_record({"service_id": "1", "date": "20240101", "exception_type": "3"})
+
+
+@pytest.mark.asyncio
+async def test_copy_producer_batches_records_with_audit_columns(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(imp, "COPY_BATCH_SIZE", 2)
+    rows = [
+        {
+            "shape_id": "3623_278",
+            "shape_pt_lat": "53.4",
+            "shape_pt_lon": "-6.2",
+            "shape_pt_sequence": str(i),
+            "shape_dist_traveled": "",
+        }
+        for i in range(3)
+    ]
+    importer = imp.ShapeImporter(iter(rows), 3, "TFI")
+    q: asyncio.Queue = asyncio.Queue()
+
+    await importer.copy_producer(q, number_of_consumers=2)
+
+    batches = [q.get_nowait() for _ in range(q.qsize())]
+    assert [len(b.records) for b in batches[:2]] == [2, 1]
+    assert batches[2:] == [None, None]
+    assert batches[0].columns == (*imp.ShapeImporter.copy_columns, "created_at", "updated_at")
+    assert batches[0].reserve_ids is True
+    assert all(len(r) == len(batches[0].columns) for r in batches[0].records)
+    assert importer.rows_imported == 3
+
+
+def test_active_producer_follows_loader():
+    copy_importer = imp.AgencyImporter(iter([]), None, "TFI", "copy")
+    insert_importer = imp.AgencyImporter(iter([]), None, "TFI", "insert")
+
+    assert copy_importer.active_producer() == copy_importer.copy_producer
+    assert insert_importer.active_producer() == insert_importer.producer
+
+
+def _write_shapes(path: Path, rows: int) -> Path:
+    with open(path, "w", encoding="utf8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(
+            ["shape_id", "shape_pt_lat", "shape_pt_lon", "shape_pt_sequence", "shape_dist_traveled"]
+        )
+        for i in range(rows):
+            writer.writerow([f"3623_{i % 7}", "53.4", "-6.2", i, "" if i % 2 else "1.5"])
+    return path
+
+
+def test_active_producer_uses_parallel_parse_for_large_files(tmp_path: Path):
+    path = _write_shapes(tmp_path / "shapes.txt", 100)
+    importer = imp.ShapeImporter(iter([]), None, "TFI", "copy")
+
+    importer.parallel = imp.ParallelParse(str(path), workers=2, chunk_size=64)
+    assert importer.active_producer() == importer.parallel_copy_producer
+
+    importer.parallel = imp.ParallelParse(str(path), workers=1, chunk_size=64)
+    assert importer.active_producer() == importer.copy_producer
+
+
+def test_split_byte_ranges_cover_rows_on_line_boundaries(tmp_path: Path):
+    path = _write_shapes(tmp_path / "shapes.txt", 50)
+    data = path.read_bytes()
+
+    ranges = imp.split_byte_ranges(str(path), chunk_size=100)
+
+    assert ranges[0][0] == data.index(b"\n") + 1
+    assert ranges[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:], strict=False))
+    assert all(data[end - 1 : end] == b"\n" for _, end in ranges)
+
+
+def test_parse_chunk_matches_copy_record(tmp_path: Path):
+    path = _write_shapes(tmp_path / "shapes.txt", 30)
+    imported_at = datetime(2024, 1, 1, tzinfo=UTC)
+    audit = (imported_at, imported_at)
+    importer = imp.ShapeImporter(iter([]), None, "TFI")
+    with open(path, encoding="utf8") as f:
+        expected = [importer.copy_record(row) + audit for row in csv.DictReader(f)]
+
+    parsed = [
+        record
+        for start, end in imp.split_byte_ranges(str(path), chunk_size=128)
+        for record in imp.parse_chunk(imp.ShapeImporter, str(path), start, end, "TFI", audit)
+    ]
+
+    assert parsed == expected
+
+
+@pytest.mark.asyncio
+async def test_parallel_copy_producer_queues_every_row(tmp_path: Path):
+    path = _write_shapes(tmp_path / "shapes.txt", 200)
+    importer = imp.ShapeImporter(iter([]), None, "TFI")
+    importer.parallel = imp.ParallelParse(str(path), workers=2, chunk_size=512)
+    q: asyncio.Queue = asyncio.Queue()
+
+    await importer.parallel_copy_producer(q, number_of_consumers=2)
+
+    items = [q.get_nowait() for _ in range(q.qsize())]
+    assert items[-2:] == [None, None]
+    assert sum(len(batch.records) for batch in items[:-2]) == 200
+    assert importer.rows_imported == 200
+
+
+@pytest.mark.parametrize(
+    "row_count, seconds, expected",
+    [(1000, 0.5, 2000), (10, 0, 10), (0, 1.0, 0)],
+)
+def test_rows_per_second(row_count: int, seconds: float, expected: int):
+    assert imp.rows_per_second(row_count, seconds) == expected
+
+
+@pytest.mark.asyncio
+async def test_run_import_graph_respects_dependencies_and_overlaps_independent_files():
+    events: list[tuple[str, str]] = []
+    running: set[str] = set()
+    overlapped: set[frozenset[str]] = set()
+
+    def job(file: str):
+        async def run() -> None:
+            events.append(("start", file))
+            running.add(file)
+            overlapped.update(frozenset({file, other}) for other in running if other != file)
+            await asyncio.sleep(0.01)
+            running.discard(file)
+            events.append(("finish", file))
+
+        return run
+
+    await imp.run_import_graph({file: job(file) for file in imp.IMPORT_DEPENDENCIES})
+
+    for file, dependencies in imp.IMPORT_DEPENDENCIES.items():
+        for dependency in dependencies:
+            assert events.index(("finish", dependency)) < events.index(("start", file))
+    assert frozenset({"shapes.txt", "stops.txt"}) in overlapped
+    assert len(events) == 2 * len(imp.IMPORT_DEPENDENCIES)
+
+
+@pytest.mark.asyncio
+async def test_run_import_graph_ignores_missing_dependencies_and_cancels_on_failure():
+    cancelled = asyncio.Event()
+
+    async def slow() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def broken() -> None:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await imp.run_import_graph({"shapes.txt": slow, "trips.txt": broken})
+
+    assert cancelled.is_set()
+
+
+def _zip_feed(path: Path, members: dict[str, str]) -> Path:
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+    return path
+
+
+def test_gtfs_importer_streams_members_from_zip(tmp_path: Path):
+    agencies = (
+        "agency_id,agency_name,agency_url,agency_timezone\n7778019,Dublin Bus,https://db.ie,Europe/Dublin\n"
+    )
+    feed = _zip_feed(
+        tmp_path / "GTFS_Realtime.zip", {"agency.txt": agencies, "feed/stops.txt": "stop_id\n1\n"}
+    )
+
+    agency = imp.GTFSImporter("agency.txt", str(feed))
+    rows = list(agency.get_reader())
+
+    assert imp.is_gtfs_archive(str(feed))
+    assert rows == [
+        {
+            "agency_id": "7778019",
+            "agency_name": "Dublin Bus",
+            "agency_url": "https://db.ie",
+            "agency_timezone": "Europe/Dublin",
+        }
+    ]
+    assert agency.bytes_read() == agency.size()
+    assert imp.GTFSImporter("stops.txt", str(feed)).exists()
+    assert not imp.GTFSImporter("shapes.txt", str(feed)).exists()
+
+
+def test_gtfs_importer_tracks_bytes_read_from_directory(tmp_path: Path):
+    _write_shapes(tmp_path / "shapes.txt", 10)
+    shapes = imp.GTFSImporter("shapes.txt", f"{tmp_path}/")
+
+    reader = shapes.get_reader()
+    assert shapes.bytes_read() == 0
+    assert len(list(reader)) == 10
+    assert shapes.bytes_read() == shapes.size()
+    assert not imp.is_gtfs_archive(f"{tmp_path}/")
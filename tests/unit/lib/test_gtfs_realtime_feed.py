@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+from SimplyTransport.lib import gtfs_realtime_feed as feed_mod
+
+FIXTURES = Path(__file__).parents[2] / "gtfs_test_data" / "TFI"
+
+
+def _load(name: str) -> dict:
+    return json.loads((FIXTURES / name).read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize(
+    "fixture",
+    ["realtime_sample_response.json", "realtime_e2e_trip_updates.json"],
+)
+def test_protobuf_trip_updates_match_json(fixture: str):
+    data = _load(fixture)
+
+    from_json = feed_mod.feed_from_json(data)
+    from_protobuf = feed_mod.feed_from_protobuf(feed_mod.json_to_protobuf(data))
+
+    assert from_protobuf.entity_count == from_json.entity_count == len(data["entity"])
+    assert from_protobuf.trip_updates == from_json.trip_updates
+
+
+def test_protobuf_vehicles_match_json():
+    data = _load("realtime_vehicles_sample_response.json")
+
+    from_json = feed_mod.feed_from_json(data)
+    from_protobuf = feed_mod.feed_from_protobuf(feed_mod.json_to_protobuf(data))
+
+    assert len(from_protobuf.vehicles) == len(from_json.vehicles) > 0
+    for protobuf_vehicle, json_vehicle in zip(from_protobuf.vehicles, from_json.vehicles, strict=True):
+        assert protobuf_vehicle[:3] == json_vehicle[:3]
+        # Positions are 32-bit floats on the wire
+        assert protobuf_vehicle.lat == pytest.approx(json_vehicle.lat)
+        assert protobuf_vehicle.lon == pytest.approx(json_vehicle.lon)
+
+
+def test_feed_from_json_resolves_duplicated_trip_and_defaults():
+    data = {
+        "entity": [
+            {
+                "id": "E1",
+                "trip_update": {
+                    "trip": {"trip_id": "T1", "schedule_relationship": "DUPLICATED", "direction_id": "1"},
+                    "trip_properties": {"trip_id": "T1-dup", "start_date": "20261018"},
+                    "stop_time_update": [{"stop_id": "S1", "stop_sequence": "x", "arrival": {"delay": 60}}],
+                },
+            }
+        ]
+    }
+
+    (trip_update,) = feed_mod.feed_from_json(data).trip_updates
+
+    assert trip_update.trip_id == "T1-dup"
+    assert (trip_update.direction_id, trip_update.start_date) == (1, "20261018")
+    assert trip_update.stop_time_updates == [
+        feed_mod.StopTimeUpdate(
+            stop_id="S1",
+            stop_sequence=None,
+            schedule_relationship="SCHEDULED",
+            arrival_delay=60,
+            departure_delay=None,
+        )
+    ]
@@ -0,0 +1,252 @@
+import json
+from contextlib import asynccontextmanager
+from datetime import UTC, datetime
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+import rich.progress as rp
+from SimplyTransport.lib import gtfs_realtime_importers as rti
+from SimplyTransport.lib.gtfs_realtime_feed import VehiclePosition
+
+FEED = {"header": {"gtfs_realtime_version": "2.0", "timestamp": "1700320044"}, "entity": []}
+
+
+def _client(responses: list[httpx.Response], requests: list[httpx.Request]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses.pop(0)
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_first_fetch_reports_changed_with_state_to_record():
+    # Arrange
+    requests: list[httpx.Request] = []
+    body = json.dumps(FEED).encode()
+    client = _client([httpx.Response(200, content=body, headers={"ETag": '"v1"'})], requests)
+
+    # Act
+    fetch = await rti._fetch_feed(client, "https://feed", "key", False, "RealTime", rti.FeedState())
+
+    # Assert
+    assert fetch.outcome == rti.FeedFetchOutcome.CHANGED
+    assert fetch.feed is not None and fetch.feed.header_timestamp == 1700320044
+    assert fetch.state == rti.FeedState(
+        etag='"v1"', last_modified=None, content_hash=rti.content_hash(body), header_timestamp=1700320044
+    )
+    assert "If-None-Match" not in requests[0].headers
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_not_modified():
+    # Arrange
+    requests: list[httpx.Request] = []
+    client = _client([httpx.Response(304)], requests)
+    state = rti.FeedState(etag='"v1"', last_modified="Sun, 18 Oct 2026 09:00:00 GMT")
+
+    # Act
+    fetch = await rti._fetch_feed(client, "https://feed", "key", False, "RealTime", state)
+
+    # Assert
+    assert fetch == rti.FeedFetch(rti.FeedFetchOutcome.NOT_MODIFIED)
+    assert requests[0].headers["If-None-Match"] == '"v1"'
+    assert requests[0].headers["If-Modified-Since"] == "Sun, 18 Oct 2026 09:00:00 GMT"
+
+
+@pytest.mark.asyncio
+async def test_identical_content_or_header_timestamp_is_unchanged():
+    # Arrange
+    requests: list[httpx.Request] = []
+    body = json.dumps(FEED).encode()
+    reserialized = json.dumps(FEED, indent=2).encode()
+    client = _client([httpx.Response(200, content=body), httpx.Response(200, content=reserialized)], requests)
+    state = rti.FeedState(content_hash=rti.content_hash(body), header_timestamp=1700320044)
+
+    # Act
+    same_bytes = await rti._fetch_feed(client, "https://feed", "key", False, "RealTime", state)
+    same_snapshot = await rti._fetch_feed(client, "https://feed", "key", False, "RealTime", state)
+
+    # Assert
+    assert same_bytes.outcome == rti.FeedFetchOutcome.UNCHANGED
+    assert same_snapshot.outcome == rti.FeedFetchOutcome.UNCHANGED
+    assert same_snapshot.feed is None
+
+
+@pytest.mark.asyncio
+async def test_feed_state_store_round_trips_state():
+    # Arrange
+    stored: dict[str, str] = {}
+    redis_service = AsyncMock()
+    redis_service.get = AsyncMock(side_effect=lambda key: stored.get(key))
+    redis_service.set = AsyncMock(side_effect=lambda key, value, expiration: stored.__setitem__(key, value))
+    store = rti.FeedStateStore(redis_service)
+    state = rti.FeedState(etag='"v1"', content_hash="abc", header_timestamp=1)
+
+    # Act
+    empty = await store.get("vehicles", "TFI")
+    await store.set("vehicles", "TFI", state)
+
+    # Assert
+    assert empty == rti.FeedState()
+    assert await store.get("vehicles", "TFI") == state
+    assert list(stored) == ["realtime_feed_state:vehicles:TFI"]
+
+
+def _stop_time_row(stop_id: str, arrival_delay: int) -> dict:
+    return {
+        "stop_id": stop_id,
+        "trip_id": "T1",
+        "stop_sequence": 1,
+        "schedule_relationship": "SCHEDULED",
+        "arrival_delay": arrival_delay,
+        "departure_delay": None,
+        "entity_id": "E1",
+        "dataset": "TFI",
+    }
+
+
+def test_row_delta_only_returns_rows_changed_since_last_write():
+    # Arrange
+    importer = rti.RealTimeImporter(url="", api_key="", dataset="TFI")
+    delta = importer.stop_time_delta
+    first_cycle = [_stop_time_row("S1", 60), _stop_time_row("S2", 0)]
+    delta.remember(delta.changed(first_cycle))
+
+    # Act
+    changed = delta.changed([_stop_time_row("S1", 60), _stop_time_row("S2", 30), _stop_time_row("S3", 0)])
+
+    # Assert
+    assert [row["stop_id"] for row in changed] == ["S2", "S3"]
+    assert len(delta) == 2
+
+
+def test_row_delta_rewrites_rows_after_partition_rollover_or_static_reload():
+    # Arrange
+    importer = rti.RealTimeImporter(url="", api_key="", dataset="TFI")
+    delta = importer.stop_time_delta
+    rows = [_stop_time_row("S1", 60), _stop_time_row("S2", 0)]
+    importer.use_partition(datetime(2026, 10, 18, 9, 0, tzinfo=UTC))
+    delta.remember(rows)
+
+    # Act
+    importer.use_partition(datetime(2026, 10, 18, 9, 0, tzinfo=UTC))
+    same_partition = list(delta.changed(rows))
+    importer.use_partition(datetime(2026, 10, 18, 9, 15, tzinfo=UTC))
+    after_rollover = list(delta.changed(rows))
+    delta.remember(rows)
+    importer.use_static_context(
+        rti.RealtimeImportSharedContext(frozenset(), frozenset(), frozenset(), trip_routes={})
+    )
+
+    # Assert
+    assert same_partition == []
+    assert [row["stop_id"] for row in after_rollover] == ["S1", "S2"]
+    assert len(delta) == 0
+    assert rti.UpsertCounts(written=2, unchanged=5).total == 7
+
+
+@pytest.mark.asyncio
+async def test_import_stop_times_streams_only_changed_rows():
+    # Arrange
+    importer = rti.RealTimeImporter(url="", api_key="", dataset="TFI")
+    feed = rti.feed_from_json(
+        {
+            "entity": [
+                {
+                    "id": "E1",
+                    "trip_update": {
+                        "trip": {"trip_id": "T1"},
+                        "stop_time_update": [
+                            {"stop_id": "S1", "stop_sequence": 1, "arrival": {"delay": 60}},
+                            {"stop_id": "S2", "stop_sequence": 2, "arrival": {"delay": 60}},
+                            {"stop_id": "S9", "stop_sequence": 3, "arrival": {"delay": 60}},
+                        ],
+                    },
+                }
+            ]
+        }
+    )
+    shared = rti.RealtimeImportSharedContext(
+        frozenset({"T1"}), frozenset({"S1", "S2"}), frozenset(), trip_routes={}
+    )
+    session = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    # Act
+    with patch.object(rti, "async_session_factory", session_factory), rp.Progress(disable=True) as progress:
+        first = await importer.import_stop_times(feed, progress, shared)
+        second = await importer.import_stop_times(feed, progress, shared)
+
+    # Assert
+    assert first == rti.UpsertCounts(written=2, unchanged=0)
+    assert second == rti.UpsertCounts(written=0, unchanged=2)
+    session.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_import_stop_times_reports_a_failed_write():
+    # Arrange
+    importer = rti.RealTimeImporter(url="", api_key="", dataset="TFI")
+    shared = rti.RealtimeImportSharedContext(frozenset(), frozenset(), frozenset(), trip_routes={})
+
+    @asynccontextmanager
+    async def session_factory():
+        yield AsyncMock()
+
+    # Act
+    with (
+        patch.object(rti, "async_session_factory", session_factory),
+        patch.object(rti, "bulk_upsert_stream", AsyncMock(side_effect=RuntimeError("connection lost"))),
+        rp.Progress(disable=True) as progress,
+    ):
+        counts = await importer.import_stop_times(rti.RealtimeFeed(), progress, shared)
+
+    # Assert
+    assert counts == rti.UpsertCounts(written=0, unchanged=0, failed=True)
+
+
+@pytest.mark.asyncio
+async def test_import_vehicles_upserts_latest_position_per_vehicle():
+    # Arrange
+    importer = rti.RealTimeVehiclesImporter(url="", api_key="", dataset="TFI")
+    feed = rti.RealtimeFeed(
+        vehicles=[
+            VehiclePosition("7", "T1", 1760778000, 53.1, -6.1),
+            VehiclePosition("7", "T1", 1760778030, 53.2, -6.2),
+            VehiclePosition("8", "T9", 1760778030, 53.3, -6.3),
+        ]
+    )
+    shared = rti.RealtimeImportSharedContext(
+        frozenset({"T1"}), frozenset(), frozenset(), trip_routes={"T1": ("R1", 1)}
+    )
+    session = AsyncMock()
+
+    @asynccontextmanager
+    async def session_factory():
+        yield session
+
+    # Act
+    with (
+        patch.object(rti, "async_session_factory", session_factory),
+        patch.object(rti, "bulk_insert", AsyncMock()) as bulk_insert,
+        patch.object(rti, "bulk_upsert", AsyncMock()) as bulk_upsert,
+    ):
+        total = await importer.import_vehicles(feed, shared, show_progress=False)
+
+    # Assert
+    assert bulk_insert.await_args is not None and bulk_upsert.await_args is not None
+    assert total == 2
+    assert len(bulk_insert.await_args.args[2]) == 2
+    (latest,) = bulk_upsert.await_args.args[2]
+    assert (latest["vehicle_id"], latest["route_id"], latest["direction"], latest["lat"]) == (
+        7,
+        "R1",
+        1,
+        53.2,
+    )
+    assert bulk_upsert.await_args.args[3] == ["vehicle_id", "dataset"]
@@ -0,0 +1,62 @@
+from SimplyTransport.lib.local_cache import LocalLRUCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_evicts_least_recently_used_over_byte_budget():
+    # Arrange
+    cache = LocalLRUCache(max_bytes=30, max_ttl_s=60)
+    cache.set("stop_map:1", b"aaaa", 60)
+    cache.set("stop_map:2", b"bbbb", 60)
+
+    # Act
+    cache.get("stop_map:1")
+    cache.set("stop_map:3", b"cccc", 60)
+
+    # Assert
+    assert cache.get("stop_map:1") == b"aaaa"
+    assert cache.get("stop_map:2") is None
+    assert cache.get("stop_map:3") == b"cccc"
+    assert cache.size_bytes == 28
+
+
+def test_ttl_is_bounded_by_redis_ttl_and_max_ttl():
+    # Arrange
+    clock = _Clock()
+    cache = LocalLRUCache(max_bytes=1000, max_ttl_s=30, clock=clock)
+
+    # Act
+    cache.set("stop_map:1", b"short", 5)
+    cache.set("stop_map:2", b"long", 86400)
+    cache.set("stop_map:3", b"expired", 0)
+    clock.now = 10
+    after_redis_ttl = (cache.get("stop_map:1"), cache.get("stop_map:2"))
+    clock.now = 31
+    after_max_ttl = cache.get("stop_map:2")
+
+    # Assert
+    assert after_redis_ttl == (None, b"long")
+    assert after_max_ttl is None
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_evict_tags_removes_only_tagged_entries():
+    # Arrange
+    cache = LocalLRUCache(max_bytes=1000, max_ttl_s=60)
+    cache.set("stop_map:S1", b"1", 60)
+    cache.set("schedule:S1:monday", b"2", 60)
+    cache.set("stop_map:S2", b"3", 60)
+
+    # Act
+    removed = cache.evict_tags(["stop:S1"])
+
+    # Assert
+    assert removed == 2
+    assert cache.get("stop_map:S2") == b"3"
+    assert cache.evict_tags(["stop:S1"]) == 0
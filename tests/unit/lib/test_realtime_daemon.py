@@ -0,0 +1,186 @@
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from SimplyTransport.lib import realtime_daemon as daemon_mod
+from SimplyTransport.lib.gtfs_realtime_feed import RealtimeFeed
+from SimplyTransport.lib.gtfs_realtime_importers import (
+    FeedFetch,
+    FeedFetchOutcome,
+    FeedState,
+    RealtimeImportSharedContext,
+)
+from SimplyTransport.lib.settings import RealtimeFeedConfig
+
+
+def _context(*trip_ids: str) -> RealtimeImportSharedContext:
+    return RealtimeImportSharedContext(
+        trips_in_db=frozenset(trip_ids),
+        stops_in_db=frozenset(),
+        routes_in_db=frozenset(),
+        trip_routes={},
+    )
+
+
+@asynccontextmanager
+async def _session_factory():
+    yield AsyncMock()
+
+
+def _daemon(redis_exists: int = 0) -> daemon_mod.RealtimeDaemon:
+    redis_service = MagicMock()
+    redis_service.redis.exists = AsyncMock(return_value=redis_exists)
+    return daemon_mod.RealtimeDaemon(
+        trip_importer=MagicMock(dataset="TFI"),
+        vehicles_importer=MagicMock(dataset="TFI"),
+        client=MagicMock(),
+        redis_service=redis_service,
+        interval=0,
+        pause_lock="gtfs_static_import",
+    )
+
+
+@pytest.mark.asyncio
+async def test_static_id_cache_reloads_only_on_new_gtfs_event():
+    # Arrange
+    cache = daemon_mod.StaticIdCache("TFI")
+    event_ids = AsyncMock(side_effect=[1, 1, 2])
+    loader = AsyncMock(side_effect=[_context("T1"), _context("T1", "T2")])
+
+    # Act
+    with (
+        patch.object(daemon_mod, "async_session_factory", _session_factory),
+        patch.object(daemon_mod.EventRepository, "get_most_recent_event_id_by_type", event_ids),
+        patch.object(daemon_mod, "_shared_context_from_session", loader),
+    ):
+        first = await cache.get()
+        second = await cache.get()
+        third = await cache.get()
+
+    # Assert
+    assert first is second
+    assert third.trips_in_db == {"T1", "T2"}
+    assert loader.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_poll_survives_failed_cycles_until_stopped():
+    # Arrange
+    daemon = _daemon()
+    stop = asyncio.Event()
+    calls = 0
+
+    async def cycle() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            stop.set()
+        raise RuntimeError("feed down")
+
+    # Act
+    await daemon.poll("trip updates", cycle, stop)
+
+    # Assert
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_poll_skips_cycles_while_static_import_lock_is_held():
+    # Arrange
+    daemon = _daemon(redis_exists=1)
+    stop = asyncio.Event()
+    cycle = AsyncMock()
+
+    async def stop_after_first_check(key: str) -> int:
+        stop.set()
+        return 1
+
+    daemon.redis_service.redis.exists = AsyncMock(side_effect=stop_after_first_check)
+
+    # Act
+    await daemon.poll("vehicles", cycle, stop)
+
+    # Assert
+    cycle.assert_not_awaited()
+    daemon.redis_service.redis.exists.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_poll_skips_cycles_while_another_process_imports_the_dataset():
+    # Arrange
+    daemon = _daemon()
+    stop = asyncio.Event()
+    cycle = AsyncMock()
+
+    async def lock_taken(*args, **kwargs) -> None:
+        stop.set()
+        return None
+
+    daemon.redis_service.redis.set = AsyncMock(side_effect=lock_taken)
+
+    # Act
+    await daemon.poll("TFI trip updates", cycle, stop, lock_name="realtime_trip_updates:TFI")
+
+    # Assert
+    cycle.assert_not_awaited()
+    daemon.redis_service.redis.set.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_that_failed_to_import_is_not_recorded():
+    # Arrange
+    daemon = _daemon()
+    importer = daemon.vehicles_importer
+    assert importer is not None
+    importer.get_data = AsyncMock(
+        return_value=FeedFetch(FeedFetchOutcome.CHANGED, RealtimeFeed(), FeedState(content_hash="abc"))
+    )
+    importer.clear_table_vehicles = AsyncMock()
+    importer.import_vehicles = AsyncMock(return_value=None)
+    importer.commit_feed_state = AsyncMock()
+    daemon.static_ids.get = AsyncMock(return_value=_context())
+
+    # Act
+    result = await daemon.import_vehicles()
+
+    # Assert
+    assert result == FeedFetchOutcome.FAILED
+    importer.commit_feed_state.assert_not_awaited()
+
+
+def test_for_feed_polls_vehicles_only_when_configured():
+    # Arrange
+    redis_service = MagicMock()
+    feeds = [
+        RealtimeFeedConfig(dataset="TFI", url="https://tfi", api_key="k", vehicles_url="https://tfi/v"),
+        RealtimeFeedConfig(dataset="GAI", url="https://gai", api_key="k", interval_s=30),
+    ]
+
+    # Act
+    tfi, gai = (daemon_mod.RealtimeDaemon.for_feed(feed, MagicMock(), redis_service, 60) for feed in feeds)
+
+    # Assert
+    assert tfi.vehicles_importer is not None and tfi.vehicles_importer.lock_name == "realtime_vehicles:TFI"
+    assert (tfi.interval, tfi.trip_importer.lock_name) == (60, "realtime_trip_updates:TFI")
+    assert gai.vehicles_importer is None
+    assert gai.interval == 30
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hot_refresh_count", [0, 25])
+async def test_refresh_realtime_responses_requests_hot_refresh_when_configured(hot_refresh_count: int):
+    # Arrange
+    redis_service = MagicMock()
+    redis_service.delete_keys_by_tag = AsyncMock()
+    redis_service.request_hot_refresh = AsyncMock()
+
+    # Act
+    await daemon_mod.refresh_realtime_responses(redis_service, hot_refresh_count)
+
+    # Assert
+    redis_service.delete_keys_by_tag.assert_awaited_once_with("realtime:stop", "realtime:trip")
+    if hot_refresh_count:
+        redis_service.request_hot_refresh.assert_awaited_once_with(hot_refresh_count)
+    else:
+        redis_service.request_hot_refresh.assert_not_awaited()
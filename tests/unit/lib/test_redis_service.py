@@ -1,16 +1,25 @@
 import json
+from collections.abc import AsyncIterator
 from datetime import datetime
 from enum import StrEnum
-from unittest.mock import AsyncMock, Mock, call
+from unittest.mock import AsyncMock, Mock, call, patch
 
 import pytest
+from redis.exceptions import ResponseError
 from SimplyTransport.lib.cache import (
+    INVALIDATION_BATCH_SIZE,
     CacheKeys,
     RedisService,
+    TaggedRedisStore,
+    TwoTierRedisStore,
+    hot_paths_key,
+    invalidation_channel,
     redis_factory,
     redis_service_cache_config_factory,
     redis_store_factory,
+    tag_set_key,
 )
+from SimplyTransport.lib.local_cache import LocalLRUCache
 
 
 @pytest.fixture
@@ -25,6 +34,11 @@ def redis_service(mock_redis: AsyncMock) -> RedisService:
     return service
 
 
+async def _aiter(items: list) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     "keys, pattern, expected_calls",
@@ -38,14 +52,60 @@ async def test_delete_keys_by_pattern(
     keys: list, pattern: StrEnum, expected_calls: int, redis_service: RedisService, mock_redis: AsyncMock
 ):
     # Arrange
-    mock_redis.keys.return_value = keys
+    mock_redis.scan_iter = Mock(return_value=_aiter(keys))
 
     # Act
     await redis_service.delete_keys_by_pattern(pattern)
 
     # Assert
-    mock_redis.keys.assert_called_once_with(pattern.value)
-    assert mock_redis.delete.call_count == expected_calls
+    mock_redis.scan_iter.assert_called_once_with(match=pattern.value, count=INVALIDATION_BATCH_SIZE)
+    assert mock_redis.unlink.call_count == expected_calls
+    mock_redis.keys.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_delete_keys_by_tag_drains_renamed_tag_sets(redis_service: RedisService, mock_redis: AsyncMock):
+    # Arrange
+    mock_redis.rename.side_effect = [None, ResponseError("ERR no such key")]
+    mock_redis.sscan_iter = Mock(return_value=_aiter([b"ns:stop_map:1", b"ns:schedule:1:monday"]))
+    mock_redis.unlink.side_effect = [2, 1]
+
+    # Act
+    deleted = await redis_service.delete_keys_by_tag("stop:1", "stop:2")
+
+    # Assert
+    assert deleted == 2
+    renamed_from, draining_key = mock_redis.rename.call_args_list[0].args
+    assert renamed_from == tag_set_key("stop:1")
+    assert draining_key.startswith(f"{tag_set_key('stop:1')}:draining:")
+    mock_redis.sscan_iter.assert_called_once_with(draining_key, count=INVALIDATION_BATCH_SIZE)
+    assert mock_redis.unlink.call_args_list == [
+        call(b"ns:stop_map:1", b"ns:schedule:1:monday"),
+        call(draining_key),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tagged_store_records_key_in_tag_sets():
+    # Arrange
+    pipeline_mock = Mock()
+    pipeline_mock.execute = AsyncMock()
+    redis = Mock()
+    redis.pipeline = Mock(return_value=pipeline_mock)
+    store = TaggedRedisStore(redis, namespace="ns")
+
+    # Act
+    await store.set("stop_map:1", "value", expires_in=60)
+
+    # Assert
+    pipeline_mock.set.assert_called_once_with("ns:stop_map:1", b"value", ex=60)
+    pipeline_mock.sadd.assert_has_calls(
+        [call("ns:cache_tag:stop_map", "ns:stop_map:1"), call("ns:cache_tag:stop:1", "ns:stop_map:1")]
+    )
+    pipeline_mock.expire.assert_has_calls(
+        [call("ns:cache_tag:stop_map", 60, nx=True), call("ns:cache_tag:stop_map", 60, gt=True)]
+    )
+    pipeline_mock.execute.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -82,15 +142,10 @@ async def test_delete_key(redis_service: RedisService, mock_redis: AsyncMock):
 
 @pytest.mark.asyncio
 async def test_delete_all_keys(redis_service: RedisService, mock_redis: AsyncMock):
-    mock_redis.keys.return_value = ["key1", "key2", "key3"]
     await redis_service.delete_all_keys()
-    mock_redis.delete.assert_called_once_with("key1", "key2", "key3")
-
-
-@pytest.mark.asyncio
-async def test_delete_all_no_keys_present(redis_service: RedisService, mock_redis: AsyncMock):
-    await redis_service.delete_all_keys()
-    mock_redis.delete.assert_called_once_with()
+    mock_redis.flushdb.assert_called_once_with(asynchronous=True)
+    mock_redis.publish.assert_awaited_once_with(invalidation_channel(), json.dumps({"all": True}))
+    mock_redis.keys.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -131,6 +186,8 @@ def test_redis_service_cache_config_factory():
 def test_redis_store_factory():
     redis_store = redis_store_factory("test_name")
     assert redis_store.namespace is not None and "test_name" in redis_store.namespace
+    assert not isinstance(redis_store, TaggedRedisStore)
+    assert isinstance(redis_store_factory("response_cache"), TwoTierRedisStore)
 
 
 @pytest.mark.asyncio
@@ -225,3 +282,98 @@ def test_serialize(input_data, expected_output, redis_service):
 def test_deserialize(input_string, expected_output, redis_service):
     result = redis_service.deserialize(input_string)
     assert result == expected_output
+
+
+def _two_tier_store(pipeline_results: list) -> tuple[TwoTierRedisStore, Mock]:
+    pipeline_mock = Mock()
+    pipeline_mock.execute = AsyncMock(return_value=pipeline_results)
+    redis = Mock()
+    redis.pipeline = Mock(return_value=pipeline_mock)
+    store = TwoTierRedisStore(redis, namespace="ns", local=LocalLRUCache(max_bytes=1000, max_ttl_s=300))
+    store._subscribed = True
+    return store, pipeline_mock
+
+
+@pytest.mark.asyncio
+async def test_two_tier_store_serves_repeat_reads_locally():
+    # Arrange
+    store, pipeline_mock = _two_tier_store([b"value", 60_000])
+
+    # Act
+    first = await store.get("stop_map:1")
+    second = await store.get("stop_map:1")
+
+    # Assert
+    assert first == second == b"value"
+    pipeline_mock.get.assert_called_once_with("ns:stop_map:1")
+    pipeline_mock.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_two_tier_store_applies_published_invalidations():
+    # Arrange
+    store, pipeline_mock = _two_tier_store([b"value", 60_000])
+    await store.get("stop_map:1")
+    await store.get("route_map:R1:0")
+
+    # Act
+    store.handle_message(json.dumps({"tags": ["stop:1"]}))
+    after_tag = (store.local.get("stop_map:1"), store.local.get("route_map:R1:0"))
+    store.handle_message(json.dumps({"all": True}))
+
+    # Assert
+    assert after_tag == (None, b"value")
+    assert len(store.local) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_keys_by_tag_announces_tags(redis_service: RedisService, mock_redis: AsyncMock):
+    # Arrange
+    mock_redis.rename.side_effect = ResponseError("ERR no such key")
+
+    # Act
+    await redis_service.delete_keys_by_tag("stop:1")
+
+    # Assert
+    mock_redis.publish.assert_awaited_once_with(invalidation_channel(), json.dumps({"tags": ["stop:1"]}))
+
+
+@pytest.mark.asyncio
+async def test_request_hot_refresh_publishes_most_requested_paths(
+    redis_service: RedisService, mock_redis: AsyncMock
+):
+    # Arrange
+    mock_redis.zrevrange.return_value = [b"/realtime/stop/1/realtime-table"]
+
+    # Act
+    targets = await redis_service.request_hot_refresh(10)
+
+    # Assert
+    assert targets == ["/realtime/stop/1/realtime-table"]
+    mock_redis.zrevrange.assert_awaited_once_with(hot_paths_key(), 0, 9)
+    channel, message = mock_redis.publish.await_args.args
+    assert channel == invalidation_channel()
+    assert json.loads(message)["refresh"] == targets
+
+
+@pytest.mark.asyncio
+async def test_only_the_worker_claiming_a_refresh_rerenders():
+    # Arrange
+    redis = Mock()
+    redis.set = AsyncMock(side_effect=[True, None])
+    store = TaggedRedisStore(redis, namespace="ns")
+    store._app = Mock()
+    rerender = AsyncMock(return_value=200)
+
+    # Act
+    with patch("SimplyTransport.lib.cache.rerender", rerender):
+        claimed = await store.refresh_paths(
+            "r1", ["/realtime/stop/1/realtime-table", "/realtime/stop/2/realtime-table"]
+        )
+        not_claimed = await store.refresh_paths("r1", ["/realtime/stop/1/realtime-table"])
+
+    # Assert
+    assert (claimed, not_claimed) == (2, 0)
+    assert rerender.await_args is not None
+    assert rerender.await_args.args[1]["path"] == "/realtime/stop/2/realtime-table"
+    assert redis.set.await_args.args[0] == "ns:hot_refresh_claim:r1"
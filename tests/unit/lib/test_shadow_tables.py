@@ -0,0 +1,67 @@
+import pytest
+from SimplyTransport.lib.db import shadow_tables as st
+
+
+def test_shadow_name_appends_suffix():
+    assert st.shadow_name("stop_time") == "stop_time__staging"
+    assert st.shadow_name("stop_time", st.RETIRED_SUFFIX) == "stop_time__retired"
+
+
+def test_shadow_name_stays_within_postgres_identifier_limit():
+    long_name = "ix_" + "a" * 70
+
+    shadow = st.shadow_name(long_name)
+
+    assert len(shadow) <= 63
+    assert shadow.endswith(st.SHADOW_SUFFIX)
+    assert shadow != st.shadow_name("ix_" + "a" * 69 + "b")
+
+
+@pytest.mark.parametrize(
+    "definition, expected",
+    [
+        (
+            "CREATE INDEX ix_trip_dataset ON public.trip USING btree (dataset)",
+            'CREATE INDEX "ix_trip_dataset__staging" ON "trip__staging" USING btree (dataset)',
+        ),
+        (
+            "CREATE UNIQUE INDEX uq_x ON trip USING btree (id, dataset)",
+            'CREATE UNIQUE INDEX "uq_x__staging" ON "trip__staging" USING btree (id, dataset)',
+        ),
+    ],
+)
+def test_shadow_index_definition(definition: str, expected: str):
+    index = st._IndexDefinition("ix_trip_dataset" if "ix_" in definition else "uq_x", definition)
+
+    assert st._shadow_index_definition(index, "trip") == expected
+
+
+def test_retarget_references_only_rewrites_staged_tables():
+    definition = "FOREIGN KEY (route_id) REFERENCES route(id) ON DELETE CASCADE"
+
+    assert st._retarget_references(definition, ["route", "trip"]) == (
+        'FOREIGN KEY (route_id) REFERENCES "route__staging"(id) ON DELETE CASCADE'
+    )
+    assert st._retarget_references(definition, ["trip"]) == definition
+    assert (
+        st._retarget_references("FOREIGN KEY (stop_id) REFERENCES public.stop(id)", ["stop"])
+        == 'FOREIGN KEY (stop_id) REFERENCES "stop__staging"(id)'
+    )
+
+
+def test_delete_orphans_statement_only_for_cascading_single_column_keys():
+    cascading = st._ConstraintDefinition(
+        "rt_trip",
+        "fk_rt_trip_trip_id_trip",
+        "f",
+        "FOREIGN KEY (trip_id) REFERENCES trip(id) ON DELETE CASCADE",
+    )
+    restricting = st._ConstraintDefinition(
+        "rt_trip", "fk_rt_trip_trip_id_trip", "f", "FOREIGN KEY (trip_id) REFERENCES trip(id)"
+    )
+
+    assert st._delete_orphans_statement(cascading) == (
+        "DELETE FROM rt_trip AS orphan WHERE NOT EXISTS "
+        "(SELECT 1 FROM trip AS parent WHERE parent.id = orphan.trip_id)"
+    )
+    assert st._delete_orphans_statement(restricting) is None
@@ -0,0 +1,131 @@
+import asyncio
+from typing import cast
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from litestar.types import Scope
+from redis.asyncio import Redis
+from SimplyTransport.lib import single_flight as sf
+from SimplyTransport.lib.cache import TaggedRedisStore
+from SimplyTransport.lib.response_cache_refresh import STALE_GRACE_OPT, request_scope_middleware
+
+
+class _FakeRedis:
+    """Just enough of SET NX / GET / the release script for leases"""
+
+    def __init__(self):
+        self.values: dict[str, object] = {}
+
+    async def set(self, key: str, value: object, nx: bool = False, px: int | None = None) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    async def get(self, key: str) -> object:
+        return self.values.get(key)
+
+    async def execute_command(self, command: str, script: str, numkeys: int, key: str, token: str) -> int:
+        if self.values.get(key) != token:
+            return 0
+        del self.values[key]
+        return 1
+
+
+def _single_flight(redis: _FakeRedis) -> sf.SingleFlight:
+    return sf.SingleFlight(cast(Redis, redis), "ns", lease_ttl_s=10, wait_s=1)
+
+
+@pytest.mark.asyncio
+async def test_only_one_request_holds_the_lease():
+    # Arrange
+    redis = _FakeRedis()
+    single_flight = _single_flight(redis)
+
+    async def request() -> bool:
+        return await single_flight.acquire("stop_map:1")
+
+    # Act
+    first, second = await asyncio.gather(asyncio.create_task(request()), asyncio.create_task(request()))
+    await single_flight.release("stop_map:1")
+
+    # Assert
+    assert sorted([first, second]) == [False, True]
+    assert "ns:single_flight_lease:stop_map:1" in redis.values  # This task never held it
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_a_released_lease():
+    # Arrange
+    redis = _FakeRedis()
+    single_flight = _single_flight(redis)
+    await single_flight.acquire("stop_map:1")
+    holder_token = redis.values["ns:single_flight_lease:stop_map:1"]
+    fetch = AsyncMock(return_value=None)
+
+    async def waiter() -> tuple[object, bool]:
+        value = await single_flight.wait("stop_map:1", fetch)
+        return value, redis.values["ns:single_flight_lease:stop_map:1"] != holder_token
+
+    # Act
+    waiting = asyncio.create_task(waiter())
+    await asyncio.sleep(0)
+    await single_flight.release("stop_map:1")
+    value, took_over = await waiting
+
+    # Assert
+    assert value is None
+    assert took_over
+
+
+@pytest.mark.asyncio
+async def test_store_miss_waits_for_the_lease_holder_value():
+    # Arrange
+    redis = Mock()
+    redis.get = AsyncMock(side_effect=[None, None, b"cached"])
+    single_flight = _single_flight(_FakeRedis())
+    single_flight.acquire = AsyncMock(return_value=False)
+    store = TaggedRedisStore(redis, namespace="ns", single_flight=single_flight)
+
+    # Act
+    value = await store.get("stop_map:1")
+
+    # Assert
+    assert value == b"cached"
+    assert redis.get.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_stale_entry_is_served_while_one_request_rerenders_it():
+    # Arrange
+    redis = Mock()
+    pipeline_mock = Mock()
+    pipeline_mock.execute = AsyncMock(return_value=[b"stale", 30_000])
+    redis.pipeline = Mock(return_value=pipeline_mock)
+    leases = _FakeRedis()
+    single_flight = _single_flight(leases)
+    store = TaggedRedisStore(redis, namespace="ns", single_flight=single_flight)
+    route_handler = Mock(opt={STALE_GRACE_OPT: 60})
+    scope = cast(
+        Scope, {"type": "http", "path": "/api/v1/map/stop/1", "route_handler": route_handler, "app": Mock()}
+    )
+    rerender = AsyncMock()
+    results: list = []
+
+    async def request() -> bytes | None:
+        return await store.get("stop_map:1")
+
+    async def capture(*_) -> None:
+        results.extend(await asyncio.gather(request(), request()))
+
+    # Act
+    with patch("SimplyTransport.lib.cache.rerender", rerender):
+        await request_scope_middleware(capture)(scope, AsyncMock(), AsyncMock())
+        await asyncio.gather(*store._tasks)
+
+    # Assert
+    assert results == [b"stale", b"stale"]
+    rerender.assert_awaited_once()
+    assert rerender.await_args is not None
+    assert rerender.await_args.args[1]["path"] == "/api/v1/map/stop/1"
+    assert leases.values == {}  # Lease released once re-rendered
@@ -0,0 +1,64 @@
+from unittest.mock import AsyncMock
+
+import pytest
+from SimplyTransport.domain.realtime.trip.model import RTTripModel
+from SimplyTransport.lib.sqlalchemy_bulk import bulk_upsert_stream
+
+
+def _rows(count: int, produced: list[int]):
+    for i in range(count):
+        produced.append(i)
+        yield {"trip_id": f"T{i}", "route_id": "R1", "dataset": "TFI"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_stream_holds_at_most_two_batches():
+    # Arrange
+    produced: list[int] = []
+    produced_at_execute: list[int] = []
+    session = AsyncMock()
+    session.execute = AsyncMock(side_effect=lambda stmt: produced_at_execute.append(len(produced)))
+    batches: list[int] = []
+
+    # Act
+    written = await bulk_upsert_stream(
+        session,
+        RTTripModel,
+        _rows(10, produced),
+        ["trip_id", "route_id", "dataset"],
+        {"dataset": "dataset"},
+        batch_size=3,
+        on_batch=lambda batch: batches.append(len(batch)),
+    )
+
+    # Assert
+    assert written == 10
+    assert batches == [3, 3, 3, 1]
+    assert produced_at_execute == [3, 6, 9, 10]
+    session.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_stream_stops_at_failed_batch():
+    # Arrange
+    produced: list[int] = []
+    session = AsyncMock()
+    session.execute = AsyncMock(side_effect=[None, RuntimeError("deadlock")])
+    batches: list[int] = []
+
+    # Act
+    with pytest.raises(RuntimeError):
+        await bulk_upsert_stream(
+            session,
+            RTTripModel,
+            _rows(10, produced),
+            ["trip_id", "route_id", "dataset"],
+            {"dataset": "dataset"},
+            batch_size=3,
+            on_batch=lambda batch: batches.append(len(batch)),
+        )
+
+    # Assert
+    assert batches == [3]
+    assert len(produced) <= 9
+    session.commit.assert_not_awaited()
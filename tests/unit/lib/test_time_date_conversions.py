@@ -1,10 +1,11 @@
-from datetime import datetime, time
+from datetime import date, datetime, time
 
 import pytest
 from litestar.exceptions import ValidationException
 from SimplyTransport.lib.time_date_conversions import (
     convert_29_hours_to_24_hours,
     convert_joined_date_to_date,
+    next_date_on_weekday,
     return_time_difference,
     validate_time_range,
 )
@@ -90,3 +91,11 @@ def test_validate_time_range_no_exception(start_time, end_time):
 def test_validate_time_range_exception(start_time, end_time):
     with pytest.raises(ValidationException):
         validate_time_range(start_time, end_time)
+
+
+@pytest.mark.parametrize(
+    "weekday, expected",
+    [(0, date(2026, 10, 5)), (2, date(2026, 10, 7)), (6, date(2026, 10, 11))],
+)
+def test_next_date_on_weekday(weekday: int, expected: date):
+    assert next_date_on_weekday(weekday, today=date(2026, 10, 5)) == expected
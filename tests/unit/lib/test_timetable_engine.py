@@ -0,0 +1,163 @@
+from array import array
+from datetime import date, time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from SimplyTransport.domain.enums import ExceptionType
+from SimplyTransport.lib import timetable_snapshot as ts
+from SimplyTransport.lib.timetable_engine import TimetableEngine, window_ranges
+from timetable_rows import columns_from_rows
+
+# Monday 5 October 2026
+MONDAY = date(2026, 10, 5)
+
+
+def _calendar(service_id: str, weekdays: str, start: date = date(2026, 1, 1)) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=service_id,
+        start_date=start,
+        end_date=date(2026, 12, 31),
+        **{column: int(flag) for column, flag in zip(ts.WEEKDAY_COLUMNS, weekdays, strict=True)},
+    )
+
+
+def _trip(trip_id: str, service_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=trip_id,
+        route_id="R1",
+        service_id=service_id,
+        headsign="City Centre",
+        short_name=None,
+        direction=1,
+        block_id=None,
+        shape_id="SH1",
+    )
+
+
+def _stop_time(trip_id: str, stop_id: str, arrival: time, sequence: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        trip_id=trip_id,
+        stop_id=stop_id,
+        arrival_time=arrival,
+        departure_time=arrival,
+        stop_sequence=sequence,
+        stop_headsign=None,
+        pickup_type=None,
+        dropoff_type=None,
+        timepoint=None,
+    )
+
+
+@pytest.fixture
+def engine(tmp_path: Path) -> TimetableEngine:
+    stops = [
+        SimpleNamespace(
+            id=stop_id,
+            code="100",
+            name=f"Stop {stop_id}",
+            description=None,
+            zone_id=None,
+            url=None,
+            parent_station=None,
+            lat=53.3,
+            lon=None,
+            location_type=0,
+        )
+        for stop_id in ("S1", "S2")
+    ]
+    route = SimpleNamespace(
+        id="R1",
+        agency_id="A1",
+        short_name="46A",
+        long_name="Dun Laoghaire - Phoenix Park",
+        description=None,
+        url=None,
+        color=None,
+        text_color=None,
+        route_type=3,
+    )
+    calendars = [
+        _calendar("WEEKDAY", "1111100"),
+        _calendar("WEEKEND", "0000011"),
+        _calendar("LATER", "1111111", start=date(2026, 11, 1)),
+    ]
+    calendar_dates = [
+        SimpleNamespace(service_id="WEEKEND", date=MONDAY, exception_type=ExceptionType.added),
+        SimpleNamespace(service_id="WEEKDAY", date=date(2026, 10, 26), exception_type=ExceptionType.removed),
+    ]
+    trips = [_trip("T1", "WEEKDAY"), _trip("T2", "WEEKDAY"), _trip("T3", "WEEKEND"), _trip("T4", "LATER")]
+    stop_times = [
+        _stop_time("T1", "S1", time(23, 50), 1),
+        _stop_time("T1", "S2", time(23, 58), 2),
+        _stop_time("T2", "S1", time(0, 10), 1),
+        _stop_time("T2", "S2", time(0, 20), 2),
+        _stop_time("T3", "S1", time(12, 0), 1),
+        _stop_time("T4", "S1", time(12, 5), 1),
+    ]
+    columns = columns_from_rows(stops, [route], calendars, calendar_dates, trips, stop_times)
+    ts.write_snapshot(tmp_path, "TFI", "1", columns)
+    return TimetableEngine(ts.TimetableSnapshotStore(tmp_path))
+
+
+def test_window_ranges_split_windows_that_wrap_midnight():
+    arrivals = memoryview(array("i", [600, 43200, 85800]))
+
+    assert window_ranges(arrivals, range(3), time(0, 0), time(12, 0)) == [range(0, 2)]
+    assert window_ranges(arrivals, range(3), time(23, 0), time(1, 0)) == [range(0, 1), range(2, 3)]
+    assert window_ranges(arrivals, range(1, 3), None, None) == [range(1, 3)]
+
+
+def test_departures_apply_weekday_bits_and_added_exceptions(engine: TimetableEngine):
+    schedules = engine.departures("S1", MONDAY)
+
+    assert schedules is not None
+    # T3 only runs at weekends but is added on this Monday, T4's calendar has not started yet
+    assert [schedule.trip.id for schedule in schedules] == ["T2", "T3", "T1"]
+    first = schedules[0]
+    assert first.stop_time.arrival_time == time(0, 10)
+    assert (first.route.short_name, first.stop.name, first.stop.lon) == ("46A", "Stop S1", None)
+    assert first.calendar.monday == 1 and first.calendar.sunday == 0
+    assert first.trip.route_id == "R1" and first.trip.service_id == "WEEKDAY"
+
+
+def test_departures_apply_removed_exceptions(engine: TimetableEngine):
+    schedules = engine.departures("S1", date(2026, 10, 26))
+
+    assert schedules == []
+
+
+def test_departures_handle_wrap_around_window(engine: TimetableEngine):
+    schedules = engine.departures("S2", MONDAY, time(23, 55), time(0, 30))
+
+    assert schedules is not None
+    assert [schedule.stop_time.arrival_time for schedule in schedules] == [time(0, 20), time(23, 58)]
+
+
+def test_departures_unknown_stop_returns_none(engine: TimetableEngine):
+    assert engine.departures("S404", MONDAY) is None
+
+
+def test_trip_schedules_report_missing_trips(engine: TimetableEngine):
+    schedules, missing = engine.trip_schedules(["T1", "T3", "ADDED"], MONDAY, time(23, 55), time(12, 0))
+
+    assert [(schedule.trip.id, schedule.stop.id) for schedule in schedules] == [
+        ("T3", "S1"),
+        ("T1", "S2"),
+    ]
+    assert missing == ["ADDED"]
+
+
+def test_is_service_active_uses_activation_bitmap(engine: TimetableEngine):
+    assert engine.is_service_active("WEEKDAY", MONDAY) is True
+    assert engine.is_service_active("WEEKDAY", date(2026, 10, 26)) is False
+    assert engine.is_service_active("WEEKEND", MONDAY) is True
+    assert engine.is_service_active("WEEKEND", date(2026, 10, 12)) is False
+    assert engine.is_service_active("UNKNOWN", MONDAY) is None
+
+
+def test_engine_without_snapshots_is_unavailable(tmp_path: Path):
+    engine = TimetableEngine(ts.TimetableSnapshotStore(tmp_path / "missing"))
+
+    assert not engine.available
+    assert engine.trip_schedules(["T1"], MONDAY) == ([], ["T1"])
@@ -0,0 +1,198 @@
+import json
+import math
+import sys
+from datetime import date, time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from SimplyTransport.domain.enums import ExceptionType
+from SimplyTransport.lib import timetable_snapshot as ts
+from timetable_rows import columns_from_rows
+
+
+def _stop(stop_id: str, name: str, lat: float | None = 53.3) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=stop_id,
+        code=None,
+        name=name,
+        description=None,
+        zone_id=None,
+        url=None,
+        parent_station=None,
+        lat=lat,
+        lon=-6.2,
+        location_type=None,
+    )
+
+
+def _stop_time(trip_id: str, stop_id: str, arrival: time, sequence: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        trip_id=trip_id,
+        stop_id=stop_id,
+        arrival_time=arrival,
+        departure_time=arrival,
+        stop_sequence=sequence,
+        stop_headsign=None,
+        pickup_type=0,
+        dropoff_type=None,
+        timepoint=1,
+    )
+
+
+def sample_columns():
+    weekdays = dict.fromkeys(ts.WEEKDAY_COLUMNS, 1) | {"saturday": 0, "sunday": 0}
+    return columns_from_rows(
+        stops=[_stop("S1", "Main Street"), _stop("S2", "Quay", lat=None)],
+        routes=[
+            SimpleNamespace(
+                id="R1",
+                agency_id="A1",
+                short_name="39A",
+                long_name="Ongar - UCD",
+                description=None,
+                url=None,
+                color=None,
+                text_color=None,
+                route_type=3,
+            )
+        ],
+        calendars=[
+            SimpleNamespace(id="C1", start_date=date(2026, 1, 1), end_date=date(2026, 12, 31), **weekdays)
+        ],
+        calendar_dates=[
+            SimpleNamespace(service_id="C1", date=date(2026, 12, 25), exception_type=ExceptionType.removed),
+            SimpleNamespace(
+                service_id="missing", date=date(2026, 12, 26), exception_type=ExceptionType.added
+            ),
+        ],
+        trips=[
+            SimpleNamespace(
+                id=trip_id,
+                route_id="R1",
+                service_id="C1",
+                headsign="UCD",
+                short_name=None,
+                direction=0,
+                block_id=None,
+                shape_id="SH1",
+            )
+            for trip_id in ("T1", "T2")
+        ],
+        stop_times=[
+            _stop_time("T2", "S1", time(9, 0), 1),
+            _stop_time("T1", "S2", time(8, 10), 2),
+            _stop_time("T1", "S1", time(8, 0), 1),
+            _stop_time("T2", "S2", time(9, 10), 2),
+            _stop_time("T3", "S1", time(7, 0), 1),
+        ],
+    )
+
+
+def test_seconds_since_midnight_round_trips():
+    assert ts.seconds_since_midnight(time(23, 59, 30)) == 86370
+    assert ts.time_from_seconds(86370) == time(23, 59, 30)
+    assert ts.time_from_seconds(86400 + 60) == time(0, 1)
+
+
+def test_string_pool_interns_values():
+    pool = ts.StringPool()
+
+    assert pool.add("S1") == 0
+    assert pool.add("Main Street") == 1
+    assert pool.add("S1") == 0
+    assert pool.add(None) == ts.NULL
+    assert list(pool.offsets) == [0, 2, 13]
+
+
+def test_columns_sort_stop_times_by_stop_and_arrival():
+    columns = sample_columns()
+
+    # Stop times of unknown trips are dropped, the rest grouped per stop in arrival order
+    assert list(columns["stop_offsets"]) == [0, 2, 4]
+    assert list(columns["stop_time_arrival"]) == [28800, 32400, 29400, 33000]
+    assert list(columns["stop_time_trip"]) == [0, 1, 0, 1]
+    assert list(columns["stop_time_dropoff_type"]) == [ts.NULL] * 4
+    assert list(columns["calendar_weekdays"]) == [0b0011111]
+
+
+def test_write_and_map_snapshot(tmp_path: Path):
+    path = ts.write_snapshot(tmp_path, "TFI", "7", sample_columns())
+
+    snapshot = ts.load_snapshot(tmp_path, "TFI")
+
+    assert snapshot is not None
+    assert path == tmp_path / "TFI" / "7"
+    assert (snapshot.dataset, snapshot.version, len(snapshot)) == ("TFI", "7", 4)
+    rows = snapshot.stop_time_range("S2")
+    assert [snapshot["stop_time_arrival"][i] for i in rows] == [29400, 33000]
+    assert snapshot.string(snapshot["stop_name"][1]) == "Quay"
+    assert math.isnan(snapshot["stop_lat"][1])
+    assert snapshot.string(snapshot["route_short_name"][0]) == "39A"
+    assert snapshot.trip_indexes == {"T1": 0, "T2": 1}
+    assert snapshot.stop_time_range("unknown") == range(0)
+    assert snapshot.service_indexes == {"C1": 0}
+
+
+def test_service_activation_folds_weekdays_range_and_exceptions():
+    builder = ts.SnapshotBuilder()
+    builder.add_calendar(
+        SimpleNamespace(
+            id="C1",
+            start_date=date(2026, 10, 5),
+            end_date=date(2026, 10, 11),
+            **dict.fromkeys(ts.WEEKDAY_COLUMNS, 0) | {"monday": 1, "tuesday": 1},
+        )
+    )
+    builder.add_calendar_date(
+        SimpleNamespace(service_id="C1", date=date(2026, 10, 6), exception_type=ExceptionType.removed)
+    )
+    builder.add_calendar_date(
+        SimpleNamespace(service_id="C1", date=date(2026, 10, 20), exception_type=ExceptionType.added)
+    )
+
+    activation_range, bitmap = builder.service_activation()
+
+    first_day, days = activation_range
+    assert (first_day, days) == (date(2026, 10, 5).toordinal(), 16)
+    running = [day for day in range(days) if bitmap[day >> 3] >> (day & 7) & 1]
+    # Monday 5th runs, Tuesday 6th is removed, Tuesday 20th is added beyond the calendar range
+    assert running == [0, 15]
+
+
+def test_write_snapshot_publishes_current_and_prunes_old_versions(tmp_path: Path):
+    for version in ("1", "2", "3", "10"):
+        ts.write_snapshot(tmp_path, "TFI", version, sample_columns())
+
+    assert ts.current_version(tmp_path, "TFI") == "10"
+    assert sorted(path.name for path in (tmp_path / "TFI").iterdir() if path.is_dir()) == ["10", "2", "3"]
+    assert ts.current_version(tmp_path, "missing") is None
+    assert ts.load_snapshot(tmp_path, "missing") is None
+
+
+def test_store_hot_swaps_to_new_version(tmp_path: Path):
+    store = ts.TimetableSnapshotStore(tmp_path, refresh_interval=3600)
+    ts.write_snapshot(tmp_path, "TFI", "1", sample_columns())
+
+    assert store.refresh() == ["TFI"]
+    held = store.get("TFI")
+
+    ts.write_snapshot(tmp_path, "TFI", "2", sample_columns())
+    assert store.get("TFI") is held
+    assert store.refresh() == ["TFI"]
+    assert store.refresh() == []
+
+    current = store.get("TFI")
+    assert current is not None and current.version == "2"
+    assert held is not None and held.version == "1"
+    assert held.string(held["trip_id"][1]) == "T2"
+
+
+def test_snapshot_rejects_foreign_byteorder(tmp_path: Path):
+    path = ts.write_snapshot(tmp_path, "TFI", "1", sample_columns())
+    manifest = json.loads((path / ts.MANIFEST_FILE).read_text())
+    manifest["byteorder"] = "big" if sys.byteorder == "little" else "little"
+    (path / ts.MANIFEST_FILE).write_text(json.dumps(manifest))
+
+    with pytest.raises(ValueError):
+        ts.TimetableSnapshot(path)
@@ -0,0 +1,31 @@
+"""Snapshot columns built from in-memory rows for the timetable snapshot and engine tests"""
+
+from array import array
+from collections.abc import Iterable
+from typing import Any
+
+from SimplyTransport.lib.timetable_snapshot import SnapshotBuilder
+
+
+def columns_from_rows(
+    stops: Iterable[Any],
+    routes: Iterable[Any],
+    calendars: Iterable[Any],
+    calendar_dates: Iterable[Any],
+    trips: Iterable[Any],
+    stop_times: Iterable[Any],
+) -> dict[str, array]:
+    """Builds snapshot columns from in-memory rows, in the order :func:`build_snapshot_from_db` reads them"""
+
+    builder = SnapshotBuilder()
+    for add, rows in (
+        (builder.add_stop, stops),
+        (builder.add_route, routes),
+        (builder.add_calendar, calendars),
+        (builder.add_calendar_date, calendar_dates),
+        (builder.add_trip, trips),
+        (builder.add_stop_time, stop_times),
+    ):
+        for row in rows:
+            add(row)
+    return builder.columns()